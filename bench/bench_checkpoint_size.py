@@ -0,0 +1,79 @@
+"""
+Benchmark local del tamaño de checkpoint y de escritura por step en el
+pipeline durable.
+
+Recorre varias duraciones de vídeo (y por tanto chunk_count) y, para cada
+modo de checkpoint de estado (full / delta), muestra:
+
+- chunk_step_kb: payload + resultado del encode_chunk más grande. Se mantiene
+  plano porque las tareas llevan una referencia al estado, no el estado.
+- ckpt_B / write_B por step (métrica state_write): en modo full el
+  checkpoint es una referencia y la escritura crece con el tamaño del job;
+  en modo delta la escritura sigue al tamaño del cambio de cada step y el
+  checkpoint también, hasta STATE_DELTA_MAX_BYTES, donde se compacta en una
+  referencia.
+
+Uso:
+    python bench/bench_checkpoint_size.py --durations 30 95 300 1000 --modes full delta
+"""
+
+import argparse
+
+from local_aws import (
+    DURABLE_VIDEO_PATH,
+    LocalDurableContext,
+    capturing_logger,
+    install_local_aws,
+    load_lambda_module,
+    video_event,
+)
+
+
+STATE_STEPS = ["validate_video", "split_video", "merge_video"]
+
+
+def run_once(module, duration_seconds: int, mode: str) -> dict:
+    stand_ins = install_local_aws(module)
+    logger, capture = capturing_logger("bench_checkpoint_size")
+    context = LocalDurableContext(logger=logger)
+
+    # Fan-out amplio solo para acortar el benchmark; no afecta al tamaño
+    event = video_event(duration_seconds, max_parallel_chunks=50, state_checkpoint_mode=mode)
+    module.run_video_job(event, context)
+
+    metric = capture.of_type("checkpoint_size")[-1]
+    writes = {m["step"]: m for m in capture.of_type("state_write")}
+
+    return {
+        "duration": duration_seconds,
+        "mode": mode,
+        "chunks": metric["chunk_count"],
+        "chunk_step_kb": metric["chunk_step_kb"],
+        "steps": {step: (writes[step]["checkpoint_bytes"], writes[step]["write_bytes"]) for step in STATE_STEPS},
+        "dynamodb_write_kb": stand_ins["jobs_table"].bytes_written / 1024.0,
+        "s3_state_kb": stand_ins["s3"].bytes_written / 1024.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--durations", type=int, nargs="+", default=[30, 95, 300, 1000])
+    parser.add_argument("--modes", nargs="+", default=["full", "delta"], choices=["full", "delta"])
+    args = parser.parse_args()
+
+    module = load_lambda_module(DURABLE_VIDEO_PATH, "fase2_durable")
+
+    step_headers = " ".join(f"{step + ' ckpt/write_B':>30}" for step in STATE_STEPS)
+    print(f"{'mode':>5} {'duration':>8} {'chunks':>6} {'chunk_step_kb':>13} {step_headers} {'ddb_write_kb':>12} {'s3_kb':>8}")
+    for mode in args.modes:
+        for duration in args.durations:
+            row = run_once(module, duration, mode)
+            step_cells = " ".join(f"{f'{ckpt}/{write}':>30}" for ckpt, write in row["steps"].values())
+            print(
+                f"{row['mode']:>5} {row['duration']:>8} {row['chunks']:>6} {row['chunk_step_kb']:>13.3f} "
+                f"{step_cells} {row['dynamodb_write_kb']:>12.1f} {row['s3_state_kb']:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark local del planificador de chunks del pipeline durable.
+
+Para cada duración de vídeo compara el troceado fijo (chunk_duration_seconds)
+con el adaptativo (plan_chunks) con el mismo max_parallel_chunks: número de
+chunks, makespan predicho y wall time medido con el DurableContext local.
+
+Uso:
+    python bench/bench_chunk_planner.py --durations 30 60 95 --concurrency 10
+"""
+
+import argparse
+import time
+
+from local_aws import (
+    DURABLE_VIDEO_PATH,
+    LocalDurableContext,
+    capturing_logger,
+    install_local_aws,
+    load_lambda_module,
+    video_event,
+)
+
+
+def run_once(module, duration_seconds: int, concurrency: int, planner: str) -> dict:
+    install_local_aws(module)
+    logger, capture = capturing_logger("bench_chunk_planner")
+    context = LocalDurableContext(logger=logger)
+
+    event = video_event(duration_seconds, max_parallel_chunks=concurrency)
+    event["encoding"]["chunk_planner"] = planner
+
+    start = time.perf_counter()
+    module.run_video_job(event, context)
+    wall_ms = (time.perf_counter() - start) * 1000
+
+    plan = capture.of_type("chunk_plan")[-1]
+    encode_ms = [m["duration_ms"] for m in capture.of_type("chunk_duration")]
+    return {
+        "chunks": plan["chunk_count"],
+        "sizes": f"{plan['min_chunk_seconds']}-{plan['max_chunk_seconds']}s",
+        "predicted_ms": plan["predicted_makespan_ms"],
+        "encode_work_ms": sum(encode_ms),
+        "wall_ms": wall_ms,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--durations", type=int, nargs="+", default=[30, 60, 95])
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+
+    module = load_lambda_module(DURABLE_VIDEO_PATH, "fase2_durable")
+
+    print(f"{'duration':>8} {'planner':>8} {'chunks':>6} {'sizes':>8} {'predicted_ms':>12} {'encode_work_ms':>14} {'wall_ms':>9}")
+    for duration in args.durations:
+        for planner in ("fixed", "adaptive"):
+            row = run_once(module, duration, args.concurrency, planner)
+            print(
+                f"{duration:>8} {planner:>8} {row['chunks']:>6} {row['sizes']:>8} {row['predicted_ms']:>12.0f} "
+                f"{row['encode_work_ms']:>14.0f} {row['wall_ms']:>9.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
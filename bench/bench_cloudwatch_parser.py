@@ -0,0 +1,158 @@
+"""
+Benchmark de throughput del parser de exports de CloudWatch.
+
+Genera exports CSV sintéticos de --size-mb repitiendo los registros de los
+CSV de `phase1/cloudwatch/` y mide, para tools/cloudwatch_parser.py y para
+una lectura ingenua (csv.reader + json.loads de cada mensaje):
+
+- líneas físicas/s y MB/s
+- RSS máximo sobre el del intérprete con los imports hechos (rss_mb). Cada
+  parser corre en un subproceso nuevo, así que ninguno hereda el heap del
+  otro. Con varios tamaños se ve que el recorrido del fichero no crece con
+  el export: lo que crece es la salida (out_mb, arrays de las tablas), que
+  la lectura ingenua no construye.
+
+Cada parser se mide --repeat veces, alternando los dos, y se muestra la
+mejor: el ruido de la máquina solo puede sumar tiempo.
+
+Uso:
+    python bench/bench_cloudwatch_parser.py --size-mb 50 200 --repeat 3
+"""
+
+import argparse
+import csv
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from local_aws import REPO_ROOT
+
+sys.path.insert(0, str(REPO_ROOT / "tools"))
+
+import cloudwatch_parser  # noqa: E402
+
+
+def build_export(target: Path, size_mb: int) -> int:
+    """Escribe el export sintético y devuelve el número de líneas físicas."""
+    body = []
+    for path in sorted((REPO_ROOT / "phase1" / "cloudwatch").rglob("*.csv")):
+        lines = path.read_bytes().splitlines(keepends=True)
+        if not lines[-1].endswith(b"\n"):
+            # El último registro del fichero no lleva salto de línea
+            lines[-1] += b"\n"
+        body.extend(lines[1:])
+    chunk = b"".join(body)
+    lines_per_chunk = len(body)
+
+    written = 0
+    lines = 0
+    with open(target, "wb") as f:
+        f.write(b"timestamp,message\n")
+        while written < size_mb * 1024 * 1024:
+            f.write(chunk)
+            written += len(chunk)
+            lines += lines_per_chunk
+    return lines + 1
+
+
+def naive_parse(path: Path) -> int:
+    metrics = 0
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader)
+        for row in reader:
+            if len(row) < 2:
+                continue
+            message = row[1]
+            try:
+                record = json.loads(message)
+            except json.JSONDecodeError:
+                continue
+            text = record.get("message", "") if isinstance(record, dict) else ""
+            if isinstance(text, str) and text.startswith("METRIC "):
+                json.loads(text[len("METRIC "):])
+                metrics += 1
+            elif isinstance(record, dict) and record.get("type") == "platform.report":
+                metrics += 1
+    return metrics
+
+
+def max_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def output_mb(tables: dict) -> float:
+    """Bytes de los arrays de salida, incluidos los objetos de las columnas object."""
+    total = 0
+    for columns in tables.values():
+        for column in columns.values():
+            total += column.nbytes
+            if column.dtype == object:
+                total += sum(sys.getsizeof(value) for value in column)
+    return total / (1024 * 1024)
+
+
+def run_parser(name: str, export: Path) -> dict:
+    """Una medición, en el proceso actual (ver measure)."""
+    rss_before = max_rss_mb()
+    start = time.perf_counter()
+    if name == "cloudwatch_parser":
+        tables = cloudwatch_parser.parse_exports([export])[0]
+        elapsed = time.perf_counter() - start
+        rows = sum(len(next(iter(t.values()))) for t in tables.values())
+        out = output_mb(tables)
+    else:
+        rows, out = naive_parse(export), 0.0
+        elapsed = time.perf_counter() - start
+    return {"seconds": elapsed, "rows": rows, "rss_mb": max_rss_mb() - rss_before, "out_mb": out}
+
+
+def measure(name: str, export: Path) -> dict:
+    """run_parser en un subproceso nuevo."""
+    output = subprocess.run(
+        [sys.executable, __file__, "--run", name, str(export)],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, nargs="+", default=[50, 200])
+    parser.add_argument("--repeat", type=int, default=3, help="Mediciones por parser (se muestra la mejor)")
+    parser.add_argument("--run", nargs=2, metavar=("PARSER", "EXPORT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        print(json.dumps(run_parser(args.run[0], Path(args.run[1]))))
+        return
+
+    print(
+        f"{'size_mb':>7} {'parser':>18} {'seconds':>8} {'lines/s':>12} {'MB/s':>7} {'rows':>9} "
+        f"{'rss_mb':>7} {'out_mb':>7}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.size_mb:
+            export = Path(tmp) / f"export_{size}.csv"
+            lines = build_export(export, size)
+            size_mb = export.stat().st_size / (1024 * 1024)
+            names = ("cloudwatch_parser", "csv+json (naive)")
+            runs = {name: [] for name in names}
+            for _ in range(args.repeat):
+                for name in names:
+                    runs[name].append(measure(name, export))
+            for name in names:
+                row = min(runs[name], key=lambda run: run["seconds"])
+                print(
+                    f"{size_mb:>7.0f} {name:>18} {row['seconds']:>8.2f} {lines / row['seconds']:>12,.0f} "
+                    f"{size_mb / row['seconds']:>7.1f} {row['rows']:>9,} {row['rss_mb']:>7.1f} {row['out_mb']:>7.1f}"
+                )
+            export.unlink()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark local del import en frío de los módulos Lambda.
+
+Cada medición importa el módulo en un intérprete nuevo (como la fase INIT de
+un contenedor Lambda) y mide:
+
+- import_ms: tiempo de exec del módulo (imports + construcción de clientes a
+  nivel de módulo si los hay).
+- first_client_ms: coste diferido a la primera invocación que construye el
+  cliente principal (0 si el módulo ya lo construía al importarse).
+
+Compara el árbol de trabajo con una revisión base (por defecto, el commit
+anterior a la introducción de los clientes perezosos). Con NumPy instalado la
+revisión base también lo importaba al cargar los módulos de vídeo.
+
+Uso:
+    python bench/bench_cold_import.py --repeats 5
+    python bench/bench_cold_import.py --baseline-rev <rev>
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from local_aws import COUNTER_PATH, DURABLE_VIDEO_PATH, REPO_ROOT, TRADITIONAL_VIDEO_PATH
+
+
+MODULES = {
+    "phase1_counter": (COUNTER_PATH, "failure_table"),
+    "phase2_durable": (DURABLE_VIDEO_PATH, "dynamodb"),
+    "phase2_traditional": (TRADITIONAL_VIDEO_PATH, "dynamodb"),
+}
+
+PROBE = """
+import importlib.util, sys, time
+path, client = sys.argv[1], sys.argv[2]
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location("cold_import_probe", path)
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+import_ms = (time.perf_counter() - start) * 1000
+first_client_ms = 0.0
+if hasattr(module, "aws_client"):
+    start = time.perf_counter()
+    module.aws_client(client)
+    first_client_ms = (time.perf_counter() - start) * 1000
+print(f"{import_ms:.3f} {first_client_ms:.3f}")
+"""
+
+
+def default_baseline_rev() -> str:
+    introduced = subprocess.run(
+        ["git", "log", "--reverse", "--format=%H", "-S", "def set_aws_client", "--", str(DURABLE_VIDEO_PATH)],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+    ).stdout.split()
+    return f"{introduced[0]}~1" if introduced else "HEAD"
+
+
+def materialize(rev: str, path: Path, workdir: Path) -> Path:
+    relative = path.relative_to(REPO_ROOT).as_posix()
+    source = subprocess.run(
+        ["git", "show", f"{rev}:{relative}"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    target = workdir / rev.replace("/", "_").replace("~", "_") / path.name
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text(source)
+    return target
+
+
+def measure(path: Path, client: str, repeats: int) -> tuple:
+    env = {**os.environ, "AWS_DEFAULT_REGION": os.environ.get("AWS_DEFAULT_REGION", "us-east-2")}
+    samples = []
+    for _ in range(repeats):
+        out = subprocess.run(
+            [sys.executable, "-c", PROBE, str(path), client], env=env, capture_output=True, text=True, check=True
+        ).stdout.split()
+        samples.append((float(out[0]), float(out[1])))
+    return (
+        statistics.median(s[0] for s in samples),
+        statistics.median(s[1] for s in samples),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--baseline-rev", default=None)
+    args = parser.parse_args()
+
+    baseline_rev = args.baseline_rev or default_baseline_rev()
+    print(f"# baseline: {baseline_rev}, median of {args.repeats} fresh interpreters")
+    print(f"{'module':>20} {'version':>9} {'import_ms':>10} {'first_client_ms':>15} {'total_ms':>9}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, (path, client) in MODULES.items():
+            versions = [("baseline", materialize(baseline_rev, path, Path(tmp))), ("current", path)]
+            for label, module_path in versions:
+                import_ms, first_client_ms = measure(module_path, client, args.repeats)
+                print(
+                    f"{name:>20} {label:>9} {import_ms:>10.1f} {first_client_ms:>15.1f} "
+                    f"{import_ms + first_client_ms:>9.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
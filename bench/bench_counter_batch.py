@@ -0,0 +1,131 @@
+"""
+Benchmark local del modo batch del contador de fase 1 (event["operations"]).
+
+Aplica --ops operaciones (incrementos y decrementos aleatorios con --seed)
+como ejecuciones durables sucesivas de --batch-sizes operaciones cada una,
+encadenando el estado de una en el evento de la siguiente, con el
+DurableContext local. Por tamaño de lote muestra:
+
+- local_ms: tiempo en proceso de una ejecución (orquestador + 3 steps).
+- billed_ms: modelo de duración facturada de una ejecución caliente,
+  --invocation-ms (overhead fijo observado en phase1/results: 263-544 ms
+  warm) + local_ms.
+- ops/s: operaciones por segundo de un contador (el runtime procesa sus
+  ejecuciones una a una), batch / billed_ms.
+- ckpt_b: bytes checkpointeados por ejecución.
+- cost/op: (compute + request + operaciones durables + datos escritos) de
+  una ejecución, con las tarifas de tools/cost_model.py, dividido por el
+  tamaño del lote.
+
+Comprueba además que el valor y la versión finales coinciden con aplicar
+las operaciones una a una.
+
+Uso:
+    python bench/bench_counter_batch.py --ops 2000 --batch-sizes 1 10 50 100 500 1000
+"""
+
+import argparse
+import random
+import sys
+import time
+
+from local_aws import (
+    COUNTER_PATH,
+    REPO_ROOT,
+    LocalDurableContext,
+    capturing_logger,
+    install_local_aws,
+    load_lambda_module,
+)
+
+sys.path.insert(0, str(REPO_ROOT / "tools"))
+
+from cost_model import PRICING  # noqa: E402
+
+
+def random_operations(count: int, seed: int) -> list:
+    rng = random.Random(seed)
+    return [
+        {"operation": rng.choice(("increment", "increment", "decrement")), "amount": rng.randint(1, 5)}
+        for _ in range(count)
+    ]
+
+
+def expected_state(operations: list) -> dict:
+    value = sum(op["amount"] if op["operation"] == "increment" else -op["amount"] for op in operations)
+    return {"value": value, "version": len(operations)}
+
+
+def run_batches(module, operations: list, batch_size: int) -> dict:
+    logger, _ = capturing_logger("bench_counter_batch")
+    state = {"value": 0, "version": 0}
+    local_ms, checkpoint_bytes, steps = [], [], []
+
+    for offset in range(0, len(operations), batch_size):
+        batch = operations[offset:offset + batch_size]
+        if batch_size == 1:
+            # Evento original de una operación
+            event = {"test_case": "counter_batch", "state": state, **batch[0]}
+        else:
+            event = {"test_case": "counter_batch", "state": state, "operations": batch}
+
+        context = LocalDurableContext(logger=logger)
+        start = time.perf_counter()
+        body = module.run_counter(event, context)["body"]
+        local_ms.append((time.perf_counter() - start) * 1000)
+        checkpoint_bytes.append(sum(c["size_bytes"] for c in context.checkpoints))
+        steps.append(len(context.checkpoints))
+        state = {"value": body["counter_value"], "version": body["version"]}
+
+    return {
+        "executions": len(local_ms),
+        "local_ms": sum(local_ms) / len(local_ms),
+        "checkpoint_bytes": sum(checkpoint_bytes) / len(checkpoint_bytes),
+        "steps": sum(steps) / len(steps),
+        "state": state,
+    }
+
+
+def execution_cost(billed_ms: float, memory_mb: int, steps: float, checkpoint_bytes: float) -> float:
+    return (
+        billed_ms * memory_mb / 1024 * PRICING["lambda_gb_ms"]
+        + PRICING["lambda_request"]
+        + steps * PRICING["durable_operation"]
+        + checkpoint_bytes / 1024 ** 3 * PRICING["durable_gb_written"]
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ops", type=int, default=2000, help="Operaciones totales")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 10, 50, 100, 500, 1000])
+    parser.add_argument("--invocation-ms", type=float, default=500.0, help="Overhead facturado por ejecución caliente")
+    parser.add_argument("--memory-mb", type=int, default=128)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    module = load_lambda_module(COUNTER_PATH, "fase1_counter")
+    install_local_aws(module)
+    operations = random_operations(args.ops, args.seed)
+    expected = expected_state(operations)
+
+    print(f"# {args.ops} operations, warm overhead {args.invocation_ms:g} ms per execution, {args.memory_mb} MB")
+    print(
+        f"{'batch':>6} {'execs':>6} {'local_ms':>8} {'billed_ms':>9} {'ops/s':>8} {'steps/op':>8} "
+        f"{'ckpt_b':>7} {'cost/op':>10} {'$/1M ops':>9}  final state"
+    )
+    for batch_size in args.batch_sizes:
+        row = run_batches(module, operations, batch_size)
+        billed_ms = args.invocation_ms + row["local_ms"]
+        ops_per_execution = args.ops / row["executions"]
+        cost_per_op = execution_cost(billed_ms, args.memory_mb, row["steps"], row["checkpoint_bytes"]) / ops_per_execution
+        print(
+            f"{batch_size:>6} {row['executions']:>6} {row['local_ms']:>8.2f} {billed_ms:>9.1f} "
+            f"{ops_per_execution / (billed_ms / 1000):>8.1f} {row['steps'] / ops_per_execution:>8.3f} "
+            f"{row['checkpoint_bytes']:>7.0f} {cost_per_op:>10.2e} {cost_per_op * 1e6:>9.2f}  "
+            f"{'ok' if row['state'] == expected else 'MISMATCH'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
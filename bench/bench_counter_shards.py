@@ -0,0 +1,136 @@
+"""
+Benchmark local de la entidad contador de fase 1 (event["counter_id"]) con
+escritores concurrentes: un único item frente a PN-counter por shards.
+
+--writers escritores (uno por thread, cada uno con su copia del módulo: un
+contenedor Lambda por ejecución concurrente) arrancan a la vez y aplican
+--ops-per-writer incrementos y decrementos, cada uno como una ejecución
+durable con el DurableContext local, sobre la misma tabla en memoria
+(--latency-ms por operación). La tabla limita cada item a --item-wps
+escrituras/s (el límite de partición de DynamoDB es 1000 WCU/s; por defecto
+escalado a lo que alcanza un solo proceso local): con "single" todas las
+escrituras van al mismo item y se reintentan por throttling; con "sharded"
+cada escritor escribe en el shard de su writer_id y la capacidad crece con
+el número de shards.
+
+Por configuración muestra ops/s, latencia por operación p50/p99, escrituras
+rechazadas por throttling (cada una se reintenta dentro del step con
+backoff), operaciones fallidas tras agotar los reintentos, items escritos y
+si el get_value final (fusión de los shards) coincide con lo aplicado.
+
+Uso:
+    python bench/bench_counter_shards.py --writers 128 --ops-per-writer 20 --shard-counts 8 32 128
+"""
+
+import argparse
+import os
+import random
+import threading
+import time
+
+import numpy as np
+
+from local_aws import (
+    COUNTER_PATH,
+    LocalDurableContext,
+    attach_local_aws,
+    capturing_logger,
+    install_local_aws,
+    load_lambda_module,
+)
+
+
+def run_config(store: str, shards: int, args) -> dict:
+    os.environ["COUNTER_SHARDS"] = str(shards)
+    modules = [load_lambda_module(COUNTER_PATH, f"fase1_counter_writer_{index}") for index in range(args.writers)]
+    stand_ins = install_local_aws(modules[0], latency_ms=args.latency_ms)
+    for module in modules[1:]:
+        attach_local_aws(module, stand_ins)
+    table = stand_ins["counter_table"]
+    table.set_item_write_capacity(args.item_wps)
+    logger, _ = capturing_logger(f"bench_counter_shards_{store}")
+
+    counter_id = f"bench-{store}-{shards}"
+    barrier = threading.Barrier(args.writers + 1)
+    lock = threading.Lock()
+    latencies, applied, failed = [], {"value": 0, "version": 0}, [0]
+
+    def writer(index: int) -> None:
+        module, rng = modules[index], random.Random(args.seed + index)
+        barrier.wait()
+        for _ in range(args.ops_per_writer):
+            operation = rng.choice(("increment", "increment", "decrement"))
+            amount = rng.randint(1, 5)
+            event = {
+                "test_case": "counter_shards",
+                "counter_id": counter_id,
+                "counter_store": store,
+                "writer_id": f"writer-{index}",
+                "operation": operation,
+                "amount": amount,
+            }
+            start = time.perf_counter()
+            try:
+                module.run_counter(event, LocalDurableContext(logger=logger, max_attempts=1))
+            except Exception:
+                with lock:
+                    failed[0] += 1
+                continue
+            with lock:
+                latencies.append((time.perf_counter() - start) * 1000)
+                applied["value"] += amount if operation == "increment" else -amount
+                applied["version"] += 1
+
+    threads = [threading.Thread(target=writer, args=(index,)) for index in range(args.writers)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    body = modules[0].run_counter(
+        {"test_case": "counter_shards", "counter_id": counter_id, "counter_store": store},
+        LocalDurableContext(logger=logger),
+    )["body"]
+    return {
+        "ops_per_s": len(latencies) / elapsed,
+        "latency": np.percentile(latencies, [50, 99]) if latencies else [float("nan")] * 2,
+        "throttled": table.throttled,
+        "failed": failed[0],
+        "items": len(table.items),
+        "consistent": {"value": body["counter_value"], "version": body["version"]} == applied,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=128, help="Escritores concurrentes")
+    parser.add_argument("--ops-per-writer", type=int, default=20)
+    parser.add_argument("--shard-counts", type=int, nargs="+", default=[8, 32, 128])
+    parser.add_argument("--item-wps", type=float, default=100.0, help="Escrituras/s por item (límite de partición)")
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="Latencia simulada por operación de DynamoDB")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(
+        f"# {args.writers} writers x {args.ops_per_writer} ops, {args.item_wps:g} writes/s per item, "
+        f"{args.latency_ms:g} ms per DynamoDB op"
+    )
+    print(
+        f"{'store':>8} {'shards':>6} {'ops/s':>8} {'p50_ms':>8} {'p99_ms':>8} {'throttled':>9} "
+        f"{'failed':>6} {'items':>5}  get_value"
+    )
+    configs = [("single", 1)] + [("sharded", shards) for shards in args.shard_counts]
+    for store, shards in configs:
+        row = run_config(store, shards, args)
+        print(
+            f"{store:>8} {shards:>6} {row['ops_per_s']:>8.1f} {row['latency'][0]:>8.1f} {row['latency'][1]:>8.1f} "
+            f"{row['throttled']:>9} {row['failed']:>6} {row['items']:>5}  "
+            f"{'ok' if row['consistent'] else 'MISMATCH'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Microbenchmark del serializador DynamoDB del item del job.
+
+Compara, para jobs con N chunks (chunks + encoded_chunks completos):
+
+- legacy: to_dynamo_number_dict (ints/floats -> Decimal) seguido del
+  TypeSerializer de boto3, que es lo que hacía la capa resource en cada
+  put_item; y TypeDeserializer + from_dynamo_number_dict en cada get_item.
+- compiled: serialize_job_item / deserialize_job_item del módulo, que
+  emiten y leen AttributeValue directamente a partir del esquema.
+
+Comprueba además que ambos caminos producen los mismos AttributeValue y el
+mismo dict al leer.
+
+Uso:
+    python bench/bench_dynamo_serializer.py --chunks 10 100 500 1000
+"""
+
+import argparse
+import time
+from decimal import Decimal
+
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+
+from local_aws import DURABLE_VIDEO_PATH, load_lambda_module
+
+
+def to_dynamo_number_dict(data: dict):
+    """Camino anterior (copiado del módulo de vídeo como referencia)."""
+    def convert(value):
+        if isinstance(value, bool) or value is None:
+            return value
+        if isinstance(value, int):
+            return Decimal(value)
+        if isinstance(value, float):
+            return Decimal(str(value))
+        if isinstance(value, list):
+            return [convert(v) for v in value]
+        if isinstance(value, dict):
+            return {k: convert(v) for k, v in value.items()}
+        return value
+
+    return convert(data)
+
+
+def from_dynamo_number_dict(data: dict):
+    def convert(value):
+        if isinstance(value, Decimal):
+            if value % 1 == 0:
+                return int(value)
+            return float(value)
+        if isinstance(value, list):
+            return [convert(v) for v in value]
+        if isinstance(value, dict):
+            return {k: convert(v) for k, v in value.items()}
+        return value
+
+    return convert(data)
+
+
+SERIALIZER = TypeSerializer()
+DESERIALIZER = TypeDeserializer()
+
+
+def legacy_serialize(item: dict) -> dict:
+    return {k: SERIALIZER.serialize(v) for k, v in to_dynamo_number_dict(item).items()}
+
+
+def legacy_deserialize(attributes: dict) -> dict:
+    return from_dynamo_number_dict({k: DESERIALIZER.deserialize(v) for k, v in attributes.items()})
+
+
+def build_job_item(chunk_count: int) -> dict:
+    chunks = [
+        {
+            "chunk_id": f"video-001_chunk_{idx:04d}",
+            "index": idx,
+            "start_second": idx * 10,
+            "end_second": idx * 10 + 10,
+            "duration_seconds": 10,
+            "source_uri": "s3://durable-video-artifacts/input/sample.mp4",
+            "status": "pending",
+        }
+        for idx in range(chunk_count)
+    ]
+    encoded_chunks = [
+        {
+            "chunk_id": chunk["chunk_id"],
+            "index": chunk["index"],
+            "duration_seconds": 10,
+            "codec": "h264",
+            "bitrate_kbps": 2200,
+            "output_uri": f"s3://durable-video-artifacts/encoded/job/{chunk['chunk_id']}.mp4",
+            "status": "encoded",
+            "simulated_processing_ms": 600.125,
+            "encoder_backend": "numpy",
+            "encoder_cpu_ms": 512.75,
+            "estimated_bytes": 1843200 + chunk["index"],
+            "started_at_ms": 1760000000000 + chunk["index"],
+            "finished_at_ms": 1760000000600 + chunk["index"],
+        }
+        for chunk in chunks
+    ]
+    return {
+        "job_id": "3f1c2e9a-0000-4000-8000-000000000001",
+        "video_id": "video-001",
+        "input_uri": "s3://durable-video-artifacts/input/sample.mp4",
+        "format": "mp4",
+        "duration_seconds": chunk_count * 10,
+        "resolution": "1080p",
+        "codec": "h264",
+        "bitrate_kbps": 2200,
+        "chunk_duration_seconds": 10,
+        "encoder_backend": "numpy",
+        "chunk_planner": "adaptive",
+        "status": "merged",
+        "chunks": chunks,
+        "encoded_chunks": encoded_chunks,
+        "merged_output_uri": "s3://durable-video-artifacts/final/job/video-001_encoded.mp4",
+        "version": 3,
+        "model": "durable",
+        "test_case": "bench",
+    }
+
+
+def time_us(fn, arg, min_seconds: float) -> float:
+    runs = 0
+    start = time.perf_counter()
+    while True:
+        fn(arg)
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return elapsed / runs * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, nargs="+", default=[10, 100, 500, 1000])
+    parser.add_argument("--min-seconds", type=float, default=0.5, help="Tiempo mínimo por medición")
+    args = parser.parse_args()
+
+    module = load_lambda_module(DURABLE_VIDEO_PATH, "fase2_durable")
+
+    print(f"{'chunks':>6} {'write_legacy_us':>15} {'write_compiled_us':>17} {'speedup':>7} "
+          f"{'read_legacy_us':>14} {'read_compiled_us':>16} {'speedup':>7}")
+    for chunk_count in args.chunks:
+        item = build_job_item(chunk_count)
+        attributes = module.serialize_job_item(item)
+        assert attributes == legacy_serialize(item), "compiled serializer diverges from legacy path"
+        assert module.deserialize_job_item(attributes) == legacy_deserialize(attributes), "deserializers diverge"
+
+        write_legacy = time_us(legacy_serialize, item, args.min_seconds)
+        write_compiled = time_us(module.serialize_job_item, item, args.min_seconds)
+        read_legacy = time_us(legacy_deserialize, attributes, args.min_seconds)
+        read_compiled = time_us(module.deserialize_job_item, attributes, args.min_seconds)
+        print(
+            f"{chunk_count:>6} {write_legacy:>15.1f} {write_compiled:>17.1f} {write_legacy / write_compiled:>6.1f}x "
+            f"{read_legacy:>14.1f} {read_compiled:>16.1f} {read_legacy / read_compiled:>6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
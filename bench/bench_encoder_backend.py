@@ -0,0 +1,80 @@
+"""
+Benchmark local de los backends de codificación de encode_chunk.
+
+1) Coste por chunk del backend "numpy" (CPU real) según resolución y
+   bitrate, medido en esta máquina y extrapolado al reparto de vCPU de
+   Lambda para varias memorias.
+2) Pipeline durable completo con backend "sleep" frente a "numpy" para
+   varios grados de paralelismo: con "sleep" el wall time baja casi
+   linealmente; con "numpy" los chunks compiten por la CPU.
+
+Uso:
+    python bench/bench_encoder_backend.py --memories 128 512 1769 --degrees 1 4 10
+"""
+
+import argparse
+import os
+import time
+
+from local_aws import (
+    DURABLE_VIDEO_PATH,
+    LocalDurableContext,
+    capturing_logger,
+    install_local_aws,
+    load_lambda_module,
+    video_event,
+)
+
+
+def encoder_table(module, memories: list) -> None:
+    print(f"{'resolution':>10} {'kbps':>5} {'local_ms':>9} " + " ".join(f"{f'{m}MB_ms':>10}" for m in memories))
+    for resolution in ("720p", "1080p", "4k"):
+        for bitrate in (1000, 2200, 4000):
+            result = module.run_encoder(
+                "numpy",
+                {"index": 0, "duration_seconds": 10},
+                resolution=resolution,
+                bitrate_kbps=bitrate,
+            )
+            projected = [
+                module.extrapolate_encode_ms(result["cpu_ms"], module.LAMBDA_FULL_VCPU_MEMORY_MB, memory)
+                for memory in memories
+            ]
+            print(
+                f"{resolution:>10} {bitrate:>5} {result['cpu_ms']:>9.1f} "
+                + " ".join(f"{ms:>10.0f}" for ms in projected)
+            )
+
+
+def pipeline_run(module, backend: str, degree: int, duration_seconds: int) -> float:
+    install_local_aws(module)
+    logger, _ = capturing_logger("bench_encoder_backend")
+    event = video_event(duration_seconds, max_parallel_chunks=degree)
+    event["encoding"].update({"chunk_planner": "fixed", "encoder_backend": backend})
+
+    start = time.perf_counter()
+    module.run_video_job(event, LocalDurableContext(logger=logger))
+    return (time.perf_counter() - start) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--memories", type=int, nargs="+", default=[128, 512, 1024, 1769])
+    parser.add_argument("--degrees", type=int, nargs="+", default=[1, 4, 10])
+    parser.add_argument("--duration", type=int, default=95)
+    args = parser.parse_args()
+
+    module = load_lambda_module(DURABLE_VIDEO_PATH, "fase2_durable")
+
+    print(f"# encode_chunk (10 s chunk), numpy backend, {os.cpu_count()} local CPUs")
+    encoder_table(module, args.memories)
+
+    print(f"\n# durable pipeline, {args.duration} s video, fixed 10 s chunks")
+    print(f"{'backend':>8} " + " ".join(f"{f'degree={d}_ms':>14}" for d in args.degrees))
+    for backend in ("sleep", "numpy"):
+        walls = [pipeline_run(module, backend, degree, args.duration) for degree in args.degrees]
+        print(f"{backend:>8} " + " ".join(f"{ms:>14.0f}" for ms in walls))
+
+
+if __name__ == "__main__":
+    main()
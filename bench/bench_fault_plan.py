@@ -0,0 +1,172 @@
+"""
+Benchmark local del plan de fallos con semilla (fault_plan) frente a la
+inyección por markers (fail_mode) en los dos pipelines de vídeo.
+
+1. coste: pipeline tradicional con un fallo en el primer intento de cada
+   encode_chunk, inyectado con fail_mode="once" (PutItem condicional en la
+   tabla de markers en cada intento) o con fault_plan fail_on_attempts=[1]
+   (en memoria). Con --latency-ms por operación de DynamoDB muestra
+   escrituras de markers y tiempo de la invocación; "none" es la referencia
+   sin fallos.
+2. reproducibilidad: el plan probabilístico (--probability de fallo
+   transitorio por intento en encode_chunk, chunks con throttling y latencia
+   lognormal) se ejecuta dos veces con --seed y una con --seed + 1. Compara
+   el conjunto de fallos inyectados (step, intento, tipo): igual con la
+   misma semilla, distinto con otra.
+3. recuperación: el mismo plan en traditional (RETRY_POLICY legacy y
+   adaptive) y durable, con el fault_summary de cada uno: intentos fallidos,
+   episodios abiertos y time-to-recover p50/p95/max por tipo de fallo. En
+   durable el contexto local no duerme las esperas de reintento (en Lambda
+   son suspensiones): su suma aparece en susp_s y no está en el TTR.
+
+Uso:
+    python bench/bench_fault_plan.py --duration 300 --parallel 8 --latency-ms 5 --seed 42
+"""
+
+import argparse
+import logging
+import os
+import time
+import uuid
+
+from local_aws import (
+    DURABLE_VIDEO_PATH,
+    TRADITIONAL_VIDEO_PATH,
+    LocalDurableContext,
+    LocalLambdaContext,
+    capturing_logger,
+    install_local_aws,
+    load_lambda_module,
+    video_event,
+)
+
+
+class FaultLog(logging.Handler):
+    """Recoge los fallos inyectados por el plan (líneas "Injected <tipo> fault in <step> attempt=<n>")."""
+
+    def __init__(self):
+        super().__init__(level=logging.ERROR)
+        self.faults = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        words = record.getMessage().split()
+        if words[:1] == ["Injected"]:
+            self.faults.append((words[4], int(words[5].split("=")[1]), words[1]))
+
+
+def fault_plan(seed: int, probability: float) -> dict:
+    return {
+        "seed": seed,
+        "steps": {
+            "encode_chunk": {
+                "probability": probability,
+                "latency": {"distribution": "lognormal", "median_ms": 20, "sigma": 0.6, "probability": 0.5},
+                "chunks": {str(index): {"fault": "throttling", "fail_on_attempts": [1, 2]} for index in (3, 11)},
+            },
+            "merge_video": {"fail_on_attempts": [1]},
+        },
+    }
+
+
+def load_module(model: str, policy: str = "adaptive"):
+    os.environ["RETRY_POLICY"] = policy
+    path = DURABLE_VIDEO_PATH if model == "durable" else TRADITIONAL_VIDEO_PATH
+    return load_lambda_module(path, f"fase2_{model}_{policy}_faults")
+
+
+def run_job(module, model: str, event: dict, latency_ms: float = 0.0) -> dict:
+    stand_ins = install_local_aws(module, latency_ms=latency_ms)
+    logger, capture = capturing_logger(f"bench_fault_plan_{model}")
+    fault_log = FaultLog()
+    logger.addHandler(fault_log)
+
+    start = time.perf_counter()
+    suspended_s = 0
+    if model == "durable":
+        context = LocalDurableContext(logger=logger)
+        try:
+            status = module.run_video_job(event, context)["statusCode"]
+        except Exception:
+            status = "error"
+        suspended_s = context.retry_wait_s
+    else:
+        status = module.lambda_handler(event, LocalLambdaContext(logger=logger))["statusCode"]
+
+    summaries = capture.of_type("fault_summary")
+    return {
+        "status": status,
+        "wall_ms": (time.perf_counter() - start) * 1000,
+        "marker_writes": stand_ins["failure_table"].op_counts["put_item"],
+        "faults": set(fault_log.faults),
+        "summary": summaries[-1] if summaries else None,
+        "suspended_s": suspended_s,
+    }
+
+
+def cost_scenario(args) -> None:
+    module = load_module("traditional")
+    print(f"# cost: fail first attempt of every encode_chunk, {args.latency_ms} ms per DynamoDB op")
+    print(f"{'injection':>10} {'status':>6} {'marker_writes':>13} {'wall_ms':>8}")
+    variants = {
+        "none": {},
+        "markers": {"failures": {"encode_chunk": {"fail_mode": "once", "failure_key": f"bench-{uuid.uuid4()}"}}},
+        "plan": {"fault_plan": {"seed": args.seed, "steps": {"encode_chunk": {"fail_on_attempts": [1]}}}},
+    }
+    for name, overrides in variants.items():
+        event = video_event(args.duration, test_case=f"fault_cost_{name}", max_parallel_chunks=args.parallel, **overrides)
+        row = run_job(module, "traditional", event, latency_ms=args.latency_ms)
+        print(f"{name:>10} {row['status']:>6} {row['marker_writes']:>13} {row['wall_ms']:>8.0f}")
+
+
+def reproducibility_scenario(args) -> None:
+    module = load_module("traditional")
+    runs = []
+    for seed in (args.seed, args.seed, args.seed + 1):
+        event = video_event(args.duration, max_parallel_chunks=args.parallel, fault_plan=fault_plan(seed, args.probability))
+        runs.append((seed, run_job(module, "traditional", event)["faults"]))
+
+    print(f"\n# reproducibility: probability={args.probability} per encode attempt")
+    print(f"{'run':>4} {'seed':>5} {'faults':>6}  same as run 1")
+    for index, (seed, faults) in enumerate(runs, start=1):
+        print(f"{index:>4} {seed:>5} {len(faults):>6}  {'yes' if faults == runs[0][1] else 'no'}")
+
+
+def recovery_scenario(args) -> None:
+    print(f"\n# time to recover per fault type (ms), probability={args.probability}, seed={args.seed}")
+    print(
+        f"{'model':>12} {'policy':>9} {'status':>6} {'wall_ms':>8} {'susp_s':>6} {'fault':>10} "
+        f"{'injected':>8} {'open':>4} {'recovered':>9} {'p50':>8} {'p95':>8} {'max':>8}"
+    )
+    for model, policy in (("traditional", "legacy"), ("traditional", "adaptive"), ("durable", "adaptive")):
+        module = load_module(model, policy)
+        event = video_event(args.duration, max_parallel_chunks=args.parallel, fault_plan=fault_plan(args.seed, args.probability))
+        # Mismos chunks (y por tanto mismos fallos) que el baseline
+        event["encoding"]["chunk_planner"] = "fixed"
+        row = run_job(module, model, event)
+        summary = row["summary"]
+        for fault_type in sorted(set(summary["injected"]) | set(summary["time_to_recover_ms"])):
+            ttr = summary["time_to_recover_ms"].get(fault_type, {})
+            print(
+                f"{model:>12} {policy:>9} {row['status']:>6} {row['wall_ms']:>8.0f} {row['suspended_s']:>6} "
+                f"{fault_type:>10} {summary['injected'].get(fault_type, 0):>8} {summary['open'].get(fault_type, 0):>4} "
+                f"{ttr.get('count', 0):>9} {ttr.get('p50', float('nan')):>8.1f} {ttr.get('p95', float('nan')):>8.1f} "
+                f"{ttr.get('max', float('nan')):>8.1f}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=int, default=300, help="Duración del vídeo en segundos")
+    parser.add_argument("--parallel", type=int, default=8, help="max_parallel_chunks")
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="Latencia simulada por operación (coste)")
+    parser.add_argument("--probability", type=float, default=0.2, help="Probabilidad de fallo por intento de encode")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    cost_scenario(args)
+    reproducibility_scenario(args)
+    recovery_scenario(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark local de unidades de capacidad de escritura (WCU) por job del
+pipeline tradicional según el layout de la tabla de jobs.
+
+- single:  el job completo en un item; cada encode_chunk reescribe chunks y
+           encoded_chunks enteros (WCU por escritura ~ tamaño del job).
+- chunked: item cabecera + un item por chunk bajo sort key; el encode hace
+           UpdateItem solo del item de su chunk y las lecturas son Query.
+
+Para cada duración de vídeo muestra escrituras, WCU totales y por chunk,
+RCU, el item más grande de la tabla y si el job terminó (el layout single
+supera el límite de 400 KB por item en vídeos largos). Por defecto el
+encoder se sustituye por uno instantáneo, porque solo interesa el coste de
+almacenamiento; --real-encoder usa el backend "sleep" del evento.
+
+Uso:
+    python bench/bench_jobs_table_layout.py --durations 30 95 300 1000 3000 7200
+"""
+
+import argparse
+import os
+from types import SimpleNamespace
+
+from local_aws import (
+    MAX_ITEM_BYTES,
+    TRADITIONAL_VIDEO_PATH,
+    capturing_logger,
+    install_local_aws,
+    item_size_bytes,
+    load_lambda_module,
+    video_event,
+)
+
+
+LAYOUTS = ["single", "chunked"]
+
+
+def instant_encoder(chunk: dict, *, resolution: str, bitrate_kbps: int) -> dict:
+    return {"processing_ms": 0.0, "cpu_ms": 0.0, "estimated_bytes": None}
+
+
+def load_module(layout: str, real_encoder: bool):
+    os.environ["JOBS_TABLE_LAYOUT"] = layout
+    module = load_lambda_module(TRADITIONAL_VIDEO_PATH, f"fase2_traditional_{layout}")
+    if not real_encoder:
+        module.ENCODER_BACKENDS["sleep"] = instant_encoder
+    return module
+
+
+def run_once(module, duration_seconds: int) -> dict:
+    stand_ins = install_local_aws(module)
+    stand_ins["jobs_table"].max_item_bytes = MAX_ITEM_BYTES
+    logger, capture = capturing_logger("bench_jobs_table_layout")
+    context = SimpleNamespace(logger=logger)
+
+    response = module.lambda_handler(video_event(duration_seconds), context)
+    metric = capture.of_type("execution_duration")[-1]
+    table = stand_ins["jobs_table"]
+    chunks = -(-duration_seconds // module.DEFAULT_CHUNK_DURATION_SECONDS)
+    return {
+        "status": response["statusCode"],
+        "error": response["body"].get("error_message", ""),
+        "chunks": chunks,
+        "writes": metric["dynamodb_writes"],
+        "wcu": metric["dynamodb_wcu"],
+        "rcu": metric["dynamodb_rcu"],
+        "max_item_kb": max(item_size_bytes(item) for item in table.items.values()) / 1024.0,
+        "write_kb": table.bytes_written / 1024.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--durations", type=int, nargs="+", default=[30, 95, 300, 1000, 3000, 7200])
+    parser.add_argument("--layouts", nargs="+", default=LAYOUTS, choices=LAYOUTS)
+    parser.add_argument("--real-encoder", action="store_true")
+    args = parser.parse_args()
+
+    modules = {layout: load_module(layout, args.real_encoder) for layout in args.layouts}
+
+    print(
+        f"{'layout':>8} {'duration':>8} {'chunks':>6} {'writes':>6} {'wcu':>8} {'wcu/chunk':>9} "
+        f"{'rcu':>6} {'max_item_kb':>11} {'write_kb':>9} status"
+    )
+    for duration in args.durations:
+        for layout, module in modules.items():
+            row = run_once(module, duration)
+            status = "ok" if row["status"] == 200 else f"{row['status']} {row['error']}"
+            print(
+                f"{layout:>8} {duration:>8} {row['chunks']:>6} {row['writes']:>6} {row['wcu']:>8.0f} "
+                f"{row['wcu'] / row['chunks']:>9.1f} {row['rcu']:>6.1f} {row['max_item_kb']:>11.1f} "
+                f"{row['write_kb']:>9.1f} {status}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark local del sink de métricas del pipeline durable.
+
+Ejecuta el mismo job con METRICS_MODE="log" (una línea METRIC por step,
+chunk e intento) y con METRICS_MODE="emf" para varias tasas de muestreo de
+eventos crudos, y cuenta líneas y bytes de log de métricas por invocación
+(líneas METRIC + documento EMF), que es lo que factura la ingesta de
+CloudWatch Logs.
+
+Uso:
+    python bench/bench_metrics_sink.py --duration 600 --sample-rates 0 0.1 1
+"""
+
+import argparse
+import json
+import time
+
+from local_aws import (
+    DURABLE_VIDEO_PATH,
+    LocalDurableContext,
+    capturing_logger,
+    install_local_aws,
+    load_lambda_module,
+    video_event,
+)
+
+
+def run_once(module, duration_seconds: int, mode: str, sample_rate: float) -> dict:
+    stand_ins = install_local_aws(module)
+    module.metrics.mode = mode
+    module.metrics.sample_rate = sample_rate
+    logger, capture = capturing_logger("bench_metrics_sink")
+
+    event = video_event(duration_seconds, max_parallel_chunks=100)
+    event["encoding"]["chunk_planner"] = "fixed"
+
+    start = time.perf_counter()
+    module.run_video_job(event, LocalDurableContext(logger=logger))
+    wall_ms = (time.perf_counter() - start) * 1000
+
+    metric_bytes = sum(len("METRIC ") + len(json.dumps(m, ensure_ascii=False)) for m in capture.metrics)
+    emf_bytes = sum(len(json.dumps(d, ensure_ascii=False)) for d in stand_ins["emf_documents"])
+    return {
+        "metric_lines": len(capture.metrics),
+        "metric_kb": metric_bytes / 1024.0,
+        "emf_docs": len(stand_ins["emf_documents"]),
+        "emf_kb": emf_bytes / 1024.0,
+        "wall_ms": wall_ms,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=int, default=600)
+    parser.add_argument("--sample-rates", type=float, nargs="+", default=[0.0, 0.1, 1.0])
+    args = parser.parse_args()
+
+    module = load_lambda_module(DURABLE_VIDEO_PATH, "fase2_durable")
+
+    runs = [("log", 1.0)] + [("emf", rate) for rate in args.sample_rates]
+    print(f"{'mode':>4} {'sample':>6} {'metric_lines':>12} {'metric_kb':>9} {'emf_docs':>8} {'emf_kb':>6} {'total_kb':>8} {'wall_ms':>8}")
+    for mode, rate in runs:
+        row = run_once(module, args.duration, mode, rate)
+        print(
+            f"{mode:>4} {rate:>6.2f} {row['metric_lines']:>12} {row['metric_kb']:>9.1f} {row['emf_docs']:>8} "
+            f"{row['emf_kb']:>6.1f} {row['metric_kb'] + row['emf_kb']:>8.1f} {row['wall_ms']:>8.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark de consultas del almacén de métricas (tools/metrics_store.py).
+
+Ingiere los CSV de `phase1/cloudwatch/` en un almacén temporal, replica la
+tabla step_duration hasta --rows filas y compara, para p50/p95/p99 por
+(test_case, step) con y sin filtro/ventana:
+
+- store: índices + percentiles por grupo vectorizados
+- naive: recorrido fila a fila agrupando en dicts + np.percentile por grupo
+
+Comprueba además que ambos dan los mismos percentiles.
+
+Uso:
+    python bench/bench_metrics_store.py --rows 100000 1000000
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from local_aws import REPO_ROOT
+
+sys.path.insert(0, str(REPO_ROOT / "tools"))
+
+import metrics_store  # noqa: E402
+
+
+QS = (50, 95, 99)
+
+
+def replicate(table: metrics_store.IndexedTable, rows: int) -> metrics_store.IndexedTable:
+    repeats = -(-rows // table.length)
+    columns = {name: np.tile(column, repeats)[:rows] for name, column in table.columns.items()}
+    # Timestamps crecientes para que las ventanas temporales tengan sentido
+    columns["timestamp_ms"] = np.arange(rows, dtype=np.int64) * 100
+    return metrics_store.IndexedTable(table.name, columns)
+
+
+def naive_percentiles(columns: dict, where: dict, since_ms, until_ms) -> dict:
+    groups = defaultdict(list)
+    for test_case, step, duration, timestamp in zip(
+        columns["test_case"], columns["step"], columns["duration_ms"], columns["timestamp_ms"]
+    ):
+        if where.get("test_case") not in (None, test_case):
+            continue
+        if since_ms is not None and not (since_ms <= timestamp < until_ms):
+            continue
+        groups[(test_case or "", step or "")].append(duration)
+    return {key: np.percentile(values, QS) for key, values in groups.items()}
+
+
+def timed(fn, repeats: int = 3):
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        store = metrics_store.MetricsStore(root)
+        store.ingest(sorted((REPO_ROOT / "phase1" / "cloudwatch").rglob("*.csv")), execution_model="durable")
+        base = store.table("step_duration")
+        test_case = base.column("test_case")[0]
+
+        print(f"{'rows':>9} {'query':>16} {'store_ms':>9} {'index_ms':>9} {'naive_ms':>9} {'speedup':>8}")
+        for rows in args.rows:
+            table = replicate(base, rows)
+            store._tables = {"step_duration": table}
+            start = time.perf_counter()
+            for column in ("test_case", "step"):
+                table.index(column)
+            table.value_order("duration_ms")
+            index_ms = (time.perf_counter() - start) * 1000
+
+            queries = {
+                "all": ({}, None, None),
+                "test_case": ({"test_case": test_case}, None, None),
+                "test_case+window": ({"test_case": test_case}, rows * 25, rows * 75),
+            }
+            for label, (where, since_ms, until_ms) in queries.items():
+                store_s, groups = timed(lambda: store.percentiles(
+                    "step_duration", by=("test_case", "step"), where=where, since_ms=since_ms, until_ms=until_ms, qs=QS,
+                ))
+                naive_s, expected = timed(lambda: naive_percentiles(table.columns, where, since_ms, until_ms), repeats=1)
+
+                assert len(groups) == len(expected), (label, len(groups), len(expected))
+                for group in groups:
+                    reference = expected[(group["test_case"], group["step"])]
+                    assert np.allclose([group[f"p{q}"] for q in QS], reference), (label, group, reference)
+
+                print(
+                    f"{rows:>9,} {label:>16} {store_s * 1000:>9.2f} {index_ms:>9.1f} "
+                    f"{naive_s * 1000:>9.1f} {naive_s / store_s:>7.0f}x"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark local del fan-out de encode_chunk.
+
+Ejecuta el pipeline durable (run_video_job con un DurableContext local) o el
+tradicional (lambda_handler con el pool de threads) para varios valores de
+max_parallel_chunks y muestra cómo baja el wall time con el grado de
+paralelismo, junto al actual_parallel_chunks que reporta parallelism_summary.
+En el tradicional muestra además los conflictos de versión resueltos
+(muchos con --layout single, donde cada chunk reescribe el job entero).
+
+Uso:
+    python bench/bench_parallel_fanout.py --duration 95 --degrees 1 2 5 10
+    python bench/bench_parallel_fanout.py --model traditional --layout single --latency-ms 5
+"""
+
+import argparse
+import os
+import time
+from types import SimpleNamespace
+
+from local_aws import (
+    DURABLE_VIDEO_PATH,
+    TRADITIONAL_VIDEO_PATH,
+    LocalDurableContext,
+    capturing_logger,
+    install_local_aws,
+    load_lambda_module,
+    video_event,
+)
+
+
+def run_once(module, model: str, duration_seconds: int, degree: int, latency_ms: float) -> dict:
+    install_local_aws(module, latency_ms=latency_ms)
+    logger, capture = capturing_logger("bench_parallel_fanout")
+
+    event = video_event(duration_seconds, max_parallel_chunks=degree)
+    # Troceado fijo: mismo número de chunks en todos los grados de paralelismo
+    event["encoding"]["chunk_planner"] = "fixed"
+
+    start = time.perf_counter()
+    if model == "durable":
+        response = module.run_video_job(event, LocalDurableContext(logger=logger))
+    else:
+        response = module.lambda_handler(event, SimpleNamespace(logger=logger))
+    wall_ms = (time.perf_counter() - start) * 1000
+
+    summary = capture.of_type("parallelism_summary")[-1]
+    return {
+        "degree": degree,
+        "wall_ms": wall_ms,
+        "chunks": summary["executed_chunks"],
+        "actual_parallel_chunks": summary["actual_parallel_chunks"],
+        "conflicts": summary.get("state_conflicts", 0),
+        "execution_model": response["body"]["execution_model"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=int, default=95, help="duración del vídeo en segundos")
+    parser.add_argument("--degrees", type=int, nargs="+", default=[1, 2, 5, 10])
+    parser.add_argument("--model", choices=["durable", "traditional"], default="durable")
+    parser.add_argument("--layout", choices=["chunked", "single"], default="chunked",
+                        help="Layout de la tabla de jobs del tradicional")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latencia simulada por operación de DynamoDB/S3")
+    args = parser.parse_args()
+
+    if args.model == "durable":
+        module = load_lambda_module(DURABLE_VIDEO_PATH, "fase2_durable")
+    else:
+        os.environ["JOBS_TABLE_LAYOUT"] = args.layout
+        module = load_lambda_module(TRADITIONAL_VIDEO_PATH, "fase2_traditional")
+
+    rows = [run_once(module, args.model, args.duration, degree, args.latency_ms) for degree in args.degrees]
+    baseline_ms = rows[0]["wall_ms"]
+
+    print(f"{'degree':>6} {'chunks':>6} {'actual':>6} {'wall_ms':>10} {'speedup':>8} {'conflicts':>9}  execution_model")
+    for row in rows:
+        print(
+            f"{row['degree']:>6} {row['chunks']:>6} {row['actual_parallel_chunks']:>6} "
+            f"{row['wall_ms']:>10.1f} {baseline_ms / row['wall_ms']:>7.2f}x {row['conflicts']:>9}  {row['execution_model']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""
+Benchmark local del fan-out por cola del pipeline tradicional frente al
+fan-out dentro de una invocación.
+
+Modelos (todos los jobs llegan a la vez, --concurrency invocaciones de job
+simultáneas):
+
+- durable:     run_video_job con map de max_parallel_chunks = --workers.
+- inline-seq:  lambda_handler tradicional, chunks en serie.
+- inline-par:  lambda_handler tradicional, pool de --workers threads.
+- queue:       lambda_handler de coordinador (chunk_fanout="queue") que
+               encola un mensaje por chunk; --workers pollers, cada uno con
+               su copia del módulo (un contenedor del trigger SQS), llaman a
+               chunk_worker_handler con lotes de --batch-size y borran los
+               mensajes que no vuelven en batchItemFailures. El último chunk
+               de cada job invoca aggregator_handler (invocación asíncrona
+               entregada a un executor).
+
+La cola en memoria tiene visibility timeout y DLQ tras --max-receive
+recepciones. --crash-rate hace fallar esa fracción de encodes (tras los
+reintentos internos del handler) para ver reentregas y mensajes en la DLQ.
+
+Informa latencia por job (desde la llegada) p50/p95, throughput, mensajes,
+reentregas, DLQ y operaciones de DynamoDB. Los workers comparten proceso y
+GIL: sirve para comparar modelos, no como latencias absolutas de Lambda.
+
+Uso:
+    python bench/bench_queue_fanout.py --jobs 20 --duration 300 --workers 16
+    python bench/bench_queue_fanout.py --models queue --crash-rate 0.05 --visibility-s 0.5
+"""
+
+import argparse
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import numpy as np
+
+from load_generator import ContainerPool
+from local_aws import (
+    LocalDurableContext,
+    LocalLambdaClient,
+    LocalLambdaContext,
+    LocalS3Client,
+    LocalSQSClient,
+    capturing_logger,
+    install_local_tables,
+    sqs_lambda_event,
+    video_event,
+)
+
+
+MODELS = ["durable", "inline-seq", "inline-par", "queue"]
+QUEUE_URL = "https://sqs.us-east-2.amazonaws.com/000000000000/local-chunk-queue"
+AGGREGATOR_NAME = "fase2-video-traditional-aggregator"
+AGGREGATOR_ATTEMPTS = 3
+
+
+def new_stand_ins(latency_ms: float) -> dict:
+    stand_ins = install_local_tables(SimpleNamespace(set_aws_client=lambda *_: None), latency_ms=latency_ms)
+    stand_ins["s3"] = LocalS3Client(latency_ms=latency_ms)
+    stand_ins["emf_documents"] = []
+    return stand_ins
+
+
+def storage_ops(stand_ins: dict) -> dict:
+    return {
+        f"{name}.{op}": count
+        for name in ("jobs_table", "failure_table")
+        for op, count in stand_ins[name].op_counts.items()
+        if count
+    }
+
+
+def crashing_encoder(module, crash_rate: float, rng: random.Random, lock: threading.Lock) -> None:
+    """Hace fallar una fracción de los encodes de este contenedor."""
+    if not crash_rate:
+        return
+    run_encoder = module.run_encoder
+
+    def wrapped(backend, chunk, **kwargs):
+        with lock:
+            crash = rng.random() < crash_rate
+        if crash:
+            raise RuntimeError(f"Injected encoder crash chunk={chunk['index']}")
+        return run_encoder(backend, chunk, **kwargs)
+
+    module.run_encoder = wrapped
+
+
+def run_inline(model: str, events: list, concurrency: int, latency_ms: float) -> dict:
+    stand_ins = new_stand_ins(latency_ms)
+    pool = ContainerPool("durable" if model == "durable" else "traditional", stand_ins)
+    logger, _ = capturing_logger(f"queue_fanout_{model}")
+
+    def run_job(event: dict, arrival: float) -> dict:
+        module = pool.acquire()
+        try:
+            if model == "durable":
+                result = module.run_video_job(event, LocalDurableContext(logger=logger))
+            else:
+                result = module.lambda_handler(event, LocalLambdaContext(logger=logger))
+        except Exception:
+            result = {"statusCode": 500}
+        finally:
+            pool.release(module)
+        return {"ok": result.get("statusCode") == 200, "latency_ms": (time.perf_counter() - arrival) * 1000}
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(lambda event: run_job(event, start), events))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "latencies": [r["latency_ms"] for r in results if r["ok"]],
+        "failed": sum(1 for r in results if not r["ok"]),
+        "elapsed_s": elapsed,
+        "messages": 0,
+        "redeliveries": 0,
+        "dlq": 0,
+        "storage_ops": storage_ops(stand_ins),
+    }
+
+
+def run_queue(events: list, *, concurrency: int, workers: int, batch_size: int, latency_ms: float,
+              visibility_s: float, max_receive: int, crash_rate: float, seed: int, timeout_s: float) -> dict:
+    stand_ins = new_stand_ins(latency_ms)
+    sqs = LocalSQSClient(visibility_timeout_s=visibility_s, max_receive_count=max_receive, latency_ms=latency_ms)
+    aggregators = ThreadPoolExecutor(max_workers=max(4, workers // 4))
+    stand_ins["sqs"] = sqs
+    stand_ins["lambda"] = LocalLambdaClient(dispatch=lambda invocation: aggregators.submit(run_aggregator, invocation))
+
+    coordinator_pool = ContainerPool("traditional", stand_ins)
+    aggregator_pool = ContainerPool("traditional", stand_ins)
+    logger, capture = capturing_logger("queue_fanout_queue")
+    rng, rng_lock = random.Random(seed), threading.Lock()
+
+    def run_aggregator(invocation: dict) -> None:
+        # Lambda reintenta las invocaciones asíncronas que fallan
+        module = aggregator_pool.acquire()
+        try:
+            for _ in range(AGGREGATOR_ATTEMPTS):
+                try:
+                    module.aggregator_handler(invocation["payload"], LocalLambdaContext(logger=logger))
+                    return
+                except Exception:
+                    continue
+        finally:
+            aggregator_pool.release(module)
+
+    stop = threading.Event()
+
+    def poller() -> None:
+        module = ContainerPool("traditional", stand_ins).acquire()
+        crashing_encoder(module, crash_rate, rng, rng_lock)
+        while not stop.is_set():
+            messages = sqs.receive_message(QueueUrl=QUEUE_URL, MaxNumberOfMessages=batch_size,
+                                           WaitTimeSeconds=0.1).get("Messages", [])
+            if not messages:
+                continue
+            response = module.chunk_worker_handler(sqs_lambda_event(messages), LocalLambdaContext(logger=logger))
+            failed = {item["itemIdentifier"] for item in response["batchItemFailures"]}
+            done = [
+                {"Id": str(position), "ReceiptHandle": message["ReceiptHandle"]}
+                for position, message in enumerate(messages)
+                if message["MessageId"] not in failed
+            ]
+            if done:
+                sqs.delete_message_batch(QueueUrl=QUEUE_URL, Entries=done)
+
+    threads = [threading.Thread(target=poller, daemon=True) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+
+    def coordinate(event: dict, submitted_at_ms: int) -> bool:
+        module = coordinator_pool.acquire()
+        try:
+            event = dict(event, chunk_fanout="queue", submitted_at_ms=submitted_at_ms)
+            return module.lambda_handler(event, LocalLambdaContext(logger=logger))["statusCode"] == 202
+        except Exception:
+            return False
+        finally:
+            coordinator_pool.release(module)
+
+    start = time.perf_counter()
+    submitted_at_ms = int(time.time() * 1000)
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        enqueued = list(executor.map(lambda event: coordinate(event, submitted_at_ms), events))
+
+    # Fin: todos los jobs agregados, o cola vacía (lo que no llegó está en la DLQ)
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        if len(capture.of_type("queue_job_summary")) >= sum(enqueued) or sqs.in_flight() == 0:
+            break
+        time.sleep(0.01)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    aggregators.shutdown(wait=True)
+    elapsed = time.perf_counter() - start
+
+    summaries = capture.of_type("queue_job_summary")
+    return {
+        "latencies": [summary["end_to_end_ms"] for summary in summaries],
+        "failed": len(events) - len(summaries),
+        "elapsed_s": elapsed,
+        "messages": sqs.receives,
+        "redeliveries": sqs.redeliveries,
+        "dlq": len(sqs.dead_letters),
+        "storage_ops": storage_ops(stand_ins),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", nargs="+", default=MODELS, choices=MODELS)
+    parser.add_argument("--jobs", type=int, default=20)
+    parser.add_argument("--duration", type=int, default=300, help="Duración de cada vídeo en segundos")
+    parser.add_argument("--concurrency", type=int, default=4, help="Invocaciones de job simultáneas")
+    parser.add_argument("--workers", type=int, default=16, help="Pollers SQS / paralelismo por job")
+    parser.add_argument("--batch-size", type=int, default=1, help="Mensajes por invocación del worker")
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="Latencia simulada por operación")
+    parser.add_argument("--visibility-s", type=float, default=2.0)
+    parser.add_argument("--max-receive", type=int, default=3)
+    parser.add_argument("--crash-rate", type=float, default=0.0, help="Fracción de encodes que fallan (queue)")
+    parser.add_argument("--timeout-s", type=float, default=300.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    os.environ["CHUNK_QUEUE_URL"] = QUEUE_URL
+    os.environ["AGGREGATOR_FUNCTION_NAME"] = AGGREGATOR_NAME
+
+    print(
+        f"# {args.jobs} jobs x {args.duration}s video, concurrency={args.concurrency}, workers={args.workers}, "
+        f"batch={args.batch_size}, latency={args.latency_ms}ms, crash_rate={args.crash_rate}"
+    )
+    print(
+        f"{'model':>10} {'jobs/s':>7} {'lat_p50':>8} {'lat_p95':>8} {'failed':>6} {'msgs':>6} {'redeliv':>7} "
+        f"{'dlq':>4}  dynamodb ops"
+    )
+    for model in args.models:
+        events = [video_event(args.duration, test_case=f"queue_fanout/{model}/{index}") for index in range(args.jobs)]
+        if model == "queue":
+            row = run_queue(
+                events,
+                concurrency=args.concurrency,
+                workers=args.workers,
+                batch_size=args.batch_size,
+                latency_ms=args.latency_ms,
+                visibility_s=args.visibility_s,
+                max_receive=args.max_receive,
+                crash_rate=args.crash_rate,
+                seed=args.seed,
+                timeout_s=args.timeout_s,
+            )
+        else:
+            for event in events:
+                event["max_parallel_chunks"] = 1 if model == "inline-seq" else args.workers
+            row = run_inline(model, events, args.concurrency, args.latency_ms)
+
+        latency = np.percentile(row["latencies"], [50, 95]) if row["latencies"] else [float("nan")] * 2
+        ops = " ".join(f"{name}={count}" for name, count in sorted(row["storage_ops"].items()))
+        print(
+            f"{model:>10} {len(row['latencies']) / row['elapsed_s']:>7.2f} {latency[0]:>8.0f} {latency[1]:>8.0f} "
+            f"{row['failed']:>6} {row['messages']:>6} {row['redeliveries']:>7} {row['dlq']:>4}  {ops}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Benchmark local del coste de replay del pipeline durable frente al número
+de steps completados.
+
+Para cada número de chunks N (steps = N encode_chunk + 5 fijos):
+
+1. Ejecuta el job completo con un LocalDurableContext nuevo y guarda su
+   history de checkpoints.
+2. Simula la reanudación tras una suspensión antes del último step: nueva
+   invocación con esa history sin build_response, de modo que N + 4 steps se
+   sirven desde checkpoint y solo build_response va en vivo.
+
+Muestra la métrica replay_overhead de la invocación reanudada:
+steps_replayed, replay_ms (tiempo del orquestador hasta el primer step en
+vivo), replayed_step_ms (tiempo dentro de las llamadas a step servidas desde
+checkpoint) y µs por step reproducido, con un gráfico ASCII de replay_ms.
+--plot guarda además el gráfico como PNG (requiere matplotlib).
+
+Uso:
+    python bench/bench_replay_overhead.py --steps 10 50 100 250 500 1000
+"""
+
+import argparse
+
+from local_aws import (
+    DURABLE_VIDEO_PATH,
+    LocalDurableContext,
+    capturing_logger,
+    install_local_aws,
+    load_lambda_module,
+    video_event,
+)
+
+try:
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+except ImportError:  # solo necesario con --plot
+    plt = None
+
+
+FIXED_STEPS = 5
+LAST_STEP = "build_response"
+BAR_WIDTH = 40
+
+
+def chunk_event(chunks: int, max_parallel_chunks: int, merge_mode: str) -> dict:
+    event = video_event(
+        chunks,
+        test_case=f"replay_{chunks}",
+        max_parallel_chunks=max_parallel_chunks,
+        merge_mode=merge_mode,
+    )
+    # Chunks de 1 s con el planner fijo: N chunks exactos y encode corto
+    event["encoding"].update({"chunk_duration_seconds": 1, "chunk_planner": "fixed"})
+    return event
+
+
+def run_once(module, chunks: int, max_parallel_chunks: int, merge_mode: str) -> dict:
+    install_local_aws(module)
+    event = chunk_event(chunks, max_parallel_chunks, merge_mode)
+
+    logger, capture = capturing_logger("bench_replay_overhead")
+    first = LocalDurableContext(logger=logger)
+    module.run_video_job(event, first)
+    live_ms = capture.of_type("execution_duration")[-1]["duration_ms"]
+
+    # Reanudación: todo checkpointeado salvo el último step
+    history = {key: value for key, value in first.history.items() if not key.startswith(f"{LAST_STEP}#")}
+    logger, capture = capturing_logger("bench_replay_overhead")
+    resumed = LocalDurableContext(logger=logger, history=history)
+    module.run_video_job(event, resumed)
+
+    metric = capture.of_type("replay_overhead")[-1]
+    return {
+        "chunks": chunks,
+        "steps": chunks + FIXED_STEPS,
+        "live_ms": live_ms,
+        "steps_replayed": metric["steps_replayed"],
+        "steps_executed": metric["steps_executed"],
+        "replay_ms": metric["replay_ms"],
+        "replayed_step_ms": metric["replayed_step_ms"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--steps", type=int, nargs="+", default=[10, 50, 100, 250, 500, 1000],
+                        help="Número de chunks (steps encode_chunk) por job")
+    parser.add_argument("--max-parallel-chunks", type=int, default=50)
+    parser.add_argument("--merge-mode", choices=["streaming", "batch"], default="streaming")
+    parser.add_argument("--plot", help="Fichero PNG para el gráfico replay_ms vs. steps")
+    args = parser.parse_args()
+
+    module = load_lambda_module(DURABLE_VIDEO_PATH, "fase2_durable")
+    rows = [run_once(module, chunks, args.max_parallel_chunks, args.merge_mode) for chunks in args.steps]
+
+    peak = max(row["replay_ms"] for row in rows) or 1.0
+    print(f"{'steps':>6} {'replayed':>8} {'live':>5} {'live_ms':>9} {'replay_ms':>9} {'in_step_ms':>10} {'us/step':>8}  replay_ms")
+    for row in rows:
+        per_step_us = row["replay_ms"] * 1000 / max(row["steps_replayed"], 1)
+        bar = "#" * max(1, round(BAR_WIDTH * row["replay_ms"] / peak))
+        print(
+            f"{row['steps']:>6} {row['steps_replayed']:>8} {row['steps_executed']:>5} {row['live_ms']:>9.0f} "
+            f"{row['replay_ms']:>9.1f} {row['replayed_step_ms']:>10.1f} {per_step_us:>8.0f}  {bar}"
+        )
+
+    if args.plot:
+        if plt is None:
+            raise SystemExit("--plot requires matplotlib")
+        figure, axis = plt.subplots(figsize=(6, 4))
+        axis.plot([r["steps"] for r in rows], [r["replay_ms"] for r in rows], marker="o", label="replay_ms")
+        axis.plot([r["steps"] for r in rows], [r["replayed_step_ms"] for r in rows], marker="x", label="replayed_step_ms")
+        axis.set_xlabel("steps per execution")
+        axis.set_ylabel("ms")
+        axis.set_title("Durable replay cost vs. completed steps")
+        axis.legend()
+        figure.tight_layout()
+        figure.savefig(args.plot)
+        print(f"# plot written to {args.plot}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Benchmark local de reanudación y continuación del pipeline tradicional.
+
+1. crash: la primera invocación muere (excepción no capturable, como un
+   timeout o un OOM) tras codificar --crash-after chunks. Después se vuelve a
+   invocar:
+   - fresh:  evento sin job_id (comportamiento original): job nuevo con otro
+             uuid y se re-codifican todos los chunks.
+   - resume: mismo job_id: se retoma desde el progreso persistido y solo se
+             codifican los chunks que faltan.
+2. deadline: con deadline_aware y un timeout simulado de --timeout-ms por
+   invocación, el job se parte en varias invocaciones que se continúan
+   solas (cliente Lambda local) sin pasar del timeout ni repetir chunks.
+
+Uso:
+    python bench/bench_resumable_pipeline.py --duration 95 --crash-after 6 --timeout-ms 2500
+"""
+
+import argparse
+import os
+import time
+import uuid
+
+from local_aws import (
+    TRADITIONAL_VIDEO_PATH,
+    LocalLambdaContext,
+    capturing_logger,
+    install_local_aws,
+    load_lambda_module,
+    video_event,
+)
+
+
+class SimulatedCrash(BaseException):
+    """Muerte de la invocación: no la captura ni execute_with_retries ni el handler."""
+
+
+def counting_encoder(module, crash_after: int | None = None) -> list:
+    """Sustituye run_encoder para contar chunks codificados y, opcionalmente, morir tras N."""
+    run_encoder = module.run_encoder
+    encoded = []
+
+    def wrapped(backend, chunk, **kwargs):
+        if crash_after is not None and len(encoded) >= crash_after:
+            raise SimulatedCrash(f"crash after {crash_after} chunks")
+        result = run_encoder(backend, chunk, **kwargs)
+        encoded.append(chunk["index"])
+        return result
+
+    module.run_encoder = wrapped
+    return encoded
+
+
+def crash_scenario(module, duration: int, crash_after: int, mode: str, max_parallel_chunks: int) -> dict:
+    install_local_aws(module)
+    logger, _ = capturing_logger("bench_resumable_pipeline")
+    original = module.run_encoder
+    event = video_event(duration, job_id=f"job-{uuid.uuid4()}", max_parallel_chunks=max_parallel_chunks)
+
+    before = counting_encoder(module, crash_after=crash_after)
+    try:
+        module.lambda_handler(event, LocalLambdaContext(logger=logger))
+    except SimulatedCrash:
+        pass
+    module.run_encoder = original
+
+    retry_event = dict(event)
+    if mode == "fresh":
+        retry_event.pop("job_id")
+    after = counting_encoder(module)
+    start = time.perf_counter()
+    response = module.lambda_handler(retry_event, LocalLambdaContext(logger=logger))
+    retry_ms = (time.perf_counter() - start) * 1000
+    module.run_encoder = original
+
+    return {
+        "mode": mode,
+        "status": response["statusCode"],
+        "chunks": response["body"].get("chunk_count"),
+        "before_crash": len(before),
+        "after_crash": len(after),
+        "rework": len(set(before) & set(after)),
+        "retry_ms": retry_ms,
+    }
+
+
+def deadline_scenario(module, duration: int, timeout_ms: int, max_parallel_chunks: int) -> list:
+    stand_ins = install_local_aws(module)
+    logger, capture = capturing_logger("bench_resumable_pipeline")
+    encoded = counting_encoder(module)
+    original_run_encoder = module.run_encoder
+
+    rows = []
+    event = video_event(duration, deadline_aware=True, max_parallel_chunks=max_parallel_chunks)
+    while event is not None:
+        seen = len(encoded)
+        start = time.perf_counter()
+        response = module.lambda_handler(event, LocalLambdaContext(logger=logger, timeout_ms=timeout_ms))
+        rows.append({
+            "invocation": int(event.get("continuation", 0)),
+            "status": response["statusCode"],
+            "encoded": len(encoded) - seen,
+            "wall_ms": (time.perf_counter() - start) * 1000,
+        })
+        queued = stand_ins["lambda"].invocations
+        event = queued.pop(0)["payload"] if queued else None
+
+    module.run_encoder = original_run_encoder
+    chunks = capture.of_type("explicit_state_size")[-1]["chunk_count"]
+    return rows, chunks, len(encoded)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=int, default=95)
+    parser.add_argument("--crash-after", type=int, default=6)
+    parser.add_argument("--timeout-ms", type=int, default=2500)
+    parser.add_argument("--safety-ms", type=int, default=300, help="DEADLINE_SAFETY_MS de la Lambda")
+    parser.add_argument("--max-parallel-chunks", type=int, default=1)
+    args = parser.parse_args()
+
+    os.environ["DEADLINE_SAFETY_MS"] = str(args.safety_ms)
+    module = load_lambda_module(TRADITIONAL_VIDEO_PATH, "fase2_traditional")
+
+    print(f"# crash after {args.crash_after} chunks, then re-invoke")
+    print(f"{'mode':>7} {'status':>6} {'chunks':>6} {'before':>6} {'after':>6} {'rework':>6} {'retry_ms':>9}")
+    for mode in ("fresh", "resume"):
+        row = crash_scenario(module, args.duration, args.crash_after, mode, args.max_parallel_chunks)
+        print(
+            f"{row['mode']:>7} {row['status']:>6} {row['chunks']:>6} {row['before_crash']:>6} "
+            f"{row['after_crash']:>6} {row['rework']:>6} {row['retry_ms']:>9.0f}"
+        )
+
+    rows, chunks, total_encoded = deadline_scenario(module, args.duration, args.timeout_ms, args.max_parallel_chunks)
+    print(f"\n# deadline-aware, timeout {args.timeout_ms} ms per invocation, safety {args.safety_ms} ms")
+    print(f"{'invocation':>10} {'status':>6} {'encoded':>7} {'wall_ms':>8}  within timeout")
+    for row in rows:
+        print(
+            f"{row['invocation']:>10} {row['status']:>6} {row['encoded']:>7} {row['wall_ms']:>8.0f}  "
+            f"{'yes' if row['wall_ms'] <= args.timeout_ms else 'NO'}"
+        )
+    print(f"# {len(rows)} invocations, {total_encoded} chunk encodes for {chunks} chunks")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Benchmark local de la política de reintentos (RETRY_POLICY legacy vs.
+adaptive) en los dos pipelines de vídeo.
+
+1. permanent: evento vid_merge_fail_always_001 (merge_video falla siempre).
+   - traditional legacy:  reintento inmediato hasta MAX_RETRIES.
+   - durable legacy:      sin StepConfig, estrategia por defecto del SDK
+                          (RetryPresets.default(), 6 intentos con backoff).
+   - adaptive:            el error se clasifica como permanent y no se
+                          reintenta.
+   Muestra intentos del step, tiempo de la invocación y espera de
+   reintentos (en durable, suma de las suspensiones que pediría el runtime;
+   el contexto local no las duerme).
+2. throttle: pipeline tradicional con --parallel chunks en paralelo y un
+   fallo "once" en cada encode_chunk, contra una tabla de markers limitada a
+   --failure-wps escrituras/s (token bucket). Con legacy los reintentos
+   inmediatos se suman al pico de escrituras; con adaptive el backoff con
+   jitter y el circuit breaker reparten la carga. Muestra estado del job,
+   escrituras intentadas y rechazadas por throttling, reintentos por clase y
+   aperturas del breaker.
+
+Uso:
+    python bench/bench_retry_policy.py --duration 300 --parallel 30 --failure-wps 10
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+import uuid
+
+from aws_durable_execution_sdk_python.retries import RetryPresets
+
+from local_aws import (
+    DURABLE_VIDEO_PATH,
+    REPO_ROOT,
+    TRADITIONAL_VIDEO_PATH,
+    LocalDurableContext,
+    LocalLambdaContext,
+    capturing_logger,
+    install_local_aws,
+    load_lambda_module,
+    video_event,
+)
+
+
+POLICIES = ["legacy", "adaptive"]
+PERMANENT_EVENT = REPO_ROOT / "phase2" / "test-events" / "vid_merge_fail_always_001.json"
+
+
+def load_module(model: str, policy: str):
+    os.environ["RETRY_POLICY"] = policy
+    path = DURABLE_VIDEO_PATH if model == "durable" else TRADITIONAL_VIDEO_PATH
+    return load_lambda_module(path, f"fase2_{model}_{policy}")
+
+
+def format_counts(counts: dict) -> str:
+    return ",".join(f"{name}={count}" for name, count in sorted(counts.items())) or "-"
+
+
+def permanent_scenario(model: str, policy: str) -> dict:
+    module = load_module(model, policy)
+    install_local_aws(module)
+    logger, capture = capturing_logger("bench_retry_policy")
+    event = json.loads(PERMANENT_EVENT.read_text())
+
+    start = time.perf_counter()
+    if model == "durable":
+        # Sin StepConfig el runtime usa RetryPresets.default()
+        context = LocalDurableContext(logger=logger, retry_strategy=RetryPresets.default())
+        try:
+            status = module.run_video_job(event, context)["statusCode"]
+        except Exception:
+            status = "error"
+        attempts, retry_wait_s = context.retries + 1, context.retry_wait_s
+    else:
+        status = module.lambda_handler(event, LocalLambdaContext(logger=logger))["statusCode"]
+        attempts = sum(1 for m in capture.of_type("step_duration") if m["step"] == "merge_video")
+        retry_wait_s = capture.of_type("retry_summary")[-1]["retry_wait_ms"] / 1000.0
+
+    return {
+        "status": status,
+        "attempts": attempts,
+        "wall_ms": (time.perf_counter() - start) * 1000,
+        "retry_wait_s": retry_wait_s,
+    }
+
+
+def throttle_scenario(policy: str, duration: int, parallel: int, failure_wps: float) -> dict:
+    module = load_module("traditional", policy)
+    stand_ins = install_local_aws(module)
+    stand_ins["failure_table"].set_write_capacity(failure_wps)
+    logger, capture = capturing_logger("bench_retry_policy")
+
+    event = video_event(
+        duration,
+        test_case=f"retry_throttle_{policy}",
+        max_parallel_chunks=parallel,
+        failures={"encode_chunk": {"fail_mode": "once", "failure_key": f"throttle-{uuid.uuid4()}"}},
+    )
+    start = time.perf_counter()
+    response = module.lambda_handler(event, LocalLambdaContext(logger=logger))
+    wall_ms = (time.perf_counter() - start) * 1000
+
+    summary = capture.of_type("retry_summary")[-1]
+    failure_table = stand_ins["failure_table"]
+    return {
+        "status": response["statusCode"],
+        "wall_ms": wall_ms,
+        "marker_writes": failure_table.op_counts["put_item"],
+        "throttled": failure_table.throttled,
+        "retries": summary["retries"],
+        "given_up": summary["given_up"],
+        "retry_wait_ms": summary["retry_wait_ms"],
+        "breaker_trips": sum(summary["breaker_trips"].values()),
+        "breaker_rejected": sum(summary["breaker_rejected"].values()),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=int, default=300, help="Duración del vídeo del escenario throttle")
+    parser.add_argument("--parallel", type=int, default=30, help="max_parallel_chunks del escenario throttle")
+    parser.add_argument("--failure-wps", type=float, default=10.0, help="Escrituras/s de la tabla de markers")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    print("# permanent failure in merge_video (vid_merge_fail_always_001)")
+    print(f"{'model':>12} {'policy':>9} {'status':>6} {'attempts':>8} {'wall_ms':>8} {'retry_wait_s':>12}")
+    for model in ("traditional", "durable"):
+        for policy in POLICIES:
+            row = permanent_scenario(model, policy)
+            print(
+                f"{model:>12} {policy:>9} {row['status']:>6} {row['attempts']:>8} {row['wall_ms']:>8.0f} "
+                f"{row['retry_wait_s']:>12.1f}"
+            )
+
+    print(
+        f"\n# throttle storm: traditional, {args.parallel} parallel chunks failing once, "
+        f"failure table at {args.failure_wps:g} writes/s"
+    )
+    print(
+        f"{'policy':>9} {'status':>6} {'wall_ms':>8} {'writes':>6} {'throttled':>9} {'wait_ms':>8} "
+        f"{'trips':>5} {'rejected':>8}  retries / given up"
+    )
+    for policy in POLICIES:
+        row = throttle_scenario(policy, args.duration, args.parallel, args.failure_wps)
+        print(
+            f"{policy:>9} {row['status']:>6} {row['wall_ms']:>8.0f} {row['marker_writes']:>6} {row['throttled']:>9} "
+            f"{row['retry_wait_ms']:>8.0f} {row['breaker_trips']:>5} {row['breaker_rejected']:>8}  "
+            f"{format_counts(row['retries'])} / {format_counts(row['given_up'])}"
+        )
+
+
+if __name__ == "__main__":
+    main()
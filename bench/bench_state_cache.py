@@ -0,0 +1,98 @@
+"""
+Benchmark local de la caché de estado del job en el pipeline tradicional.
+
+Ejecuta lambda_handler con JOB_STATE_CACHE=0 (un GetItem por lectura del
+estado) y JOB_STATE_CACHE=1 (read-through/write-through por invocación) para
+varias duraciones de vídeo, con latencia simulada por operación de DynamoDB,
+y muestra lecturas, escrituras, aciertos de caché y tiempo de ejecución.
+
+La fila "conflict" repite el caso con caché simulando otro escritor que
+avanza la versión del job mientras se codifica el chunk 1: la siguiente
+escritura condicionada a la versión (el propio chunk en el layout single, la
+cabecera en merge_video en el layout chunked) falla, se invalida la caché y
+el reintento vuelve a leer.
+
+Uso:
+    python bench/bench_state_cache.py --durations 30 95 300 --latency-ms 5
+"""
+
+import argparse
+import os
+from types import SimpleNamespace
+
+from local_aws import (
+    TRADITIONAL_VIDEO_PATH,
+    capturing_logger,
+    install_local_aws,
+    load_lambda_module,
+    video_event,
+)
+
+
+def load_module(cache_enabled: bool):
+    os.environ["JOB_STATE_CACHE"] = "1" if cache_enabled else "0"
+    return load_lambda_module(TRADITIONAL_VIDEO_PATH, f"fase2_traditional_cache_{int(cache_enabled)}")
+
+
+def inject_conflict(module, stand_ins: dict, chunk_index: int = 1) -> None:
+    """Otro escritor incrementa la versión del job durante el encode del chunk."""
+    run_encoder = module.run_encoder
+    fired = []
+
+    def competing_run_encoder(backend, chunk, **kwargs):
+        if chunk["index"] == chunk_index and not fired:
+            fired.append(True)
+            table = stand_ins["jobs_table"]
+            for item in table.items.values():
+                if "version" in item:
+                    item["version"] += 1
+        return run_encoder(backend, chunk, **kwargs)
+
+    module.run_encoder = competing_run_encoder
+
+
+def run_once(module, duration_seconds: int, latency_ms: float, conflict: bool = False) -> dict:
+    stand_ins = install_local_aws(module, latency_ms=latency_ms)
+    if conflict:
+        inject_conflict(module, stand_ins)
+    logger, capture = capturing_logger("bench_state_cache")
+    context = SimpleNamespace(logger=logger)
+
+    response = module.lambda_handler(video_event(duration_seconds), context)
+    metric = capture.of_type("execution_duration")[-1]
+    return {
+        "status": response["statusCode"],
+        "chunks": response["body"].get("chunk_count", 0),
+        "reads": metric["dynamodb_reads"],
+        "writes": metric["dynamodb_writes"],
+        "hits": metric["state_cache_hits"],
+        "conflicts": metric["state_conflicts"],
+        "duration_ms": metric["duration_ms"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--durations", type=int, nargs="+", default=[30, 95, 300])
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    uncached = load_module(cache_enabled=False)
+    cached = load_module(cache_enabled=True)
+
+    print(f"{'cache':>8} {'duration':>8} {'chunks':>6} {'reads':>6} {'writes':>6} {'hits':>5} {'conflicts':>9} {'exec_ms':>9}")
+    for duration in args.durations:
+        rows = [
+            ("off", run_once(uncached, duration, args.latency_ms)),
+            ("on", run_once(cached, duration, args.latency_ms)),
+            ("conflict", run_once(cached, duration, args.latency_ms, conflict=True)),
+        ]
+        for label, row in rows:
+            print(
+                f"{label:>8} {duration:>8} {row['chunks']:>6} {row['reads']:>6} {row['writes']:>6} "
+                f"{row['hits']:>5} {row['conflicts']:>9} {row['duration_ms']:>9.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
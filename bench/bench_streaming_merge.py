@@ -0,0 +1,57 @@
+"""
+Benchmark local del merge incremental del pipeline durable.
+
+Compara merge_mode="batch" (merge de 200 ms tras el último chunk) con
+"streaming" (StreamingMerger ensambla el prefijo contiguo mientras se
+codifica) para varios grados de paralelismo: wall time, duración del step
+merge_video y chunks que quedaban por ensamblar al llegar al merge.
+
+Uso:
+    python bench/bench_streaming_merge.py --duration 95 --degrees 1 4 10
+"""
+
+import argparse
+import time
+
+from local_aws import (
+    DURABLE_VIDEO_PATH,
+    LocalDurableContext,
+    capturing_logger,
+    install_local_aws,
+    load_lambda_module,
+    video_event,
+)
+
+
+def run_once(module, duration_seconds: int, degree: int, merge_mode: str) -> dict:
+    install_local_aws(module)
+    logger, capture = capturing_logger("bench_streaming_merge")
+    event = video_event(duration_seconds, max_parallel_chunks=degree, merge_mode=merge_mode)
+    event["encoding"]["chunk_planner"] = "fixed"
+
+    start = time.perf_counter()
+    module.run_video_job(event, LocalDurableContext(logger=logger))
+    wall_ms = (time.perf_counter() - start) * 1000
+
+    merge_ms = next(m["duration_ms"] for m in capture.of_type("step_duration") if m["step"] == "merge_video")
+    overlap = capture.of_type("merge_overlap")[-1]
+    return {"wall_ms": wall_ms, "merge_ms": merge_ms, "tail_chunks": overlap["tail_chunks"]}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=int, default=95)
+    parser.add_argument("--degrees", type=int, nargs="+", default=[1, 4, 10])
+    args = parser.parse_args()
+
+    module = load_lambda_module(DURABLE_VIDEO_PATH, "fase2_durable")
+
+    print(f"{'degree':>6} {'merge_mode':>10} {'wall_ms':>9} {'merge_step_ms':>13} {'tail_chunks':>11}")
+    for degree in args.degrees:
+        for merge_mode in ("batch", "streaming"):
+            row = run_once(module, args.duration, degree, merge_mode)
+            print(f"{degree:>6} {merge_mode:>10} {row['wall_ms']:>9.0f} {row['merge_ms']:>13.1f} {row['tail_chunks']:>11}")
+
+
+if __name__ == "__main__":
+    main()
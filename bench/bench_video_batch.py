@@ -0,0 +1,112 @@
+"""
+Benchmark local del modo batch multi-vídeo del pipeline durable.
+
+Compara N ejecuciones durables de un vídeo (una por invocación, cada una
+pagando un cold start modelado con --cold-start-ms) con una única ejecución
+batch de los N vídeos, y repite el batch con un vídeo que falla de forma
+permanente en merge_video para comprobar que los demás terminan.
+
+Uso:
+    python bench/bench_video_batch.py --durations 30 60 95 --max-parallel-videos 3
+"""
+
+import argparse
+import time
+
+from local_aws import (
+    DURABLE_VIDEO_PATH,
+    LocalDurableContext,
+    capturing_logger,
+    install_local_aws,
+    load_lambda_module,
+    video_event,
+)
+
+
+def video_entry(duration_seconds: int, index: int) -> dict:
+    video = video_event(duration_seconds)["video"]
+    video["video_id"] = f"video-{index:02d}-{duration_seconds:03d}s"
+    return {"video": video}
+
+
+def run_single_videos(module, durations: list, max_parallel_chunks: int, cold_start_ms: float) -> dict:
+    install_local_aws(module)
+    logger, _ = capturing_logger("bench_video_batch")
+
+    start = time.perf_counter()
+    checkpoints = 0
+    for index, duration in enumerate(durations):
+        context = LocalDurableContext(logger=logger)
+        event = video_event(duration, max_parallel_chunks=max_parallel_chunks, **video_entry(duration, index))
+        module.run_video_job(event, context)
+        checkpoints += len(context.checkpoints)
+    wall_ms = (time.perf_counter() - start) * 1000
+
+    return {
+        "wall_ms": wall_ms,
+        "modeled_ms": wall_ms + cold_start_ms * len(durations),
+        "checkpoints": checkpoints,
+        "succeeded": len(durations),
+        "failed": 0,
+    }
+
+
+def run_batch(module, durations: list, max_parallel_chunks: int, max_parallel_videos: int,
+              cold_start_ms: float, failing_index: int | None = None) -> dict:
+    install_local_aws(module)
+    logger, capture = capturing_logger("bench_video_batch")
+    context = LocalDurableContext(logger=logger, max_attempts=1)
+
+    entries = [video_entry(duration, index) for index, duration in enumerate(durations)]
+    if failing_index is not None:
+        entries[failing_index]["failures"] = {"merge_video": {"fail_mode": "always"}}
+
+    event = video_event(
+        durations[0],
+        max_parallel_chunks=max_parallel_chunks,
+        max_parallel_videos=max_parallel_videos,
+        videos=entries,
+    )
+    del event["video"]
+
+    start = time.perf_counter()
+    module.run_video_job(event, context)
+    wall_ms = (time.perf_counter() - start) * 1000
+
+    summary = capture.of_type("batch_summary")[-1]
+    return {
+        "wall_ms": wall_ms,
+        "modeled_ms": wall_ms + cold_start_ms,
+        "checkpoints": len(context.checkpoints),
+        "succeeded": summary["success"],
+        "failed": summary["failed"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--durations", type=int, nargs="+", default=[30, 60, 95])
+    parser.add_argument("--max-parallel-chunks", type=int, default=10)
+    parser.add_argument("--max-parallel-videos", type=int, default=3)
+    parser.add_argument("--cold-start-ms", type=float, default=575.0, help="Cold start por invocación (README: 575–808 ms)")
+    args = parser.parse_args()
+
+    module = load_lambda_module(DURABLE_VIDEO_PATH, "fase2_durable")
+
+    rows = [
+        ("single x N", run_single_videos(module, args.durations, args.max_parallel_chunks, args.cold_start_ms)),
+        ("batch", run_batch(module, args.durations, args.max_parallel_chunks, args.max_parallel_videos, args.cold_start_ms)),
+        ("batch, 1 fails", run_batch(module, args.durations, args.max_parallel_chunks, args.max_parallel_videos,
+                                     args.cold_start_ms, failing_index=0)),
+    ]
+
+    print(f"{'mode':>15} {'wall_ms':>9} {'+cold_start_ms':>14} {'checkpoints':>11} {'succeeded':>9} {'failed':>6}")
+    for label, row in rows:
+        print(
+            f"{label:>15} {row['wall_ms']:>9.0f} {row['modeled_ms']:>14.0f} {row['checkpoints']:>11} "
+            f"{row['succeeded']:>9} {row['failed']:>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
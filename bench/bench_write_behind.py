@@ -0,0 +1,67 @@
+"""
+Benchmark local del write-behind de jobs_table en el pipeline durable.
+
+Con una latencia DynamoDB simulada (--latency-ms), compara el step_duration
+de initialize_job / validate_video / split_video / merge_video con
+escrituras síncronas frente a write-behind, y cuántas escrituras llegan
+realmente a la tabla tras la coalescencia.
+
+Uso:
+    python bench/bench_write_behind.py --latency-ms 10 --duration 95
+"""
+
+import argparse
+import statistics
+
+from local_aws import (
+    DURABLE_VIDEO_PATH,
+    LocalDurableContext,
+    capturing_logger,
+    install_local_aws,
+    load_lambda_module,
+    video_event,
+)
+
+
+STATE_STEPS = ["initialize_job", "validate_video", "split_video", "merge_video"]
+
+
+def run_once(module, duration_seconds: int, latency_ms: float, write_behind: bool) -> dict:
+    stand_ins = install_local_aws(module, latency_ms=latency_ms)
+    module.job_writes = module.JobWriteBehind(enabled=write_behind)
+    logger, capture = capturing_logger("bench_write_behind")
+    context = LocalDurableContext(logger=logger)
+
+    module.run_video_job(video_event(duration_seconds), context)
+
+    durations = {m["step"]: m["duration_ms"] for m in capture.of_type("step_duration") if m["step"] in STATE_STEPS}
+    table_ops = stand_ins["jobs_table"].op_counts
+    return {
+        "durations": durations,
+        "table_writes": table_ops["put_item"] + table_ops["update_item"],
+        "execution_ms": capture.of_type("execution_duration")[-1]["duration_ms"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=int, default=95)
+    parser.add_argument("--latency-ms", type=float, default=10.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    module = load_lambda_module(DURABLE_VIDEO_PATH, "fase2_durable")
+
+    print(f"{'mode':>12} " + " ".join(f"{step:>15}" for step in STATE_STEPS) + f" {'table_writes':>12} {'exec_ms':>9}")
+    for write_behind in (False, True):
+        runs = [run_once(module, args.duration, args.latency_ms, write_behind) for _ in range(args.repeat)]
+        medians = {step: statistics.median(r["durations"][step] for r in runs) for step in STATE_STEPS}
+        label = "write_behind" if write_behind else "sync"
+        print(
+            f"{label:>12} " + " ".join(f"{medians[step]:>15.2f}" for step in STATE_STEPS)
+            + f" {runs[-1]['table_writes']:>12} {statistics.median(r['execution_ms'] for r in runs):>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Calibra el modelo de coste por chunk del planificador (plan_chunks) a partir
+de métricas chunk_duration pasadas.
+
+Lee exports CSV de CloudWatch (timestamp,message) o logs de texto, extrae las
+líneas `METRIC {...}` con metric_type=chunk_duration y status=success, y
+ajusta por mínimos cuadrados duration_ms = a + b * chunk_seconds. Imprime las
+variables de entorno para el Lambda durable: CHUNK_OVERHEAD_MS incluye
+además el overhead de checkpoint por step, que no se ve desde dentro del step.
+
+Uso:
+    python bench/calibrate_chunk_model.py logs/*.csv --checkpoint-overhead-ms 200
+"""
+
+import argparse
+import csv
+import json
+import sys
+
+
+def iter_messages(path: str):
+    with open(path, newline="", encoding="utf-8") as f:
+        first = f.readline()
+        f.seek(0)
+        if first.startswith("timestamp,message"):
+            for row in csv.DictReader(f):
+                yield row["message"]
+        else:
+            yield from f
+
+
+def iter_chunk_samples(paths: list, assume_chunk_seconds: float | None):
+    for path in paths:
+        for message in iter_messages(path):
+            idx = message.find("METRIC {")
+            if idx < 0:
+                continue
+            try:
+                metric = json.loads(message[idx + len("METRIC "):].strip())
+            except json.JSONDecodeError:
+                continue
+            if metric.get("metric_type") != "chunk_duration" or metric.get("status") != "success":
+                continue
+
+            chunk_seconds = metric.get("chunk_seconds", assume_chunk_seconds)
+            if chunk_seconds is None:
+                continue
+            yield float(chunk_seconds), float(metric["duration_ms"])
+
+
+def fit_linear(samples: list, default_slope: float) -> tuple:
+    """
+    Mínimos cuadrados de y = a + b*x. Si todas las x son iguales no se puede
+    estimar la pendiente: se fija default_slope y se ajusta solo a.
+    """
+    n = len(samples)
+    mean_x = sum(x for x, _ in samples) / n
+    mean_y = sum(y for _, y in samples) / n
+    var_x = sum((x - mean_x) ** 2 for x, _ in samples)
+
+    if var_x == 0:
+        slope = default_slope
+    else:
+        slope = sum((x - mean_x) * (y - mean_y) for x, y in samples) / var_x
+
+    return mean_y - slope * mean_x, slope
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--checkpoint-overhead-ms", type=float, default=200.0,
+                        help="overhead de checkpoint por step, fuera del step (informe fase 2: ~150-200 ms)")
+    parser.add_argument("--assume-chunk-seconds", type=float, default=None,
+                        help="duración de chunk para métricas antiguas sin chunk_seconds")
+    parser.add_argument("--default-ms-per-second", type=float, default=50.0)
+    args = parser.parse_args()
+
+    samples = list(iter_chunk_samples(args.paths, args.assume_chunk_seconds))
+    if not samples:
+        sys.exit("No chunk_duration samples found")
+
+    intercept, slope = fit_linear(samples, args.default_ms_per_second)
+
+    print(f"# {len(samples)} samples, duration_ms = {intercept:.1f} + {slope:.2f} * chunk_seconds")
+    print(f"CHUNK_OVERHEAD_MS={intercept + args.checkpoint_overhead_ms:.0f}")
+    print(f"CHUNK_MS_PER_SECOND={slope:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""
+Generador de carga local y concurrente para los dos handlers de vídeo.
+
+Lanza N jobs contra el handler durable (run_video_job con
+LocalDurableContext) y el tradicional (lambda_handler) en el propio proceso,
+con workers en threads y DynamoDB/S3 en memoria compartidos por todos los
+jobs de un modelo. Cada worker usa un "contenedor": una copia propia del
+módulo Lambda (globals, sink de métricas, clientes), como hace Lambda con una
+invocación por contenedor. Los contenedores se crean bajo demanda (cold
+start) hasta --concurrency y se reutilizan después.
+
+Modos de llegada:
+- open:   lazo abierto, llegadas Poisson a --rate jobs/s; si no hay
+          contenedor libre el job espera en cola (la latencia lo incluye).
+- closed: lazo cerrado, --concurrency clientes que lanzan un job tras otro
+          (con --think-ms entre jobs).
+
+Por modelo informa: throughput, latencia p50/p95/p99 (desde la llegada) y
+de servicio, jobs fallidos, reintentos de step, cold starts y operaciones
+de DynamoDB/S3. --failure-rate inyecta un fallo transitorio (fail_mode
+"once") en --fail-step en esa fracción de jobs.
+
+Todos los contenedores comparten un proceso (y su GIL): el trabajo de CPU de
+cientos de jobs concurrentes se serializa, así que las cifras sirven para
+comparar modelos y ver dónde empieza la degradación, no como latencias
+absolutas de Lambda.
+
+Uso:
+    python bench/load_generator.py --jobs 200 --concurrency 50 --mode closed
+    python bench/load_generator.py --jobs 300 --rate 40 --mode open --concurrency 500 --failure-rate 0.05
+"""
+
+import argparse
+import queue
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import numpy as np
+
+from local_aws import (
+    DURABLE_VIDEO_PATH,
+    TRADITIONAL_VIDEO_PATH,
+    LocalDurableContext,
+    LocalS3Client,
+    attach_local_aws,
+    capturing_logger,
+    install_local_tables,
+    load_lambda_module,
+    video_event,
+)
+
+
+MODEL_PATHS = {
+    "durable": DURABLE_VIDEO_PATH,
+    "traditional": TRADITIONAL_VIDEO_PATH,
+}
+
+
+class ContainerPool:
+    """Copias del módulo Lambda: se reutiliza una libre o se crea otra (cold start)."""
+
+    def __init__(self, model: str, stand_ins: dict):
+        self.model = model
+        self.stand_ins = stand_ins
+        self.idle = queue.LifoQueue()
+        self.cold_starts = 0
+        self.cold_start_ms = []
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            self.cold_starts += 1
+            name = f"load_{self.model}_{self.cold_starts}"
+        start = time.perf_counter()
+        module = load_lambda_module(MODEL_PATHS[self.model], name)
+        attach_local_aws(module, self.stand_ins)
+        with self._lock:
+            self.cold_start_ms.append((time.perf_counter() - start) * 1000)
+        return module
+
+    def release(self, module) -> None:
+        self.idle.put(module)
+
+
+def build_events(jobs: int, duration_seconds: int, failure_rate: float, fail_step: str, seed: int) -> list:
+    rng = random.Random(seed)
+    events = []
+    for index in range(jobs):
+        event = video_event(duration_seconds, test_case=f"load/{index}")
+        if rng.random() < failure_rate:
+            event["failures"] = {fail_step: {"fail_mode": "once", "failure_key": f"load-{uuid.uuid4()}"}}
+        events.append(event)
+    return events
+
+
+def invoke(model: str, module, event: dict, logger) -> tuple:
+    """Ejecuta un job. Devuelve (ok, reintentos de step vistos por el runtime)."""
+    if model == "durable":
+        context = LocalDurableContext(logger=logger)
+        try:
+            result = module.run_video_job(event, context)
+        except Exception:
+            return False, context.retries
+        return result.get("statusCode") == 200, context.retries
+
+    context = SimpleNamespace(logger=logger, aws_request_id=str(uuid.uuid4()))
+    try:
+        result = module.lambda_handler(event, context)
+    except Exception:
+        return False, 0
+    return result.get("statusCode") == 200, 0
+
+
+def run_model(model: str, events: list, *, mode: str, concurrency: int, rate: float, think_ms: float,
+              latency_ms: float, seed: int) -> dict:
+    stand_ins = install_local_tables(SimpleNamespace(set_aws_client=lambda *_: None), latency_ms=latency_ms)
+    stand_ins["s3"] = LocalS3Client(latency_ms=latency_ms)
+    stand_ins["emf_documents"] = []
+    pool = ContainerPool(model, stand_ins)
+    logger, capture = capturing_logger(f"load_{model}")
+
+    results = [None] * len(events)
+
+    def run_job(index: int, arrival: float) -> None:
+        module = pool.acquire()
+        started = time.perf_counter()
+        try:
+            ok, retries = invoke(model, module, events[index], logger)
+        finally:
+            pool.release(module)
+        finished = time.perf_counter()
+        results[index] = {
+            "ok": ok,
+            "retries": retries,
+            "latency_ms": (finished - arrival) * 1000,
+            "service_ms": (finished - started) * 1000,
+        }
+
+    start = time.perf_counter()
+    if mode == "open":
+        rng = np.random.default_rng(seed)
+        arrivals = start + np.cumsum(rng.exponential(1.0 / rate, size=len(events)))
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for index, arrival in enumerate(arrivals):
+                delay = arrival - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                executor.submit(run_job, index, float(arrival))
+    else:
+        next_index = iter(range(len(events)))
+        lock = threading.Lock()
+
+        def client() -> None:
+            while True:
+                with lock:
+                    index = next(next_index, None)
+                if index is None:
+                    return
+                run_job(index, time.perf_counter())
+                if think_ms:
+                    time.sleep(think_ms / 1000.0)
+
+        threads = [threading.Thread(target=client) for _ in range(min(concurrency, len(events)))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies = np.array([r["latency_ms"] for r in results])
+    service = np.array([r["service_ms"] for r in results])
+    # El tradicional reintenta dentro del handler: cada reintento deja un step_duration con status "error"
+    step_errors = sum(1 for m in capture.of_type("step_duration") if m.get("status") == "error")
+    storage_ops = {}
+    for name in ("jobs_table", "failure_table", "s3"):
+        for op, count in stand_ins[name].op_counts.items():
+            if count:
+                storage_ops[f"{name}.{op}"] = count
+
+    return {
+        "model": model,
+        "jobs": len(events),
+        "elapsed_s": elapsed,
+        "throughput": len(events) / elapsed,
+        "latency": np.percentile(latencies, [50, 95, 99]),
+        "service": np.percentile(service, [50, 95, 99]),
+        "failed": sum(1 for r in results if not r["ok"]),
+        "retries": sum(r["retries"] for r in results) + (step_errors if model == "traditional" else 0),
+        "cold_starts": pool.cold_starts,
+        "cold_start_ms": float(np.median(pool.cold_start_ms)) if pool.cold_start_ms else 0.0,
+        "storage_ops": storage_ops,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", nargs="+", default=["durable", "traditional"], choices=list(MODEL_PATHS))
+    parser.add_argument("--jobs", type=int, default=200)
+    parser.add_argument("--mode", choices=["open", "closed"], default="closed")
+    parser.add_argument("--concurrency", type=int, default=50, help="Clientes (closed) o contenedores máximos (open)")
+    parser.add_argument("--rate", type=float, default=20.0, help="Llegadas por segundo (open)")
+    parser.add_argument("--think-ms", type=float, default=0.0)
+    parser.add_argument("--duration", type=int, default=30, help="Duración de cada vídeo en segundos")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latencia simulada por operación de DynamoDB/S3")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--fail-step", default="encode_chunk",
+                        choices=["validate_video", "split_video", "encode_chunk", "merge_video"])
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    events = build_events(args.jobs, args.duration, args.failure_rate, args.fail_step, args.seed)
+    print(
+        f"# {args.jobs} jobs, mode={args.mode}, concurrency={args.concurrency}"
+        + (f", rate={args.rate}/s" if args.mode == "open" else "")
+        + f", video={args.duration}s, failure_rate={args.failure_rate}"
+    )
+    print(
+        f"{'model':>12} {'jobs/s':>7} {'lat_p50':>8} {'lat_p95':>8} {'lat_p99':>8} {'svc_p50':>8} {'svc_p99':>8} "
+        f"{'failed':>6} {'retries':>7} {'cold':>5} {'cold_ms':>7}  storage ops"
+    )
+    for model in args.models:
+        row = run_model(
+            model,
+            [dict(event) for event in events],
+            mode=args.mode,
+            concurrency=args.concurrency,
+            rate=args.rate,
+            think_ms=args.think_ms,
+            latency_ms=args.latency_ms,
+            seed=args.seed,
+        )
+        lat, svc = row["latency"], row["service"]
+        ops = " ".join(f"{name}={count}" for name, count in sorted(row["storage_ops"].items()))
+        print(
+            f"{row['model']:>12} {row['throughput']:>7.1f} {lat[0]:>8.0f} {lat[1]:>8.0f} {lat[2]:>8.0f} "
+            f"{svc[0]:>8.0f} {svc[2]:>8.0f} {row['failed']:>6} {row['retries']:>7} {row['cold_starts']:>5} "
+            f"{row['cold_start_ms']:>7.0f}  {ops}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,994 @@
+"""
+Stand-ins locales de AWS para ejecutar los handlers de fase 1/fase 2 sin
+desplegar: tabla DynamoDB y bucket S3 en memoria, DurableContext local y un cargador de
+los módulos Lambda (sus nombres de fichero llevan guiones y no se pueden
+importar con `import`).
+
+Requiere las mismas dependencias que los Lambdas (boto3 y
+aws_durable_execution_sdk_python); no se llama a AWS en ningún momento.
+"""
+
+import copy
+import importlib.util
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from botocore.exceptions import ClientError
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+DURABLE_VIDEO_PATH = REPO_ROOT / "phase2" / "code" / "fase2-lambda_function.py"
+TRADITIONAL_VIDEO_PATH = REPO_ROOT / "phase2" / "code" / "fase2-video-traditional.py"
+COUNTER_PATH = REPO_ROOT / "phase1" / "code" / "lambda_function.py"
+
+
+def get_logger(name: str = "local", level: int = logging.WARNING) -> logging.Logger:
+    logger = logging.getLogger(name)
+    logger.setLevel(level)
+    return logger
+
+
+class MetricCapture(logging.Handler):
+    """
+    Handler de logging que recoge las líneas `METRIC {...}` emitidas por
+    emit_metric, igual que las extraería CloudWatch Logs Insights.
+    """
+
+    def __init__(self):
+        super().__init__(level=logging.INFO)
+        self.metrics = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        message = record.getMessage()
+        if message.startswith("METRIC "):
+            self.metrics.append(json.loads(message[len("METRIC "):]))
+
+    def of_type(self, metric_type: str) -> list:
+        return [m for m in self.metrics if m.get("metric_type") == metric_type]
+
+
+def capturing_logger(name: str = "local") -> tuple:
+    """Logger a nivel INFO sin propagación, con un MetricCapture enganchado."""
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    capture = MetricCapture()
+    logger.addHandler(capture)
+    return logger, capture
+
+
+# ============================================================
+# DynamoDB
+# ============================================================
+
+def conditional_check_failed(operation: str) -> ClientError:
+    return ClientError(
+        {"Error": {"Code": "ConditionalCheckFailedException", "Message": "The conditional request failed"}},
+        operation,
+    )
+
+
+def throughput_exceeded(operation: str) -> ClientError:
+    return ClientError(
+        {"Error": {"Code": "ProvisionedThroughputExceededException",
+                   "Message": "The level of configured provisioned throughput for the table was exceeded"}},
+        operation,
+    )
+
+
+def item_too_large(operation: str) -> ClientError:
+    return ClientError(
+        {"Error": {"Code": "ValidationException", "Message": "Item size has exceeded the maximum allowed size"}},
+        operation,
+    )
+
+
+# Límites y unidades de capacidad de DynamoDB
+MAX_ITEM_BYTES = 400 * 1024
+WRITE_UNIT_BYTES = 1024
+READ_UNIT_BYTES = 4096
+QUERY_PAGE_BYTES = 1024 * 1024
+
+
+def item_size_bytes(item: dict) -> int:
+    """Aproximación del tamaño de item DynamoDB: JSON sin espacios."""
+    return len(json.dumps(item, ensure_ascii=False, default=str, separators=(",", ":")))
+
+
+def write_capacity_units(before: dict | None, after: dict | None) -> float:
+    """PutItem/UpdateItem consumen según el mayor de los items antes y después, en bloques de 1 KB."""
+    size = max(item_size_bytes(before) if before else 0, item_size_bytes(after) if after else 0)
+    return float(max(1, -(-size // WRITE_UNIT_BYTES)))
+
+
+def read_capacity_units(size_bytes: int, consistent: bool) -> float:
+    """Bloques de 4 KB; las lecturas eventualmente consistentes cuestan la mitad."""
+    units = max(1, -(-size_bytes // READ_UNIT_BYTES))
+    return float(units) if consistent else units / 2.0
+
+
+def consumed_capacity(table_name: str, units: float, mode: str | None) -> dict:
+    if mode in ("TOTAL", "INDEXES"):
+        return {"ConsumedCapacity": {"TableName": table_name, "CapacityUnits": units}}
+    return {}
+
+
+def resolve_name(token: str, names: dict) -> str:
+    return names.get(token, token) if token.startswith("#") else token
+
+
+def evaluate_condition(expression: str | None, item: dict | None, names: dict, values: dict) -> bool:
+    """
+    Evalúa el subconjunto de ConditionExpression que usa el repo: cláusulas
+    unidas por AND de la forma attribute_exists(a), attribute_not_exists(a)
+    o `a <op> :v` con op en =, <>, <, <=, >, >=.
+    """
+    if not expression:
+        return True
+
+    item = item or {}
+    for clause in re.split(r"\s+AND\s+", expression.strip()):
+        clause = clause.strip()
+        match = re.fullmatch(r"attribute_(not_)?exists\((\S+)\)", clause)
+        if match:
+            exists = resolve_name(match.group(2), names) in item
+            if exists == bool(match.group(1)):
+                return False
+            continue
+
+        match = re.fullmatch(r"(\S+)\s*(=|<>|<=|>=|<|>)\s*(:\w+)", clause)
+        if not match:
+            raise NotImplementedError(f"Unsupported condition clause: {clause}")
+
+        field = resolve_name(match.group(1), names)
+        if field not in item:
+            return False
+        left, op, right = item[field], match.group(2), values[match.group(3)]
+        ok = {
+            "=": left == right,
+            "<>": left != right,
+            "<": left < right,
+            "<=": left <= right,
+            ">": left > right,
+            ">=": left >= right,
+        }[op]
+        if not ok:
+            return False
+
+    return True
+
+
+def apply_update_expression(item: dict, expression: str, names: dict, values: dict) -> None:
+    """
+    Aplica SET (a = :v, a = a + :v, a = if_not_exists(a, :v) + :v) y ADD (a :v)
+    sobre el item, in place.
+    """
+    sections = re.split(r"\b(SET|ADD|REMOVE)\b", expression)
+    for action, body in zip(sections[1::2], sections[2::2]):
+        for clause in [c.strip() for c in body.split(",") if c.strip()]:
+            if action == "SET":
+                target, rhs = [part.strip() for part in clause.split("=", 1)]
+                field = resolve_name(target, names)
+                item[field] = evaluate_operand(rhs, item, names, values)
+            elif action == "ADD":
+                target, value_token = clause.split()
+                field = resolve_name(target, names)
+                item[field] = item.get(field, 0) + values[value_token]
+            else:
+                item.pop(resolve_name(clause, names), None)
+
+
+def evaluate_operand(rhs: str, item: dict, names: dict, values: dict):
+    match = re.fullmatch(r"(.+?)\s*([+-])\s*(:\w+)", rhs)
+    if match:
+        base = evaluate_operand(match.group(1).strip(), item, names, values)
+        delta = values[match.group(3)]
+        return base + delta if match.group(2) == "+" else base - delta
+
+    match = re.fullmatch(r"if_not_exists\((\S+),\s*(:\w+)\)", rhs)
+    if match:
+        return item.get(resolve_name(match.group(1), names), values[match.group(2)])
+
+    if rhs.startswith(":"):
+        return copy.deepcopy(values[rhs])
+    return item[resolve_name(rhs, names)]
+
+
+def parse_key_condition(expression: str, names: dict, values: dict) -> tuple:
+    """
+    KeyConditionExpression soportada: `pk = :v` opcionalmente seguida de
+    `AND sk = :s`, `AND sk <op> :s` o `AND begins_with(sk, :p)`.
+    Devuelve (valor de partición, predicado sobre la sort key).
+    """
+    clauses = re.split(r"\s+AND\s+", expression.strip())
+    match = re.fullmatch(r"(\S+)\s*=\s*(:\w+)", clauses[0])
+    if not match:
+        raise NotImplementedError(f"Unsupported key condition: {expression}")
+    partition = values[match.group(2)]
+
+    if len(clauses) == 1:
+        return partition, lambda sort_value: True
+
+    match = re.fullmatch(r"begins_with\((\S+),\s*(:\w+)\)", clauses[1])
+    if match:
+        prefix = values[match.group(2)]
+        return partition, lambda sort_value: isinstance(sort_value, str) and sort_value.startswith(prefix)
+
+    match = re.fullmatch(r"(\S+)\s*(=|<=|>=|<|>)\s*(:\w+)", clauses[1])
+    if not match:
+        raise NotImplementedError(f"Unsupported key condition: {expression}")
+    op, bound = match.group(2), values[match.group(3)]
+    compare = {
+        "=": lambda v: v == bound,
+        "<": lambda v: v < bound,
+        "<=": lambda v: v <= bound,
+        ">": lambda v: v > bound,
+        ">=": lambda v: v >= bound,
+    }[op]
+    return partition, lambda sort_value: sort_value is not None and compare(sort_value)
+
+
+class InMemoryTable:
+    """
+    Tabla DynamoDB (API resource) en memoria con latencia simulada opcional.
+
+    Soporta las expresiones que usan los Lambdas del repo (ver
+    evaluate_condition y apply_update_expression) y contabiliza operaciones,
+    bytes escritos y unidades de capacidad (WCU/RCU, ver
+    write_capacity_units). Con sort_key_name la clave es (partición, sort
+    key) y admite Query; los accesos sin sort key usan (partición, None).
+    Con max_item_bytes (MAX_ITEM_BYTES: 400 KB, como DynamoDB) rechaza los
+    items más grandes; sin él no hay límite, para que los benches que no
+    miden el tamaño del item no dependan de él.
+
+    Con writes_per_second, las escrituras pasan por un token bucket (ráfaga
+    de un segundo de capacidad): sin token fallan con
+    ProvisionedThroughputExceededException, como una tabla provisionada.
+    item_writes_per_second añade un bucket por clave: el límite de una
+    partición (1000 WCU/s en DynamoDB) que un item caliente no puede superar
+    por mucha capacidad que tenga la tabla.
+    """
+
+    def __init__(self, key_name: str, latency_ms: float = 0.0, sort_key_name: str | None = None, name: str = "local",
+                 writes_per_second: float | None = None, item_writes_per_second: float | None = None,
+                 max_item_bytes: int | None = None):
+        self.key_name = key_name
+        self.sort_key_name = sort_key_name
+        self.name = name
+        self.latency_ms = latency_ms
+        self.max_item_bytes = max_item_bytes
+        self.items = {}
+        self.op_counts = {"put_item": 0, "get_item": 0, "update_item": 0, "query": 0}
+        self.bytes_written = 0
+        self.write_units = 0.0
+        self.read_units = 0.0
+        self.throttled = 0
+        self._lock = threading.Lock()
+        self.set_write_capacity(writes_per_second)
+        self.set_item_write_capacity(item_writes_per_second)
+
+    def set_write_capacity(self, writes_per_second: float | None) -> None:
+        self.writes_per_second = writes_per_second
+        self._tokens = writes_per_second or 0.0
+        self._refilled_at = time.monotonic()
+
+    def set_item_write_capacity(self, item_writes_per_second: float | None) -> None:
+        self.item_writes_per_second = item_writes_per_second
+        # clave -> (tokens, instante de la última recarga)
+        self._item_buckets = {}
+
+    def _sleep(self) -> None:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+
+    def _take_write_token(self, operation: str, key) -> None:
+        """Bajo self._lock: consume un token de escritura (tabla e item) o lanza throttling."""
+        now = time.monotonic()
+        if self.item_writes_per_second:
+            tokens, refilled_at = self._item_buckets.get(key, (self.item_writes_per_second, now))
+            tokens = min(self.item_writes_per_second, tokens + (now - refilled_at) * self.item_writes_per_second)
+            if tokens < 1.0:
+                self._item_buckets[key] = (tokens, now)
+                self.throttled += 1
+                raise throughput_exceeded(operation)
+        if self.writes_per_second:
+            self._tokens = min(self.writes_per_second, self._tokens + (now - self._refilled_at) * self.writes_per_second)
+            self._refilled_at = now
+            if self._tokens < 1.0:
+                self.throttled += 1
+                raise throughput_exceeded(operation)
+            self._tokens -= 1.0
+        if self.item_writes_per_second:
+            self._item_buckets[key] = (tokens - 1.0, now)
+
+    def _count(self, op: str) -> None:
+        self.op_counts[op] = self.op_counts.get(op, 0) + 1
+
+    def _key(self, key: dict):
+        if self.sort_key_name is None:
+            return key[self.key_name]
+        return key[self.key_name], key.get(self.sort_key_name)
+
+    def _charge_write(self, before: dict | None, after: dict, operation: str) -> float:
+        if self.max_item_bytes is not None and item_size_bytes(after) > self.max_item_bytes:
+            raise item_too_large(operation)
+        units = write_capacity_units(before, after)
+        self.write_units += units
+        return units
+
+    def put_item(
+        self,
+        Item: dict,
+        ConditionExpression: str | None = None,
+        ExpressionAttributeNames: dict | None = None,
+        ExpressionAttributeValues: dict | None = None,
+        ReturnConsumedCapacity: str | None = None,
+        **kwargs,
+    ) -> dict:
+        self._sleep()
+        key = self._key(Item)
+        with self._lock:
+            self._count("put_item")
+            self._take_write_token("PutItem", key)
+            current = self.items.get(key)
+            if not evaluate_condition(
+                ConditionExpression,
+                current,
+                ExpressionAttributeNames or {},
+                ExpressionAttributeValues or {},
+            ):
+                raise conditional_check_failed("PutItem")
+            units = self._charge_write(current, Item, "PutItem")
+            self.items[key] = copy.deepcopy(Item)
+            self.bytes_written += item_size_bytes(Item)
+        return consumed_capacity(self.name, units, ReturnConsumedCapacity)
+
+    def update_item(
+        self,
+        Key: dict,
+        UpdateExpression: str,
+        ConditionExpression: str | None = None,
+        ExpressionAttributeNames: dict | None = None,
+        ExpressionAttributeValues: dict | None = None,
+        ReturnValues: str = "NONE",
+        ReturnConsumedCapacity: str | None = None,
+        **kwargs,
+    ) -> dict:
+        self._sleep()
+        names = ExpressionAttributeNames or {}
+        values = ExpressionAttributeValues or {}
+        key = self._key(Key)
+        with self._lock:
+            self._count("update_item")
+            self._take_write_token("UpdateItem", key)
+            current = self.items.get(key)
+            if not evaluate_condition(ConditionExpression, current, names, values):
+                raise conditional_check_failed("UpdateItem")
+
+            item = copy.deepcopy(current) if current is not None else dict(Key)
+            apply_update_expression(item, UpdateExpression, names, values)
+            units = self._charge_write(current, item, "UpdateItem")
+            self.items[key] = item
+            # DynamoDB factura el tamaño del item resultante (write_units);
+            # aquí contamos los bytes enviados, que es lo que reduce una
+            # escritura parcial.
+            self.bytes_written += item_size_bytes(values)
+
+            response = consumed_capacity(self.name, units, ReturnConsumedCapacity)
+            if ReturnValues == "ALL_NEW":
+                response["Attributes"] = copy.deepcopy(item)
+            elif ReturnValues == "UPDATED_NEW":
+                response["Attributes"] = {
+                    field: copy.deepcopy(value)
+                    for field, value in item.items()
+                    if current is None or current.get(field) != value
+                }
+        return response
+
+    def get_item(self, Key: dict, ConsistentRead: bool = False, ReturnConsumedCapacity: str | None = None,
+                 **kwargs) -> dict:
+        self._sleep()
+        with self._lock:
+            self._count("get_item")
+            item = self.items.get(self._key(Key))
+            units = read_capacity_units(item_size_bytes(item) if item else 0, ConsistentRead)
+            self.read_units += units
+            response = consumed_capacity(self.name, units, ReturnConsumedCapacity)
+            if item is not None:
+                response["Item"] = copy.deepcopy(item)
+        return response
+
+    def query(
+        self,
+        KeyConditionExpression: str,
+        ExpressionAttributeNames: dict | None = None,
+        ExpressionAttributeValues: dict | None = None,
+        ExclusiveStartKey: dict | None = None,
+        Limit: int | None = None,
+        ScanIndexForward: bool = True,
+        ConsistentRead: bool = False,
+        ReturnConsumedCapacity: str | None = None,
+        **kwargs,
+    ) -> dict:
+        """Items de una partición ordenados por sort key, en páginas de hasta 1 MB (o Limit items)."""
+        if self.sort_key_name is None:
+            raise NotImplementedError("query requires a table with a sort key")
+        self._sleep()
+        partition, matches = parse_key_condition(
+            KeyConditionExpression, ExpressionAttributeNames or {}, ExpressionAttributeValues or {}
+        )
+        with self._lock:
+            self._count("query")
+            keys = sorted(
+                (key for key in self.items if key[0] == partition and matches(key[1])),
+                key=lambda key: (key[1] is not None, key[1] or ""),
+                reverse=not ScanIndexForward,
+            )
+            if ExclusiveStartKey is not None:
+                start = self._key(ExclusiveStartKey)
+                keys = keys[keys.index(start) + 1:] if start in keys else []
+
+            page, page_bytes = [], 0
+            for key in keys:
+                if Limit is not None and len(page) >= Limit:
+                    break
+                if page and page_bytes >= QUERY_PAGE_BYTES:
+                    break
+                item = self.items[key]
+                page.append(copy.deepcopy(item))
+                page_bytes += item_size_bytes(item)
+
+            units = read_capacity_units(page_bytes, ConsistentRead)
+            self.read_units += units
+            response = consumed_capacity(self.name, units, ReturnConsumedCapacity)
+            response.update({"Items": page, "Count": len(page)})
+            if len(page) < len(keys):
+                last = page[-1]
+                response["LastEvaluatedKey"] = {
+                    self.key_name: last[self.key_name],
+                    self.sort_key_name: last[self.sort_key_name],
+                }
+        return response
+
+
+class LocalDynamoDBClient:
+    """
+    Cliente DynamoDB de bajo nivel en memoria: traduce AttributeValue a/desde
+    valores de la API resource (TypeSerializer/TypeDeserializer de boto3) y
+    delega en la InMemoryTable de cada TableName.
+    """
+
+    def __init__(self, tables: dict):
+        self.tables = tables
+        self._serializer = TypeSerializer()
+        self._deserializer = TypeDeserializer()
+
+    def _to_python(self, attributes: dict | None) -> dict | None:
+        if attributes is None:
+            return None
+        return {k: self._deserializer.deserialize(v) for k, v in attributes.items()}
+
+    def _to_attributes(self, item: dict) -> dict:
+        return {k: self._serializer.serialize(v) for k, v in item.items()}
+
+    def _table(self, table_name: str) -> InMemoryTable:
+        table = self.tables[table_name]
+        table.name = table_name
+        return table
+
+    def put_item(self, TableName: str, Item: dict, ExpressionAttributeValues: dict | None = None, **kwargs) -> dict:
+        return self._table(TableName).put_item(
+            Item=self._to_python(Item),
+            ExpressionAttributeValues=self._to_python(ExpressionAttributeValues),
+            **kwargs,
+        )
+
+    def update_item(self, TableName: str, Key: dict, ExpressionAttributeValues: dict | None = None, **kwargs) -> dict:
+        response = self._table(TableName).update_item(
+            Key=self._to_python(Key),
+            ExpressionAttributeValues=self._to_python(ExpressionAttributeValues),
+            **kwargs,
+        )
+        if "Attributes" in response:
+            response["Attributes"] = self._to_attributes(response["Attributes"])
+        return response
+
+    def get_item(self, TableName: str, Key: dict, **kwargs) -> dict:
+        response = self._table(TableName).get_item(Key=self._to_python(Key), **kwargs)
+        if "Item" in response:
+            response["Item"] = self._to_attributes(response["Item"])
+        return response
+
+    def query(self, TableName: str, ExpressionAttributeValues: dict | None = None,
+              ExclusiveStartKey: dict | None = None, **kwargs) -> dict:
+        response = self._table(TableName).query(
+            ExpressionAttributeValues=self._to_python(ExpressionAttributeValues),
+            ExclusiveStartKey=self._to_python(ExclusiveStartKey),
+            **kwargs,
+        )
+        response["Items"] = [self._to_attributes(item) for item in response["Items"]]
+        if "LastEvaluatedKey" in response:
+            response["LastEvaluatedKey"] = self._to_attributes(response["LastEvaluatedKey"])
+        return response
+
+    def batch_write_item(self, RequestItems: dict, ReturnConsumedCapacity: str | None = None, **kwargs) -> dict:
+        """Solo PutRequest (como los usa el repo); máximo 25 peticiones como DynamoDB."""
+        requests = sum(len(batch) for batch in RequestItems.values())
+        if requests > 25:
+            raise ClientError(
+                {"Error": {"Code": "ValidationException", "Message": "Too many items requested for the BatchWriteItem call"}},
+                "BatchWriteItem",
+            )
+        consumed = []
+        for table_name, batch in RequestItems.items():
+            table = self._table(table_name)
+            units = 0.0
+            for request in batch:
+                response = table.put_item(Item=self._to_python(request["PutRequest"]["Item"]), ReturnConsumedCapacity="TOTAL")
+                units += response["ConsumedCapacity"]["CapacityUnits"]
+            table.op_counts["batch_write_item"] = table.op_counts.get("batch_write_item", 0) + 1
+            consumed.append({"TableName": table_name, "CapacityUnits": units})
+        response = {"UnprocessedItems": {}}
+        if ReturnConsumedCapacity in ("TOTAL", "INDEXES"):
+            response["ConsumedCapacity"] = consumed
+        return response
+
+
+# ============================================================
+# S3
+# ============================================================
+
+class LocalBody:
+    def __init__(self, data: bytes):
+        self._data = data
+
+    def read(self) -> bytes:
+        return self._data
+
+
+class LocalS3Client:
+    """Cliente S3 (API client) en memoria: put_object/get_object."""
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.objects = {}
+        self.op_counts = {"put_object": 0, "get_object": 0}
+        self.bytes_written = 0
+        self._lock = threading.Lock()
+
+    def put_object(self, Bucket: str, Key: str, Body, **kwargs) -> dict:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+        data = Body.encode("utf-8") if isinstance(Body, str) else bytes(Body)
+        with self._lock:
+            self.op_counts["put_object"] += 1
+            self.bytes_written += len(data)
+            self.objects[(Bucket, Key)] = data
+        return {}
+
+    def get_object(self, Bucket: str, Key: str, **kwargs) -> dict:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+        with self._lock:
+            self.op_counts["get_object"] += 1
+            if (Bucket, Key) not in self.objects:
+                raise ClientError({"Error": {"Code": "NoSuchKey", "Message": Key}}, "GetObject")
+            return {"Body": LocalBody(self.objects[(Bucket, Key)])}
+
+
+# ============================================================
+# Durable runtime
+# ============================================================
+
+class LocalStepContext:
+    def __init__(self, logger, attempt: int = 1):
+        self.logger = logger
+        self.attempt = attempt
+
+
+class LocalBatchResult:
+    """Subconjunto de BatchResult del SDK: throw_if_error() y get_results()."""
+
+    def __init__(self, results: list, errors: list):
+        self.results = results
+        self.errors = errors
+
+    def throw_if_error(self) -> None:
+        for error in self.errors:
+            if error is not None:
+                raise error
+
+    def get_results(self) -> list:
+        return [r for r, e in zip(self.results, self.errors) if e is None]
+
+
+class LocalDurableContext:
+    """
+    DurableContext local: ejecuta steps en el propio proceso, reintenta hasta
+    max_attempts y registra el tamaño JSON de cada checkpoint.
+
+    Reintentos: si el step trae StepConfig.retry_strategy (o el contexto se
+    crea con retry_strategy, p. ej. RetryPresets.default() para emular el
+    runtime sin StepConfig), se usa su decisión como el runtime, que aplica
+    un mínimo de 1 s de espera. La espera no se duerme (en Lambda es una
+    suspensión); se suma en `retry_wait_s`.
+
+    map() usa un ThreadPoolExecutor acotado por MapConfig.max_concurrency,
+    que es el comportamiento del runtime real con una única instancia.
+
+    Replay: el resultado (serializado en JSON) de cada step queda en
+    `history`, indexado por nombre y ocurrencia. Un contexto creado con
+    history=<history de una invocación anterior> devuelve esos resultados
+    sin ejecutar la función, como el runtime al reanudar una ejecución.
+    """
+
+    def __init__(self, logger=None, max_attempts: int = 3, history: dict | None = None, retry_strategy=None):
+        self.logger = logger or get_logger()
+        self.max_attempts = max_attempts
+        self.retry_strategy = retry_strategy
+        self.checkpoints = []
+        self.retries = 0
+        self.retry_wait_s = 0
+        self.replayed = 0
+        self.history = dict(history or {})
+        self._occurrences = {}
+        self._lock = threading.Lock()
+
+    def _history_key(self, name: str | None) -> str:
+        with self._lock:
+            occurrence = self._occurrences.get(name, 0)
+            self._occurrences[name] = occurrence + 1
+        return f"{name}#{occurrence}"
+
+    def _record_checkpoint(self, name: str | None, result) -> None:
+        size = len(json.dumps(result, ensure_ascii=False, default=str))
+        with self._lock:
+            self.checkpoints.append({"name": name, "size_bytes": size})
+
+    def step(self, func, name: str | None = None, config=None):
+        name = name or getattr(func, "_original_name", None)
+        key = self._history_key(name)
+        if key in self.history:
+            with self._lock:
+                self.replayed += 1
+            return json.loads(self.history[key])
+
+        retry_strategy = getattr(config, "retry_strategy", None) or self.retry_strategy
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                result = func(LocalStepContext(self.logger, attempt))
+                break
+            except Exception as e:
+                if retry_strategy is None:
+                    if attempt >= self.max_attempts:
+                        raise
+                    wait_s = 0
+                else:
+                    decision = retry_strategy(e, attempt)
+                    if not decision.should_retry:
+                        raise
+                    wait_s = max(1, decision.delay_seconds)
+                with self._lock:
+                    self.retries += 1
+                    self.retry_wait_s += wait_s
+
+        self._record_checkpoint(name, result)
+        with self._lock:
+            self.history[key] = json.dumps(result, ensure_ascii=False, default=str)
+        return result
+
+    def map(self, inputs, func, name: str | None = None, config=None) -> LocalBatchResult:
+        max_concurrency = getattr(config, "max_concurrency", None) or len(inputs) or 1
+
+        def run(index):
+            try:
+                return func(self, inputs[index], index, inputs), None
+            except Exception as e:
+                return None, e
+
+        with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+            outcomes = list(pool.map(run, range(len(inputs))))
+
+        return LocalBatchResult([o[0] for o in outcomes], [o[1] for o in outcomes])
+
+
+# ============================================================
+# Lambda (continuaciones)
+# ============================================================
+
+class LocalLambdaClient:
+    """
+    Cliente Lambda en memoria: invoke guarda cada invocación (función, tipo
+    y payload decodificado) en `invocations` para que el benchmark la
+    ejecute después, como haría la cola de eventos asíncronos de Lambda.
+    Con `dispatch`, las invocaciones "Event" se entregan además a
+    dispatch(invocation) en el momento (p. ej. a un executor que ejecuta el
+    handler destino).
+    """
+
+    def __init__(self, dispatch=None):
+        self.invocations = []
+        self.op_counts = {"invoke": 0}
+        self.dispatch = dispatch
+        self._lock = threading.Lock()
+
+    def invoke(self, FunctionName: str, Payload=b"{}", InvocationType: str = "RequestResponse", **kwargs) -> dict:
+        if isinstance(Payload, (bytes, bytearray)):
+            Payload = Payload.decode("utf-8")
+        with self._lock:
+            self.op_counts["invoke"] += 1
+            self.invocations.append({
+                "function_name": FunctionName,
+                "invocation_type": InvocationType,
+                "payload": json.loads(Payload),
+            })
+            invocation = self.invocations[-1]
+        if self.dispatch is not None and InvocationType == "Event":
+            self.dispatch(invocation)
+        return {"StatusCode": 202 if InvocationType == "Event" else 200}
+
+
+# ============================================================
+# SQS (fan-out por cola)
+# ============================================================
+
+class LocalSQSClient:
+    """
+    Cola SQS estándar en memoria con la semántica que importa al fan-out:
+    entrega al menos una vez, visibility timeout (un mensaje recibido y no
+    borrado vuelve a ser visible al expirar) y DLQ tras max_receive_count
+    recepciones. Los mensajes movidos a la DLQ quedan en `dead_letters`.
+    """
+
+    def __init__(self, visibility_timeout_s: float = 30.0, max_receive_count: int = 3, latency_ms: float = 0.0):
+        self.visibility_timeout_s = visibility_timeout_s
+        self.max_receive_count = max_receive_count
+        self.latency_ms = latency_ms
+        self.messages = {}
+        self.dead_letters = []
+        self.receives = 0
+        self.redeliveries = 0
+        self.op_counts = {"send_message_batch": 0, "receive_message": 0, "delete_message_batch": 0}
+        self._condition = threading.Condition()
+
+    def _sleep(self) -> None:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+
+    def send_message_batch(self, QueueUrl: str, Entries: list, **kwargs) -> dict:
+        if len(Entries) > 10:
+            raise ClientError(
+                {"Error": {"Code": "AWS.SimpleQueueService.TooManyEntriesInBatchRequest",
+                           "Message": "Maximum number of entries per request are 10"}},
+                "SendMessageBatch",
+            )
+        self._sleep()
+        successful = []
+        with self._condition:
+            self.op_counts["send_message_batch"] += 1
+            for entry in Entries:
+                message_id = str(uuid.uuid4())
+                self.messages[message_id] = {
+                    "body": entry["MessageBody"],
+                    "visible_at": time.monotonic(),
+                    "receive_count": 0,
+                    "receipt_handle": None,
+                }
+                successful.append({"Id": entry["Id"], "MessageId": message_id})
+            self._condition.notify_all()
+        return {"Successful": successful, "Failed": []}
+
+    def _take_visible(self, limit: int, visibility_timeout_s: float) -> list:
+        now = time.monotonic()
+        taken = []
+        for message_id, message in list(self.messages.items()):
+            if len(taken) >= limit:
+                break
+            if message["visible_at"] > now:
+                continue
+            if message["receive_count"] >= self.max_receive_count:
+                # Redrive policy: a la DLQ en lugar de otra recepción
+                self.dead_letters.append(self.messages.pop(message_id))
+                continue
+            if message["receive_count"]:
+                self.redeliveries += 1
+            message["receive_count"] += 1
+            message["visible_at"] = now + visibility_timeout_s
+            message["receipt_handle"] = f"{message_id}#{message['receive_count']}"
+            taken.append({
+                "MessageId": message_id,
+                "ReceiptHandle": message["receipt_handle"],
+                "Body": message["body"],
+                "Attributes": {"ApproximateReceiveCount": str(message["receive_count"])},
+            })
+        return taken
+
+    def receive_message(self, QueueUrl: str, MaxNumberOfMessages: int = 1, WaitTimeSeconds: float = 0,
+                        VisibilityTimeout: float | None = None, **kwargs) -> dict:
+        self._sleep()
+        visibility = self.visibility_timeout_s if VisibilityTimeout is None else VisibilityTimeout
+        deadline = time.monotonic() + WaitTimeSeconds
+        with self._condition:
+            self.op_counts["receive_message"] += 1
+            while True:
+                taken = self._take_visible(min(MaxNumberOfMessages, 10), visibility)
+                remaining = deadline - time.monotonic()
+                if taken or remaining <= 0:
+                    break
+                # Long polling: espera a un envío o a que expire alguna visibilidad
+                self._condition.wait(timeout=min(remaining, 0.05))
+            self.receives += len(taken)
+        return {"Messages": taken} if taken else {}
+
+    def delete_message_batch(self, QueueUrl: str, Entries: list, **kwargs) -> dict:
+        self._sleep()
+        successful = []
+        with self._condition:
+            self.op_counts["delete_message_batch"] += 1
+            for entry in Entries:
+                message_id, _ = entry["ReceiptHandle"].split("#", 1)
+                message = self.messages.get(message_id)
+                # Un receipt handle caducado (mensaje ya reentregado) no borra
+                if message is not None and message["receipt_handle"] == entry["ReceiptHandle"]:
+                    del self.messages[message_id]
+                successful.append({"Id": entry["Id"]})
+        return {"Successful": successful, "Failed": []}
+
+    def in_flight(self) -> int:
+        with self._condition:
+            return len(self.messages)
+
+
+def sqs_lambda_event(messages: list, queue_arn: str = "arn:aws:sqs:us-east-2:000000000000:local-queue") -> dict:
+    """Mensajes de receive_message con la forma del evento del trigger SQS de Lambda."""
+    return {
+        "Records": [
+            {
+                "messageId": message["MessageId"],
+                "receiptHandle": message["ReceiptHandle"],
+                "body": message["Body"],
+                "attributes": message.get("Attributes", {}),
+                "eventSource": "aws:sqs",
+                "eventSourceARN": queue_arn,
+            }
+            for message in messages
+        ]
+    }
+
+
+class LocalLambdaContext:
+    """
+    Contexto Lambda mínimo con timeout: get_remaining_time_in_millis cuenta
+    desde la creación del contexto, como el de una invocación real.
+    """
+
+    def __init__(self, logger=None, timeout_ms: int = 900_000, function_name: str = "local-function"):
+        self.logger = logger
+        self.function_name = function_name
+        self.invoked_function_arn = f"arn:aws:lambda:us-east-2:000000000000:function:{function_name}"
+        self.aws_request_id = str(uuid.uuid4())
+        self._deadline = time.monotonic() + timeout_ms / 1000.0
+
+    def get_remaining_time_in_millis(self) -> int:
+        return max(0, int((self._deadline - time.monotonic()) * 1000))
+
+
+# ============================================================
+# Carga de módulos Lambda
+# ============================================================
+
+def load_lambda_module(path: Path, module_name: str):
+    """
+    Importa un fichero Lambda por ruta. Fija una región por defecto por si se
+    construye algún cliente boto3 real (los módulos los crean en el primer uso).
+    """
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-2")
+    # Los benchmarks leen los eventos crudos: sin muestreo salvo que se pida
+    os.environ.setdefault("METRICS_RAW_SAMPLE_RATE", "1")
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def install_local_tables(module, latency_ms: float = 0.0) -> dict:
+    """
+    Sustituye las tablas DynamoDB del módulo por tablas en memoria. La tabla
+    de jobs lleva sort key (JOBS_TABLE_SORT_KEY del módulo, "item_key" por
+    defecto) para el layout por chunks del pipeline tradicional; los accesos
+    solo por job_id siguen funcionando igual.
+    """
+    tables = {
+        "jobs_table": InMemoryTable(
+            "job_id",
+            latency_ms=latency_ms,
+            sort_key_name=getattr(module, "JOBS_TABLE_SORT_KEY", "item_key"),
+        ),
+        "failure_table": InMemoryTable("marker_id", latency_ms=latency_ms),
+    }
+    if hasattr(module, "COUNTER_TABLE_NAME"):
+        # Entidad contador de fase 1: un item por shard
+        tables["counter_table"] = InMemoryTable("counter_id", latency_ms=latency_ms, sort_key_name="shard")
+    for name, table in tables.items():
+        module.set_aws_client(name, table)
+    if hasattr(module, "JOBS_TABLE_NAME"):
+        # Los módulos de vídeo usan el cliente de bajo nivel con TableName
+        module.set_aws_client(
+            "dynamodb",
+            LocalDynamoDBClient({
+                module.JOBS_TABLE_NAME: tables["jobs_table"],
+                module.FAILURE_TABLE_NAME: tables["failure_table"],
+            }),
+        )
+    return tables
+
+
+def install_local_aws(module, latency_ms: float = 0.0) -> dict:
+    """
+    Tablas en memoria + clientes S3 y Lambda en memoria; los documentos EMF del sink de
+    métricas se guardan en stand_ins["emf_documents"]. Vacía además las cachés
+    de estado del módulo para que cada ejecución empiece en frío.
+    """
+    stand_ins = install_local_tables(module, latency_ms=latency_ms)
+    stand_ins["s3"] = LocalS3Client(latency_ms=latency_ms)
+    stand_ins["lambda"] = LocalLambdaClient()
+    stand_ins["emf_documents"] = []
+    attach_local_aws(module, stand_ins)
+    return stand_ins
+
+
+def attach_local_aws(module, stand_ins: dict) -> None:
+    """
+    Conecta un módulo a stand-ins ya creados (p. ej. varias copias del módulo,
+    una por contenedor simulado, contra el mismo DynamoDB/S3 en memoria).
+    """
+    for name in ("jobs_table", "failure_table", "counter_table", "s3", "lambda", "sqs"):
+        if name in stand_ins:
+            module.set_aws_client(name, stand_ins[name])
+    if hasattr(module, "JOBS_TABLE_NAME"):
+        module.set_aws_client(
+            "dynamodb",
+            LocalDynamoDBClient({
+                module.JOBS_TABLE_NAME: stand_ins["jobs_table"],
+                module.FAILURE_TABLE_NAME: stand_ins["failure_table"],
+            }),
+        )
+    # Documentos EMF de metrics.flush() en lugar de stdout
+    module.metrics.write = lambda line: stand_ins["emf_documents"].append(json.loads(line))
+    if hasattr(module, "_state_object_cache"):
+        module._state_object_cache.clear()
+
+
+def video_event(duration_seconds: int, test_case: str = "local_bench", **overrides) -> dict:
+    """Evento de fase 2 equivalente a phase2/test-events/video_happy_path_001.json."""
+    event = {
+        "test_case": test_case,
+        "video": {
+            "video_id": f"video-{duration_seconds:03d}s",
+            "input_uri": "s3://durable-video-artifacts/input/sample.mp4",
+            "format": "mp4",
+            "duration_seconds": duration_seconds,
+            "resolution": "1080p",
+        },
+        "encoding": {
+            "codec": "h264",
+            "bitrate_kbps": 2200,
+            "chunk_duration_seconds": 10,
+        },
+        "failures": {},
+    }
+    event.update(overrides)
+    return event
@@ -1,17 +1,101 @@
-import os
 import time
+
+# Perfil de la fase INIT: marca tras cada grupo de imports (ver emit_init_profile)
+_init_marks = [("start", time.perf_counter())]
+
+import os
 import json
-import boto3
+import math
+import random
+import threading
+import zlib
+
+_init_marks.append(("stdlib", time.perf_counter()))
+
 from botocore.exceptions import ClientError
 
+_init_marks.append(("botocore", time.perf_counter()))
+
+from aws_durable_execution_sdk_python.config import StepConfig, StepSemantics
 from aws_durable_execution_sdk_python.context import DurableContext, StepContext, durable_step
 from aws_durable_execution_sdk_python.execution import durable_execution
 
+_init_marks.append(("durable_sdk", time.perf_counter()))
+
+_init_profile_emitted = False
+
 
 # Tabla DynamoDB para controlar fail_once
 FAILURE_TABLE_NAME = os.environ.get("FAILURE_TABLE_NAME", "durable-failure-markers")
-dynamodb = boto3.resource("dynamodb")
-failure_table = dynamodb.Table(FAILURE_TABLE_NAME)
+METRICS_MODE = os.environ.get("METRICS_MODE", "emf")
+# Fracción de eventos por step/chunk/intento que se siguen escribiendo como
+# línea METRIC además del agregado EMF
+METRICS_RAW_SAMPLE_RATE = float(os.environ.get("METRICS_RAW_SAMPLE_RATE", "0.1"))
+METRICS_NAMESPACE = os.environ.get("METRICS_NAMESPACE", "DurableFunctionsResearch")
+# Añade al documento EMF los contadores por status y los buckets de cada
+# histograma; solo para depurar, multiplica su tamaño
+METRICS_EMF_DETAIL = os.environ.get("METRICS_EMF_DETAIL", "0") == "1"
+# Máximo de operaciones por evento en modo batch: el resultado del step (con
+# valor y versión por operación) es un único checkpoint
+MAX_BATCH_OPERATIONS = int(os.environ.get("MAX_BATCH_OPERATIONS", "1000"))
+# Entidad contador persistente (evento con "counter_id"): tabla con clave
+# (counter_id, shard). "sharded" reparte las escrituras entre COUNTER_SHARDS
+# items PN-counter; "single" usa un único item por contador.
+COUNTER_TABLE_NAME = os.environ.get("COUNTER_TABLE_NAME", "durable-counters")
+COUNTER_STORE = os.environ.get("COUNTER_STORE", "sharded")
+COUNTER_SHARDS = int(os.environ.get("COUNTER_SHARDS", "32"))
+# Reintentos dentro del step de una escritura rechazada por throttling
+# (backoff exponencial con full jitter, como el reintento estándar de boto3)
+COUNTER_WRITE_MAX_ATTEMPTS = int(os.environ.get("COUNTER_WRITE_MAX_ATTEMPTS", "10"))
+COUNTER_WRITE_BASE_DELAY_MS = float(os.environ.get("COUNTER_WRITE_BASE_DELAY_MS", "25"))
+COUNTER_WRITE_MAX_DELAY_MS = float(os.environ.get("COUNTER_WRITE_MAX_DELAY_MS", "2000"))
+
+
+# ── Clientes AWS (construcción perezosa) ──────────────────────────────────
+# boto3 y las tablas se crean en el primer uso y no al importar el módulo: la
+# de markers solo se usa con fail_mode="once" y la de contadores con
+# "counter_id". Una única boto3 Session por contenedor.
+
+_aws_session = None
+_aws_clients = {}
+_aws_clients_lock = threading.RLock()
+# ms de construcción de cada cliente (inclusivo: las tablas incluyen dynamodb)
+_aws_client_init_ms = {}
+
+
+def _build_aws_client(name: str):
+    global _aws_session
+    if _aws_session is None:
+        import boto3
+        _aws_session = boto3.session.Session()
+    if name == "dynamodb":
+        return _aws_session.resource("dynamodb")
+    if name == "failure_table":
+        return aws_client("dynamodb").Table(FAILURE_TABLE_NAME)
+    if name == "counter_table":
+        return aws_client("dynamodb").Table(COUNTER_TABLE_NAME)
+    raise ValueError(f"Unknown AWS client: {name}")
+
+
+def aws_client(name: str):
+    """
+    Cliente o tabla compartida del contenedor ("dynamodb", "failure_table",
+    "counter_table"), construida en el primer uso. En local se sustituye con set_aws_client().
+    """
+    client = _aws_clients.get(name)
+    if client is None:
+        with _aws_clients_lock:
+            client = _aws_clients.get(name)
+            if client is None:
+                start = time.perf_counter()
+                client = _build_aws_client(name)
+                _aws_client_init_ms[name] = round((time.perf_counter() - start) * 1000, 3)
+                _aws_clients[name] = client
+    return client
+
+
+def set_aws_client(name: str, client) -> None:
+    _aws_clients[name] = client
 
 
 # ── Detección de replay a nivel módulo ────────────────────────────────────
@@ -22,16 +106,305 @@ failure_table = dynamodb.Table(FAILURE_TABLE_NAME)
 _module_load_time = time.time()
 _handler_invocation_count = 0
 
+# Steps servidos desde checkpoint vs. ejecutados en esta invocación: en cada
+# reanudación el runtime re-ejecuta el handler desde el principio.
+class ReplayTracker:
+    """
+    Steps de la invocación actual servidos desde checkpoint (replay) frente a
+    ejecutados en vivo, y tiempo del orquestador hasta el primer step en vivo.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.started_at = time.perf_counter()
+            self.first_live_at = None
+            self.replayed = 0
+            self.executed = 0
+            self.replayed_step_ms = 0.0
+
+    def mark_live(self) -> None:
+        with self._lock:
+            if self.first_live_at is None:
+                self.first_live_at = time.perf_counter()
+
+    def record(self, executed: bool, duration_ms: float) -> None:
+        with self._lock:
+            if executed:
+                self.executed += 1
+            else:
+                self.replayed += 1
+                self.replayed_step_ms += duration_ms
+
+    def summary(self) -> dict:
+        with self._lock:
+            end = self.first_live_at if self.first_live_at is not None else time.perf_counter()
+            return {
+                "steps_replayed": self.replayed,
+                "steps_executed": self.executed,
+                "replay_ms": round((end - self.started_at) * 1000, 3),
+                "replayed_step_ms": round(self.replayed_step_ms, 3),
+            }
+
+
+replay = ReplayTracker()
+
+
+def tracked_step(context, func, name: str | None = None, config: StepConfig | None = None):
+    """
+    context.step() que registra si el step se ejecuta o se sirve desde
+    checkpoint: la función envuelta solo corre cuando el step va en vivo.
+    """
+    executed = []
+
+    def live(step_context):
+        if not executed:
+            executed.append(True)
+            replay.mark_live()
+        return func(step_context)
+
+    live._original_name = getattr(func, "_original_name", None)
+    start = time.perf_counter()
+    result = context.step(live, name=name, config=config)
+    replay.record(bool(executed), (time.perf_counter() - start) * 1000)
+    return result
+
+
+# ── Métricas: sink por invocación (EMF) ──────────────────────────────────
+
+# Métricas agregables -> campo que se agrega en histograma. Solo se agregan
+# las que se repiten por chunk: chunk_duration y los step_duration y
+# state_write de AGGREGATED_STEPS. Las de una vez por invocación se emiten
+# siempre en crudo; agregarlas añadiría 5 métricas EMF por cada una.
+AGGREGATED_METRICS = {
+    "step_duration": "duration_ms",
+    "chunk_duration": "duration_ms",
+    "state_write": "write_bytes",
+}
+# Steps que se repiten por chunk dentro de una invocación (sin sufijo). La
+# fase 1 no tiene ninguno: sus métricas son por invocación y van en crudo.
+AGGREGATED_STEPS = ()
+METRIC_UNITS = {"duration_ms": "Milliseconds", "write_bytes": "Bytes"}
+CHUNK_SECONDS_BUCKETS = (2, 5, 10, 20, 60)
+# Histograma log-lineal: cada bucket cubre un factor HISTOGRAM_GROWTH
+HISTOGRAM_GROWTH = 1.1
+EMF_MAX_METRICS_PER_DIRECTIVE = 100
+
+
+def metric_group(payload: dict) -> str:
+    """
+    Grupo de agregación: métrica + step (sin sufijo de chunk, p. ej.
+    encode_chunk_7 -> encode_chunk); chunk_duration se agrupa por tramo de
+    duración del chunk.
+    """
+    metric_type = payload["metric_type"]
+    if metric_type == "chunk_duration":
+        seconds = payload.get("chunk_seconds", 0)
+        upper = next((b for b in CHUNK_SECONDS_BUCKETS if seconds <= b), None)
+        return f"{metric_type}.chunk_le{upper}s" if upper else f"{metric_type}.chunk_gt{CHUNK_SECONDS_BUCKETS[-1]}s"
+    step = str(payload.get("step", "all")).rstrip("0123456789").rstrip("_")
+    return f"{metric_type}.{step}"
+
+
+def aggregated_field(payload: dict) -> str | None:
+    """Campo que se agrega del evento, o None si se emite siempre en crudo."""
+    metric_type = payload["metric_type"]
+    field = AGGREGATED_METRICS.get(metric_type)
+    if field is None or metric_type == "chunk_duration":
+        return field
+    return field if metric_group(payload).partition(".")[2] in AGGREGATED_STEPS else None
+
+
+class MetricsSink:
+    """
+    Buffer de métricas de una invocación.
+
+    Las métricas con aggregated_field se acumulan por grupo (metric_group)
+    como contador por status + histograma log-lineal, y solo una fracción
+    sample_rate de ellas se sigue escribiendo como línea METRIC (muestreo
+    determinista: 1 de cada 1/sample_rate por tipo). flush() escribe los
+    agregados una sola vez como documento EMF en stdout; con detail=True
+    incluye además los contadores por status y los buckets de cada grupo.
+
+    mode="log" mantiene el comportamiento original: todo en crudo, sin EMF.
+    """
+
+    def __init__(self, *, service: str, mode: str, sample_rate: float, namespace: str, detail: bool):
+        self.service = service
+        self.mode = mode
+        self.sample_rate = sample_rate
+        self.namespace = namespace
+        self.detail = detail
+        self.write = print
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.groups = {}
+            self.seen = {}
+            self.raw_emitted = 0
+            self.raw_sampled_out = 0
+
+    def record(self, payload: dict) -> bool:
+        """Acumula el evento; devuelve True si debe escribirse en crudo."""
+        metric_type = payload["metric_type"]
+        field = aggregated_field(payload)
+        if self.mode != "emf" or field is None:
+            return True
+
+        value = payload.get(field)
+        with self._lock:
+            group = self.groups.setdefault(
+                metric_group(payload),
+                {"field": field, "statuses": {}, "buckets": {}, "count": 0, "sum": 0.0, "min": None, "max": None},
+            )
+            status = payload.get("status", "success")
+            group["statuses"][status] = group["statuses"].get(status, 0) + 1
+            if isinstance(value, (int, float)):
+                bucket = math.floor(math.log(value, HISTOGRAM_GROWTH)) if value > 0 else None
+                group["buckets"][bucket] = group["buckets"].get(bucket, 0) + 1
+                group["count"] += 1
+                group["sum"] += value
+                group["min"] = value if group["min"] is None else min(group["min"], value)
+                group["max"] = value if group["max"] is None else max(group["max"], value)
+
+            seen = self.seen.get(metric_type, 0)
+            self.seen[metric_type] = seen + 1
+            emit_raw = int((seen + 1) * self.sample_rate) > int(seen * self.sample_rate)
+            if emit_raw:
+                self.raw_emitted += 1
+            else:
+                self.raw_sampled_out += 1
+            return emit_raw
+
+    @staticmethod
+    def percentile(group: dict, q: float) -> float:
+        """Cota superior del bucket que contiene el percentil q (acotada por max)."""
+        target = q * group["count"]
+        cumulative = 0
+        for bucket in sorted(group["buckets"], key=lambda b: -math.inf if b is None else b):
+            cumulative += group["buckets"][bucket]
+            if cumulative >= target:
+                upper = 0.0 if bucket is None else HISTOGRAM_GROWTH ** (bucket + 1)
+                return round(min(upper, group["max"]), 3)
+        return group["max"]
+
+    def build_document(self, properties: dict) -> dict | None:
+        with self._lock:
+            if not self.groups:
+                return None
+
+            values = {}
+            metric_definitions = []
+            histograms = {}
+            counters = {}
+            for name, group in sorted(self.groups.items()):
+                counters[name] = dict(group["statuses"])
+                metric_definitions.append({"Name": f"{name}.count", "Unit": "Count"})
+                values[f"{name}.count"] = sum(group["statuses"].values())
+                if not group["count"]:
+                    continue
+
+                unit = METRIC_UNITS.get(group["field"], "None")
+                stats = {
+                    "p50": self.percentile(group, 0.50),
+                    "p99": self.percentile(group, 0.99),
+                    "max": group["max"],
+                    "sum": round(group["sum"], 3),
+                }
+                for stat, value in stats.items():
+                    metric_definitions.append({"Name": f"{name}.{stat}", "Unit": unit})
+                    values[f"{name}.{stat}"] = value
+                histograms[name] = {
+                    "field": group["field"],
+                    "growth": HISTOGRAM_GROWTH,
+                    "buckets": [
+                        [None if b is None else round(HISTOGRAM_GROWTH ** (b + 1), 3), group["buckets"][b]]
+                        for b in sorted(group["buckets"], key=lambda b: -math.inf if b is None else b)
+                    ],
+                }
+
+            directives = [
+                {
+                    "Namespace": self.namespace,
+                    "Dimensions": [["service"]],
+                    "Metrics": metric_definitions[i:i + EMF_MAX_METRICS_PER_DIRECTIVE],
+                }
+                for i in range(0, len(metric_definitions), EMF_MAX_METRICS_PER_DIRECTIVE)
+            ]
+
+            return {
+                "_aws": {"Timestamp": int(time.time() * 1000), "CloudWatchMetrics": directives},
+                "service": self.service,
+                "metric_type": "metrics_summary",
+                **properties,
+                **values,
+                **({"counters": counters, "histograms": histograms} if self.detail else {}),
+                "raw_events": {"emitted": self.raw_emitted, "sampled_out": self.raw_sampled_out},
+            }
+
+    def flush(self, properties: dict) -> None:
+        """Escribe el documento EMF de la invocación (si hay agregados) y vacía el buffer."""
+        if self.mode != "emf":
+            return
+        document = self.build_document(properties)
+        self.reset()
+        if document is not None:
+            self.write(json.dumps(document, ensure_ascii=False))
+
+
+metrics = MetricsSink(
+    service="fase1-counter-durable",
+    mode=METRICS_MODE,
+    sample_rate=METRICS_RAW_SAMPLE_RATE,
+    namespace=METRICS_NAMESPACE,
+    detail=METRICS_EMF_DETAIL,
+)
+
 
 def emit_metric(logger, metric_name: str, data: dict) -> None:
     """
     Emite una métrica estructurada en formato JSON para CloudWatch Logs Insights.
+    Las de alto volumen pasan por el sink (agregado EMF + muestreo).
     """
     payload = {
         "metric_type": metric_name,
         **data
     }
-    logger.info(f"METRIC {json.dumps(payload, ensure_ascii=False)}")
+    if metrics.record(payload):
+        logger.info(f"METRIC {json.dumps(payload, ensure_ascii=False)}")
+
+
+def emit_init_profile(logger, test_case: str) -> None:
+    """
+    Emite una vez por contenedor la métrica init_profile: ms de cada grupo de
+    imports del módulo (fase INIT) y ms de construcción de los clientes AWS
+    creados hasta el final de la primera invocación.
+    """
+    global _init_profile_emitted
+    if _init_profile_emitted:
+        return
+    _init_profile_emitted = True
+
+    phases_ms = {
+        name: round((mark - previous) * 1000, 3)
+        for (_, previous), (name, mark) in zip(_init_marks, _init_marks[1:])
+    }
+    emit_metric(
+        logger,
+        "init_profile",
+        {
+            "test_case": test_case,
+            "module": __name__,
+            "import_phases_ms": phases_ms,
+            "import_total_ms": round(sum(phases_ms.values()), 3),
+            "clients_ms": dict(_aws_client_init_ms),
+        },
+    )
 
 
 def consume_fail_once_marker(marker_id: str) -> bool:
@@ -43,7 +416,7 @@ def consume_fail_once_marker(marker_id: str) -> bool:
     no debemos volver a fallar.
     """
     try:
-        failure_table.put_item(
+        aws_client("failure_table").put_item(
             Item={"marker_id": marker_id},
             ConditionExpression="attribute_not_exists(marker_id)"
         )
@@ -62,6 +435,188 @@ def consume_fail_once_marker(marker_id: str) -> bool:
         raise
 
 
+def simulate_failure(step_context: StepContext, *, fail_mode: str, failure_key: str | None, step_name: str) -> None:
+    """Inyección de fallos: fail_mode='none', 'always' o 'once' (marker en DynamoDB)."""
+    if fail_mode == "always":
+        step_context.logger.error(f"Simulated permanent failure in {step_name}")
+        raise RuntimeError(f"Simulated permanent failure in {step_name}")
+
+    if fail_mode == "once":
+        if not failure_key:
+            raise ValueError("fail_mode='once' requires 'failure_key' in the event")
+
+        should_fail_now = consume_fail_once_marker(failure_key)
+
+        if should_fail_now:
+            step_context.logger.error("Simulated transient failure on first attempt")
+            raise RuntimeError("Simulated transient failure on first attempt")
+
+
+def apply_operation(state: dict, operation: str, amount: int) -> dict:
+    """Aplica una operación sobre una copia del estado."""
+    new_state = {
+        "value": int(state["value"]),
+        "version": int(state["version"])
+    }
+
+    if operation == "increment":
+        new_state["value"] += amount
+        new_state["version"] += 1
+
+    elif operation == "decrement":
+        new_state["value"] -= amount
+        new_state["version"] += 1
+
+    elif operation == "get_value":
+        pass
+
+    else:
+        raise ValueError(f"Unsupported operation: {operation}")
+
+    return new_state
+
+
+def parse_operations(event: dict) -> list:
+    """
+    Normaliza la lista "operations" del evento a [{"operation", "amount"}].
+    Se valida en el orquestador, antes de cualquier step: un lote inválido
+    falla sin que el runtime reintente el step.
+    """
+    operations = event["operations"]
+    if not isinstance(operations, list) or not operations:
+        raise ValueError("'operations' must be a non-empty list")
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        raise ValueError(f"Too many operations: {len(operations)} > MAX_BATCH_OPERATIONS={MAX_BATCH_OPERATIONS}")
+
+    default_amount = int(event.get("amount", 1))
+    parsed = []
+    for entry in operations:
+        operation = entry.get("operation", "get_value")
+        if operation not in ("increment", "decrement", "get_value"):
+            raise ValueError(f"Unsupported operation: {operation}")
+        parsed.append({"operation": operation, "amount": int(entry.get("amount", default_amount))})
+    return parsed
+
+
+# ── Entidad contador persistente (PN-counter por shards) ─────────────────
+# Con "counter_id" el estado vive en COUNTER_TABLE_NAME y lo comparten todas
+# las ejecuciones. En modo "sharded" cada shard (counter_id, "shard#NNNN")
+# guarda p (suma de incrementos), n (suma de decrementos) y ops; una
+# escritura es un ADD atómico sobre un único shard, elegido por hash del
+# writer_id o al azar, así que escritores concurrentes no compiten por el
+# mismo item. get_value fusiona los shards con una Query consistente:
+# value = Σ(p - n), version = Σ ops. La fusión no depende de COUNTER_SHARDS,
+# que se puede cambiar sin migrar. "single" es la referencia: un ADD sobre
+# un único item (value, version), limitado por el throughput de ese item.
+#
+# La escritura es la última llamada del step y un ADD rechazado (throttling,
+# validación) no se aplica, así que reintentarla no duplica el incremento.
+# Un ADD aplicado sí se duplicaría si el intento se repite antes de su
+# checkpoint (timeout o caída tras escribir): con la semántica por defecto
+# (AT_LEAST_ONCE_PER_RETRY) el runtime lo vuelve a ejecutar. Las escrituras
+# usan AT_MOST_ONCE_PER_RETRY: el inicio del intento se checkpointea antes
+# de ejecutarlo y un intento interrumpido cuenta como fallido.
+ENTITY_WRITE_STEP_CONFIG = StepConfig(step_semantics=StepSemantics.AT_MOST_ONCE_PER_RETRY)
+
+COUNTER_STORES = ("sharded", "single")
+SHARD_KEY_PREFIX = "shard#"
+SINGLE_ITEM_KEY = "single"
+THROTTLING_ERROR_CODES = {"ProvisionedThroughputExceededException", "ThrottlingException"}
+
+
+def shard_key(index: int) -> str:
+    return f"{SHARD_KEY_PREFIX}{index:04d}"
+
+
+def choose_shard(writer_id, shards: int) -> int:
+    """Hash estable (crc32) del writer_id o, sin writer_id, un shard al azar."""
+    if writer_id is None:
+        return random.randrange(shards)
+    return zlib.crc32(str(writer_id).encode("utf-8")) % shards
+
+
+def write_with_backoff(update) -> tuple:
+    """
+    Ejecuta update() reintentando el throttling con backoff exponencial y
+    full jitter, sin salir del step (una suspensión cuesta al menos 1 s).
+    Devuelve (respuesta, reintentos).
+    """
+    for attempt in range(1, COUNTER_WRITE_MAX_ATTEMPTS + 1):
+        try:
+            return update(), attempt - 1
+        except ClientError as e:
+            error_code = e.response["Error"]["Code"]
+            if error_code not in THROTTLING_ERROR_CODES:
+                raise
+            if attempt == COUNTER_WRITE_MAX_ATTEMPTS:
+                raise RuntimeError(
+                    f"DynamoDB throttling on counter write after {attempt} attempts: {error_code}"
+                ) from e
+            delay_ms = random.uniform(0, min(COUNTER_WRITE_MAX_DELAY_MS, COUNTER_WRITE_BASE_DELAY_MS * 2 ** (attempt - 1)))
+            time.sleep(delay_ms / 1000.0)
+
+
+def write_counter_entity(counter_id: str, store: str, operation: str, amount: int, writer_id=None) -> dict:
+    """Incremento o decremento atómico sobre la entidad; devuelve el item escrito."""
+    table = aws_client("counter_table")
+
+    if store == "single":
+        delta = amount if operation == "increment" else -amount
+        response, retries = write_with_backoff(lambda: table.update_item(
+            Key={"counter_id": counter_id, "shard": SINGLE_ITEM_KEY},
+            UpdateExpression="ADD #value :delta, version :one",
+            ExpressionAttributeNames={"#value": "value"},
+            ExpressionAttributeValues={":delta": delta, ":one": 1},
+            ReturnValues="ALL_NEW"
+        ))
+        item = response["Attributes"]
+        return {"value": int(item["value"]), "version": int(item["version"]), "throttle_retries": retries}
+
+    index = choose_shard(writer_id, COUNTER_SHARDS)
+    field = "p" if operation == "increment" else "n"
+    response, retries = write_with_backoff(lambda: table.update_item(
+        Key={"counter_id": counter_id, "shard": shard_key(index)},
+        UpdateExpression=f"ADD {field} :amount, ops :one",
+        ExpressionAttributeValues={":amount": amount, ":one": 1},
+        ReturnValues="ALL_NEW"
+    ))
+    item = response["Attributes"]
+    return {
+        "shard": index,
+        "shard_value": int(item.get("p", 0)) - int(item.get("n", 0)),
+        "shard_version": int(item["ops"]),
+        "throttle_retries": retries
+    }
+
+
+def read_counter_entity(counter_id: str, store: str) -> dict:
+    """Valor y versión de la entidad (lectura consistente); en sharded, fusión de los shards."""
+    table = aws_client("counter_table")
+
+    if store == "single":
+        item = table.get_item(
+            Key={"counter_id": counter_id, "shard": SINGLE_ITEM_KEY},
+            ConsistentRead=True
+        ).get("Item", {})
+        return {"value": int(item.get("value", 0)), "version": int(item.get("version", 0))}
+
+    state = {"value": 0, "version": 0, "shards": 0}
+    query = {
+        "KeyConditionExpression": "counter_id = :id AND begins_with(shard, :prefix)",
+        "ExpressionAttributeValues": {":id": counter_id, ":prefix": SHARD_KEY_PREFIX},
+        "ConsistentRead": True
+    }
+    while True:
+        page = table.query(**query)
+        for item in page["Items"]:
+            state["value"] += int(item.get("p", 0)) - int(item.get("n", 0))
+            state["version"] += int(item.get("ops", 0))
+            state["shards"] += 1
+        if "LastEvaluatedKey" not in page:
+            return state
+        query["ExclusiveStartKey"] = page["LastEvaluatedKey"]
+
+
 @durable_step
 def initialize_counter(step_context: StepContext, payload: dict) -> dict:
     """
@@ -157,42 +712,172 @@ def apply_counter_operation(step_context: StepContext, payload: dict) -> dict:
         if payload.get("debug_sleep_seconds", 0):
             time.sleep(int(payload["debug_sleep_seconds"]))
 
-        if fail_mode == "always":
-            step_context.logger.error("Simulated permanent failure in apply_counter_operation")
-            raise RuntimeError("Simulated permanent failure in apply_counter_operation")
+        simulate_failure(
+            step_context,
+            fail_mode=fail_mode,
+            failure_key=failure_key,
+            step_name="apply_counter_operation"
+        )
 
-        if fail_mode == "once":
-            if not failure_key:
-                raise ValueError("fail_mode='once' requires 'failure_key' in the event")
+        new_state = apply_operation(state, operation, amount)
 
-            should_fail_now = consume_fail_once_marker(failure_key)
+        step_context.logger.info(f"Updated state={new_state}")
+        return new_state
 
-            if should_fail_now:
-                step_context.logger.error("Simulated transient failure on first attempt")
-                raise RuntimeError("Simulated transient failure on first attempt")
+    except Exception:
+        status = "error"
+        raise
 
-        # Trabajar sobre una copia del estado
-        new_state = {
-            "value": int(state["value"]),
-            "version": int(state["version"])
-        }
+    finally:
+        duration_ms = round((time.perf_counter() - start) * 1000, 3)
+        emit_metric(
+            step_context.logger,
+            "step_duration",
+            {
+                "test_case": test_case,
+                "step": "apply_counter_operation",
+                "operation": operation,
+                "fail_mode": fail_mode,
+                "duration_ms": duration_ms,
+                "status": status
+            }
+        )
+
+
+@durable_step
+def apply_counter_operations(step_context: StepContext, payload: dict) -> dict:
+    """
+    Modo batch: aplica la lista de operaciones en orden dentro de un único
+    step, así que todo el lote cuesta un checkpoint y se reintenta entero.
+    Devuelve el estado final y el valor y la versión tras cada operación.
+    """
+    start = time.perf_counter()
+    status = "success"
+
+    test_case = payload.get("test_case", "unknown")
+    state = payload["state"]
+    operations = payload["operations"]
+    fail_mode = payload.get("fail_mode", "none")
+    failure_key = payload.get("failure_key")
+
+    try:
+        step_context.logger.info(
+            f"Applying {len(operations)} operations, fail_mode={fail_mode}, current_state={state}, failure_key={failure_key}"
+        )
+
+        emit_metric(
+            step_context.logger,
+            "step_invocation",
+            {
+                "test_case": test_case,
+                "step": "apply_counter_operations",
+                "operation_count": len(operations),
+                "fail_mode": fail_mode,
+                "wall_time": time.time()
+            }
+        )
+
+        if payload.get("debug_sleep_seconds", 0):
+            time.sleep(int(payload["debug_sleep_seconds"]))
+
+        simulate_failure(
+            step_context,
+            fail_mode=fail_mode,
+            failure_key=failure_key,
+            step_name="apply_counter_operations"
+        )
+
+        results = []
+        for entry in operations:
+            state = apply_operation(state, entry["operation"], entry["amount"])
+            results.append({**entry, "value": state["value"], "version": state["version"]})
+
+        step_context.logger.info(f"Updated state={state} after {len(results)} operations")
+        return {"state": state, "results": results}
+
+    except Exception:
+        status = "error"
+        raise
+
+    finally:
+        duration_ms = round((time.perf_counter() - start) * 1000, 3)
+        emit_metric(
+            step_context.logger,
+            "step_duration",
+            {
+                "test_case": test_case,
+                "step": "apply_counter_operations",
+                "operation_count": len(operations),
+                "fail_mode": fail_mode,
+                "duration_ms": duration_ms,
+                "status": status
+            }
+        )
 
-        if operation == "increment":
-            new_state["value"] += amount
-            new_state["version"] += 1
 
-        elif operation == "decrement":
-            new_state["value"] -= amount
-            new_state["version"] += 1
+@durable_step
+def apply_entity_operation(step_context: StepContext, payload: dict) -> dict:
+    """
+    Aplica una operación sobre la entidad contador persistente (counter_id):
+    increment/decrement escriben un shard (o el item único), get_value
+    fusiona los shards. Los fallos simulados se inyectan antes de escribir.
+    """
+    start = time.perf_counter()
+    status = "success"
+
+    test_case = payload.get("test_case", "unknown")
+    counter_id = payload["counter_id"]
+    store = payload["counter_store"]
+    operation = payload.get("operation", "get_value")
+    amount = int(payload.get("amount", 1))
+    fail_mode = payload.get("fail_mode", "none")
+    failure_key = payload.get("failure_key")
 
-        elif operation == "get_value":
-            pass
+    try:
+        step_context.logger.info(
+            f"Applying operation={operation}, amount={amount} to counter_id={counter_id}, store={store}, fail_mode={fail_mode}"
+        )
 
+        emit_metric(
+            step_context.logger,
+            "step_invocation",
+            {
+                "test_case": test_case,
+                "step": "apply_entity_operation",
+                "operation": operation,
+                "counter_store": store,
+                "fail_mode": fail_mode,
+                "wall_time": time.time()
+            }
+        )
+
+        simulate_failure(
+            step_context,
+            fail_mode=fail_mode,
+            failure_key=failure_key,
+            step_name="apply_entity_operation"
+        )
+
+        if operation == "get_value":
+            result = read_counter_entity(counter_id, store)
         else:
-            raise ValueError(f"Unsupported operation: {operation}")
+            result = write_counter_entity(counter_id, store, operation, amount, payload.get("writer_id"))
 
-        step_context.logger.info(f"Updated state={new_state}")
-        return new_state
+        emit_metric(
+            step_context.logger,
+            "counter_entity_operation",
+            {
+                "test_case": test_case,
+                "counter_store": store,
+                "operation": operation,
+                "shard": result.get("shard"),
+                "throttle_retries": result.get("throttle_retries", 0),
+                "duration_ms": round((time.perf_counter() - start) * 1000, 3)
+            }
+        )
+
+        step_context.logger.info(f"Counter entity result={result}")
+        return result
 
     except Exception:
         status = "error"
@@ -205,8 +890,9 @@ def apply_counter_operation(step_context: StepContext, payload: dict) -> dict:
             "step_duration",
             {
                 "test_case": test_case,
-                "step": "apply_counter_operation",
+                "step": "apply_entity_operation",
                 "operation": operation,
+                "counter_store": store,
                 "fail_mode": fail_mode,
                 "duration_ms": duration_ms,
                 "status": status
@@ -238,10 +924,17 @@ def build_response(step_context: StepContext, payload: dict) -> dict:
         )
 
         result = {
-            "message": "fase1-counter-durable executed successfully",
-            "counter_value": state["value"],
-            "version": state["version"]
+            "message": "fase1-counter-durable executed successfully"
         }
+        # Una escritura sharded solo conoce su shard: el valor del contador
+        # se obtiene con get_value
+        if state is not None:
+            result["counter_value"] = state["value"]
+            result["version"] = state["version"]
+        if "operation_count" in payload:
+            result["operation_count"] = payload["operation_count"]
+        if "entity" in payload:
+            result.update(payload["entity"])
 
         step_context.logger.info(f"Returning result={result}")
         return result
@@ -264,9 +957,11 @@ def build_response(step_context: StepContext, payload: dict) -> dict:
         )
 
 
-@durable_execution
-def lambda_handler(event, context: DurableContext) -> dict:
+def run_counter(event, context: DurableContext) -> dict:
     """
+    Orquestación del contador. Separada de lambda_handler para poder
+    ejecutarla con un DurableContext local (ver bench/local_aws.py).
+
     Evento esperado:
     {
       "test_case": "normal_inc_001",
@@ -285,6 +980,34 @@ def lambda_handler(event, context: DurableContext) -> dict:
       "fail_mode": "once",
       "failure_key": "phase1-fail-once-test-001"
     }
+
+    Entidad persistente: con "counter_id" el estado no viene en el evento,
+    vive en COUNTER_TABLE_NAME y lo comparten las ejecuciones concurrentes.
+    "counter_store" (env COUNTER_STORE) elige "sharded" (PN-counter por
+    shards; "writer_id" opcional fija el shard) o "single" (un item):
+    {
+      "test_case": "counter_entity_001",
+      "counter_id": "phase1-shared-counter",
+      "counter_store": "sharded",
+      "writer_id": "client-001",
+      "operation": "increment",
+      "amount": 1,
+      "fail_mode": "none"
+    }
+
+    Modo batch: una lista "operations" aplicada en orden en un solo step
+    (apply_counter_operations); "amount" del evento es el valor por defecto
+    de cada operación y la respuesta incluye valor y versión por operación:
+    {
+      "test_case": "counter_batch_001",
+      "state": {"value": 0, "version": 0},
+      "operations": [
+        {"operation": "increment", "amount": 5},
+        {"operation": "decrement", "amount": 2},
+        {"operation": "get_value"}
+      ],
+      "fail_mode": "none"
+    }
     """
     start = time.perf_counter()
     status = "success"
@@ -299,6 +1022,8 @@ def lambda_handler(event, context: DurableContext) -> dict:
 
     test_case = event.get("test_case", "unknown")
     context.logger.info(f"Received event={event}")
+    metrics.reset()
+    replay.reset()
 
     emit_metric(
         context.logger,
@@ -317,30 +1042,75 @@ def lambda_handler(event, context: DurableContext) -> dict:
         amount = int(event.get("amount", 1))
         fail_mode = event.get("fail_mode", "none")
         failure_key = event.get("failure_key")
-
-        state = context.step(initialize_counter({
-            "initial_state": initial_state,
-            "test_case": test_case
-        }))
-
-        state = context.step(apply_counter_operation({
-            "state": state,
-            "operation": operation,
-            "amount": amount,
-            "fail_mode": fail_mode,
-            "failure_key": failure_key,
-            "debug_sleep_seconds": event.get("debug_sleep_seconds", 0),
-            "test_case": test_case
-        }))
-
-        result = context.step(build_response({
-            "state": state,
-            "test_case": test_case
-        }))
+        operations = parse_operations(event) if "operations" in event else None
+        counter_id = event.get("counter_id")
+
+        if counter_id is not None:
+            store = event.get("counter_store", COUNTER_STORE)
+            if store not in COUNTER_STORES:
+                raise ValueError(f"Unsupported counter_store: {store}")
+            if operation not in ("increment", "decrement", "get_value"):
+                raise ValueError(f"Unsupported operation: {operation}")
+            if operations is not None:
+                raise ValueError("'operations' is not supported with 'counter_id'")
+            if amount < 0:
+                raise ValueError("'amount' must be non-negative for a counter entity")
+        else:
+            # Con "counter_id" no hay initialize_counter: el estado está en la tabla
+            state = tracked_step(context, initialize_counter({
+                "initial_state": initial_state,
+                "test_case": test_case
+            }))
+
+        if counter_id is not None:
+            applied = tracked_step(context, apply_entity_operation({
+                "counter_id": counter_id,
+                "counter_store": store,
+                "writer_id": event.get("writer_id"),
+                "operation": operation,
+                "amount": amount,
+                "fail_mode": fail_mode,
+                "failure_key": failure_key,
+                "test_case": test_case
+            }), config=ENTITY_WRITE_STEP_CONFIG if operation != "get_value" else None)
+            state = {"value": applied["value"], "version": applied["version"]} if "value" in applied else None
+            entity = {"counter_id": counter_id, "counter_store": store}
+            entity.update({k: applied[k] for k in ("shard", "shard_value", "shard_version", "shards") if k in applied})
+            response_payload = {"state": state, "entity": entity, "test_case": test_case}
+        elif operations is None:
+            state = tracked_step(context, apply_counter_operation({
+                "state": state,
+                "operation": operation,
+                "amount": amount,
+                "fail_mode": fail_mode,
+                "failure_key": failure_key,
+                "debug_sleep_seconds": event.get("debug_sleep_seconds", 0),
+                "test_case": test_case
+            }))
+            applied = state
+            response_payload = {"state": state, "test_case": test_case}
+        else:
+            applied = tracked_step(context, apply_counter_operations({
+                "state": state,
+                "operations": operations,
+                "fail_mode": fail_mode,
+                "failure_key": failure_key,
+                "debug_sleep_seconds": event.get("debug_sleep_seconds", 0),
+                "test_case": test_case
+            }))
+            state = applied["state"]
+            response_payload = {"state": state, "operation_count": len(operations), "test_case": test_case}
+
+        result = tracked_step(context, build_response(response_payload))
+        if operations is not None:
+            # Los resultados por operación ya están en el checkpoint de
+            # apply_counter_operations: no se repiten en el de build_response
+            result = {**result, "operations": applied["results"]}
 
         # Proxy del tamaño del estado serializado como aproximación
-        # del tamaño del checkpoint/state persisted footprint.
-        checkpoint_size_kb = len(json.dumps(state, ensure_ascii=False)) / 1024
+        # del tamaño del checkpoint/state persisted footprint (en batch,
+        # el resultado completo del step, con los resultados por operación).
+        checkpoint_size_kb = len(json.dumps(applied, ensure_ascii=False)) / 1024
 
         emit_metric(
             context.logger,
@@ -348,8 +1118,8 @@ def lambda_handler(event, context: DurableContext) -> dict:
             {
                 "test_case": test_case,
                 "size_kb": round(checkpoint_size_kb, 3),
-                "state_version": state.get("version", 0),
-                "counter_value": state.get("value", 0)
+                "state_version": (state or {}).get("version", 0),
+                "counter_value": (state or {}).get("value", 0)
             }
         )
 
@@ -363,17 +1133,37 @@ def lambda_handler(event, context: DurableContext) -> dict:
         raise
 
     finally:
+        replay_summary = replay.summary()
+        emit_metric(
+            context.logger,
+            "replay_overhead",
+            {
+                "test_case": test_case,
+                **replay_summary,
+                "is_replay": replay_summary["steps_replayed"] > 0
+            }
+        )
         duration_ms = round((time.perf_counter() - start) * 1000, 3)
         emit_metric(
             context.logger,
             "execution_duration",
             {
                 "test_case": test_case,
-                "operation": event.get("operation", "get_value"),
+                "operation": "batch" if "operations" in event else event.get("operation", "get_value"),
+                "operation_count": len(event["operations"]) if isinstance(event.get("operations"), list) else 1,
+                "counter_store": event.get("counter_store", COUNTER_STORE) if "counter_id" in event else None,
                 "fail_mode": event.get("fail_mode", "none"),
                 "duration_ms": duration_ms,
                 "status": status
             }
         )
-    
-    
\ No newline at end of file
+        emit_init_profile(context.logger, test_case)
+        metrics.flush({"test_case": test_case, "status": status})
+
+
+@durable_execution
+def lambda_handler(event, context: DurableContext) -> dict:
+    return run_counter(event, context)
+
+
+_init_marks.append(("module_body", time.perf_counter()))
@@ -1,14 +1,34 @@
-import os
 import time
+
+# Perfil de la fase INIT: marca tras cada grupo de imports (ver emit_init_profile)
+_init_marks = [("start", time.perf_counter())]
+
+import os
 import json
+import functools
 import math
+import hashlib
+import random
+import threading
 import uuid
-import boto3
 from decimal import Decimal
+
+_init_marks.append(("stdlib", time.perf_counter()))
+
 from botocore.exceptions import ClientError
 
+_init_marks.append(("botocore", time.perf_counter()))
+
+from aws_durable_execution_sdk_python.config import CompletionConfig, Duration, MapConfig, StepConfig
 from aws_durable_execution_sdk_python.context import DurableContext, StepContext, durable_step
 from aws_durable_execution_sdk_python.execution import durable_execution
+from aws_durable_execution_sdk_python.retries import RetryDecision
+
+_init_marks.append(("durable_sdk", time.perf_counter()))
+
+# NumPy solo se importa con encoder_backend="numpy" (ver load_numpy)
+np = None
+_init_profile_emitted = False
 
 
 # ============================================================
@@ -19,12 +39,751 @@ FAILURE_TABLE_NAME = os.environ.get("FAILURE_TABLE_NAME", "durable-failure-marke
 JOBS_TABLE_NAME = os.environ.get("JOBS_TABLE_NAME", "durable-video-jobs")
 S3_BUCKET_NAME = os.environ.get("VIDEO_BUCKET_NAME", "durable-video-artifacts")
 DEFAULT_CHUNK_DURATION_SECONDS = int(os.environ.get("DEFAULT_CHUNK_DURATION_SECONDS", "10"))
+DEFAULT_ENCODER_BACKEND = os.environ.get("ENCODER_BACKEND", "sleep")
+ENCODER_SAMPLE_FPS = float(os.environ.get("ENCODER_SAMPLE_FPS", "2"))
+ENCODER_PIXEL_SCALE = float(os.environ.get("ENCODER_PIXEL_SCALE", "0.25"))
+# Solo en local: emula el reparto de vCPU de Lambda para esta memoria (MB)
+ENCODER_EMULATE_MEMORY_MB = int(os.environ.get("ENCODER_EMULATE_MEMORY_MB", "0"))
+DEFAULT_MAX_PARALLEL_CHUNKS = int(os.environ.get("MAX_PARALLEL_CHUNKS", "10"))
+DEFAULT_MAX_PARALLEL_VIDEOS = int(os.environ.get("MAX_PARALLEL_VIDEOS", "4"))
+STATE_KEY_PREFIX = os.environ.get("STATE_KEY_PREFIX", "state/")
+STATE_CACHE_MAX_ENTRIES = int(os.environ.get("STATE_CACHE_MAX_ENTRIES", "64"))
+DEFAULT_STATE_CHECKPOINT_MODE = os.environ.get("STATE_CHECKPOINT_MODE", "delta")
+# En modo delta, deltas acumulados (JSON) a partir de los cuales el step
+# compacta el estado en un snapshot nuevo en vez de checkpointear el delta
+STATE_DELTA_MAX_BYTES = int(os.environ.get("STATE_DELTA_MAX_BYTES", "1024"))
+DEFAULT_CHUNK_PLANNER = os.environ.get("CHUNK_PLANNER", "adaptive")
+# Modelo de coste por chunk: t(d) = CHUNK_OVERHEAD_MS + CHUNK_MS_PER_SECOND * d.
+# Por defecto: 100 ms fijos de encode_chunk + ~200 ms de checkpoint por step
+# (informe de fase 2). Recalibrar con bench/calibrate_chunk_model.py.
+CHUNK_OVERHEAD_MS = float(os.environ.get("CHUNK_OVERHEAD_MS", "300"))
+CHUNK_MS_PER_SECOND = float(os.environ.get("CHUNK_MS_PER_SECOND", "50"))
+MIN_CHUNK_SECONDS = int(os.environ.get("MIN_CHUNK_SECONDS", "2"))
+PLANNER_MAKESPAN_TOLERANCE = float(os.environ.get("PLANNER_MAKESPAN_TOLERANCE", "0.05"))
+DEFAULT_MERGE_MODE = os.environ.get("MERGE_MODE", "streaming")
+# Coste simulado del merge: el merge batch original dura 200 ms fijos; en modo
+# streaming se reparte en ensamblado por chunk + cierre del contenedor final.
+MERGE_BATCH_MS = float(os.environ.get("MERGE_BATCH_MS", "200"))
+MERGE_CHUNK_MS = float(os.environ.get("MERGE_CHUNK_MS", "15"))
+MERGE_FINALIZE_MS = float(os.environ.get("MERGE_FINALIZE_MS", "50"))
+JOBS_WRITE_BEHIND = os.environ.get("JOBS_WRITE_BEHIND", "1") == "1"
+WRITE_BEHIND_FLUSH_INTERVAL_MS = int(os.environ.get("WRITE_BEHIND_FLUSH_INTERVAL_MS", "50"))
+# Política de reintentos de los steps: "adaptive" (clasificación de errores,
+# backoff con jitter, presupuesto por job y circuit breaker de throttling) o
+# "legacy" (estrategia por defecto del SDK para cualquier error)
+RETRY_POLICY = os.environ.get("RETRY_POLICY", "adaptive")
+STEP_MAX_ATTEMPTS = int(os.environ.get("STEP_MAX_ATTEMPTS", "6"))
+RETRY_BASE_DELAY_MS = float(os.environ.get("RETRY_BASE_DELAY_MS", "1000"))
+RETRY_MAX_DELAY_MS = float(os.environ.get("RETRY_MAX_DELAY_MS", "30000"))
+THROTTLE_BASE_DELAY_MS = float(os.environ.get("THROTTLE_BASE_DELAY_MS", "2000"))
+# Intentos máximos de un step que falla por throttling (en lugar de STEP_MAX_ATTEMPTS)
+THROTTLE_MAX_ATTEMPTS = int(os.environ.get("THROTTLE_MAX_ATTEMPTS", "8"))
+# Presupuesto de reintentos por job: RETRY_BUDGET_PER_JOB + RETRY_BUDGET_RATIO
+# por step ejecutado (cada chunk suma margen)
+RETRY_BUDGET_PER_JOB = int(os.environ.get("RETRY_BUDGET_PER_JOB", "20"))
+RETRY_BUDGET_RATIO = float(os.environ.get("RETRY_BUDGET_RATIO", "2.0"))
+BREAKER_THRESHOLD = int(os.environ.get("BREAKER_THRESHOLD", "5"))
+BREAKER_COOLDOWN_MS = float(os.environ.get("BREAKER_COOLDOWN_MS", "1000"))
+# Rechazos del breaker admitidos por step, en múltiplos de THROTTLE_MAX_ATTEMPTS
+BREAKER_REJECTION_FACTOR = int(os.environ.get("BREAKER_REJECTION_FACTOR", "3"))
+METRICS_MODE = os.environ.get("METRICS_MODE", "emf")
+# Fracción de eventos por step/chunk/intento que se siguen escribiendo como
+# línea METRIC además del agregado EMF
+METRICS_RAW_SAMPLE_RATE = float(os.environ.get("METRICS_RAW_SAMPLE_RATE", "0.1"))
+METRICS_NAMESPACE = os.environ.get("METRICS_NAMESPACE", "DurableFunctionsResearch")
+# Añade al documento EMF los contadores por status y los buckets de cada
+# histograma; solo para depurar, multiplica su tamaño
+METRICS_EMF_DETAIL = os.environ.get("METRICS_EMF_DETAIL", "0") == "1"
+
+
+# ============================================================
+# Clientes AWS (construcción perezosa)
+# ============================================================
+# boto3 y sus clientes se crean en el primer uso y no al importar el módulo:
+# una invocación que solo hace replay de steps ya checkpointeados no
+# toca DynamoDB ni S3.
+# Todos salen de una única boto3 Session por contenedor.
+
+_aws_session = None
+_aws_clients = {}
+_aws_clients_lock = threading.RLock()
+# ms de construcción de cada cliente
+_aws_client_init_ms = {}
+
+
+def _build_aws_client(name: str):
+    global _aws_session
+    if _aws_session is None:
+        import boto3
+        _aws_session = boto3.session.Session()
+    if name == "dynamodb":
+        return _aws_session.client("dynamodb")
+    if name == "s3":
+        return _aws_session.client("s3")
+    raise ValueError(f"Unknown AWS client: {name}")
+
+
+def aws_client(name: str):
+    """
+    Cliente de bajo nivel compartido del contenedor ("dynamodb", "s3"),
+    construido en el primer uso. En local se sustituye con set_aws_client().
+    """
+    client = _aws_clients.get(name)
+    if client is None:
+        with _aws_clients_lock:
+            client = _aws_clients.get(name)
+            if client is None:
+                start = time.perf_counter()
+                client = _build_aws_client(name)
+                _aws_client_init_ms[name] = round((time.perf_counter() - start) * 1000, 3)
+                _aws_clients[name] = client
+    return client
+
+
+def set_aws_client(name: str, client) -> None:
+    _aws_clients[name] = client
+
+
+# ============================================================
+# Métricas: sink por invocación (EMF)
+# ============================================================
+
+# Métricas agregables -> campo que se agrega en histograma. Solo se agregan
+# las que se repiten por chunk: chunk_duration y los step_duration y
+# state_write de AGGREGATED_STEPS. Las de una vez por invocación se emiten
+# siempre en crudo; agregarlas añadiría 5 métricas EMF por cada una.
+AGGREGATED_METRICS = {
+    "step_duration": "duration_ms",
+    "chunk_duration": "duration_ms",
+    "state_write": "write_bytes",
+}
+# Steps que se repiten por chunk dentro de una invocación (sin sufijo)
+AGGREGATED_STEPS = ("encode_chunk",)
+METRIC_UNITS = {"duration_ms": "Milliseconds", "write_bytes": "Bytes"}
+CHUNK_SECONDS_BUCKETS = (2, 5, 10, 20, 60)
+# Histograma log-lineal: cada bucket cubre un factor HISTOGRAM_GROWTH
+HISTOGRAM_GROWTH = 1.1
+EMF_MAX_METRICS_PER_DIRECTIVE = 100
+
+
+def metric_group(payload: dict) -> str:
+    """
+    Grupo de agregación: métrica + step (sin sufijo de chunk, p. ej.
+    encode_chunk_7 -> encode_chunk); chunk_duration se agrupa por tramo de
+    duración del chunk.
+    """
+    metric_type = payload["metric_type"]
+    if metric_type == "chunk_duration":
+        seconds = payload.get("chunk_seconds", 0)
+        upper = next((b for b in CHUNK_SECONDS_BUCKETS if seconds <= b), None)
+        return f"{metric_type}.chunk_le{upper}s" if upper else f"{metric_type}.chunk_gt{CHUNK_SECONDS_BUCKETS[-1]}s"
+    step = str(payload.get("step", "all")).rstrip("0123456789").rstrip("_")
+    return f"{metric_type}.{step}"
+
+
+def aggregated_field(payload: dict) -> str | None:
+    """Campo que se agrega del evento, o None si se emite siempre en crudo."""
+    metric_type = payload["metric_type"]
+    field = AGGREGATED_METRICS.get(metric_type)
+    if field is None or metric_type == "chunk_duration":
+        return field
+    return field if metric_group(payload).partition(".")[2] in AGGREGATED_STEPS else None
+
+
+class MetricsSink:
+    """
+    Buffer de métricas de una invocación.
+
+    Las métricas con aggregated_field se acumulan por grupo (metric_group)
+    como contador por status + histograma log-lineal, y solo una fracción
+    sample_rate de ellas se sigue escribiendo como línea METRIC (muestreo
+    determinista: 1 de cada 1/sample_rate por tipo). flush() escribe los
+    agregados una sola vez como documento EMF en stdout; con detail=True
+    incluye además los contadores por status y los buckets de cada grupo.
+
+    mode="log" mantiene el comportamiento original: todo en crudo, sin EMF.
+    """
+
+    def __init__(self, *, service: str, mode: str, sample_rate: float, namespace: str, detail: bool):
+        self.service = service
+        self.mode = mode
+        self.sample_rate = sample_rate
+        self.namespace = namespace
+        self.detail = detail
+        self.write = print
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.groups = {}
+            self.seen = {}
+            self.raw_emitted = 0
+            self.raw_sampled_out = 0
+
+    def record(self, payload: dict) -> bool:
+        """Acumula el evento; devuelve True si debe escribirse en crudo."""
+        metric_type = payload["metric_type"]
+        field = aggregated_field(payload)
+        if self.mode != "emf" or field is None:
+            return True
+
+        value = payload.get(field)
+        with self._lock:
+            group = self.groups.setdefault(
+                metric_group(payload),
+                {"field": field, "statuses": {}, "buckets": {}, "count": 0, "sum": 0.0, "min": None, "max": None},
+            )
+            status = payload.get("status", "success")
+            group["statuses"][status] = group["statuses"].get(status, 0) + 1
+            if isinstance(value, (int, float)):
+                bucket = math.floor(math.log(value, HISTOGRAM_GROWTH)) if value > 0 else None
+                group["buckets"][bucket] = group["buckets"].get(bucket, 0) + 1
+                group["count"] += 1
+                group["sum"] += value
+                group["min"] = value if group["min"] is None else min(group["min"], value)
+                group["max"] = value if group["max"] is None else max(group["max"], value)
+
+            seen = self.seen.get(metric_type, 0)
+            self.seen[metric_type] = seen + 1
+            emit_raw = int((seen + 1) * self.sample_rate) > int(seen * self.sample_rate)
+            if emit_raw:
+                self.raw_emitted += 1
+            else:
+                self.raw_sampled_out += 1
+            return emit_raw
+
+    @staticmethod
+    def percentile(group: dict, q: float) -> float:
+        """Cota superior del bucket que contiene el percentil q (acotada por max)."""
+        target = q * group["count"]
+        cumulative = 0
+        for bucket in sorted(group["buckets"], key=lambda b: -math.inf if b is None else b):
+            cumulative += group["buckets"][bucket]
+            if cumulative >= target:
+                upper = 0.0 if bucket is None else HISTOGRAM_GROWTH ** (bucket + 1)
+                return round(min(upper, group["max"]), 3)
+        return group["max"]
+
+    def build_document(self, properties: dict) -> dict | None:
+        with self._lock:
+            if not self.groups:
+                return None
+
+            values = {}
+            metric_definitions = []
+            histograms = {}
+            counters = {}
+            for name, group in sorted(self.groups.items()):
+                counters[name] = dict(group["statuses"])
+                metric_definitions.append({"Name": f"{name}.count", "Unit": "Count"})
+                values[f"{name}.count"] = sum(group["statuses"].values())
+                if not group["count"]:
+                    continue
+
+                unit = METRIC_UNITS.get(group["field"], "None")
+                stats = {
+                    "p50": self.percentile(group, 0.50),
+                    "p99": self.percentile(group, 0.99),
+                    "max": group["max"],
+                    "sum": round(group["sum"], 3),
+                }
+                for stat, value in stats.items():
+                    metric_definitions.append({"Name": f"{name}.{stat}", "Unit": unit})
+                    values[f"{name}.{stat}"] = value
+                histograms[name] = {
+                    "field": group["field"],
+                    "growth": HISTOGRAM_GROWTH,
+                    "buckets": [
+                        [None if b is None else round(HISTOGRAM_GROWTH ** (b + 1), 3), group["buckets"][b]]
+                        for b in sorted(group["buckets"], key=lambda b: -math.inf if b is None else b)
+                    ],
+                }
+
+            directives = [
+                {
+                    "Namespace": self.namespace,
+                    "Dimensions": [["service"]],
+                    "Metrics": metric_definitions[i:i + EMF_MAX_METRICS_PER_DIRECTIVE],
+                }
+                for i in range(0, len(metric_definitions), EMF_MAX_METRICS_PER_DIRECTIVE)
+            ]
+
+            return {
+                "_aws": {"Timestamp": int(time.time() * 1000), "CloudWatchMetrics": directives},
+                "service": self.service,
+                "metric_type": "metrics_summary",
+                **properties,
+                **values,
+                **({"counters": counters, "histograms": histograms} if self.detail else {}),
+                "raw_events": {"emitted": self.raw_emitted, "sampled_out": self.raw_sampled_out},
+            }
+
+    def flush(self, properties: dict) -> None:
+        """Escribe el documento EMF de la invocación (si hay agregados) y vacía el buffer."""
+        if self.mode != "emf":
+            return
+        document = self.build_document(properties)
+        self.reset()
+        if document is not None:
+            self.write(json.dumps(document, ensure_ascii=False))
+
+
+metrics = MetricsSink(
+    service="fase2-video-durable",
+    mode=METRICS_MODE,
+    sample_rate=METRICS_RAW_SAMPLE_RATE,
+    namespace=METRICS_NAMESPACE,
+    detail=METRICS_EMF_DETAIL,
+)
+
+
+# ============================================================
+# Política de reintentos
+# ============================================================
+# Cada error de un step se clasifica antes de decidir si se reintenta:
+# - domain:     datos del evento o del estado inválidos (ValueError,
+#               KeyError, TypeError); reintentar da el mismo resultado.
+# - permanent:  no se recupera solo (PermanentStepError, p. ej.
+#               fail_mode="always", o ValidationException/AccessDenied).
+# - throttling: ThrottlingException/ProvisionedThroughputExceeded de
+#               DynamoDB (ThrottlingError); backoff más largo y circuit
+#               breaker por tabla.
+# - transient:  el resto (fallo de una vez, conflicto de versión, 5xx).
+# transient y throttling se reintentan con backoff exponencial y full
+# jitter, hasta max_attempts por step (THROTTLE_MAX_ATTEMPTS si es
+# throttling) y un presupuesto de reintentos por job.
+# Mismo motor que el baseline tradicional; aquí sustituye a la estrategia
+# por defecto del SDK (RetryPresets.default(): 6 intentos, 5 s iniciales,
+# cualquier error) mediante StepConfig(retry_strategy=...).
+
+ERROR_DOMAIN = "domain"
+ERROR_PERMANENT = "permanent"
+ERROR_THROTTLING = "throttling"
+ERROR_TRANSIENT = "transient"
+
+THROTTLING_ERROR_CODES = {
+    "ProvisionedThroughputExceededException",
+    "ThrottlingException",
+    "RequestLimitExceeded",
+    "TooManyRequestsException",
+}
+PERMANENT_ERROR_CODES = {
+    "ValidationException",
+    "AccessDeniedException",
+    "ResourceNotFoundException",
+    "ItemCollectionSizeLimitExceededException",
+    "UnrecognizedClientException",
+}
+
+
+class PermanentStepError(RuntimeError):
+    """Fallo de un step que no se recupera reintentando."""
+
+
+class ThrottlingError(RuntimeError):
+    """
+    Throttling de DynamoDB en `resource`, o llamada rechazada por su circuit
+    breaker abierto (rejected=True, no llegó a DynamoDB).
+    """
+
+    def __init__(self, resource: str, message: str, rejected: bool = False):
+        super().__init__(message)
+        self.resource = resource
+        self.rejected = rejected
+
+
+def classify_error(error: BaseException) -> str:
+    cause = error
+    while cause is not None:
+        if isinstance(cause, ThrottlingError):
+            return ERROR_THROTTLING
+        if isinstance(cause, PermanentStepError):
+            return ERROR_PERMANENT
+        if isinstance(cause, ClientError):
+            code = cause.response.get("Error", {}).get("Code", "")
+            if code in THROTTLING_ERROR_CODES:
+                return ERROR_THROTTLING
+            if code in PERMANENT_ERROR_CODES:
+                return ERROR_PERMANENT
+            return ERROR_TRANSIENT
+        cause = cause.__cause__
+
+    if isinstance(error, (ValueError, KeyError, TypeError)):
+        return ERROR_DOMAIN
+    return ERROR_TRANSIENT
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker de throttling de una tabla, compartido por el contenedor:
+    tras `threshold` throttlings seguidos se abre durante cooldown_ms y las
+    llamadas fallan con ThrottlingError sin llegar a DynamoDB. Pasado el
+    cooldown deja pasar una sola llamada de prueba (half-open): si no hay
+    throttling se cierra; si lo hay, se vuelve a abrir. Con enabled=False
+    (RETRY_POLICY="legacy") nunca se abre.
+    """
+
+    def __init__(self, name: str, threshold: int, cooldown_ms: float, enabled: bool = True):
+        self.name = name
+        self.enabled = enabled
+        self.threshold = threshold
+        self.cooldown_ms = cooldown_ms
+        self.state = "closed"
+        self.consecutive_throttles = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed" or not self.enabled:
+                return True
+            if self.state == "open" and self._open_elapsed_ms() >= self.cooldown_ms:
+                self.state = "half_open"
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self.consecutive_throttles = 0
+
+    def record_throttle(self) -> None:
+        with self._lock:
+            self.consecutive_throttles += 1
+            if not self.enabled:
+                return
+            if self.state == "half_open" or (self.state == "closed" and self.consecutive_throttles >= self.threshold):
+                self.state = "open"
+                self.opened_at = time.monotonic()
+                self.trips += 1
+
+    def remaining_open_ms(self) -> float:
+        with self._lock:
+            if self.state != "open":
+                return 0.0
+            return max(0.0, self.cooldown_ms - self._open_elapsed_ms())
+
+    def _open_elapsed_ms(self) -> float:
+        return (time.monotonic() - self.opened_at) * 1000
+
+
+throttle_breakers = {
+    name: CircuitBreaker(name, BREAKER_THRESHOLD, BREAKER_COOLDOWN_MS, enabled=RETRY_POLICY == "adaptive")
+    for name in ("jobs_table", "failure_table")
+}
+
+
+def call_with_breaker(resource: str, operation):
+    """
+    Ejecuta una llamada a DynamoDB sobre `resource` a través de su circuit
+    breaker; el throttling se relanza como ThrottlingError.
+    """
+    breaker = throttle_breakers[resource]
+    if not breaker.allow():
+        raise ThrottlingError(resource, f"Circuit breaker open for {resource}", rejected=True)
 
-dynamodb = boto3.resource("dynamodb")
-s3 = boto3.client("s3")
+    try:
+        result = operation()
+    except ClientError as e:
+        error_code = e.response["Error"]["Code"]
+        if error_code in THROTTLING_ERROR_CODES:
+            breaker.record_throttle()
+            raise ThrottlingError(resource, f"DynamoDB throttling on {resource}: {error_code}") from e
+        breaker.record_success()
+        raise
 
-failure_table = dynamodb.Table(FAILURE_TABLE_NAME)
-jobs_table = dynamodb.Table(JOBS_TABLE_NAME)
+    breaker.record_success()
+    return result
+
+
+class RetryPolicy:
+    """
+    Decide si un step fallido se reintenta y tras cuánto. El presupuesto
+    de reintentos es por job y por invocación (reset() al inicio del
+    handler): acota los reintentos de un job con muchos chunks fallando a la
+    vez. Con un breaker abierto la espera dura al menos lo que le queda de
+    cooldown más el jitter, para que los reintentos no lleguen todos juntos
+    a la llamada de prueba. En durable la decisión la pide el runtime
+    (step_retry_strategy), el presupuesto cuenta solo la invocación actual y
+    la espera es una suspensión, no tiempo facturado.
+    """
+
+    def __init__(self, *, mode: str, base_delay_ms: float, max_delay_ms: float,
+                 throttle_base_delay_ms: float, job_budget: int, budget_ratio: float):
+        self.mode = mode
+        self.base_delay_ms = base_delay_ms
+        self.max_delay_ms = max_delay_ms
+        self.throttle_base_delay_ms = throttle_base_delay_ms
+        self.job_budget = job_budget
+        self.budget_ratio = budget_ratio
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.budgets = {}
+            self.stats = {"retries": {}, "given_up": {}, "budget_exhausted": 0, "retry_wait_ms": 0.0}
+
+    def record_step(self, job_id: str | None) -> None:
+        """Un step nuevo del job: amplía su presupuesto en budget_ratio."""
+        with self._lock:
+            budget = self.budgets.setdefault(job_id, {"steps": 0, "retries": 0})
+            budget["steps"] += 1
+
+    def decide(self, error: BaseException, attempt: int, max_attempts: int, job_id: str | None = None) -> dict:
+        error_class = classify_error(error)
+        if self.mode == "legacy":
+            retry, delay_ms = attempt < max_attempts, 0.0
+        else:
+            if error_class == ERROR_THROTTLING:
+                # Los rechazos del breaker no llegan a DynamoDB: límite más holgado
+                rejected = getattr(throttling_cause(error), "rejected", False)
+                max_attempts = max(max_attempts, THROTTLE_MAX_ATTEMPTS * (BREAKER_REJECTION_FACTOR if rejected else 1))
+            retry = error_class in (ERROR_TRANSIENT, ERROR_THROTTLING) and attempt < max_attempts
+            delay_ms = self._backoff_ms(error, error_class, attempt) if retry else 0.0
+
+        with self._lock:
+            # Un rechazo del breaker no llegó a DynamoDB: no gasta presupuesto
+            if retry and self.mode != "legacy" and not getattr(throttling_cause(error), "rejected", False):
+                budget = self.budgets.setdefault(job_id, {"steps": 0, "retries": 0})
+                if budget["retries"] >= self.job_budget + self.budget_ratio * budget["steps"]:
+                    retry, delay_ms = False, 0.0
+                    self.stats["budget_exhausted"] += 1
+                else:
+                    budget["retries"] += 1
+            counter = self.stats["retries"] if retry else self.stats["given_up"]
+            counter[error_class] = counter.get(error_class, 0) + 1
+            self.stats["retry_wait_ms"] += delay_ms
+
+        return {"retry": retry, "delay_ms": delay_ms, "error_class": error_class}
+
+    def _backoff_ms(self, error: BaseException, error_class: str, attempt: int) -> float:
+        base = self.throttle_base_delay_ms if error_class == ERROR_THROTTLING else self.base_delay_ms
+        delay = random.uniform(0, min(self.max_delay_ms, base * 2 ** (attempt - 1)))
+        breaker = throttle_breakers.get(getattr(throttling_cause(error), "resource", None))
+        if breaker is not None:
+            delay += breaker.remaining_open_ms()
+        return delay
+
+    def summary(self) -> dict:
+        with self._lock:
+            stats = {name: dict(value) if isinstance(value, dict) else value for name, value in self.stats.items()}
+        stats["retry_wait_ms"] = round(stats["retry_wait_ms"], 3)
+        stats["breaker_trips"] = {name: b.trips for name, b in throttle_breakers.items() if b.trips}
+        stats["breaker_rejected"] = {name: b.rejected for name, b in throttle_breakers.items() if b.rejected}
+        return stats
+
+
+def throttling_cause(error: BaseException) -> ThrottlingError | None:
+    cause = error
+    while cause is not None and not isinstance(cause, ThrottlingError):
+        cause = cause.__cause__
+    return cause
+
+
+retry_policy = RetryPolicy(
+    mode=RETRY_POLICY,
+    base_delay_ms=RETRY_BASE_DELAY_MS,
+    max_delay_ms=RETRY_MAX_DELAY_MS,
+    throttle_base_delay_ms=THROTTLE_BASE_DELAY_MS,
+    job_budget=RETRY_BUDGET_PER_JOB,
+    budget_ratio=RETRY_BUDGET_RATIO,
+)
+
+
+def step_retry_strategy(error: Exception, attempts_made: int, job_id: str | None = None) -> RetryDecision:
+    """retry_strategy del SDK sobre retry_policy (el runtime aplica un mínimo de 1 s)."""
+    decision = retry_policy.decide(error, attempts_made, max_attempts=STEP_MAX_ATTEMPTS, job_id=job_id)
+    if not decision["retry"]:
+        return RetryDecision.no_retry()
+    return RetryDecision.retry(Duration.from_seconds(max(1, math.ceil(decision["delay_ms"] / 1000.0))))
+
+
+def step_config(job_id: str | None) -> StepConfig | None:
+    """
+    StepConfig de los steps de un job: la estrategia lleva el job_id ligado
+    para que cada vídeo de un batch gaste su propio presupuesto. Sin
+    StepConfig (RETRY_POLICY="legacy") el SDK usa RetryPresets.default().
+    """
+    if RETRY_POLICY != "adaptive":
+        return None
+    return StepConfig(retry_strategy=functools.partial(step_retry_strategy, job_id=job_id))
+
+
+# ============================================================
+# Plan de fallos (inyección determinista en memoria)
+# ============================================================
+# Alternativa a fail_mode: el evento trae un "fault_plan" con semilla y se
+# evalúa en memoria, sin markers en DynamoDB:
+#
+#   "fault_plan": {
+#     "seed": 42,
+#     "steps": {
+#       "encode_chunk": {
+#         "fault": "transient",              # transient | throttling | permanent
+#         "probability": 0.1,                # por intento
+#         "fail_on_attempts": [1],           # intentos que fallan siempre
+#         "latency": {"distribution": "lognormal", "median_ms": 80, "sigma": 0.6},
+#         "chunks": {"3": {"fault": "throttling", "fail_on_attempts": [1, 2]}}
+#       },
+#       "merge_video": {"fail_on_attempts": [1]}
+#     }
+#   }
+#
+# La decisión de cada intento sale de random.Random(f"{seed}:{step}:{attempt}"):
+# no depende del orden de los threads ni de la invocación, así que dos
+# ejecuciones con la misma semilla inyectan los mismos fallos. El tiempo de
+# recuperación (TTR) de un fallo va desde el intento que falla hasta que un
+# intento posterior del mismo step supera el punto de inyección.
+
+FAULT_TYPES = (ERROR_TRANSIENT, ERROR_THROTTLING, ERROR_PERMANENT)
+
+
+def resolve_fault_spec(plan: dict | None, step: str, chunk_index: int | None = None) -> dict | None:
+    """Spec del plan para un step (y chunk): la del step con la del chunk encima, más la semilla."""
+    step_spec = (plan or {}).get("steps", {}).get(step)
+    if step_spec is None:
+        return None
+
+    spec = {key: value for key, value in step_spec.items() if key != "chunks"}
+    if chunk_index is not None:
+        spec.update(step_spec.get("chunks", {}).get(str(chunk_index), {}))
+    if spec.get("fault", ERROR_TRANSIENT) not in FAULT_TYPES:
+        raise ValueError(f"Unsupported fault type in fault_plan: {spec['fault']}")
+    spec["seed"] = plan.get("seed", 0)
+    return spec
+
+
+def sample_latency_ms(spec: dict | None, rng: random.Random) -> float:
+    """Latencia inyectada: fixed (ms), uniform (min_ms, max_ms), exponential (mean_ms) o lognormal (median_ms, sigma)."""
+    if not spec or rng.random() >= spec.get("probability", 1.0):
+        return 0.0
+
+    distribution = spec.get("distribution", "fixed")
+    if distribution == "fixed":
+        return float(spec["ms"])
+    if distribution == "uniform":
+        return rng.uniform(spec["min_ms"], spec["max_ms"])
+    if distribution == "exponential":
+        return rng.expovariate(1.0 / spec["mean_ms"])
+    if distribution == "lognormal":
+        return rng.lognormvariate(math.log(spec["median_ms"]), spec.get("sigma", 0.5))
+    raise ValueError(f"Unsupported latency distribution: {distribution}")
+
+
+def planned_fault(spec: dict, step_name: str, attempt: int) -> tuple:
+    """(latencia en ms, si falla) del plan para ese intento del step."""
+    rng = random.Random(f"{spec['seed']}:{step_name}:{attempt}")
+    delay_ms = sample_latency_ms(spec.get("latency"), rng)
+    fails = attempt in spec.get("fail_on_attempts", ()) or rng.random() < spec.get("probability", 0.0)
+    return delay_ms, fails
+
+
+def fault_error(fault_type: str, step_name: str) -> Exception:
+    message = f"Injected {fault_type} fault in {step_name}"
+    if fault_type == ERROR_PERMANENT:
+        return PermanentStepError(message)
+    if fault_type == ERROR_THROTTLING:
+        return ThrottlingError("fault_plan", message)
+    return RuntimeError(message)
+
+
+def _percentile(values: list, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1)]
+
+
+class FaultInjector:
+    """
+    Evalúa el fault_plan en cada intento de un step y lleva las estadísticas
+    de la invocación (reset() en run_video_job). En durable el intento es
+    StepContext.attempt, que el runtime persiste entre invocaciones.
+
+    Un episodio empieza con el primer intento que falla y se cierra cuando
+    un intento posterior del step pasa la inyección (su TTR). Si el intento
+    anterior falló en otra invocación (no hay episodio abierto en memoria,
+    pero el plan dice que falló) se cuenta como recovered_unmeasured: en
+    Lambda el reintento llega tras una suspensión, y el fallo figura en
+    `open` de la invocación que lo inyectó.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._attempts = {}
+            self._open = {}
+            self.injected = {}
+            self.recovery_ms = {}
+            self.recovered_unmeasured = {}
+            self.latency_ms = []
+
+    def inject(self, spec: dict | None, *, scope: str, step_name: str, logger, attempt: int | None = None) -> None:
+        if not spec:
+            return
+
+        now_ms = time.perf_counter() * 1000
+        key = (scope, step_name)
+        with self._lock:
+            if attempt is None:
+                attempt = self._attempts.get(key, 0) + 1
+            self._attempts[key] = attempt
+
+        delay_ms, fails = planned_fault(spec, step_name, attempt)
+        fault_type = spec.get("fault", ERROR_TRANSIENT)
+        recovered_elsewhere = not fails and attempt > 1 and planned_fault(spec, step_name, attempt - 1)[1]
+
+        with self._lock:
+            if delay_ms:
+                self.latency_ms.append(delay_ms)
+            if fails:
+                self.injected[fault_type] = self.injected.get(fault_type, 0) + 1
+                self._open.setdefault(key, (fault_type, now_ms))
+            else:
+                opened = self._open.pop(key, None)
+                if opened is not None:
+                    self.recovery_ms.setdefault(opened[0], []).append(now_ms - opened[1])
+                elif recovered_elsewhere:
+                    self.recovered_unmeasured[fault_type] = self.recovered_unmeasured.get(fault_type, 0) + 1
+
+        if delay_ms:
+            time.sleep(delay_ms / 1000.0)
+        if fails:
+            logger.error(f"Injected {fault_type} fault in {step_name} attempt={attempt}")
+            raise fault_error(fault_type, step_name)
+
+    def summary(self) -> dict:
+        """Intentos fallidos inyectados, episodios abiertos y TTR (ms) por tipo de fallo."""
+        with self._lock:
+            still_open = {}
+            for fault_type, _ in self._open.values():
+                still_open[fault_type] = still_open.get(fault_type, 0) + 1
+            recovery = {
+                fault_type: {
+                    "count": len(values),
+                    "p50": round(_percentile(values, 0.5), 3),
+                    "p95": round(_percentile(values, 0.95), 3),
+                    "max": round(max(values), 3),
+                }
+                for fault_type, values in self.recovery_ms.items()
+            }
+            return {
+                "injected": dict(self.injected),
+                "open": still_open,
+                "time_to_recover_ms": recovery,
+                "recovered_unmeasured": dict(self.recovered_unmeasured),
+                "latency_injected": len(self.latency_ms),
+                "latency_injected_ms": round(sum(self.latency_ms), 3),
+            }
+
+
+fault_injector = FaultInjector()
 
 
 # ============================================================
@@ -34,9 +793,39 @@ jobs_table = dynamodb.Table(JOBS_TABLE_NAME)
 def emit_metric(logger, metric_name: str, data: dict) -> None:
     """
     Emite una métrica estructurada en JSON para CloudWatch Logs Insights.
+    Las de alto volumen pasan por el sink (agregado EMF + muestreo).
     """
     payload = {"metric_type": metric_name, **data}
-    logger.info(f"METRIC {json.dumps(payload, ensure_ascii=False)}")
+    if metrics.record(payload):
+        logger.info(f"METRIC {json.dumps(payload, ensure_ascii=False)}")
+
+
+def emit_init_profile(logger, test_case: str) -> None:
+    """
+    Emite una vez por contenedor la métrica init_profile: ms de cada grupo de
+    imports del módulo (fase INIT) y ms de construcción de los clientes AWS
+    creados hasta el final de la primera invocación.
+    """
+    global _init_profile_emitted
+    if _init_profile_emitted:
+        return
+    _init_profile_emitted = True
+
+    phases_ms = {
+        name: round((mark - previous) * 1000, 3)
+        for (_, previous), (name, mark) in zip(_init_marks, _init_marks[1:])
+    }
+    emit_metric(
+        logger,
+        "init_profile",
+        {
+            "test_case": test_case,
+            "module": __name__,
+            "import_phases_ms": phases_ms,
+            "import_total_ms": round(sum(phases_ms.values()), 3),
+            "clients_ms": dict(_aws_client_init_ms),
+        },
+    )
 
 
 def consume_fail_once_marker(marker_id: str) -> bool:
@@ -45,22 +834,15 @@ def consume_fail_once_marker(marker_id: str) -> bool:
     Devuelve False si ya existía, lo que evita repetir el mismo fallo transitorio.
     """
     try:
-        failure_table.put_item(
-            Item={"marker_id": marker_id},
+        call_with_breaker("failure_table", lambda: aws_client("dynamodb").put_item(
+            TableName=FAILURE_TABLE_NAME,
+            Item={"marker_id": {"S": marker_id}},
             ConditionExpression="attribute_not_exists(marker_id)"
-        )
+        ))
         return True
     except ClientError as e:
-        error_code = e.response["Error"]["Code"]
-
-        if error_code == "ConditionalCheckFailedException":
+        if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
             return False
-
-        if error_code in {"ProvisionedThroughputExceededException", "ThrottlingException"}:
-            raise RuntimeError(
-                f"DynamoDB throttling while consuming failure marker: {error_code}"
-            ) from e
-
         raise
 
 
@@ -77,7 +859,7 @@ def maybe_fail(step_context: StepContext, *, fail_mode: str, failure_key: str |
 
     if fail_mode == "always":
         step_context.logger.error(f"Simulated permanent failure in {step_name}")
-        raise RuntimeError(f"Simulated permanent failure in {step_name}")
+        raise PermanentStepError(f"Simulated permanent failure in {step_name}")
 
     if fail_mode == "once":
         if not failure_key:
@@ -99,24 +881,851 @@ def compute_chunk_count(duration_seconds: int, chunk_duration_seconds: int) -> i
     return max(1, math.ceil(duration_seconds / chunk_duration_seconds))
 
 
-def to_dynamo_number_dict(data: dict) -> dict:
+# ============================================================
+# Planificador de chunks
+# ============================================================
+
+def fixed_chunk_sizes(duration_seconds: int, chunk_duration_seconds: int) -> list:
+    """
+    Troceado fijo original: chunks de chunk_duration_seconds y un tail corto.
+    """
+    chunk_count = compute_chunk_count(duration_seconds, chunk_duration_seconds)
+    return [
+        min(duration_seconds, (idx + 1) * chunk_duration_seconds) - idx * chunk_duration_seconds
+        for idx in range(chunk_count)
+    ]
+
+
+def balanced_chunk_sizes(duration_seconds: int, chunk_count: int) -> list:
+    """
+    Reparte duration_seconds en chunk_count chunks de segundos enteros que
+    difieren como mucho en 1 s (sin tail corto). Los largos van primero.
+    """
+    base, remainder = divmod(duration_seconds, chunk_count)
+    return [base + 1] * remainder + [base] * (chunk_count - remainder)
+
+
+def predict_chunk_plan(sizes: list, max_concurrency: int, overhead_ms: float, ms_per_second: float) -> dict:
+    """
+    Predice makespan y trabajo total de un plan con el modelo lineal por chunk.
+
+    Los chunks se lanzan en orden en oleadas de max_concurrency (así despacha
+    context.map); con tamaños no crecientes cada oleada dura lo que su
+    primer chunk.
+    """
+    concurrency = max(1, min(max_concurrency, len(sizes)))
+    makespan_ms = sum(
+        overhead_ms + ms_per_second * sizes[wave_start]
+        for wave_start in range(0, len(sizes), concurrency)
+    )
+    work_ms = len(sizes) * overhead_ms + ms_per_second * sum(sizes)
+    return {
+        "chunk_count": len(sizes),
+        "predicted_makespan_ms": round(makespan_ms, 3),
+        "predicted_work_ms": round(work_ms, 3),
+    }
+
+
+def plan_chunks(
+    duration_seconds: int,
+    max_concurrency: int,
+    *,
+    overhead_ms: float = CHUNK_OVERHEAD_MS,
+    ms_per_second: float = CHUNK_MS_PER_SECOND,
+    min_chunk_seconds: int = MIN_CHUNK_SECONDS,
+    tolerance: float = PLANNER_MAKESPAN_TOLERANCE,
+) -> dict:
+    """
+    Elige el número de chunks y sus duraciones minimizando el makespan
+    predicho; entre los planes a menos de `tolerance` del mejor makespan se
+    queda con el de menor trabajo total (menos steps, menos coste).
+
+    Devuelve el plan con "sizes" (duración de cada chunk, en orden).
+    """
+    max_chunks = max(1, duration_seconds // max(1, min_chunk_seconds))
+
+    # Forma cerrada de predict_chunk_plan para balanced_chunk_sizes: las
+    # oleadas que contienen algún chunk de base+1 s duran ms_per_second más.
+    candidates = []
+    for chunk_count in range(1, max_chunks + 1):
+        base, remainder = divmod(duration_seconds, chunk_count)
+        concurrency = max(1, min(max_concurrency, chunk_count))
+        waves = math.ceil(chunk_count / concurrency)
+        long_waves = math.ceil(remainder / concurrency)
+        makespan_ms = waves * (overhead_ms + ms_per_second * base) + long_waves * ms_per_second
+        work_ms = chunk_count * overhead_ms + ms_per_second * duration_seconds
+        candidates.append((makespan_ms, work_ms, chunk_count))
+
+    best_makespan = min(c[0] for c in candidates)
+    eligible = [c for c in candidates if c[0] <= best_makespan * (1 + tolerance)]
+    _, _, chunk_count = min(eligible, key=lambda c: (c[1], c[0]))
+
+    sizes = balanced_chunk_sizes(duration_seconds, chunk_count)
+    return {**predict_chunk_plan(sizes, max_concurrency, overhead_ms, ms_per_second), "sizes": sizes}
+
+
+# ============================================================
+# Serialización DynamoDB del job (AttributeValue de bajo nivel)
+# ============================================================
+# El esquema del item del job es fijo: se compila una vez a un serializador
+# por campo y las lecturas/escrituras usan AttributeValue directamente con el
+# cliente de bajo nivel, sin la conversión recursiva a Decimal ni el segundo
+# recorrido del TypeSerializer de la capa resource. Los campos fuera del
+# esquema pasan por el camino genérico.
+
+def _format_number(value) -> str:
+    """Texto de un AttributeValue N. bool, NaN e infinito no son números de DynamoDB."""
+    kind = type(value)
+    if kind is int:
+        return str(value)
+    if kind is float:
+        if not math.isfinite(value):
+            raise ValueError(f"Unsupported DynamoDB number: {value!r}")
+        text = repr(value)
+    elif isinstance(value, bool):
+        raise TypeError(f"Unsupported DynamoDB number: {value!r} (bool)")
+    elif isinstance(value, int):
+        return str(value)
+    elif isinstance(value, Decimal):
+        if not value.is_finite():
+            raise ValueError(f"Unsupported DynamoDB number: {value!r}")
+        text = str(value)
+    else:
+        raise TypeError(f"Unsupported DynamoDB number type: {type(value).__name__}")
+    if "e" in text or "E" in text:
+        # DynamoDB no acepta notación exponencial
+        text = format(Decimal(text), "f")
+    return text
+
+
+def _parse_number(text: str):
+    """Los enteros (también "N.0") se leen con int() para no perder precisión."""
+    if "e" in text or "E" in text:
+        number = Decimal(text)
+        return int(number) if number == number.to_integral_value() else float(number)
+    integer, dot, fraction = text.partition(".")
+    if not dot or not fraction.strip("0"):
+        return int(integer)
+    return float(text)
+
+
+def _serialize_str(value) -> dict:
+    return {"NULL": True} if value is None else {"S": value}
+
+
+def _serialize_int(value) -> dict:
+    if value is None:
+        return {"NULL": True}
+    return {"N": str(value) if type(value) is int else _format_number(value)}
+
+
+def _serialize_number(value) -> dict:
+    return {"NULL": True} if value is None else {"N": _format_number(value)}
+
+
+def _serialize_any(value) -> dict:
+    if value is None:
+        return {"NULL": True}
+    if isinstance(value, bool):
+        return {"BOOL": value}
+    if isinstance(value, str):
+        return {"S": value}
+    if isinstance(value, (int, float, Decimal)):
+        return {"N": _format_number(value)}
+    if isinstance(value, (list, tuple)):
+        return {"L": [_serialize_any(v) for v in value]}
+    if isinstance(value, dict):
+        return {"M": {k: _serialize_any(v) for k, v in value.items()}}
+    raise TypeError(f"Unsupported DynamoDB value type: {type(value).__name__}")
+
+
+def _deserialize_str(attr: dict):
+    return attr.get("S")
+
+
+def _deserialize_int(attr: dict):
+    return int(attr["N"]) if "N" in attr else None
+
+
+def _deserialize_number(attr: dict):
+    return _parse_number(attr["N"]) if "N" in attr else None
+
+
+def _deserialize_any(attr: dict):
+    if "S" in attr:
+        return attr["S"]
+    if "N" in attr:
+        return _parse_number(attr["N"])
+    if "BOOL" in attr:
+        return attr["BOOL"]
+    if "NULL" in attr:
+        return None
+    if "L" in attr:
+        return [_deserialize_any(v) for v in attr["L"]]
+    if "M" in attr:
+        return {k: _deserialize_any(v) for k, v in attr["M"].items()}
+    raise TypeError(f"Unsupported DynamoDB attribute: {sorted(attr)}")
+
+
+_SCALAR_CODECS = {
+    "S": (_serialize_str, _deserialize_str),
+    "int": (_serialize_int, _deserialize_int),
+    "number": (_serialize_number, _deserialize_number),
+}
+
+
+def compile_field_serializers(schema: dict) -> dict:
+    """
+    schema: {campo: "S" | "int" | "number" | [sub_schema]}, donde [sub_schema]
+    es una lista de mapas con ese esquema.
+    """
+    serializers = {}
+    for field, kind in schema.items():
+        if isinstance(kind, list):
+            serialize_item = compile_item_serializer(kind[0])
+
+            def serialize_list(value, serialize_item=serialize_item):
+                if value is None:
+                    return {"NULL": True}
+                return {"L": [{"M": serialize_item(v)} for v in value]}
+
+            serializers[field] = serialize_list
+        else:
+            serializers[field] = _SCALAR_CODECS[kind][0]
+    return serializers
+
+
+def compile_item_serializer(schema: dict):
+    get_serializer = compile_field_serializers(schema).get
+
+    def serialize(item: dict) -> dict:
+        return {field: get_serializer(field, _serialize_any)(value) for field, value in item.items()}
+
+    return serialize
+
+
+def compile_item_deserializer(schema: dict):
+    deserializers = {}
+    for field, kind in schema.items():
+        if isinstance(kind, list):
+            deserialize_item = compile_item_deserializer(kind[0])
+
+            def deserialize_list(attr, deserialize_item=deserialize_item):
+                if "L" not in attr:
+                    return None
+                return [deserialize_item(v["M"]) for v in attr["L"]]
+
+            deserializers[field] = deserialize_list
+        else:
+            deserializers[field] = _SCALAR_CODECS[kind][1]
+    get_deserializer = deserializers.get
+
+    def deserialize(item: dict) -> dict:
+        return {field: get_deserializer(field, _deserialize_any)(attr) for field, attr in item.items()}
+
+    return deserialize
+
+
+CHUNK_SCHEMA = {
+    "chunk_id": "S",
+    "index": "int",
+    "start_second": "int",
+    "end_second": "int",
+    "duration_seconds": "int",
+    "source_uri": "S",
+    "status": "S",
+    "output_uri": "S",
+}
+
+ENCODED_CHUNK_SCHEMA = {
+    "chunk_id": "S",
+    "index": "int",
+    "duration_seconds": "int",
+    "codec": "S",
+    "bitrate_kbps": "int",
+    "output_uri": "S",
+    "status": "S",
+    "simulated_processing_ms": "number",
+    "encoder_backend": "S",
+    "encoder_cpu_ms": "number",
+    "estimated_bytes": "int",
+    "started_at_ms": "int",
+    "finished_at_ms": "int",
+}
+
+JOB_ITEM_SCHEMA = {
+    "job_id": "S",
+    "video_id": "S",
+    "input_uri": "S",
+    "format": "S",
+    "duration_seconds": "int",
+    "resolution": "S",
+    "codec": "S",
+    "bitrate_kbps": "int",
+    "chunk_duration_seconds": "int",
+    "encoder_backend": "S",
+    "chunk_planner": "S",
+    "status": "S",
+    "chunks": [CHUNK_SCHEMA],
+    "encoded_chunks": [ENCODED_CHUNK_SCHEMA],
+    "merged_output_uri": "S",
+    "version": "int",
+    "model": "S",
+    "test_case": "S",
+}
+
+JOB_FIELD_SERIALIZERS = compile_field_serializers(JOB_ITEM_SCHEMA)
+serialize_job_item = compile_item_serializer(JOB_ITEM_SCHEMA)
+deserialize_job_item = compile_item_deserializer(JOB_ITEM_SCHEMA)
+
+
+def serialize_job_field(field: str, value) -> dict:
+    return JOB_FIELD_SERIALIZERS.get(field, _serialize_any)(value)
+
+
+# ============================================================
+# Estado del job direccionado por contenido
+# ============================================================
+
+# Caché por contenedor. Una clave de contenido nunca cambia de valor, así que
+# cada estado se lee de S3 como mucho una vez por contenedor caliente.
+_state_object_cache: dict = {}
+
+
+def put_state_object(state: dict) -> dict:
+    """
+    Persiste el estado completo del job en S3 bajo una clave derivada de su
+    contenido (sha256 del JSON canónico) y devuelve una referencia compacta.
+
+    Los steps intercambian solo esta referencia, de modo que el tamaño de cada
+    payload/checkpoint no depende del número de chunks. Repetir el put con el
+    mismo estado (p. ej. en un retry) es idempotente.
+    """
+    body = json.dumps(state, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    state_key = f"{STATE_KEY_PREFIX}{state['job_id']}/{hashlib.sha256(body).hexdigest()}.json"
+
+    if state_key not in _state_object_cache:
+        aws_client("s3").put_object(
+            Bucket=S3_BUCKET_NAME,
+            Key=state_key,
+            Body=body,
+            ContentType="application/json",
+        )
+        cache_state_object(state_key, state)
+
+    return {
+        "job_id": state["job_id"],
+        "video_id": state["video_id"],
+        "version": state["version"],
+        "state_key": state_key,
+    }
+
+
+def get_state_object(state_key: str) -> dict:
+    """
+    Devuelve una copia superficial del estado almacenado en state_key.
+    """
+    state = _state_object_cache.get(state_key)
+    if state is None:
+        body = aws_client("s3").get_object(Bucket=S3_BUCKET_NAME, Key=state_key)["Body"].read()
+        state = json.loads(body)
+        cache_state_object(state_key, state)
+    return dict(state)
+
+
+def cache_state_object(state_key: str, state: dict) -> None:
+    if len(_state_object_cache) >= STATE_CACHE_MAX_ENTRIES:
+        _state_object_cache.clear()
+    _state_object_cache[state_key] = state
+
+
+# ============================================================
+# Checkpoints de estado: snapshot completo o delta
+# ============================================================
+#
+# state_ref = {job_id, video_id, version, state_key, mode, deltas}
+#   estado actual = snapshot(state_key) + deltas aplicados en orden
+#
+# mode="full":  cada step escribe un snapshot nuevo (put_item + S3) y
+#               devuelve {"base_version", "version", "state_key"}.
+# mode="delta": cada step devuelve solo los campos que cambia,
+#               {"base_version", "version", "changes"}, y los escribe en
+#               DynamoDB con UpdateItem condicionado a base_version.
+#               Si los deltas de state_ref más el nuevo superan
+#               STATE_DELTA_MAX_BYTES (p. ej. la lista de chunks), el step
+#               compacta: escribe igualmente el UpdateItem, pero checkpointea
+#               un snapshot nuevo como en modo full. Así state_ref, que viaja
+#               en el payload de los steps siguientes, no crece con el job.
+
+def apply_state_delta(state: dict, delta: dict) -> dict:
+    """
+    Aplica un delta sobre el estado. Falla si el delta no parte de la
+    versión actual, lo que detectaría un replay con historia inconsistente.
+    """
+    if state["version"] != delta["base_version"]:
+        raise RuntimeError(
+            f"State delta base_version={delta['base_version']} does not match "
+            f"state version={state['version']} for job={state['job_id']}"
+        )
+    new_state = dict(state)
+    new_state.update(delta["changes"])
+    new_state["version"] = delta["version"]
+    return new_state
+
+
+def load_job_state(state_ref: dict) -> dict:
+    """
+    Materializa el estado actual del job a partir de su referencia.
+    Es determinista (snapshot inmutable + deltas checkpointeados), así que
+    también puede usarse desde el orquestador durante un replay.
+    """
+    state = get_state_object(state_ref["state_key"])
+    for delta in state_ref.get("deltas", []):
+        state = apply_state_delta(state, delta)
+    return state
+
+
+def advance_state_ref(state_ref: dict, update: dict) -> dict:
+    """
+    Incorpora a la referencia el resultado (checkpoint) de un step.
+    """
+    if update["base_version"] != state_ref["version"]:
+        raise RuntimeError(
+            f"State update base_version={update['base_version']} does not match "
+            f"state_ref version={state_ref['version']} for job={state_ref['job_id']}"
+        )
+
+    if "state_key" in update:
+        return {**state_ref, "version": update["version"], "state_key": update["state_key"], "deltas": []}
+
+    return {**state_ref, "version": update["version"], "deltas": state_ref["deltas"] + [update]}
+
+
+def update_job_item(job_id: str, base_version: int, version: int, changes: dict) -> None:
+    """
+    Escribe solo los campos cambiados (UpdateItem SET) condicionado a que el
+    item siga en base_version. Si la condición falla porque un intento
+    anterior ya aplicó el cambio (el item está en version), se trata como éxito.
+    """
+    names = {"#version": "version"}
+    values = {":base_version": {"N": str(base_version)}, ":version": {"N": str(version)}}
+    assignments = ["#version = :version"]
+
+    for idx, (field, value) in enumerate(changes.items()):
+        names[f"#f{idx}"] = field
+        values[f":v{idx}"] = serialize_job_field(field, value)
+        assignments.append(f"#f{idx} = :v{idx}")
+
+    try:
+        aws_client("dynamodb").update_item(
+            TableName=JOBS_TABLE_NAME,
+            Key={"job_id": {"S": job_id}},
+            UpdateExpression="SET " + ", ".join(assignments),
+            ConditionExpression="#version = :base_version",
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values,
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+
+        current = aws_client("dynamodb").get_item(
+            TableName=JOBS_TABLE_NAME,
+            Key={"job_id": {"S": job_id}},
+            ConsistentRead=True,
+            ProjectionExpression="#version",
+            ExpressionAttributeNames={"#version": "version"},
+        ).get("Item") or {}
+        if deserialize_job_item(current).get("version", -1) != version:
+            raise
+
+
+# ============================================================
+# Write-behind de jobs_table
+# ============================================================
+
+class JobWriteBehind:
+    """
+    Cola write-behind para las escrituras de jobs_table dentro de una invocación.
+
+    - Las escrituras pendientes se agrupan por job_id: versiones sucesivas del
+      mismo item se fusionan en una sola (el último PutItem gana; los deltas
+      consecutivos se unen en un único UpdateItem desde la primera base_version).
+    - Un hilo en segundo plano vacía la cola cada WRITE_BEHIND_FLUSH_INTERVAL_MS,
+      fuera del camino crítico de los steps.
+    - flush() vacía la cola de forma síncrona. El orquestador lo llama al
+      terminar la ejecución y antes de suspenderse (cualquier excepción que
+      salga del handler, incluida la suspensión del runtime), porque Lambda
+      congela el proceso en cuanto el handler retorna.
+
+    jobs_table es una proyección del estado durable (la fuente de verdad son
+    los checkpoints), pero diferir la escritura sí afecta al replay: si el
+    proceso muere entre el checkpoint de un step y el flush, el checkpoint
+    queda y su escritura se pierde, y el siguiente UpdateItem condicionado a
+    base_version fallaría. Por eso, en una invocación con steps servidos
+    desde checkpoint, commit_job_state llama a resync() antes del primer
+    delta del job: un PutItem del estado materializado de los checkpoints
+    (que se fusiona con el delta en un único PutItem).
+    Con enabled=False las escrituras son síncronas, como antes.
+    """
+
+    def __init__(self, enabled: bool = JOBS_WRITE_BEHIND, flush_interval_ms: int = WRITE_BEHIND_FLUSH_INTERVAL_MS):
+        self.enabled = enabled
+        self.flush_interval_ms = flush_interval_ms
+        self.pending = {}
+        self.reset()
+        self._in_flight = 0
+        self._error = None
+        self._condition = threading.Condition()
+        self._worker = None
+
+    def reset(self) -> None:
+        """Estadísticas y jobs resincronizados de la invocación."""
+        self.stats = {"enqueued": 0, "coalesced": 0, "flushed": 0}
+        self.resynced = set()
+
+    def put(self, item: dict) -> None:
+        self._enqueue(item["job_id"], {"op": "put", "item": item})
+
+    def resync(self, state: dict) -> None:
+        """
+        Reescribe el item completo con el estado de los checkpoints, una vez
+        por job e invocación (ver docstring de la clase).
+        """
+        if state["job_id"] in self.resynced:
+            return
+        self.resynced.add(state["job_id"])
+        self.put(state)
+
+    def update(self, job_id: str, base_version: int, version: int, changes: dict) -> None:
+        self._enqueue(
+            job_id,
+            {"op": "update", "base_version": base_version, "version": version, "changes": changes},
+        )
+
+    def _enqueue(self, job_id: str, write: dict) -> None:
+        if not self.enabled:
+            self._write(job_id, write)
+            return
+
+        with self._condition:
+            self.stats["enqueued"] += 1
+            previous = self.pending.get(job_id)
+            if previous is not None:
+                write = coalesce_job_writes(previous, write)
+                self.stats["coalesced"] += 1
+            self.pending[job_id] = write
+            self._ensure_worker()
+            self._condition.notify_all()
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="jobs-write-behind", daemon=True)
+            self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self.pending:
+                    self._condition.wait()
+            # Ventana de agrupación: deja que lleguen más versiones del mismo job
+            time.sleep(self.flush_interval_ms / 1000.0)
+            self._drain()
+
+    def _drain(self) -> None:
+        with self._condition:
+            batch = self.pending
+            self.pending = {}
+            self._in_flight += len(batch)
+
+        failed = {}
+        error = None
+        for job_id, write in batch.items():
+            try:
+                self._write(job_id, write)
+            except Exception as e:
+                failed[job_id] = write
+                error = e
+
+        with self._condition:
+            if error is not None:
+                self._error = error
+            # Lo que falla vuelve a la cola delante de lo llegado después
+            for job_id, write in failed.items():
+                newer = self.pending.get(job_id)
+                self.pending[job_id] = coalesce_job_writes(write, newer) if newer else write
+            self._in_flight -= len(batch)
+            self.stats["flushed"] += len(batch) - len(failed)
+            self._condition.notify_all()
+
+    def _write(self, job_id: str, write: dict) -> None:
+        def request():
+            if write["op"] == "put":
+                aws_client("dynamodb").put_item(TableName=JOBS_TABLE_NAME, Item=serialize_job_item(write["item"]))
+            else:
+                update_job_item(job_id, write["base_version"], write["version"], write["changes"])
+
+        call_with_breaker("jobs_table", request)
+
+    def flush(self) -> None:
+        """
+        Vacía la cola y espera a las escrituras en curso. Si tras un intento
+        propio quedan escrituras fallidas, relanza el último error.
+        """
+        if not self.enabled:
+            return
+
+        attempted = False
+        while True:
+            with self._condition:
+                # pending y _in_flight se comprueban juntos bajo el lock: un
+                # _drain del hilo puede haber sacado la cola y no haber escrito aún
+                while self._in_flight:
+                    self._condition.wait()
+                if not self.pending:
+                    self._error = None
+                    return
+                if attempted and self._error is not None:
+                    error, self._error = self._error, None
+                    failed = sorted(self.pending)
+                    break
+                self._error = None
+            attempted = True
+            self._drain()
+
+        raise RuntimeError(f"Write-behind flush failed for jobs={failed}") from error
+
+
+def coalesce_job_writes(previous: dict, write: dict) -> dict:
+    """
+    Fusiona dos escrituras consecutivas del mismo item en una equivalente.
+    """
+    if write["op"] == "put":
+        return write
+
+    if previous["op"] == "put":
+        item = dict(previous["item"])
+        item.update(write["changes"])
+        item["version"] = write["version"]
+        return {"op": "put", "item": item}
+
+    if previous["version"] != write["base_version"]:
+        raise RuntimeError(
+            f"Cannot coalesce update base_version={write['base_version']} "
+            f"after pending version={previous['version']}"
+        )
+
+    return {
+        "op": "update",
+        "base_version": previous["base_version"],
+        "version": write["version"],
+        "changes": {**previous["changes"], **write["changes"]},
+    }
+
+
+job_writes = JobWriteBehind()
+
+
+def commit_job_state(logger, state: dict, changes: dict, *, state_ref: dict, step: str, test_case: str) -> dict:
+    """
+    Persiste los cambios de un step según el modo de checkpoint de state_ref
+    y devuelve el update que el step checkpointea (ver advance_state_ref).
+    """
+    mode = state_ref["mode"]
+    base_version = state["version"]
+    compacted = False
+
+    if mode == "full":
+        new_state = dict(state)
+        new_state.update(changes)
+        new_state["version"] = base_version + 1
+
+        job_writes.put(new_state)
+        write_bytes = len(json.dumps(new_state, ensure_ascii=False))
+        update = {
+            "base_version": base_version,
+            "version": new_state["version"],
+            "state_key": put_state_object(new_state)["state_key"],
+        }
+
+    elif mode == "delta":
+        if replay.replayed:
+            job_writes.resync(state)
+        job_writes.update(state["job_id"], base_version, base_version + 1, changes)
+        write_bytes = len(json.dumps(changes, ensure_ascii=False))
+        update = {
+            "base_version": base_version,
+            "version": base_version + 1,
+            "changes": changes,
+        }
+        pending_bytes = len(json.dumps(state_ref.get("deltas", []), ensure_ascii=False))
+        if write_bytes + pending_bytes > STATE_DELTA_MAX_BYTES:
+            compacted = True
+            new_state = apply_state_delta(state, update)
+            update = {
+                "base_version": base_version,
+                "version": new_state["version"],
+                "state_key": put_state_object(new_state)["state_key"],
+            }
+
+    else:
+        raise ValueError(f"Unsupported state checkpoint mode: {mode}")
+
+    emit_metric(
+        logger,
+        "state_write",
+        {
+            "test_case": test_case,
+            "step": step,
+            "mode": mode,
+            "compacted": compacted,
+            "write_bytes": write_bytes,
+            "checkpoint_bytes": len(json.dumps(update, ensure_ascii=False)),
+            "state_version": update["version"],
+            "execution_model": "durable",
+        },
+    )
+    return update
+
+
+# ============================================================
+# Backends de codificación
+# ============================================================
+#
+# "sleep": espera fija 100 ms + 50 ms por segundo de chunk (versión original).
+# "numpy": transcodificador sintético con coste de CPU real: DCT por bloques
+#          8x8, cuantización y estimación del tamaño entrópico sobre frames
+#          generados. El trabajo escala con la duración del chunk, la
+#          resolución y el bitrate, así que compite por la vCPU asignada.
+
+LAMBDA_FULL_VCPU_MEMORY_MB = 1769
+
+RESOLUTION_DIMENSIONS = {
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+    "1440p": (2560, 1440),
+    "4k": (3840, 2160),
+}
+
+_dct_basis_cache = {}
+
+
+def lambda_vcpu_share(memory_mb: int) -> float:
+    """
+    Fracción de vCPU que Lambda asigna a memory_mb (1 vCPU a 1769 MB,
+    proporcional por debajo). Un encoder monohilo no escala por encima de 1.
+    """
+    return min(1.0, memory_mb / LAMBDA_FULL_VCPU_MEMORY_MB)
+
+
+def extrapolate_encode_ms(measured_ms: float, from_memory_mb: int, to_memory_mb: int) -> float:
+    """
+    Extrapola un tiempo de encode CPU-bound medido con from_memory_mb a otra
+    configuración de memoria según el reparto de vCPU de Lambda.
+    """
+    return measured_ms * lambda_vcpu_share(from_memory_mb) / lambda_vcpu_share(to_memory_mb)
+
+
+def sleep_encoder(chunk: dict, *, resolution: str, bitrate_kbps: int) -> dict:
+    simulated_ms = 100 + (50 * int(chunk["duration_seconds"]))
+    time.sleep(simulated_ms / 1000.0)
+    return {"processing_ms": simulated_ms, "cpu_ms": 0.0, "estimated_bytes": None}
+
+
+def load_numpy():
     """
-    Convierte ints/floats a Decimal para DynamoDB.
+    Importa NumPy en el primer uso del backend numpy (~90 ms que no se pagan
+    en la fase INIT de contenedores que usan encoder_backend="sleep").
     """
-    def convert(value):
-        if isinstance(value, bool) or value is None:
-            return value
-        if isinstance(value, int):
-            return Decimal(value)
-        if isinstance(value, float):
-            return Decimal(str(value))
-        if isinstance(value, list):
-            return [convert(v) for v in value]
-        if isinstance(value, dict):
-            return {k: convert(v) for k, v in value.items()}
-        return value
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError as e:
+            raise RuntimeError("encoder_backend='numpy' requires numpy in the deployment package or a layer") from e
+        np = numpy
+    return np
+
 
-    return convert(data)
+def dct_basis(size: int = 8):
+    basis = _dct_basis_cache.get(size)
+    if basis is None:
+        k = np.arange(size)[:, None]
+        n = np.arange(size)[None, :]
+        basis = np.sqrt(2.0 / size) * np.cos(np.pi * (2 * n + 1) * k / (2 * size))
+        basis[0, :] /= np.sqrt(2.0)
+        _dct_basis_cache[size] = basis
+    return basis
+
+
+def numpy_synthetic_encoder(chunk: dict, *, resolution: str, bitrate_kbps: int) -> dict:
+    """
+    Transcodificación sintética de un chunk.
+
+    - Frames: ENCODER_SAMPLE_FPS frames por segundo de chunk, a la resolución
+      del job reducida por ENCODER_PIXEL_SCALE (fracción de lado) para que
+      quepa en 128 MB.
+    - Por frame: DCT 2D por bloques 8x8, y una pasada de cuantización +
+      estimación de bits (tamaño Exp-Golomb de los coeficientes no nulos) por
+      cada 1000 kbps de bitrate, como iteraciones de control de tasa.
+    """
+    load_numpy()
+
+    width, height = RESOLUTION_DIMENSIONS[resolution]
+    width = max(8, int(width * ENCODER_PIXEL_SCALE) // 8 * 8)
+    height = max(8, int(height * ENCODER_PIXEL_SCALE) // 8 * 8)
+    frame_count = max(1, int(round(float(chunk["duration_seconds"]) * ENCODER_SAMPLE_FPS)))
+    rate_passes = max(1, int(round(bitrate_kbps / 1000)))
+
+    start = time.perf_counter()
+    cpu_start = time.thread_time()
+
+    rng = np.random.default_rng(int(chunk["index"]))
+    basis = dct_basis(8)
+    yy, xx = np.mgrid[0:height, 0:width].astype(np.float32)
+    scene = 128 + 60 * np.sin(xx / 37.0) * np.cos(yy / 23.0)
+    # Paso de cuantización: más bitrate, cuantización más fina
+    q_step = 16.0 * 2000.0 / max(1, bitrate_kbps)
+
+    total_bits = 0
+    for frame_idx in range(frame_count):
+        frame = np.roll(scene, frame_idx * 3, axis=1) + rng.normal(0, 6, size=scene.shape)
+        blocks = (frame - 128).reshape(height // 8, 8, width // 8, 8).transpose(0, 2, 1, 3)
+        coeffs = basis @ blocks @ basis.T
+
+        for rate_pass in range(rate_passes):
+            quantized = np.rint(coeffs / (q_step * (1 + 0.25 * rate_pass)))
+            magnitudes = np.abs(quantized[quantized != 0])
+            total_bits += int(np.sum(2 * np.floor(np.log2(magnitudes)) + 2)) + 4 * blocks.shape[0] * blocks.shape[1]
+
+    processing_ms = (time.perf_counter() - start) * 1000
+    cpu_ms = (time.thread_time() - cpu_start) * 1000
+
+    if ENCODER_EMULATE_MEMORY_MB:
+        # Ejecución local: alarga el tiempo como si la vCPU fuera la fracción
+        # que Lambda asigna a ENCODER_EMULATE_MEMORY_MB.
+        emulated_ms = extrapolate_encode_ms(processing_ms, LAMBDA_FULL_VCPU_MEMORY_MB, ENCODER_EMULATE_MEMORY_MB)
+        time.sleep(max(0.0, emulated_ms - processing_ms) / 1000.0)
+        processing_ms = emulated_ms
+
+    return {
+        "processing_ms": round(processing_ms, 3),
+        "cpu_ms": round(cpu_ms, 3),
+        "estimated_bytes": total_bits // (8 * rate_passes),
+    }
+
+
+ENCODER_BACKENDS = {
+    "sleep": sleep_encoder,
+    "numpy": numpy_synthetic_encoder,
+}
+
+
+def run_encoder(backend: str, chunk: dict, *, resolution: str, bitrate_kbps: int) -> dict:
+    encoder = ENCODER_BACKENDS.get(backend)
+    if encoder is None:
+        raise ValueError(f"Unsupported encoder_backend: {backend}")
+    return encoder(chunk, resolution=resolution, bitrate_kbps=int(bitrate_kbps))
 
 
 # ============================================================
@@ -126,7 +1735,7 @@ def to_dynamo_number_dict(data: dict) -> dict:
 @durable_step
 def initialize_job(step_context: StepContext, payload: dict) -> dict:
     """
-    Inicializa el estado del job de vídeo.
+    Inicializa el estado del job de vídeo y devuelve su state_ref.
     """
     start = time.perf_counter()
     status = "success"
@@ -150,6 +1759,8 @@ def initialize_job(step_context: StepContext, payload: dict) -> dict:
             "chunk_duration_seconds": int(
                 encoding.get("chunk_duration_seconds", DEFAULT_CHUNK_DURATION_SECONDS)
             ),
+            "encoder_backend": encoding.get("encoder_backend", DEFAULT_ENCODER_BACKEND),
+            "chunk_planner": encoding.get("chunk_planner", DEFAULT_CHUNK_PLANNER),
             "status": "initialized",
             "chunks": [],
             "encoded_chunks": [],
@@ -159,8 +1770,12 @@ def initialize_job(step_context: StepContext, payload: dict) -> dict:
             "test_case": test_case,
         }
 
-        jobs_table.put_item(Item=to_dynamo_number_dict(job_state))
-        return job_state
+        job_writes.put(job_state)
+        return {
+            **put_state_object(job_state),
+            "mode": payload.get("state_checkpoint_mode", DEFAULT_STATE_CHECKPOINT_MODE),
+            "deltas": [],
+        }
 
     except Exception:
         status = "error"
@@ -194,7 +1809,7 @@ def validate_video(step_context: StepContext, payload: dict) -> dict:
     status = "success"
     test_case = payload.get("test_case", "unknown")
 
-    state = payload["state"]
+    state_ref = payload["state_ref"]
     fail_mode = payload.get("fail_mode", "none")
     failure_key = payload.get("failure_key")
 
@@ -205,6 +1820,15 @@ def validate_video(step_context: StepContext, payload: dict) -> dict:
             failure_key=failure_key,
             step_name="validate_video",
         )
+        fault_injector.inject(
+            payload.get("fault"),
+            scope=state_ref["job_id"],
+            step_name="validate_video",
+            logger=step_context.logger,
+            attempt=step_context.attempt,
+        )
+
+        state = load_job_state(state_ref)
 
         supported_formats = {"mp4", "mov", "mkv"}
         supported_resolutions = {"720p", "1080p", "1440p", "4k"}
@@ -215,7 +1839,6 @@ def validate_video(step_context: StepContext, payload: dict) -> dict:
                 "is_valid": False,
                 "error_type": "domain_validation",
                 "error_message": f"Unsupported input format: {state['format']}",
-                "state": state,
             }
 
         if state["resolution"] not in supported_resolutions:
@@ -224,7 +1847,6 @@ def validate_video(step_context: StepContext, payload: dict) -> dict:
                 "is_valid": False,
                 "error_type": "domain_validation",
                 "error_message": f"Unsupported resolution: {state['resolution']}",
-                "state": state,
             }
 
         if state["duration_seconds"] <= 0:
@@ -233,19 +1855,21 @@ def validate_video(step_context: StepContext, payload: dict) -> dict:
                 "is_valid": False,
                 "error_type": "domain_validation",
                 "error_message": "Video duration must be > 0",
-                "state": state,
             }
 
-        new_state = dict(state)
-        new_state["status"] = "validated"
-        new_state["version"] += 1
-
-        jobs_table.put_item(Item=to_dynamo_number_dict(new_state))
-        step_context.logger.info(f"Validated job={new_state['job_id']}")
+        update = commit_job_state(
+            step_context.logger,
+            state,
+            {"status": "validated"},
+            state_ref=state_ref,
+            step="validate_video",
+            test_case=test_case,
+        )
+        step_context.logger.info(f"Validated job={state['job_id']}")
 
         return {
             "is_valid": True,
-            "state": new_state,
+            "update": update,
         }
 
     except Exception:
@@ -272,12 +1896,18 @@ def split_video(step_context: StepContext, payload: dict) -> dict:
     """
     Divide el vídeo en chunks lógicos.
     Nota: aquí no cortamos físicamente el vídeo; construimos metadatos reproducibles.
+
+    Con chunk_planner="adaptive" el número y la duración de los chunks los
+    decide plan_chunks según max_concurrency; con "fixed" se trocea cada
+    chunk_duration_seconds como en la versión original.
+
+    Devuelve el update de estado; en modo delta incluye la lista de chunks.
     """
     start = time.perf_counter()
     status = "success"
     test_case = payload.get("test_case", "unknown")
 
-    state = payload["state"]
+    state_ref = payload["state_ref"]
     fail_mode = payload.get("fail_mode", "none")
     failure_key = payload.get("failure_key")
 
@@ -288,15 +1918,54 @@ def split_video(step_context: StepContext, payload: dict) -> dict:
             failure_key=failure_key,
             step_name="split_video",
         )
+        fault_injector.inject(
+            payload.get("fault"),
+            scope=state_ref["job_id"],
+            step_name="split_video",
+            logger=step_context.logger,
+            attempt=step_context.attempt,
+        )
+
+        state = load_job_state(state_ref)
+
+        duration = int(state["duration_seconds"])
+        max_concurrency = int(payload.get("max_concurrency", DEFAULT_MAX_PARALLEL_CHUNKS))
+        planner = state.get("chunk_planner", "fixed")
+
+        if planner == "adaptive":
+            plan = plan_chunks(duration, max_concurrency)
+        elif planner == "fixed":
+            sizes = fixed_chunk_sizes(duration, int(state["chunk_duration_seconds"]))
+            plan = {
+                **predict_chunk_plan(sizes, max_concurrency, CHUNK_OVERHEAD_MS, CHUNK_MS_PER_SECOND),
+                "sizes": sizes,
+            }
+        else:
+            raise ValueError(f"Unsupported chunk_planner: {planner}")
 
-        duration = int(state["duration_seconds"])
-        chunk_duration = int(state["chunk_duration_seconds"])
-        chunk_count = compute_chunk_count(duration, chunk_duration)
+        chunk_count = plan["chunk_count"]
+
+        emit_metric(
+            step_context.logger,
+            "chunk_plan",
+            {
+                "test_case": test_case,
+                "planner": planner,
+                "duration_seconds": duration,
+                "max_concurrency": max_concurrency,
+                "chunk_count": chunk_count,
+                "min_chunk_seconds": min(plan["sizes"]),
+                "max_chunk_seconds": max(plan["sizes"]),
+                "predicted_makespan_ms": plan["predicted_makespan_ms"],
+                "predicted_work_ms": plan["predicted_work_ms"],
+                "execution_model": "durable",
+            },
+        )
 
         chunks = []
-        for idx in range(chunk_count):
-            start_sec = idx * chunk_duration
-            end_sec = min(duration, (idx + 1) * chunk_duration)
+        start_sec = 0
+        for idx, size in enumerate(plan["sizes"]):
+            end_sec = start_sec + size
 
             chunks.append(
                 {
@@ -309,15 +1978,18 @@ def split_video(step_context: StepContext, payload: dict) -> dict:
                     "status": "pending",
                 }
             )
+            start_sec = end_sec
 
-        new_state = dict(state)
-        new_state["chunks"] = chunks
-        new_state["status"] = "chunked"
-        new_state["version"] += 1
-
-        jobs_table.put_item(Item=to_dynamo_number_dict(new_state))
+        update = commit_job_state(
+            step_context.logger,
+            state,
+            {"chunks": chunks, "status": "chunked"},
+            state_ref=state_ref,
+            step="split_video",
+            test_case=test_case,
+        )
         step_context.logger.info(f"Generated {chunk_count} chunks for job={state['job_id']}")
-        return new_state
+        return update
 
     except Exception:
         status = "error"
@@ -344,12 +2016,16 @@ def encode_chunk(step_context: StepContext, payload: dict) -> dict:
     Codifica un chunk lógico.
     En esta fase experimental simulamos la codificación usando tiempo de CPU/espera,
     sin invocar ffmpeg real aún. Esto permite medir control de flujo, retries y overhead.
+
+    El payload es un descriptor de tarea (ver build_chunk_task): solo lleva
+    job_id, la versión/clave del estado y el chunk a codificar. codec y
+    bitrate se leen del estado direccionado por contenido.
     """
     start = time.perf_counter()
+    started_at_ms = int(time.time() * 1000)
     status = "success"
     test_case = payload.get("test_case", "unknown")
 
-    state = payload["state"]
     chunk = payload["chunk"]
     fail_mode = payload.get("fail_mode", "none")
     failure_key = payload.get("failure_key")
@@ -361,9 +2037,22 @@ def encode_chunk(step_context: StepContext, payload: dict) -> dict:
             failure_key=failure_key,
             step_name=f"encode_chunk_{chunk['index']}",
         )
+        fault_injector.inject(
+            payload.get("fault"),
+            scope=payload["job_id"],
+            step_name=f"encode_chunk_{chunk['index']}",
+            logger=step_context.logger,
+            attempt=step_context.attempt,
+        )
+
+        state = get_state_object(payload["state_key"])
 
-        simulated_ms = 100 + (50 * int(chunk["duration_seconds"]))
-        time.sleep(simulated_ms / 1000.0)
+        encoder_result = run_encoder(
+            state.get("encoder_backend", "sleep"),
+            chunk,
+            resolution=state["resolution"],
+            bitrate_kbps=state["bitrate_kbps"],
+        )
 
         encoded = {
             "chunk_id": chunk["chunk_id"],
@@ -371,13 +2060,18 @@ def encode_chunk(step_context: StepContext, payload: dict) -> dict:
             "duration_seconds": chunk["duration_seconds"],
             "codec": state["codec"],
             "bitrate_kbps": state["bitrate_kbps"],
-            "output_uri": f"s3://{S3_BUCKET_NAME}/encoded/{state['job_id']}/{chunk['chunk_id']}.mp4",
+            "output_uri": f"s3://{S3_BUCKET_NAME}/encoded/{payload['job_id']}/{chunk['chunk_id']}.mp4",
             "status": "encoded",
-            "simulated_processing_ms": simulated_ms,
+            "simulated_processing_ms": encoder_result["processing_ms"],
+            "encoder_backend": state.get("encoder_backend", "sleep"),
+            "encoder_cpu_ms": encoder_result["cpu_ms"],
+            "estimated_bytes": encoder_result["estimated_bytes"],
+            "started_at_ms": started_at_ms,
+            "finished_at_ms": int(time.time() * 1000),
         }
 
         step_context.logger.info(
-            f"Encoded chunk index={chunk['index']} for job={state['job_id']} output={encoded['output_uri']}"
+            f"Encoded chunk index={chunk['index']} for job={payload['job_id']} output={encoded['output_uri']}"
         )
         return encoded
 
@@ -394,6 +2088,7 @@ def encode_chunk(step_context: StepContext, payload: dict) -> dict:
                 "test_case": test_case,
                 "step": "encode_chunk",
                 "chunk_index": chunk["index"],
+                "chunk_seconds": chunk["duration_seconds"],
                 "duration_ms": duration_ms,
                 "status": status,
                 "execution_model": "durable",
@@ -405,13 +2100,18 @@ def encode_chunk(step_context: StepContext, payload: dict) -> dict:
 def merge_video(step_context: StepContext, payload: dict) -> dict:
     """
     Ensambla chunks codificados en una salida final lógica.
+
+    merge_mode="batch": ensamblado completo aquí (MERGE_BATCH_MS).
+    merge_mode="streaming": el StreamingMerger ya ensambló `assembled_count`
+    chunks mientras se codificaban; aquí solo queda el resto y el cierre.
     """
     start = time.perf_counter()
     status = "success"
     test_case = payload.get("test_case", "unknown")
 
-    state = payload["state"]
+    state_ref = payload["state_ref"]
     encoded_chunks = payload["encoded_chunks"]
+    merge_mode = payload.get("merge_mode", "batch")
     fail_mode = payload.get("fail_mode", "none")
     failure_key = payload.get("failure_key")
 
@@ -422,21 +2122,41 @@ def merge_video(step_context: StepContext, payload: dict) -> dict:
             failure_key=failure_key,
             step_name="merge_video",
         )
+        fault_injector.inject(
+            payload.get("fault"),
+            scope=state_ref["job_id"],
+            step_name="merge_video",
+            logger=step_context.logger,
+            attempt=step_context.attempt,
+        )
 
-        time.sleep(0.2)
+        state = load_job_state(state_ref)
+
+        if merge_mode == "streaming":
+            tail_chunks = len(encoded_chunks) - int(payload.get("assembled_count", 0))
+            time.sleep((tail_chunks * MERGE_CHUNK_MS + MERGE_FINALIZE_MS) / 1000.0)
+        elif merge_mode == "batch":
+            time.sleep(MERGE_BATCH_MS / 1000.0)
+        else:
+            raise ValueError(f"Unsupported merge_mode: {merge_mode}")
 
         ordered_chunks = sorted(encoded_chunks, key=lambda c: c["index"])
         final_uri = f"s3://{S3_BUCKET_NAME}/final/{state['job_id']}/{state['video_id']}_encoded.mp4"
 
-        new_state = dict(state)
-        new_state["encoded_chunks"] = ordered_chunks
-        new_state["merged_output_uri"] = final_uri
-        new_state["status"] = "merged"
-        new_state["version"] += 1
-
-        jobs_table.put_item(Item=to_dynamo_number_dict(new_state))
+        update = commit_job_state(
+            step_context.logger,
+            state,
+            {
+                "encoded_chunks": ordered_chunks,
+                "merged_output_uri": final_uri,
+                "status": "merged",
+            },
+            state_ref=state_ref,
+            step="merge_video",
+            test_case=test_case,
+        )
         step_context.logger.info(f"Merged job={state['job_id']} into {final_uri}")
-        return new_state
+        return update
 
     except Exception:
         status = "error"
@@ -466,10 +2186,12 @@ def build_response(step_context: StepContext, payload: dict) -> dict:
     status = "success"
     test_case = payload.get("test_case", "unknown")
 
-    state = payload["state"]
+    state_ref = payload["state_ref"]
     execution_mode = payload.get("execution_mode", "durable_unknown")
 
     try:
+        state = load_job_state(state_ref)
+
         result = {
             "message": "fase2-video-durable executed successfully",
             "job_id": state["job_id"],
@@ -508,89 +2230,588 @@ def build_response(step_context: StepContext, payload: dict) -> dict:
 # Helpers de paralelismo
 # ============================================================
 
-def run_parallel_chunk_encoding(context: DurableContext, state: dict, failures: dict, test_case: str):
+def build_chunk_task(state_ref: dict, chunk: dict, failures: dict, test_case: str,
+                     fault_plan: dict | None = None) -> dict:
+    """
+    Construye el descriptor serializable de una tarea encode_chunk.
+
+    Solo contiene datos JSON (referencia al estado del job + el chunk), nunca
+    closures: el runtime durable puede checkpointearlo y reconstruirlo en replay.
+    Su tamaño no depende del número de chunks del job: del fault_plan solo
+    lleva la spec resuelta para este chunk.
     """
-    Intenta usar paralelismo real del SDK durable.
-    Materializa resultados BatchResult a listas Python estándar.
+    return {
+        "job_id": state_ref["job_id"],
+        "state_version": state_ref["version"],
+        "state_key": state_ref["state_key"],
+        "chunk_index": chunk["index"],
+        "chunk": chunk,
+        "fail_mode": failures.get("encode_chunk", {}).get("fail_mode", "none"),
+        "failure_key": failures.get("encode_chunk", {}).get("failure_key"),
+        "fault": resolve_fault_spec(fault_plan, "encode_chunk", chunk["index"]),
+        "test_case": test_case,
+    }
+
+
+class StreamingMerger:
     """
-    chunk_payloads = [
-        {
-            "state": state,
-            "chunk": chunk,
-            "fail_mode": failures.get("encode_chunk", {}).get("fail_mode", "none"),
-            "failure_key": failures.get("encode_chunk", {}).get("failure_key"),
-            "test_case": test_case,
-        }
-        for chunk in state["chunks"]
-    ]
+    Merge incremental en proceso que se solapa con la codificación.
 
-    def materialize_batch_result(batch_result):
-        """Convierte cualquier iterable/SDK result a lista Python"""
-        if isinstance(batch_result, list):
-            return batch_result
-        
-        # Caso 1: Tiene método result() (Future-like)
-        if hasattr(batch_result, "result") and callable(getattr(batch_result, "result")):
-            try:
-                resolved = batch_result.result()
-                return list(resolved) if not isinstance(resolved, list) else resolved
-            except Exception:
-                pass
-        
-        # Caso 2: Tiene atributo results (list-like)
-        if hasattr(batch_result, "results"):
+    Recibe chunks codificados en cualquier orden y ensambla el prefijo
+    contiguo en cuanto está disponible (cursor = siguiente índice esperado).
+    Solo un hilo ensambla a la vez; el resto deja su chunk en `pending` y
+    sigue. Al terminar el último chunk solo queda en el camino crítico el
+    ensamblado de lo que él desbloquea.
+
+    No es estado durable: si hay replay, los chunks servidos desde checkpoint
+    no pasan por aquí (tracked_step solo llama a on_live_result cuando el step
+    se ejecuta en vivo) y merge_video ensambla lo que falte (assembled_count).
+    """
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.cursor = 0
+        self.pending = {}
+        self.assembled_uris = []
+        self._lock = threading.Lock()
+        self._assembly_lock = threading.Lock()
+
+    def add(self, encoded: dict) -> None:
+        with self._lock:
+            if encoded["index"] < self.cursor:
+                return
+            self.pending[encoded["index"]] = encoded
+        self._assemble_ready_prefix()
+
+    def _assemble_ready_prefix(self) -> None:
+        while self._assembly_lock.acquire(blocking=False):
             try:
-                resolved = batch_result.results
-                if callable(resolved):
-                    resolved = resolved()
-                return list(resolved) if not isinstance(resolved, list) else resolved
-            except Exception:
-                pass
-        
-        # Caso 3: Es iterable genérico (BatchResult, generator, etc)
-        try:
-            return list(batch_result)
-        except TypeError:
-            raise TypeError(
-                f"Cannot materialize parallel result of type {type(batch_result).__name__}. "
-                f"Attributes: {[a for a in dir(batch_result) if not a.startswith('_')]}"
+                while True:
+                    with self._lock:
+                        chunk = self.pending.pop(self.cursor, None)
+                    if chunk is None:
+                        break
+                    time.sleep(MERGE_CHUNK_MS / 1000.0)
+                    with self._lock:
+                        self.assembled_uris.append(chunk["output_uri"])
+                        self.cursor += 1
+            finally:
+                self._assembly_lock.release()
+
+            # Un chunk pudo llegar entre la última comprobación y el release
+            with self._lock:
+                if self.cursor not in self.pending:
+                    return
+
+
+# Mergers activos por job_id en este contenedor (los hilos de context.map
+# comparten proceso con el orquestador).
+_stream_mergers: dict = {}
+
+
+def feed_stream_merger(job_id: str, encoded: dict) -> None:
+    merger = _stream_mergers.get(job_id)
+    if merger is not None:
+        merger.add(encoded)
+
+
+def encode_chunk_task(child_context: DurableContext, task: dict, index: int, tasks: list) -> dict:
+    """
+    Función de iteración para context.map(): ejecuta encode_chunk como step
+    dentro del child context de la iteración y entrega el resultado al
+    StreamingMerger del job, si lo hay.
+    """
+    return tracked_step(
+        child_context,
+        encode_chunk(task),
+        name=f"encode_chunk_{task['chunk_index']}",
+        on_live_result=lambda encoded: feed_stream_merger(task["job_id"], encoded),
+        job_id=task["job_id"],
+    )
+
+
+def compute_peak_concurrency(encoded_chunks: list) -> int:
+    """
+    Concurrencia real observada: máximo número de chunks cuyos intervalos
+    [started_at_ms, finished_at_ms) se solapan.
+    """
+    events = []
+    for c in encoded_chunks:
+        if "started_at_ms" not in c or "finished_at_ms" not in c:
+            continue
+        events.append((c["started_at_ms"], 1))
+        events.append((c["finished_at_ms"], -1))
+
+    # Los fines se ordenan antes que los inicios en el mismo instante
+    events.sort(key=lambda e: (e[0], e[1]))
+
+    peak = current = 0
+    for _, delta in events:
+        current += delta
+        peak = max(peak, current)
+    return peak
+
+
+def run_parallel_chunk_encoding(
+    context: DurableContext,
+    state_ref: dict,
+    chunks: list,
+    failures: dict,
+    test_case: str,
+    max_concurrency: int = DEFAULT_MAX_PARALLEL_CHUNKS,
+    fault_plan: dict | None = None,
+):
+    """
+    Fan-out de chunks con context.map() sobre descriptores serializables.
+
+    - max_concurrency acota el número de encode_chunk simultáneos.
+    - Los resultados se devuelven ordenados por índice de chunk.
+    - max_concurrency <= 1 ejecuta los steps en secuencia, sin map.
+    """
+    chunk_tasks = [
+        build_chunk_task(state_ref, chunk, failures, test_case, fault_plan)
+        for chunk in chunks
+    ]
+
+    if not chunk_tasks:
+        return [], "durable_sequential"
+
+    max_concurrency = max(1, min(int(max_concurrency), len(chunk_tasks)))
+
+    if max_concurrency == 1:
+        encoded_chunks = []
+        for task in chunk_tasks:
+            encoded = tracked_step(
+                context,
+                encode_chunk(task),
+                name=f"encode_chunk_{task['chunk_index']}",
+                on_live_result=lambda encoded, job_id=task["job_id"]: feed_stream_merger(job_id, encoded),
+                job_id=task["job_id"],
             )
+            encoded_chunks.append(encoded)
+        return encoded_chunks, "durable_sequential"
+
+    batch_result = context.map(
+        chunk_tasks,
+        encode_chunk_task,
+        name="encode_chunks",
+        config=MapConfig(max_concurrency=max_concurrency),
+    )
+    batch_result.throw_if_error()
+
+    encoded_chunks = sorted(batch_result.get_results(), key=lambda c: c["index"])
+    if len(encoded_chunks) != len(chunk_tasks):
+        raise RuntimeError(
+            f"Parallel encoding returned {len(encoded_chunks)} of {len(chunk_tasks)} chunks"
+        )
+
+    context.logger.info(
+        f"Encoded {len(encoded_chunks)} chunks with max_concurrency={max_concurrency}"
+    )
+    return encoded_chunks, "durable_parallel"
+
+# ============================================================
+# Replay
+# ============================================================
+#
+# En cada reanudación el runtime vuelve a ejecutar el handler desde el
+# principio; los steps ya checkpointeados devuelven su resultado sin ejecutar
+# la función. replay_overhead mide cuánto cuesta ese recorrido.
+
+class ReplayTracker:
+    """
+    Steps de la invocación actual servidos desde checkpoint (replay) frente a
+    ejecutados en vivo, y tiempo del orquestador hasta el primer step en vivo.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.started_at = time.perf_counter()
+            self.first_live_at = None
+            self.replayed = 0
+            self.executed = 0
+            self.replayed_step_ms = 0.0
+
+    def mark_live(self) -> None:
+        with self._lock:
+            if self.first_live_at is None:
+                self.first_live_at = time.perf_counter()
+
+    def record(self, executed: bool, duration_ms: float) -> None:
+        with self._lock:
+            if executed:
+                self.executed += 1
+            else:
+                self.replayed += 1
+                self.replayed_step_ms += duration_ms
+
+    def summary(self) -> dict:
+        with self._lock:
+            end = self.first_live_at if self.first_live_at is not None else time.perf_counter()
+            return {
+                "steps_replayed": self.replayed,
+                "steps_executed": self.executed,
+                "replay_ms": round((end - self.started_at) * 1000, 3),
+                "replayed_step_ms": round(self.replayed_step_ms, 3),
+            }
+
+
+replay = ReplayTracker()
 
-    # Intento 1: Parallel nativo
-    if hasattr(context, "parallel"):
-        try:
-            encode_tasks = [(lambda p=payload: encode_chunk(p)) for payload in chunk_payloads]
-            batch_result = context.parallel(encode_tasks)
-            
-            context.logger.info(f"Parallel execution returned: {type(batch_result).__name__}")
-            encoded_chunks = materialize_batch_result(batch_result)
-            
-            context.logger.info(f"Successfully materialized {len(encoded_chunks)} chunks in parallel")
-            return encoded_chunks, "durable_parallel"
-            
-        except Exception as e:
-            context.logger.warning(f"Parallel failed ({e}), trying map...")
-
-    # Intento 2: Map nativo
-    if hasattr(context, "map"):
-        try:
-            batch_result = context.map(lambda p: encode_chunk(p), chunk_payloads)
-            encoded_chunks = materialize_batch_result(batch_result)
-            return encoded_chunks, "durable_parallel"
-        except Exception as e:
-            context.logger.warning(f"Map failed ({e}), using sequential fallback...")
 
-    # Fallback secuencial (siempre retorna lista nativa)
-    encoded_chunks = [context.step(encode_chunk(payload)) for payload in chunk_payloads]
-    return encoded_chunks, "durable_sequential_fallback"
+def tracked_step(context, func, name: str | None = None, on_live_result=None, job_id: str | None = None):
+    """
+    context.step() que registra si el step se ejecuta o se sirve desde
+    checkpoint: la función envuelta solo corre cuando el step va en vivo.
+    on_live_result(result) se llama tras el checkpoint solo si el step se
+    ejecutó en esta invocación; con replay no se repite su trabajo.
+    Los reintentos del step cuentan en el presupuesto de job_id.
+    """
+    executed = []
+
+    def live(step_context):
+        if not executed:
+            executed.append(True)
+            replay.mark_live()
+        return func(step_context)
+
+    live._original_name = getattr(func, "_original_name", None)
+    start = time.perf_counter()
+    result = context.step(live, name=name, config=step_config(job_id))
+    replay.record(bool(executed), (time.perf_counter() - start) * 1000)
+    if executed and on_live_result is not None:
+        on_live_result(result)
+    return result
+
 
 # ============================================================
 # Orquestación principal
 # ============================================================
 
-@durable_execution
-def lambda_handler(event, context: DurableContext) -> dict:
+def run_video_pipeline(event: dict, context: DurableContext, test_case: str) -> dict:
+    """
+    Pipeline completo de un vídeo (initialize → validate → split → encode →
+    merge → build_response) sobre `context`. En modo batch `context` es el
+    child context del vídeo, así que sus steps quedan en su propio espacio
+    de checkpoints.
+    """
+    failures = event.get("failures", {})
+    fault_plan = event.get("fault_plan")
+    max_parallel_chunks = int(event.get("max_parallel_chunks", DEFAULT_MAX_PARALLEL_CHUNKS))
+
+    state_ref = tracked_step(
+        context,
+        initialize_job(
+            {
+                "job_id": event.get("job_id"),
+                "video": event["video"],
+                "encoding": event.get("encoding", {}),
+                "state_checkpoint_mode": event.get("state_checkpoint_mode", DEFAULT_STATE_CHECKPOINT_MODE),
+                "test_case": test_case,
+            }
+        ),
+        # Sin job_id en el evento aún no lo hay: test_case es único por vídeo en un batch
+        job_id=event.get("job_id") or test_case,
+    )
+
+    validation_result = tracked_step(
+        context,
+        validate_video(
+            {
+                "state_ref": state_ref,
+                "fail_mode": failures.get("validate_video", {}).get("fail_mode", "none"),
+                "failure_key": failures.get("validate_video", {}).get("failure_key"),
+                "fault": resolve_fault_spec(fault_plan, "validate_video"),
+                "test_case": test_case,
+            }
+        ),
+        job_id=state_ref["job_id"],
+    )
+
+    if not validation_result["is_valid"]:
+        emit_metric(
+            context.logger,
+            "validation_failure",
+            {
+                "test_case": test_case,
+                "error_type": validation_result["error_type"],
+                "error_message": validation_result["error_message"],
+                "execution_model": "durable",
+            },
+        )
+
+        return {
+            "statusCode": 400,
+            "body": {
+                "message": "fase2-video-durable validation failed",
+                "job_id": state_ref["job_id"],
+                "video_id": state_ref["video_id"],
+                "status": "validation_failed",
+                "error_type": validation_result["error_type"],
+                "error_message": validation_result["error_message"],
+                "execution_model": "durable",
+            },
+        }
+
+    state_updates = [validation_result["update"]]
+    state_ref = advance_state_ref(state_ref, validation_result["update"])
+
+    split_update = tracked_step(
+        context,
+        split_video(
+            {
+                "state_ref": state_ref,
+                "max_concurrency": max_parallel_chunks,
+                "fail_mode": failures.get("split_video", {}).get("fail_mode", "none"),
+                "failure_key": failures.get("split_video", {}).get("failure_key"),
+                "fault": resolve_fault_spec(fault_plan, "split_video"),
+                "test_case": test_case,
+            }
+        ),
+        job_id=state_ref["job_id"],
+    )
+
+    state_updates.append(split_update)
+    state_ref = advance_state_ref(state_ref, split_update)
+    chunks = load_job_state(state_ref)["chunks"]
+
+    merge_mode = event.get("merge_mode", DEFAULT_MERGE_MODE)
+    if merge_mode == "streaming":
+        _stream_mergers[state_ref["job_id"]] = StreamingMerger(state_ref["job_id"])
+
+    try:
+        encoded_chunks, execution_mode = run_parallel_chunk_encoding(
+            context=context,
+            state_ref=state_ref,
+            chunks=chunks,
+            failures=failures,
+            test_case=test_case,
+            max_concurrency=max_parallel_chunks,
+            fault_plan=fault_plan,
+        )
+    finally:
+        # También si el map falla o la invocación se suspende
+        merger = _stream_mergers.pop(state_ref["job_id"], None)
+
+    emit_metric(
+        context.logger,
+        "parallelism_summary",
+        {
+            "test_case": test_case,
+            "requested_parallel_chunks": len(chunks),
+            "max_parallel_chunks": max_parallel_chunks,
+            "executed_chunks": len(encoded_chunks),
+            "actual_parallel_chunks": compute_peak_concurrency(encoded_chunks),
+            "execution_model": execution_mode,
+        },
+    )
+
+    chunk_step_kb = max(
+        (
+            len(json.dumps(build_chunk_task(state_ref, chunk, failures, test_case, fault_plan), ensure_ascii=False))
+            + len(json.dumps(encoded, ensure_ascii=False))
+            for chunk, encoded in zip(chunks, encoded_chunks)
+        ),
+        default=0,
+    ) / 1024.0
+
+    assembled_count = merger.cursor if merger is not None else 0
+
+    emit_metric(
+        context.logger,
+        "merge_overlap",
+        {
+            "test_case": test_case,
+            "merge_mode": merge_mode,
+            "chunk_count": len(encoded_chunks),
+            "assembled_before_merge": assembled_count,
+            "tail_chunks": len(encoded_chunks) - assembled_count,
+            "execution_model": execution_mode,
+        },
+    )
+
+    merge_update = tracked_step(
+        context,
+        merge_video(
+            {
+                "state_ref": state_ref,
+                "encoded_chunks": encoded_chunks,
+                "merge_mode": merge_mode,
+                "assembled_count": assembled_count,
+                "fail_mode": failures.get("merge_video", {}).get("fail_mode", "none"),
+                "failure_key": failures.get("merge_video", {}).get("failure_key"),
+                "fault": resolve_fault_spec(fault_plan, "merge_video"),
+                "test_case": test_case,
+            }
+        ),
+        job_id=state_ref["job_id"],
+    )
+
+    state_updates.append(merge_update)
+    state_ref = advance_state_ref(state_ref, merge_update)
+
+    result = tracked_step(
+        context,
+        build_response(
+            {
+                "state_ref": state_ref,
+                "test_case": test_case,
+                "execution_mode": execution_mode,
+            }
+        ),
+        job_id=state_ref["job_id"],
+    )
+
+    # size_kb: suma de los updates de estado checkpointeados por
+    # validate/split/merge (snapshot refs en modo full, deltas en modo delta).
+    # chunk_step_kb: payload + resultado del encode_chunk más grande.
+    update_sizes_kb = [len(json.dumps(u, ensure_ascii=False)) / 1024.0 for u in state_updates]
+
+    emit_metric(
+        context.logger,
+        "checkpoint_size",
+        {
+            "test_case": test_case,
+            "size_kb": round(sum(update_sizes_kb), 3),
+            "max_state_update_kb": round(max(update_sizes_kb), 3),
+            "chunk_step_kb": round(chunk_step_kb, 3),
+            "state_checkpoint_mode": state_ref["mode"],
+            "state_version": state_ref.get("version", 0),
+            "chunk_count": len(chunks),
+            "encoded_chunk_count": len(encoded_chunks),
+            "execution_model": execution_mode,
+        },
+    )
+
+    return {"statusCode": 200, "body": result}
+
+
+def run_video_batch_item(child_context: DurableContext, video_event: dict, index: int, video_events: list) -> dict:
+    """
+    Función de iteración de context.map() sobre los vídeos de un batch.
+
+    Un fallo definitivo del vídeo (steps agotados sus reintentos) se captura
+    aquí y se devuelve como resultado 500 del vídeo: el map lo checkpointea
+    como completado y el resto de vídeos no se ve afectado ni se re-ejecuta.
+    SuspendExecution hereda de BaseException y no se intercepta.
+    """
+    test_case = video_event["test_case"]
+    start = time.perf_counter()
+    try:
+        response = run_video_pipeline(video_event, child_context, test_case)
+        status = "success" if response["statusCode"] == 200 else "validation_failed"
+    except Exception as e:
+        status = "error"
+        response = {
+            "statusCode": 500,
+            "body": {
+                "message": "fase2-video-durable video failed",
+                "video_id": video_event["video"].get("video_id"),
+                "status": "failed",
+                "error_type": type(e).__name__,
+                "error_message": str(e),
+                "execution_model": "durable",
+            },
+        }
+
+    duration_ms = round((time.perf_counter() - start) * 1000, 3)
+    emit_metric(
+        child_context.logger,
+        "video_duration",
+        {
+            "test_case": test_case,
+            "video_index": index,
+            "video_id": video_event["video"].get("video_id"),
+            "duration_ms": duration_ms,
+            "status": status,
+            "execution_model": "durable_batch",
+        },
+    )
+    return {**response, "video_index": index, "duration_ms": duration_ms}
+
+
+def build_batch_video_events(event: dict) -> list:
+    """
+    Expande un evento batch en un sub-evento por vídeo. Cada entrada de
+    "videos" es {"video": {...}} con overrides opcionales ("job_id",
+    "encoding", "failures", ...) sobre los campos comunes del batch.
+    """
+    shared = {k: v for k, v in event.items() if k not in ("videos", "max_parallel_videos")}
+    test_case = event.get("test_case", "unknown")
+    video_events = []
+    for index, entry in enumerate(event["videos"]):
+        video_event = {**shared, **entry}
+        video_event["test_case"] = entry.get("test_case", f"{test_case}/video_{index}")
+        video_events.append(video_event)
+    return video_events
+
+
+def run_video_batch(event: dict, context: DurableContext, test_case: str) -> dict:
+    """
+    Ejecuta varios vídeos en una sola ejecución durable: cold start, clientes
+    AWS y write-behind compartidos; cada vídeo en su propia rama de
+    context.map() (espacio de checkpoints propio) y sin fail-fast entre vídeos.
+    """
+    video_events = build_batch_video_events(event)
+    max_parallel_videos = int(event.get("max_parallel_videos", DEFAULT_MAX_PARALLEL_VIDEOS))
+
+    batch = context.map(
+        video_events,
+        run_video_batch_item,
+        name="video_batch",
+        config=MapConfig(
+            max_concurrency=max_parallel_videos,
+            completion_config=CompletionConfig.all_completed(),
+        ),
+    )
+    batch.throw_if_error()
+    videos = sorted(batch.get_results(), key=lambda r: r["video_index"])
+
+    status_counts = {"success": 0, "validation_failed": 0, "failed": 0}
+    for video in videos:
+        if video["statusCode"] == 200:
+            status_counts["success"] += 1
+        elif video["statusCode"] == 400:
+            status_counts["validation_failed"] += 1
+        else:
+            status_counts["failed"] += 1
+
+    durations = [video["duration_ms"] for video in videos]
+    emit_metric(
+        context.logger,
+        "batch_summary",
+        {
+            "test_case": test_case,
+            "video_count": len(videos),
+            "max_parallel_videos": max_parallel_videos,
+            **status_counts,
+            "sum_video_duration_ms": round(sum(durations), 3),
+            "max_video_duration_ms": max(durations, default=0),
+            "execution_model": "durable_batch",
+        },
+    )
+
+    return {
+        "statusCode": 200 if status_counts["success"] == len(videos) else 207,
+        "body": {
+            "message": "fase2-video-durable batch completed",
+            "video_count": len(videos),
+            **status_counts,
+            "videos": videos,
+            "execution_model": "durable_batch",
+        },
+    }
+
+
+def run_video_job(event, context: DurableContext) -> dict:
     """
+    Orquestación del pipeline. Separada de lambda_handler para poder
+    ejecutarla con un DurableContext local (ver bench/local_aws.py).
+
     Evento esperado (ejemplo mínimo):
     {
       "test_case": "video_happy_path_001",
@@ -604,157 +2825,97 @@ def lambda_handler(event, context: DurableContext) -> dict:
       "encoding": {
         "codec": "h264",
         "bitrate_kbps": 2200,
-        "chunk_duration_seconds": 10
+        "chunk_duration_seconds": 10,
+        "chunk_planner": "adaptive"
       },
+      "max_parallel_chunks": 10,
+      "state_checkpoint_mode": "delta",
+      "merge_mode": "streaming",
       "failures": {
         "validate_video": {"fail_mode": "none"},
         "split_video": {"fail_mode": "none"},
         "encode_chunk": {"fail_mode": "none"},
         "merge_video": {"fail_mode": "none"}
-      }
+      },
+      "fault_plan": {"seed": 42, "steps": {"encode_chunk": {"probability": 0.1}}}
     }
+
+    "fault_plan" es opcional (ver la sección Plan de fallos).
+
+    Modo batch: en lugar de "video", una lista "videos" de entradas
+    {"video": {...}} (con overrides opcionales por vídeo) y
+    "max_parallel_videos"; el resto de campos se comparte entre vídeos.
     """
     start = time.perf_counter()
     status = "success"
 
     test_case = event.get("test_case", "unknown")
     context.logger.info(f"Received event={event}")
+    job_writes.reset()
+    metrics.reset()
+    replay.reset()
+    retry_policy.reset()
+    fault_injector.reset()
 
     try:
-        failures = event.get("failures", {})
-
-        state = context.step(
-            initialize_job(
-                {
-                    "job_id": event.get("job_id"),
-                    "video": event["video"],
-                    "encoding": event.get("encoding", {}),
-                    "test_case": test_case,
-                }
-            )
-        )
+        if "videos" in event:
+            return run_video_batch(event, context, test_case)
+        return run_video_pipeline(event, context, test_case)
 
-        validation_result = context.step(
-            validate_video(
-                {
-                    "state": state,
-                    "fail_mode": failures.get("validate_video", {}).get("fail_mode", "none"),
-                    "failure_key": failures.get("validate_video", {}).get("failure_key"),
-                    "test_case": test_case,
-                }
-            )
-        )
+    except Exception:
+        status = "error"
+        raise
 
-        if not validation_result["is_valid"]:
+    finally:
+        try:
+            # Lambda congela el proceso al retornar y al suspenderse
+            # (SuspendExecution): no dejar escrituras de jobs_table pendientes.
+            job_writes.flush()
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            replay_summary = replay.summary()
             emit_metric(
                 context.logger,
-                "validation_failure",
+                "replay_overhead",
                 {
                     "test_case": test_case,
-                    "error_type": validation_result["error_type"],
-                    "error_message": validation_result["error_message"],
-                    "execution_model": "durable",
-                },
-            )
-
-            return {
-                "statusCode": 400,
-                "body": {
-                    "message": "fase2-video-durable validation failed",
-                    "job_id": state["job_id"],
-                    "video_id": state["video_id"],
-                    "status": "validation_failed",
-                    "error_type": validation_result["error_type"],
-                    "error_message": validation_result["error_message"],
+                    **replay_summary,
+                    "is_replay": replay_summary["steps_replayed"] > 0,
                     "execution_model": "durable",
                 },
-            }
-
-        state = validation_result["state"]
-
-        state = context.step(
-            split_video(
-                {
-                    "state": state,
-                    "fail_mode": failures.get("split_video", {}).get("fail_mode", "none"),
-                    "failure_key": failures.get("split_video", {}).get("failure_key"),
-                    "test_case": test_case,
-                }
             )
-        )
-
-        encoded_chunks, execution_mode = run_parallel_chunk_encoding(
-            context=context,
-            state=state,
-            failures=failures,
-            test_case=test_case,
-        )
-
-        emit_metric(
-            context.logger,
-            "parallelism_summary",
-            {
-                "test_case": test_case,
-                "requested_parallel_chunks": len(state["chunks"]),
-                "executed_chunks": len(encoded_chunks),
-                "actual_parallel_chunks": len(encoded_chunks)
-                if execution_mode == "durable_parallel" else 1,
-                "execution_model": execution_mode,
-            },
-        )
-
-        state = context.step(
-            merge_video(
+            duration_ms = round((time.perf_counter() - start) * 1000, 3)
+            emit_metric(
+                context.logger,
+                "execution_duration",
                 {
-                    "state": state,
-                    "encoded_chunks": encoded_chunks,
-                    "fail_mode": failures.get("merge_video", {}).get("fail_mode", "none"),
-                    "failure_key": failures.get("merge_video", {}).get("failure_key"),
                     "test_case": test_case,
-                }
+                    "duration_ms": duration_ms,
+                    "status": status,
+                    "execution_model": "durable",
+                    "write_behind": dict(job_writes.stats),
+                },
             )
-        )
-
-        result = context.step(
-            build_response(
-                {
-                    "state": state,
-                    "test_case": test_case,
-                    "execution_mode": execution_mode,
-                }
+            emit_metric(
+                context.logger,
+                "retry_summary",
+                {"test_case": test_case, "retry_policy": RETRY_POLICY, **retry_policy.summary(), "status": status},
             )
-        )
-
-        checkpoint_size_kb = len(json.dumps(state, ensure_ascii=False)) / 1024.0
+            if event.get("fault_plan") or any(entry.get("fault_plan") for entry in event.get("videos", [])):
+                emit_metric(
+                    context.logger,
+                    "fault_summary",
+                    {"test_case": test_case, **fault_injector.summary(), "status": status, "execution_model": "durable"},
+                )
+            emit_init_profile(context.logger, test_case)
+            metrics.flush({"test_case": test_case, "status": status})
 
-        emit_metric(
-            context.logger,
-            "checkpoint_size",
-            {
-                "test_case": test_case,
-                "size_kb": round(checkpoint_size_kb, 3),
-                "state_version": state.get("version", 0),
-                "chunk_count": len(state.get("chunks", [])),
-                "encoded_chunk_count": len(state.get("encoded_chunks", [])),
-                "execution_model": execution_mode,
-            },
-        )
 
-        return {"statusCode": 200, "body": result}
+@durable_execution
+def lambda_handler(event, context: DurableContext) -> dict:
+    return run_video_job(event, context)
 
-    except Exception:
-        status = "error"
-        raise
 
-    finally:
-        duration_ms = round((time.perf_counter() - start) * 1000, 3)
-        emit_metric(
-            context.logger,
-            "execution_duration",
-            {
-                "test_case": test_case,
-                "duration_ms": duration_ms,
-                "status": status,
-                "execution_model": "durable",
-            },
-        )
\ No newline at end of file
+_init_marks.append(("module_body", time.perf_counter()))
@@ -1,12 +1,28 @@
-import os
 import time
+
+# Perfil de la fase INIT: marca tras cada grupo de imports (ver emit_init_profile)
+_init_marks = [("start", time.perf_counter())]
+
+import os
+import copy
 import json
 import math
+import random
+import threading
 import uuid
-import boto3
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from decimal import Decimal
+
+_init_marks.append(("stdlib", time.perf_counter()))
+
 from botocore.exceptions import ClientError
 
+_init_marks.append(("botocore", time.perf_counter()))
+
+# NumPy solo se importa con encoder_backend="numpy" (ver load_numpy)
+np = None
+_init_profile_emitted = False
+
 
 # ============================================================
 # Configuración
@@ -16,12 +32,107 @@ FAILURE_TABLE_NAME = os.environ.get("FAILURE_TABLE_NAME", "durable-failure-marke
 JOBS_TABLE_NAME = os.environ.get("TRADITIONAL_JOBS_TABLE_NAME", "traditional-video-jobs")
 S3_BUCKET_NAME = os.environ.get("VIDEO_BUCKET_NAME", "durable-video-artifacts")
 DEFAULT_CHUNK_DURATION_SECONDS = int(os.environ.get("DEFAULT_CHUNK_DURATION_SECONDS", "10"))
+DEFAULT_ENCODER_BACKEND = os.environ.get("ENCODER_BACKEND", "sleep")
+ENCODER_SAMPLE_FPS = float(os.environ.get("ENCODER_SAMPLE_FPS", "2"))
+ENCODER_PIXEL_SCALE = float(os.environ.get("ENCODER_PIXEL_SCALE", "0.25"))
+# Solo en local: emula el reparto de vCPU de Lambda para esta memoria (MB)
+ENCODER_EMULATE_MEMORY_MB = int(os.environ.get("ENCODER_EMULATE_MEMORY_MB", "0"))
 MAX_RETRIES = int(os.environ.get("MAX_RETRIES", "2"))
+# Encode dentro del handler: 1 = secuencial (baseline original), N > 1 = pool
+# de N threads con escrituras condicionadas a version
+DEFAULT_MAX_PARALLEL_CHUNKS = int(os.environ.get("MAX_PARALLEL_CHUNKS", "1"))
+# Reintentos por conflicto de versión (aparte de MAX_RETRIES) y su backoff base
+MAX_CONFLICT_RETRIES = int(os.environ.get("MAX_CONFLICT_RETRIES", "10"))
+CONFLICT_BACKOFF_MS = float(os.environ.get("CONFLICT_BACKOFF_MS", "10"))
+# Modo deadline-aware: antes de agotar el timeout la invocación deja el
+# progreso persistido y se re-invoca a sí misma (asíncrona) con el job_id
+DEADLINE_AWARE = os.environ.get("DEADLINE_AWARE", "0") == "1"
+# Margen que se reserva para persistir y lanzar la continuación
+DEADLINE_SAFETY_MS = int(os.environ.get("DEADLINE_SAFETY_MS", "3000"))
+MAX_CONTINUATIONS = int(os.environ.get("MAX_CONTINUATIONS", "50"))
+# Fan-out de chunks: "inline" (encode dentro de lambda_handler) o "queue"
+# (lambda_handler como coordinador, un mensaje SQS por chunk para
+# chunk_worker_handler y merge en aggregator_handler)
+CHUNK_FANOUT = os.environ.get("CHUNK_FANOUT", "inline")
+CHUNK_QUEUE_URL = os.environ.get("CHUNK_QUEUE_URL", "")
+AGGREGATOR_FUNCTION_NAME = os.environ.get("AGGREGATOR_FUNCTION_NAME", "")
+# Política de reintentos de los steps: "adaptive" (clasificación de errores,
+# backoff con jitter, presupuesto por job y circuit breaker de throttling) o
+# "legacy" (reintento inmediato de cualquier error, comportamiento original)
+RETRY_POLICY = os.environ.get("RETRY_POLICY", "adaptive")
+RETRY_BASE_DELAY_MS = float(os.environ.get("RETRY_BASE_DELAY_MS", "50"))
+RETRY_MAX_DELAY_MS = float(os.environ.get("RETRY_MAX_DELAY_MS", "2000"))
+THROTTLE_BASE_DELAY_MS = float(os.environ.get("THROTTLE_BASE_DELAY_MS", "200"))
+# El throttling no cuenta para MAX_RETRIES: tiene su propio límite
+THROTTLE_MAX_ATTEMPTS = int(os.environ.get("THROTTLE_MAX_ATTEMPTS", "8"))
+# Presupuesto de reintentos por job: RETRY_BUDGET_PER_JOB + RETRY_BUDGET_RATIO
+# por step ejecutado (cada chunk suma margen)
+RETRY_BUDGET_PER_JOB = int(os.environ.get("RETRY_BUDGET_PER_JOB", "20"))
+RETRY_BUDGET_RATIO = float(os.environ.get("RETRY_BUDGET_RATIO", "2.0"))
+BREAKER_THRESHOLD = int(os.environ.get("BREAKER_THRESHOLD", "5"))
+BREAKER_COOLDOWN_MS = float(os.environ.get("BREAKER_COOLDOWN_MS", "1000"))
+# Rechazos del breaker admitidos por step, en múltiplos de THROTTLE_MAX_ATTEMPTS
+BREAKER_REJECTION_FACTOR = int(os.environ.get("BREAKER_REJECTION_FACTOR", "3"))
+# Caché read-through/write-through del estado del job durante la invocación
+JOB_STATE_CACHE = os.environ.get("JOB_STATE_CACHE", "1") == "1"
+# Layout de la tabla de jobs: "chunked" (item cabecera + un item por chunk
+# bajo la sort key) o "single" (el job completo en un item, layout original)
+JOBS_TABLE_LAYOUT = os.environ.get("JOBS_TABLE_LAYOUT", "chunked")
+JOBS_TABLE_SORT_KEY = os.environ.get("JOBS_TABLE_SORT_KEY", "item_key")
+METRICS_MODE = os.environ.get("METRICS_MODE", "emf")
+# Fracción de eventos por step/chunk/intento que se siguen escribiendo como
+# línea METRIC además del agregado EMF
+METRICS_RAW_SAMPLE_RATE = float(os.environ.get("METRICS_RAW_SAMPLE_RATE", "0.1"))
+METRICS_NAMESPACE = os.environ.get("METRICS_NAMESPACE", "DurableFunctionsResearch")
+# Añade al documento EMF los contadores por status y los buckets de cada
+# histograma; solo para depurar, multiplica su tamaño
+METRICS_EMF_DETAIL = os.environ.get("METRICS_EMF_DETAIL", "0") == "1"
 
-dynamodb = boto3.resource("dynamodb")
 
-failure_table = dynamodb.Table(FAILURE_TABLE_NAME)
-jobs_table = dynamodb.Table(JOBS_TABLE_NAME)
+# ============================================================
+# Clientes AWS (construcción perezosa)
+# ============================================================
+# boto3 y sus clientes se crean en el primer uso y no al importar el módulo:
+# el import de boto3 sale de la fase INIT.
+# Todos salen de una única boto3 Session por contenedor.
+
+_aws_session = None
+_aws_clients = {}
+_aws_clients_lock = threading.RLock()
+# ms de construcción de cada cliente
+_aws_client_init_ms = {}
+
+
+def _build_aws_client(name: str):
+    global _aws_session
+    if _aws_session is None:
+        import boto3
+        _aws_session = boto3.session.Session()
+    if name in ("dynamodb", "lambda", "sqs"):
+        return _aws_session.client(name)
+    raise ValueError(f"Unknown AWS client: {name}")
+
+
+def aws_client(name: str):
+    """
+    Cliente de bajo nivel compartido del contenedor ("dynamodb", y "lambda"
+    o "sqs" para continuaciones y fan-out por cola), construido en el primer
+    uso. En local se sustituye con set_aws_client().
+    """
+    client = _aws_clients.get(name)
+    if client is None:
+        with _aws_clients_lock:
+            client = _aws_clients.get(name)
+            if client is None:
+                start = time.perf_counter()
+                client = _build_aws_client(name)
+                _aws_client_init_ms[name] = round((time.perf_counter() - start) * 1000, 3)
+                _aws_clients[name] = client
+    return client
+
+
+def set_aws_client(name: str, client) -> None:
+    _aws_clients[name] = client
 
 
 # ============================================================
@@ -32,54 +143,957 @@ IO_COUNTERS = {
     "jobs_table_reads": 0,
     "jobs_table_writes": 0,
     "failure_table_writes": 0,
+    "jobs_table_cache_hits": 0,
+    "jobs_table_conflicts": 0,
+    # Unidades de capacidad según ConsumedCapacity de cada respuesta
+    "jobs_table_write_units": 0.0,
+    "jobs_table_read_units": 0.0,
+}
+_io_lock = threading.Lock()
+
+
+def count_io(name: str, amount=1) -> None:
+    # Los workers del encode paralelo comparten los contadores
+    with _io_lock:
+        IO_COUNTERS[name] += amount
+
+
+# ============================================================
+# Serialización DynamoDB del job (AttributeValue de bajo nivel)
+# ============================================================
+# El esquema del item del job es fijo: se compila una vez a un serializador
+# por campo y las lecturas/escrituras usan AttributeValue directamente con el
+# cliente de bajo nivel, sin la conversión recursiva a Decimal ni el segundo
+# recorrido del TypeSerializer de la capa resource. Los campos fuera del
+# esquema pasan por el camino genérico.
+
+def _format_number(value) -> str:
+    """Texto de un AttributeValue N. bool, NaN e infinito no son números de DynamoDB."""
+    kind = type(value)
+    if kind is int:
+        return str(value)
+    if kind is float:
+        if not math.isfinite(value):
+            raise ValueError(f"Unsupported DynamoDB number: {value!r}")
+        text = repr(value)
+    elif isinstance(value, bool):
+        raise TypeError(f"Unsupported DynamoDB number: {value!r} (bool)")
+    elif isinstance(value, int):
+        return str(value)
+    elif isinstance(value, Decimal):
+        if not value.is_finite():
+            raise ValueError(f"Unsupported DynamoDB number: {value!r}")
+        text = str(value)
+    else:
+        raise TypeError(f"Unsupported DynamoDB number type: {type(value).__name__}")
+    if "e" in text or "E" in text:
+        # DynamoDB no acepta notación exponencial
+        text = format(Decimal(text), "f")
+    return text
+
+
+def _parse_number(text: str):
+    """Los enteros (también "N.0") se leen con int() para no perder precisión."""
+    if "e" in text or "E" in text:
+        number = Decimal(text)
+        return int(number) if number == number.to_integral_value() else float(number)
+    integer, dot, fraction = text.partition(".")
+    if not dot or not fraction.strip("0"):
+        return int(integer)
+    return float(text)
+
+
+def _serialize_str(value) -> dict:
+    return {"NULL": True} if value is None else {"S": value}
+
+
+def _serialize_int(value) -> dict:
+    if value is None:
+        return {"NULL": True}
+    return {"N": str(value) if type(value) is int else _format_number(value)}
+
+
+def _serialize_number(value) -> dict:
+    return {"NULL": True} if value is None else {"N": _format_number(value)}
+
+
+def _serialize_any(value) -> dict:
+    if value is None:
+        return {"NULL": True}
+    if isinstance(value, bool):
+        return {"BOOL": value}
+    if isinstance(value, str):
+        return {"S": value}
+    if isinstance(value, (int, float, Decimal)):
+        return {"N": _format_number(value)}
+    if isinstance(value, (list, tuple)):
+        return {"L": [_serialize_any(v) for v in value]}
+    if isinstance(value, dict):
+        return {"M": {k: _serialize_any(v) for k, v in value.items()}}
+    raise TypeError(f"Unsupported DynamoDB value type: {type(value).__name__}")
+
+
+def _deserialize_str(attr: dict):
+    return attr.get("S")
+
+
+def _deserialize_int(attr: dict):
+    return int(attr["N"]) if "N" in attr else None
+
+
+def _deserialize_number(attr: dict):
+    return _parse_number(attr["N"]) if "N" in attr else None
+
+
+def _deserialize_any(attr: dict):
+    if "S" in attr:
+        return attr["S"]
+    if "N" in attr:
+        return _parse_number(attr["N"])
+    if "BOOL" in attr:
+        return attr["BOOL"]
+    if "NULL" in attr:
+        return None
+    if "L" in attr:
+        return [_deserialize_any(v) for v in attr["L"]]
+    if "M" in attr:
+        return {k: _deserialize_any(v) for k, v in attr["M"].items()}
+    raise TypeError(f"Unsupported DynamoDB attribute: {sorted(attr)}")
+
+
+_SCALAR_CODECS = {
+    "S": (_serialize_str, _deserialize_str),
+    "int": (_serialize_int, _deserialize_int),
+    "number": (_serialize_number, _deserialize_number),
+}
+
+
+def compile_field_serializers(schema: dict) -> dict:
+    """
+    schema: {campo: "S" | "int" | "number" | [sub_schema] | {sub_schema}},
+    donde [sub_schema] es una lista de mapas con ese esquema y {sub_schema}
+    un único mapa.
+    """
+    serializers = {}
+    for field, kind in schema.items():
+        if isinstance(kind, dict):
+            serialize_map = compile_item_serializer(kind)
+
+            def serialize_nested(value, serialize_map=serialize_map):
+                if value is None:
+                    return {"NULL": True}
+                return {"M": serialize_map(value)}
+
+            serializers[field] = serialize_nested
+        elif isinstance(kind, list):
+            serialize_item = compile_item_serializer(kind[0])
+
+            def serialize_list(value, serialize_item=serialize_item):
+                if value is None:
+                    return {"NULL": True}
+                return {"L": [{"M": serialize_item(v)} for v in value]}
+
+            serializers[field] = serialize_list
+        else:
+            serializers[field] = _SCALAR_CODECS[kind][0]
+    return serializers
+
+
+def compile_item_serializer(schema: dict):
+    get_serializer = compile_field_serializers(schema).get
+
+    def serialize(item: dict) -> dict:
+        return {field: get_serializer(field, _serialize_any)(value) for field, value in item.items()}
+
+    return serialize
+
+
+def compile_item_deserializer(schema: dict):
+    deserializers = {}
+    for field, kind in schema.items():
+        if isinstance(kind, dict):
+            deserialize_map = compile_item_deserializer(kind)
+
+            def deserialize_nested(attr, deserialize_map=deserialize_map):
+                if "M" not in attr:
+                    return None
+                return deserialize_map(attr["M"])
+
+            deserializers[field] = deserialize_nested
+        elif isinstance(kind, list):
+            deserialize_item = compile_item_deserializer(kind[0])
+
+            def deserialize_list(attr, deserialize_item=deserialize_item):
+                if "L" not in attr:
+                    return None
+                return [deserialize_item(v["M"]) for v in attr["L"]]
+
+            deserializers[field] = deserialize_list
+        else:
+            deserializers[field] = _SCALAR_CODECS[kind][1]
+    get_deserializer = deserializers.get
+
+    def deserialize(item: dict) -> dict:
+        return {field: get_deserializer(field, _deserialize_any)(attr) for field, attr in item.items()}
+
+    return deserialize
+
+
+CHUNK_SCHEMA = {
+    "chunk_id": "S",
+    "index": "int",
+    "start_second": "int",
+    "end_second": "int",
+    "duration_seconds": "int",
+    "source_uri": "S",
+    "status": "S",
+    "output_uri": "S",
+}
+
+ENCODED_CHUNK_SCHEMA = {
+    "chunk_id": "S",
+    "index": "int",
+    "duration_seconds": "int",
+    "codec": "S",
+    "bitrate_kbps": "int",
+    "output_uri": "S",
+    "status": "S",
+    "simulated_processing_ms": "number",
+    "encoder_backend": "S",
+    "encoder_cpu_ms": "number",
+    "estimated_bytes": "int",
+    "started_at_ms": "int",
+    "finished_at_ms": "int",
+}
+
+JOB_ITEM_SCHEMA = {
+    "job_id": "S",
+    "video_id": "S",
+    "input_uri": "S",
+    "format": "S",
+    "duration_seconds": "int",
+    "resolution": "S",
+    "codec": "S",
+    "bitrate_kbps": "int",
+    "chunk_duration_seconds": "int",
+    "encoder_backend": "S",
+    "chunk_planner": "S",
+    "status": "S",
+    "chunks": [CHUNK_SCHEMA],
+    "encoded_chunks": [ENCODED_CHUNK_SCHEMA],
+    "merged_output_uri": "S",
+    "version": "int",
+    "completed_chunks": "int",
+    "model": "S",
+    "test_case": "S",
+}
+
+JOB_FIELD_SERIALIZERS = compile_field_serializers(JOB_ITEM_SCHEMA)
+serialize_job_item = compile_item_serializer(JOB_ITEM_SCHEMA)
+deserialize_job_item = compile_item_deserializer(JOB_ITEM_SCHEMA)
+
+# Layout "chunked": la cabecera lleva los campos escalares del job y cada
+# chunk es un item propio (plan del split + resultado del encode en
+# "encoded"), así que ninguna escritura crece con el número de chunks.
+JOB_HEADER_ITEM_KEY = "JOB"
+CHUNK_ITEM_PREFIX = "CHUNK#"
+JOB_LIST_FIELDS = ("chunks", "encoded_chunks")
+
+JOB_HEADER_SCHEMA = {
+    **{field: kind for field, kind in JOB_ITEM_SCHEMA.items() if field not in JOB_LIST_FIELDS},
+    JOBS_TABLE_SORT_KEY: "S",
+    "chunk_count": "int",
+}
+CHUNK_ITEM_SCHEMA = {
+    "job_id": "S",
+    JOBS_TABLE_SORT_KEY: "S",
+    **CHUNK_SCHEMA,
+    "encoded": ENCODED_CHUNK_SCHEMA,
+}
+
+HEADER_FIELD_SERIALIZERS = compile_field_serializers(JOB_HEADER_SCHEMA)
+CHUNK_FIELD_SERIALIZERS = compile_field_serializers(CHUNK_ITEM_SCHEMA)
+serialize_chunk_item = compile_item_serializer(CHUNK_ITEM_SCHEMA)
+deserialize_header_item = compile_item_deserializer(JOB_HEADER_SCHEMA)
+deserialize_chunk_item = compile_item_deserializer(CHUNK_ITEM_SCHEMA)
+
+
+def serialize_job_field(field: str, value) -> dict:
+    return JOB_FIELD_SERIALIZERS.get(field, _serialize_any)(value)
+
+
+# ============================================================
+# Métricas: sink por invocación (EMF)
+# ============================================================
+
+# Métricas agregables -> campo que se agrega en histograma. Solo se agregan
+# las que se repiten por chunk: chunk_duration y los step_duration y
+# state_write de AGGREGATED_STEPS. Las de una vez por invocación se emiten
+# siempre en crudo; agregarlas añadiría 5 métricas EMF por cada una.
+AGGREGATED_METRICS = {
+    "step_duration": "duration_ms",
+    "chunk_duration": "duration_ms",
+    "state_write": "write_bytes",
+}
+# Steps que se repiten por chunk dentro de una invocación (sin sufijo)
+AGGREGATED_STEPS = ("encode_chunk",)
+METRIC_UNITS = {"duration_ms": "Milliseconds", "write_bytes": "Bytes"}
+CHUNK_SECONDS_BUCKETS = (2, 5, 10, 20, 60)
+# Histograma log-lineal: cada bucket cubre un factor HISTOGRAM_GROWTH
+HISTOGRAM_GROWTH = 1.1
+EMF_MAX_METRICS_PER_DIRECTIVE = 100
+
+
+def metric_group(payload: dict) -> str:
+    """
+    Grupo de agregación: métrica + step (sin sufijo de chunk, p. ej.
+    encode_chunk_7 -> encode_chunk); chunk_duration se agrupa por tramo de
+    duración del chunk.
+    """
+    metric_type = payload["metric_type"]
+    if metric_type == "chunk_duration":
+        seconds = payload.get("chunk_seconds", 0)
+        upper = next((b for b in CHUNK_SECONDS_BUCKETS if seconds <= b), None)
+        return f"{metric_type}.chunk_le{upper}s" if upper else f"{metric_type}.chunk_gt{CHUNK_SECONDS_BUCKETS[-1]}s"
+    step = str(payload.get("step", "all")).rstrip("0123456789").rstrip("_")
+    return f"{metric_type}.{step}"
+
+
+def aggregated_field(payload: dict) -> str | None:
+    """Campo que se agrega del evento, o None si se emite siempre en crudo."""
+    metric_type = payload["metric_type"]
+    field = AGGREGATED_METRICS.get(metric_type)
+    if field is None or metric_type == "chunk_duration":
+        return field
+    return field if metric_group(payload).partition(".")[2] in AGGREGATED_STEPS else None
+
+
+class MetricsSink:
+    """
+    Buffer de métricas de una invocación.
+
+    Las métricas con aggregated_field se acumulan por grupo (metric_group)
+    como contador por status + histograma log-lineal, y solo una fracción
+    sample_rate de ellas se sigue escribiendo como línea METRIC (muestreo
+    determinista: 1 de cada 1/sample_rate por tipo). flush() escribe los
+    agregados una sola vez como documento EMF en stdout; con detail=True
+    incluye además los contadores por status y los buckets de cada grupo.
+
+    mode="log" mantiene el comportamiento original: todo en crudo, sin EMF.
+    """
+
+    def __init__(self, *, service: str, mode: str, sample_rate: float, namespace: str, detail: bool):
+        self.service = service
+        self.mode = mode
+        self.sample_rate = sample_rate
+        self.namespace = namespace
+        self.detail = detail
+        self.write = print
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.groups = {}
+            self.seen = {}
+            self.raw_emitted = 0
+            self.raw_sampled_out = 0
+
+    def record(self, payload: dict) -> bool:
+        """Acumula el evento; devuelve True si debe escribirse en crudo."""
+        metric_type = payload["metric_type"]
+        field = aggregated_field(payload)
+        if self.mode != "emf" or field is None:
+            return True
+
+        value = payload.get(field)
+        with self._lock:
+            group = self.groups.setdefault(
+                metric_group(payload),
+                {"field": field, "statuses": {}, "buckets": {}, "count": 0, "sum": 0.0, "min": None, "max": None},
+            )
+            status = payload.get("status", "success")
+            group["statuses"][status] = group["statuses"].get(status, 0) + 1
+            if isinstance(value, (int, float)):
+                bucket = math.floor(math.log(value, HISTOGRAM_GROWTH)) if value > 0 else None
+                group["buckets"][bucket] = group["buckets"].get(bucket, 0) + 1
+                group["count"] += 1
+                group["sum"] += value
+                group["min"] = value if group["min"] is None else min(group["min"], value)
+                group["max"] = value if group["max"] is None else max(group["max"], value)
+
+            seen = self.seen.get(metric_type, 0)
+            self.seen[metric_type] = seen + 1
+            emit_raw = int((seen + 1) * self.sample_rate) > int(seen * self.sample_rate)
+            if emit_raw:
+                self.raw_emitted += 1
+            else:
+                self.raw_sampled_out += 1
+            return emit_raw
+
+    @staticmethod
+    def percentile(group: dict, q: float) -> float:
+        """Cota superior del bucket que contiene el percentil q (acotada por max)."""
+        target = q * group["count"]
+        cumulative = 0
+        for bucket in sorted(group["buckets"], key=lambda b: -math.inf if b is None else b):
+            cumulative += group["buckets"][bucket]
+            if cumulative >= target:
+                upper = 0.0 if bucket is None else HISTOGRAM_GROWTH ** (bucket + 1)
+                return round(min(upper, group["max"]), 3)
+        return group["max"]
+
+    def build_document(self, properties: dict) -> dict | None:
+        with self._lock:
+            if not self.groups:
+                return None
+
+            values = {}
+            metric_definitions = []
+            histograms = {}
+            counters = {}
+            for name, group in sorted(self.groups.items()):
+                counters[name] = dict(group["statuses"])
+                metric_definitions.append({"Name": f"{name}.count", "Unit": "Count"})
+                values[f"{name}.count"] = sum(group["statuses"].values())
+                if not group["count"]:
+                    continue
+
+                unit = METRIC_UNITS.get(group["field"], "None")
+                stats = {
+                    "p50": self.percentile(group, 0.50),
+                    "p99": self.percentile(group, 0.99),
+                    "max": group["max"],
+                    "sum": round(group["sum"], 3),
+                }
+                for stat, value in stats.items():
+                    metric_definitions.append({"Name": f"{name}.{stat}", "Unit": unit})
+                    values[f"{name}.{stat}"] = value
+                histograms[name] = {
+                    "field": group["field"],
+                    "growth": HISTOGRAM_GROWTH,
+                    "buckets": [
+                        [None if b is None else round(HISTOGRAM_GROWTH ** (b + 1), 3), group["buckets"][b]]
+                        for b in sorted(group["buckets"], key=lambda b: -math.inf if b is None else b)
+                    ],
+                }
+
+            directives = [
+                {
+                    "Namespace": self.namespace,
+                    "Dimensions": [["service"]],
+                    "Metrics": metric_definitions[i:i + EMF_MAX_METRICS_PER_DIRECTIVE],
+                }
+                for i in range(0, len(metric_definitions), EMF_MAX_METRICS_PER_DIRECTIVE)
+            ]
+
+            return {
+                "_aws": {"Timestamp": int(time.time() * 1000), "CloudWatchMetrics": directives},
+                "service": self.service,
+                "metric_type": "metrics_summary",
+                **properties,
+                **values,
+                **({"counters": counters, "histograms": histograms} if self.detail else {}),
+                "raw_events": {"emitted": self.raw_emitted, "sampled_out": self.raw_sampled_out},
+            }
+
+    def flush(self, properties: dict) -> None:
+        """Escribe el documento EMF de la invocación (si hay agregados) y vacía el buffer."""
+        if self.mode != "emf":
+            return
+        document = self.build_document(properties)
+        self.reset()
+        if document is not None:
+            self.write(json.dumps(document, ensure_ascii=False))
+
+
+metrics = MetricsSink(
+    service="fase2-video-traditional",
+    mode=METRICS_MODE,
+    sample_rate=METRICS_RAW_SAMPLE_RATE,
+    namespace=METRICS_NAMESPACE,
+    detail=METRICS_EMF_DETAIL,
+)
+
+
+# ============================================================
+# Política de reintentos
+# ============================================================
+# Cada error de un step se clasifica antes de decidir si se reintenta:
+# - domain:     datos del evento o del estado inválidos (ValueError,
+#               KeyError, TypeError); reintentar da el mismo resultado.
+# - permanent:  no se recupera solo (PermanentStepError, p. ej.
+#               fail_mode="always", o ValidationException/AccessDenied).
+# - throttling: ThrottlingException/ProvisionedThroughputExceeded de
+#               DynamoDB (ThrottlingError); backoff más largo y circuit
+#               breaker por tabla.
+# - transient:  el resto (fallo de una vez, conflicto de versión, 5xx).
+# transient y throttling se reintentan con backoff exponencial y full
+# jitter, hasta max_attempts por step (THROTTLE_MAX_ATTEMPTS si es
+# throttling) y un presupuesto de reintentos por job.
+
+ERROR_DOMAIN = "domain"
+ERROR_PERMANENT = "permanent"
+ERROR_THROTTLING = "throttling"
+ERROR_TRANSIENT = "transient"
+
+THROTTLING_ERROR_CODES = {
+    "ProvisionedThroughputExceededException",
+    "ThrottlingException",
+    "RequestLimitExceeded",
+    "TooManyRequestsException",
+}
+PERMANENT_ERROR_CODES = {
+    "ValidationException",
+    "AccessDeniedException",
+    "ResourceNotFoundException",
+    "ItemCollectionSizeLimitExceededException",
+    "UnrecognizedClientException",
 }
 
 
+class PermanentStepError(RuntimeError):
+    """Fallo de un step que no se recupera reintentando."""
+
+
+class ThrottlingError(RuntimeError):
+    """
+    Throttling de DynamoDB en `resource`, o llamada rechazada por su circuit
+    breaker abierto (rejected=True, no llegó a DynamoDB).
+    """
+
+    def __init__(self, resource: str, message: str, rejected: bool = False):
+        super().__init__(message)
+        self.resource = resource
+        self.rejected = rejected
+
+
+def classify_error(error: BaseException) -> str:
+    cause = error
+    while cause is not None:
+        if isinstance(cause, ThrottlingError):
+            return ERROR_THROTTLING
+        if isinstance(cause, PermanentStepError):
+            return ERROR_PERMANENT
+        if isinstance(cause, ClientError):
+            code = cause.response.get("Error", {}).get("Code", "")
+            if code in THROTTLING_ERROR_CODES:
+                return ERROR_THROTTLING
+            if code in PERMANENT_ERROR_CODES:
+                return ERROR_PERMANENT
+            return ERROR_TRANSIENT
+        cause = cause.__cause__
+
+    if isinstance(error, (ValueError, KeyError, TypeError)):
+        return ERROR_DOMAIN
+    return ERROR_TRANSIENT
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker de throttling de una tabla, compartido por el contenedor:
+    tras `threshold` throttlings seguidos se abre durante cooldown_ms y las
+    llamadas fallan con ThrottlingError sin llegar a DynamoDB. Pasado el
+    cooldown deja pasar una sola llamada de prueba (half-open): si no hay
+    throttling se cierra; si lo hay, se vuelve a abrir. Con enabled=False
+    (RETRY_POLICY="legacy") nunca se abre.
+    """
+
+    def __init__(self, name: str, threshold: int, cooldown_ms: float, enabled: bool = True):
+        self.name = name
+        self.enabled = enabled
+        self.threshold = threshold
+        self.cooldown_ms = cooldown_ms
+        self.state = "closed"
+        self.consecutive_throttles = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed" or not self.enabled:
+                return True
+            if self.state == "open" and self._open_elapsed_ms() >= self.cooldown_ms:
+                self.state = "half_open"
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self.consecutive_throttles = 0
+
+    def record_throttle(self) -> None:
+        with self._lock:
+            self.consecutive_throttles += 1
+            if not self.enabled:
+                return
+            if self.state == "half_open" or (self.state == "closed" and self.consecutive_throttles >= self.threshold):
+                self.state = "open"
+                self.opened_at = time.monotonic()
+                self.trips += 1
+
+    def remaining_open_ms(self) -> float:
+        with self._lock:
+            if self.state != "open":
+                return 0.0
+            return max(0.0, self.cooldown_ms - self._open_elapsed_ms())
+
+    def _open_elapsed_ms(self) -> float:
+        return (time.monotonic() - self.opened_at) * 1000
+
+
+throttle_breakers = {
+    name: CircuitBreaker(name, BREAKER_THRESHOLD, BREAKER_COOLDOWN_MS, enabled=RETRY_POLICY == "adaptive")
+    for name in ("jobs_table", "failure_table")
+}
+
+
+def call_with_breaker(resource: str, operation):
+    """
+    Ejecuta una llamada a DynamoDB sobre `resource` a través de su circuit
+    breaker; el throttling se relanza como ThrottlingError.
+    """
+    breaker = throttle_breakers[resource]
+    if not breaker.allow():
+        raise ThrottlingError(resource, f"Circuit breaker open for {resource}", rejected=True)
+
+    try:
+        result = operation()
+    except ClientError as e:
+        error_code = e.response["Error"]["Code"]
+        if error_code in THROTTLING_ERROR_CODES:
+            breaker.record_throttle()
+            raise ThrottlingError(resource, f"DynamoDB throttling on {resource}: {error_code}") from e
+        breaker.record_success()
+        raise
+
+    breaker.record_success()
+    return result
+
+
+class RetryPolicy:
+    """
+    Decide si un step fallido se reintenta y tras cuánto. El presupuesto
+    de reintentos es por job y por invocación (reset() al inicio del
+    handler): acota los reintentos de un job con muchos chunks fallando a la
+    vez. Con un breaker abierto la espera dura al menos lo que le queda de
+    cooldown más el jitter, para que los reintentos no lleguen todos juntos
+    a la llamada de prueba.
+    """
+
+    def __init__(self, *, mode: str, base_delay_ms: float, max_delay_ms: float,
+                 throttle_base_delay_ms: float, job_budget: int, budget_ratio: float):
+        self.mode = mode
+        self.base_delay_ms = base_delay_ms
+        self.max_delay_ms = max_delay_ms
+        self.throttle_base_delay_ms = throttle_base_delay_ms
+        self.job_budget = job_budget
+        self.budget_ratio = budget_ratio
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.budgets = {}
+            self.stats = {"retries": {}, "given_up": {}, "budget_exhausted": 0, "retry_wait_ms": 0.0}
+
+    def record_step(self, job_id: str | None) -> None:
+        """Un step nuevo del job: amplía su presupuesto en budget_ratio."""
+        with self._lock:
+            budget = self.budgets.setdefault(job_id, {"steps": 0, "retries": 0})
+            budget["steps"] += 1
+
+    def decide(self, error: BaseException, attempt: int, max_attempts: int, job_id: str | None = None) -> dict:
+        error_class = classify_error(error)
+        if self.mode == "legacy":
+            retry, delay_ms = attempt < max_attempts, 0.0
+        else:
+            if error_class == ERROR_THROTTLING:
+                # Los rechazos del breaker no llegan a DynamoDB: límite más holgado
+                rejected = getattr(throttling_cause(error), "rejected", False)
+                max_attempts = max(max_attempts, THROTTLE_MAX_ATTEMPTS * (BREAKER_REJECTION_FACTOR if rejected else 1))
+            retry = error_class in (ERROR_TRANSIENT, ERROR_THROTTLING) and attempt < max_attempts
+            delay_ms = self._backoff_ms(error, error_class, attempt) if retry else 0.0
+
+        with self._lock:
+            # Un rechazo del breaker no llegó a DynamoDB: no gasta presupuesto
+            if retry and self.mode != "legacy" and not getattr(throttling_cause(error), "rejected", False):
+                budget = self.budgets.setdefault(job_id, {"steps": 0, "retries": 0})
+                if budget["retries"] >= self.job_budget + self.budget_ratio * budget["steps"]:
+                    retry, delay_ms = False, 0.0
+                    self.stats["budget_exhausted"] += 1
+                else:
+                    budget["retries"] += 1
+            counter = self.stats["retries"] if retry else self.stats["given_up"]
+            counter[error_class] = counter.get(error_class, 0) + 1
+            self.stats["retry_wait_ms"] += delay_ms
+
+        return {"retry": retry, "delay_ms": delay_ms, "error_class": error_class}
+
+    def _backoff_ms(self, error: BaseException, error_class: str, attempt: int) -> float:
+        base = self.throttle_base_delay_ms if error_class == ERROR_THROTTLING else self.base_delay_ms
+        delay = random.uniform(0, min(self.max_delay_ms, base * 2 ** (attempt - 1)))
+        breaker = throttle_breakers.get(getattr(throttling_cause(error), "resource", None))
+        if breaker is not None:
+            delay += breaker.remaining_open_ms()
+        return delay
+
+    def summary(self) -> dict:
+        with self._lock:
+            stats = copy.deepcopy(self.stats)
+        stats["retry_wait_ms"] = round(stats["retry_wait_ms"], 3)
+        stats["breaker_trips"] = {name: b.trips for name, b in throttle_breakers.items() if b.trips}
+        stats["breaker_rejected"] = {name: b.rejected for name, b in throttle_breakers.items() if b.rejected}
+        return stats
+
+
+def throttling_cause(error: BaseException) -> ThrottlingError | None:
+    cause = error
+    while cause is not None and not isinstance(cause, ThrottlingError):
+        cause = cause.__cause__
+    return cause
+
+
+retry_policy = RetryPolicy(
+    mode=RETRY_POLICY,
+    base_delay_ms=RETRY_BASE_DELAY_MS,
+    max_delay_ms=RETRY_MAX_DELAY_MS,
+    throttle_base_delay_ms=THROTTLE_BASE_DELAY_MS,
+    job_budget=RETRY_BUDGET_PER_JOB,
+    budget_ratio=RETRY_BUDGET_RATIO,
+)
+
+
+# ============================================================
+# Plan de fallos (inyección determinista en memoria)
+# ============================================================
+# Alternativa a fail_mode: el evento trae un "fault_plan" con semilla y se
+# evalúa en memoria, sin markers en DynamoDB:
+#
+#   "fault_plan": {
+#     "seed": 42,
+#     "steps": {
+#       "encode_chunk": {
+#         "fault": "transient",              # transient | throttling | permanent
+#         "probability": 0.1,                # por intento
+#         "fail_on_attempts": [1],           # intentos que fallan siempre
+#         "latency": {"distribution": "lognormal", "median_ms": 80, "sigma": 0.6},
+#         "chunks": {"3": {"fault": "throttling", "fail_on_attempts": [1, 2]}}
+#       },
+#       "merge_video": {"fail_on_attempts": [1]}
+#     }
+#   }
+#
+# La decisión de cada intento sale de random.Random(f"{seed}:{step}:{attempt}"):
+# no depende del orden de los threads ni de la invocación, así que dos
+# ejecuciones con la misma semilla inyectan los mismos fallos. El tiempo de
+# recuperación (TTR) de un fallo va desde el intento que falla hasta que un
+# intento posterior del mismo step supera el punto de inyección.
+
+FAULT_TYPES = (ERROR_TRANSIENT, ERROR_THROTTLING, ERROR_PERMANENT)
+
+
+def resolve_fault_spec(plan: dict | None, step: str, chunk_index: int | None = None) -> dict | None:
+    """Spec del plan para un step (y chunk): la del step con la del chunk encima, más la semilla."""
+    step_spec = (plan or {}).get("steps", {}).get(step)
+    if step_spec is None:
+        return None
+
+    spec = {key: value for key, value in step_spec.items() if key != "chunks"}
+    if chunk_index is not None:
+        spec.update(step_spec.get("chunks", {}).get(str(chunk_index), {}))
+    if spec.get("fault", ERROR_TRANSIENT) not in FAULT_TYPES:
+        raise ValueError(f"Unsupported fault type in fault_plan: {spec['fault']}")
+    spec["seed"] = plan.get("seed", 0)
+    return spec
+
+
+def sample_latency_ms(spec: dict | None, rng: random.Random) -> float:
+    """Latencia inyectada: fixed (ms), uniform (min_ms, max_ms), exponential (mean_ms) o lognormal (median_ms, sigma)."""
+    if not spec or rng.random() >= spec.get("probability", 1.0):
+        return 0.0
+
+    distribution = spec.get("distribution", "fixed")
+    if distribution == "fixed":
+        return float(spec["ms"])
+    if distribution == "uniform":
+        return rng.uniform(spec["min_ms"], spec["max_ms"])
+    if distribution == "exponential":
+        return rng.expovariate(1.0 / spec["mean_ms"])
+    if distribution == "lognormal":
+        return rng.lognormvariate(math.log(spec["median_ms"]), spec.get("sigma", 0.5))
+    raise ValueError(f"Unsupported latency distribution: {distribution}")
+
+
+def planned_fault(spec: dict, step_name: str, attempt: int) -> tuple:
+    """(latencia en ms, si falla) del plan para ese intento del step."""
+    rng = random.Random(f"{spec['seed']}:{step_name}:{attempt}")
+    delay_ms = sample_latency_ms(spec.get("latency"), rng)
+    fails = attempt in spec.get("fail_on_attempts", ()) or rng.random() < spec.get("probability", 0.0)
+    return delay_ms, fails
+
+
+def fault_error(fault_type: str, step_name: str) -> Exception:
+    message = f"Injected {fault_type} fault in {step_name}"
+    if fault_type == ERROR_PERMANENT:
+        return PermanentStepError(message)
+    if fault_type == ERROR_THROTTLING:
+        return ThrottlingError("fault_plan", message)
+    return RuntimeError(message)
+
+
+def _percentile(values: list, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1)]
+
+
+class FaultInjector:
+    """
+    Evalúa el fault_plan en cada intento de un step y lleva las estadísticas
+    de la invocación (reset() al inicio del handler). Sin attempt explícito
+    cuenta los intentos por (scope, step) en memoria, que en el baseline
+    coinciden con los de execute_with_retries.
+
+    Un episodio empieza con el primer intento que falla y se cierra cuando
+    un intento posterior del step pasa la inyección (su TTR). Si el intento
+    anterior falló en otra invocación (no hay episodio abierto en memoria,
+    pero el plan dice que falló) se cuenta como recovered_unmeasured. Los
+    episodios sin cerrar al final de la invocación quedan en `open`.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._attempts = {}
+            self._open = {}
+            self.injected = {}
+            self.recovery_ms = {}
+            self.recovered_unmeasured = {}
+            self.latency_ms = []
+
+    def inject(self, spec: dict | None, *, scope: str, step_name: str, logger, attempt: int | None = None) -> None:
+        if not spec:
+            return
+
+        now_ms = time.perf_counter() * 1000
+        key = (scope, step_name)
+        with self._lock:
+            if attempt is None:
+                attempt = self._attempts.get(key, 0) + 1
+            self._attempts[key] = attempt
+
+        delay_ms, fails = planned_fault(spec, step_name, attempt)
+        fault_type = spec.get("fault", ERROR_TRANSIENT)
+        recovered_elsewhere = not fails and attempt > 1 and planned_fault(spec, step_name, attempt - 1)[1]
+
+        with self._lock:
+            if delay_ms:
+                self.latency_ms.append(delay_ms)
+            if fails:
+                self.injected[fault_type] = self.injected.get(fault_type, 0) + 1
+                self._open.setdefault(key, (fault_type, now_ms))
+            else:
+                opened = self._open.pop(key, None)
+                if opened is not None:
+                    self.recovery_ms.setdefault(opened[0], []).append(now_ms - opened[1])
+                elif recovered_elsewhere:
+                    self.recovered_unmeasured[fault_type] = self.recovered_unmeasured.get(fault_type, 0) + 1
+
+        if delay_ms:
+            time.sleep(delay_ms / 1000.0)
+        if fails:
+            logger.error(f"Injected {fault_type} fault in {step_name} attempt={attempt}")
+            raise fault_error(fault_type, step_name)
+
+    def summary(self) -> dict:
+        """Intentos fallidos inyectados, episodios abiertos y TTR (ms) por tipo de fallo."""
+        with self._lock:
+            still_open = {}
+            for fault_type, _ in self._open.values():
+                still_open[fault_type] = still_open.get(fault_type, 0) + 1
+            recovery = {
+                fault_type: {
+                    "count": len(values),
+                    "p50": round(_percentile(values, 0.5), 3),
+                    "p95": round(_percentile(values, 0.95), 3),
+                    "max": round(max(values), 3),
+                }
+                for fault_type, values in self.recovery_ms.items()
+            }
+            return {
+                "injected": dict(self.injected),
+                "open": still_open,
+                "time_to_recover_ms": recovery,
+                "recovered_unmeasured": dict(self.recovered_unmeasured),
+                "latency_injected": len(self.latency_ms),
+                "latency_injected_ms": round(sum(self.latency_ms), 3),
+            }
+
+
+fault_injector = FaultInjector()
+
+
 # ============================================================
 # Utilidades
 # ============================================================
 
 def emit_metric(logger, metric_name: str, data: dict) -> None:
+    """
+    Línea METRIC para CloudWatch Logs Insights; las métricas de alto volumen
+    pasan por el sink (agregado EMF + muestreo).
+    """
     payload = {"metric_type": metric_name, **data}
-    logger.info(f"METRIC {json.dumps(payload, ensure_ascii=False)}")
-
+    if metrics.record(payload):
+        logger.info(f"METRIC {json.dumps(payload, ensure_ascii=False)}")
 
-def to_dynamo_number_dict(data: dict):
-    def convert(value):
-        if isinstance(value, bool) or value is None:
-            return value
-        if isinstance(value, int):
-            return Decimal(value)
-        if isinstance(value, float):
-            return Decimal(str(value))
-        if isinstance(value, list):
-            return [convert(v) for v in value]
-        if isinstance(value, dict):
-            return {k: convert(v) for k, v in value.items()}
-        return value
 
-    return convert(data)
+def emit_fault_summary(logger, test_case: str, status: str) -> None:
+    emit_metric(
+        logger,
+        "fault_summary",
+        {"test_case": test_case, **fault_injector.summary(), "status": status, "execution_model": execution_model},
+    )
 
 
-def from_dynamo_number_dict(data: dict):
-    def convert(value):
-        if isinstance(value, Decimal):
-            if value % 1 == 0:
-                return int(value)
-            return float(value)
-        if isinstance(value, list):
-            return [convert(v) for v in value]
-        if isinstance(value, dict):
-            return {k: convert(v) for k, v in value.items()}
-        return value
+def emit_init_profile(logger, test_case: str) -> None:
+    """
+    Emite una vez por contenedor la métrica init_profile: ms de cada grupo de
+    imports del módulo (fase INIT) y ms de construcción de los clientes AWS
+    creados hasta el final de la primera invocación.
+    """
+    global _init_profile_emitted
+    if _init_profile_emitted:
+        return
+    _init_profile_emitted = True
 
-    return convert(data)
+    phases_ms = {
+        name: round((mark - previous) * 1000, 3)
+        for (_, previous), (name, mark) in zip(_init_marks, _init_marks[1:])
+    }
+    emit_metric(
+        logger,
+        "init_profile",
+        {
+            "test_case": test_case,
+            "module": __name__,
+            "import_phases_ms": phases_ms,
+            "import_total_ms": round(sum(phases_ms.values()), 3),
+            "clients_ms": dict(_aws_client_init_ms),
+        },
+    )
 
 
 def reset_io_counters() -> None:
-    IO_COUNTERS["jobs_table_reads"] = 0
-    IO_COUNTERS["jobs_table_writes"] = 0
-    IO_COUNTERS["failure_table_writes"] = 0
+    with _io_lock:
+        for name in IO_COUNTERS:
+            IO_COUNTERS[name] = 0
 
 
 def compute_chunk_count(duration_seconds: int, chunk_duration_seconds: int) -> int:
@@ -92,23 +1106,16 @@ def consume_fail_once_marker(marker_id: str) -> bool:
     False -> ya falló antes, no volver a fallar
     """
     try:
-        failure_table.put_item(
-            Item={"marker_id": marker_id},
+        call_with_breaker("failure_table", lambda: aws_client("dynamodb").put_item(
+            TableName=FAILURE_TABLE_NAME,
+            Item={"marker_id": {"S": marker_id}},
             ConditionExpression="attribute_not_exists(marker_id)"
-        )
-        IO_COUNTERS["failure_table_writes"] += 1
+        ))
+        count_io("failure_table_writes")
         return True
     except ClientError as e:
-        error_code = e.response["Error"]["Code"]
-
-        if error_code == "ConditionalCheckFailedException":
+        if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
             return False
-
-        if error_code in {"ProvisionedThroughputExceededException", "ThrottlingException"}:
-            raise RuntimeError(
-                f"DynamoDB throttling while consuming failure marker: {error_code}"
-            ) from e
-
         raise
 
 
@@ -125,7 +1132,7 @@ def maybe_fail(*, fail_mode: str, failure_key: str | None, step_name: str, logge
 
     if fail_mode == "always":
         logger.error(f"Simulated permanent failure in {step_name}")
-        raise RuntimeError(f"Simulated permanent failure in {step_name}")
+        raise PermanentStepError(f"Simulated permanent failure in {step_name}")
 
     if fail_mode == "once":
         if not failure_key:
@@ -142,39 +1149,401 @@ def maybe_fail(*, fail_mode: str, failure_key: str | None, step_name: str, logge
     raise ValueError(f"Unsupported fail_mode: {fail_mode}")
 
 
+class JobStateCache:
+    """
+    Caché del estado de cada job durante una invocación (read-through y
+    write-through): guarda la última versión leída o escrita, de modo que
+    load_job_state solo lee de DynamoDB en frío o tras un conflicto.
+
+    Las escrituras llevan como condición la versión que leyó el step, así
+    que si otro escritor ha avanzado el item la escritura falla, la entrada
+    se invalida y el reintento vuelve a leer de DynamoDB.
+    """
+
+    def __init__(self):
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._states.clear()
+
+    def get(self, job_id: str) -> dict | None:
+        with self._lock:
+            state = self._states.get(job_id)
+            return copy.deepcopy(state) if state is not None else None
+
+    def version(self, job_id: str):
+        with self._lock:
+            state = self._states.get(job_id)
+        return state["version"] if state is not None else None
+
+    def put(self, state: dict) -> None:
+        snapshot = copy.deepcopy(state)
+        with self._lock:
+            current = self._states.get(state["job_id"])
+            if current is None or current["version"] <= snapshot["version"]:
+                self._states[state["job_id"]] = snapshot
+
+    def update(self, job_id: str, mutate) -> None:
+        """Aplica mutate a la entrada cacheada, si la hay, bajo el lock."""
+        with self._lock:
+            state = self._states.get(job_id)
+            if state is not None:
+                mutate(state)
+
+    def invalidate(self, job_id: str) -> None:
+        with self._lock:
+            self._states.pop(job_id, None)
+
+
+job_state_cache = JobStateCache()
+
+EXECUTION_MODEL_SEQUENTIAL = "traditional_sequential_with_explicit_state"
+EXECUTION_MODEL_PARALLEL = "traditional_parallel_with_explicit_state"
+EXECUTION_MODEL_QUEUE = "traditional_queue_fanout_with_explicit_state"
+# Modelo de la invocación en curso (lo fija lambda_handler según max_parallel_chunks)
+execution_model = EXECUTION_MODEL_SEQUENTIAL
+
+
+BATCH_WRITE_MAX_ITEMS = 25
+
+
+def chunk_item_key(index: int) -> str:
+    return f"{CHUNK_ITEM_PREFIX}{index:05d}"
+
+
+def item_key(job_id: str, key: str) -> dict:
+    return {"job_id": {"S": job_id}, JOBS_TABLE_SORT_KEY: {"S": key}}
+
+
+def job_header_key(job_id: str) -> dict:
+    """Clave del item con los campos escalares del job en el layout activo."""
+    if JOBS_TABLE_LAYOUT == "chunked":
+        return item_key(job_id, JOB_HEADER_ITEM_KEY)
+    return {"job_id": {"S": job_id}}
+
+
+def record_consumed_capacity(response: dict, counter: str) -> None:
+    consumed = response.get("ConsumedCapacity") or []
+    if isinstance(consumed, dict):
+        consumed = [consumed]
+    count_io(counter, sum(entry.get("CapacityUnits", 0.0) for entry in consumed))
+
+
+def is_conditional_check_failure(error: Exception) -> bool:
+    return (
+        isinstance(error, ClientError)
+        and error.response["Error"]["Code"] == "ConditionalCheckFailedException"
+    )
+
+
+def add_version_condition(request: dict, state: dict) -> None:
+    """
+    Condiciona la escritura a la versión que leyó el step: cada step sube
+    version en 1 antes de guardar, así que la base es version - 1. La
+    creación del job (version 0) no lleva condición.
+    """
+    base_version = state["version"] - 1
+    if base_version < 0:
+        return
+    request["ConditionExpression"] = "#version = :base_version"
+    request.setdefault("ExpressionAttributeNames", {})["#version"] = "version"
+    request.setdefault("ExpressionAttributeValues", {})[":base_version"] = serialize_job_field(
+        "version", base_version
+    )
+
+
+def write_job_item(operation: str, job_id: str, request: dict) -> None:
+    """PutItem/UpdateItem en la tabla de jobs; un conflicto invalida la caché."""
+    try:
+        response = call_with_breaker("jobs_table", lambda: getattr(aws_client("dynamodb"), operation)(
+            TableName=JOBS_TABLE_NAME,
+            ReturnConsumedCapacity="TOTAL",
+            **request,
+        ))
+    except ClientError as e:
+        if is_conditional_check_failure(e):
+            count_io("jobs_table_conflicts")
+            job_state_cache.invalidate(job_id)
+        raise
+
+    count_io("jobs_table_writes")
+    record_consumed_capacity(response, "jobs_table_write_units")
+
+
+def header_update_request(state: dict) -> dict:
+    """UpdateItem con los campos escalares del job sobre el item cabecera."""
+    fields = {field: value for field, value in state.items() if field not in JOB_LIST_FIELDS and field != "job_id"}
+    fields["chunk_count"] = len(state.get("chunks") or [])
+
+    names, values, assignments = {}, {}, []
+    for position, (field, value) in enumerate(fields.items()):
+        names[f"#f{position}"] = field
+        values[f":f{position}"] = HEADER_FIELD_SERIALIZERS.get(field, _serialize_any)(value)
+        assignments.append(f"#f{position} = :f{position}")
+
+    return {
+        "Key": job_header_key(state["job_id"]),
+        "UpdateExpression": "SET " + ", ".join(assignments),
+        "ExpressionAttributeNames": names,
+        "ExpressionAttributeValues": values,
+    }
+
+
 def save_job_state(state: dict) -> None:
-    jobs_table.put_item(Item=to_dynamo_number_dict(state))
-    IO_COUNTERS["jobs_table_writes"] += 1
+    """
+    Layout single: PutItem del job completo. Layout chunked: UpdateItem de la
+    cabecera; los chunks se escriben aparte (put_chunk_items y
+    save_encoded_chunk). En ambos casos la escritura va condicionada a la
+    versión leída (ver add_version_condition).
+    """
+    if JOBS_TABLE_LAYOUT == "chunked":
+        operation, request = "update_item", header_update_request(state)
+    else:
+        operation, request = "put_item", {"Item": serialize_job_item(state)}
 
+    add_version_condition(request, state)
+    write_job_item(operation, state["job_id"], request)
+    if JOB_STATE_CACHE:
+        job_state_cache.put(state)
 
-def load_job_state(job_id: str) -> dict:
-    response = jobs_table.get_item(Key={"job_id": job_id})
-    IO_COUNTERS["jobs_table_reads"] += 1
-    item = response.get("Item")
-    if not item:
+
+def put_chunk_items(state: dict) -> None:
+    """
+    Layout chunked: crea un item por chunk del split con BatchWriteItem (25
+    por petición). Reenvía UnprocessedItems con backoff hasta MAX_RETRIES veces.
+    """
+    requests = [
+        {
+            "PutRequest": {
+                "Item": serialize_chunk_item({
+                    "job_id": state["job_id"],
+                    JOBS_TABLE_SORT_KEY: chunk_item_key(chunk["index"]),
+                    **chunk,
+                })
+            }
+        }
+        for chunk in state["chunks"]
+    ]
+
+    client = aws_client("dynamodb")
+    for offset in range(0, len(requests), BATCH_WRITE_MAX_ITEMS):
+        pending = {JOBS_TABLE_NAME: requests[offset:offset + BATCH_WRITE_MAX_ITEMS]}
+        attempt = 0
+        while pending:
+            response = client.batch_write_item(RequestItems=pending, ReturnConsumedCapacity="TOTAL")
+            count_io("jobs_table_writes")
+            record_consumed_capacity(response, "jobs_table_write_units")
+            pending = response.get("UnprocessedItems") or {}
+            if pending:
+                attempt += 1
+                if attempt > MAX_RETRIES:
+                    unprocessed = sum(len(items) for items in pending.values())
+                    raise RuntimeError(f"Failed to write {unprocessed} chunk items for job={state['job_id']}")
+                time.sleep(min(0.05 * 2 ** attempt, 1.0))
+
+
+def save_with_conflict_retries(state: dict, mutate, max_conflicts: int = MAX_CONFLICT_RETRIES) -> dict:
+    """
+    Aplica mutate al estado, sube version y lo guarda. Si otro worker ha
+    escrito antes (conflicto de versión), relee el job y vuelve a aplicar
+    mutate sin repetir el trabajo del step, con backoff exponencial con
+    jitter. Los conflictos no consumen los reintentos de execute_with_retries.
+    """
+    conflicts = 0
+    while True:
+        mutate(state)
+        state["version"] += 1
+        try:
+            save_job_state(state)
+            return state
+        except ClientError as e:
+            if not is_conditional_check_failure(e) or conflicts >= max_conflicts:
+                raise
+        conflicts += 1
+        time.sleep(random.uniform(0, min(CONFLICT_BACKOFF_MS * 2 ** conflicts, 1000.0)) / 1000.0)
+        state = load_job_state(state["job_id"])
+
+
+def apply_encoded_chunk(state: dict, encoded: dict) -> dict:
+    """Marca el chunk como codificado en el estado (in place)."""
+    updated_chunks = []
+    for existing in state["chunks"]:
+        if existing["chunk_id"] == encoded["chunk_id"]:
+            new_chunk = dict(existing)
+            new_chunk["status"] = "encoded"
+            new_chunk["output_uri"] = encoded["output_uri"]
+            updated_chunks.append(new_chunk)
+        else:
+            updated_chunks.append(existing)
+
+    encoded_chunks = [c for c in state.get("encoded_chunks", []) if c["chunk_id"] != encoded["chunk_id"]]
+    encoded_chunks.append(encoded)
+
+    state["chunks"] = updated_chunks
+    state["encoded_chunks"] = sorted(encoded_chunks, key=lambda c: c["index"])
+    state["status"] = "encoding"
+    return state
+
+
+def save_encoded_chunk(state: dict, encoded: dict) -> None:
+    """
+    Layout chunked: UpdateItem del item del chunk con el resultado del encode.
+    La cabecera (y su versión) no cambia, así que el coste por chunk no
+    depende del número de chunks del job y los workers paralelos no compiten
+    por la versión. La entrada cacheada se actualiza in place para no pisar
+    los chunks que hayan escrito otros workers.
+    """
+    write_job_item("update_item", state["job_id"], {
+        "Key": item_key(state["job_id"], chunk_item_key(encoded["index"])),
+        "UpdateExpression": "SET #status = :status, output_uri = :output_uri, encoded = :encoded",
+        "ConditionExpression": "attribute_exists(#item_key)",
+        "ExpressionAttributeNames": {"#status": "status", "#item_key": JOBS_TABLE_SORT_KEY},
+        "ExpressionAttributeValues": {
+            ":status": {"S": "encoded"},
+            ":output_uri": {"S": encoded["output_uri"]},
+            ":encoded": CHUNK_FIELD_SERIALIZERS["encoded"](encoded),
+        },
+    })
+    if JOB_STATE_CACHE:
+        job_state_cache.update(state["job_id"], lambda cached: apply_encoded_chunk(cached, encoded))
+
+
+def record_chunk_completion(job_id: str) -> int:
+    """
+    Fan-out por cola: suma 1 al contador completed_chunks del job (y a
+    version, para que las escrituras condicionadas concurrentes lo vean) y
+    devuelve el valor nuevo. Con entregas duplicadas de SQS puede pasar del
+    número de chunks; aggregator_handler comprueba los chunks antes del merge.
+    """
+    response = call_with_breaker("jobs_table", lambda: aws_client("dynamodb").update_item(
+        TableName=JOBS_TABLE_NAME,
+        Key=job_header_key(job_id),
+        UpdateExpression="ADD completed_chunks :one, #version :one",
+        ConditionExpression="attribute_exists(job_id)",
+        ExpressionAttributeNames={"#version": "version"},
+        ExpressionAttributeValues={":one": {"N": "1"}},
+        ReturnValues="UPDATED_NEW",
+        ReturnConsumedCapacity="TOTAL",
+    ))
+    count_io("jobs_table_writes")
+    record_consumed_capacity(response, "jobs_table_write_units")
+    job_state_cache.invalidate(job_id)
+    return int(response["Attributes"]["completed_chunks"]["N"])
+
+
+def assemble_job_state(header: dict, chunk_items: list) -> dict:
+    """Reconstruye el estado con la forma del layout single a partir de los items."""
+    state = {field: value for field, value in header.items() if field not in (JOBS_TABLE_SORT_KEY, "chunk_count")}
+    chunks, encoded_chunks = [], []
+    for item in sorted(chunk_items, key=lambda c: c["index"]):
+        encoded = item.pop("encoded", None)
+        chunks.append({field: value for field, value in item.items() if field not in ("job_id", JOBS_TABLE_SORT_KEY)})
+        if encoded:
+            encoded_chunks.append(encoded)
+    state["chunks"] = chunks
+    state["encoded_chunks"] = encoded_chunks
+    return state
+
+
+def query_job_items(job_id: str) -> dict:
+    """Layout chunked: Query (paginada) de la partición del job: cabecera + chunks."""
+    request = {
+        "TableName": JOBS_TABLE_NAME,
+        "KeyConditionExpression": "job_id = :job_id",
+        "ExpressionAttributeValues": {":job_id": {"S": job_id}},
+        "ConsistentRead": True,
+        "ReturnConsumedCapacity": "TOTAL",
+    }
+    header, chunk_items = None, []
+    while True:
+        response = aws_client("dynamodb").query(**request)
+        count_io("jobs_table_reads")
+        record_consumed_capacity(response, "jobs_table_read_units")
+        for item in response.get("Items", []):
+            if item[JOBS_TABLE_SORT_KEY]["S"] == JOB_HEADER_ITEM_KEY:
+                header = deserialize_header_item(item)
+            else:
+                chunk_items.append(deserialize_chunk_item(item))
+        if "LastEvaluatedKey" not in response:
+            break
+        request["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    if header is None:
         raise KeyError(f"Job state not found for job_id={job_id}")
-    return from_dynamo_number_dict(item)
+    return assemble_job_state(header, chunk_items)
+
+
+def load_job_state(job_id: str) -> dict:
+    """
+    Estado del job con lectura consistente: el agregador lee justo después
+    del último record_chunk_completion y save_with_conflict_retries relee
+    tras un conflicto; una lectura eventual podría devolver la versión
+    anterior (un chunk aún pendiente o la misma versión en conflicto).
+    """
+    if JOB_STATE_CACHE:
+        cached = job_state_cache.get(job_id)
+        if cached is not None:
+            count_io("jobs_table_cache_hits")
+            return cached
+
+    if JOBS_TABLE_LAYOUT == "chunked":
+        state = query_job_items(job_id)
+    else:
+        response = aws_client("dynamodb").get_item(
+            TableName=JOBS_TABLE_NAME,
+            Key={"job_id": {"S": job_id}},
+            ConsistentRead=True,
+            ReturnConsumedCapacity="TOTAL",
+        )
+        count_io("jobs_table_reads")
+        record_consumed_capacity(response, "jobs_table_read_units")
+        item = response.get("Item")
+        if not item:
+            raise KeyError(f"Job state not found for job_id={job_id}")
+        state = deserialize_job_item(item)
+
+    if JOB_STATE_CACHE:
+        job_state_cache.put(state)
+    return state
 
 
-def execute_with_retries(step_name: str, fn, logger, test_case: str, max_retries: int = MAX_RETRIES):
+def execute_with_retries(step_name: str, fn, logger, test_case: str, max_retries: int = MAX_RETRIES,
+                         job_id: str | None = None):
     """
-    Retry explícito para baseline tradicional.
+    Retry explícito para baseline tradicional: retry_policy decide, según la
+    clase del error, los intentos y el presupuesto del job, si se reintenta
+    y tras cuánta espera. Los intentos se cuentan por clase de error (y los
+    rechazos del breaker aparte), así que los throttlings no gastan los
+    MAX_RETRIES de los fallos transitorios.
     """
+    retry_policy.record_step(job_id)
     attempt = 0
+    failures_by_class = {}
     while True:
         attempt += 1
         start = time.perf_counter()
         status = "success"
+        decision = None
 
         try:
             result = fn()
             return result
 
-        except Exception:
+        except Exception as e:
             status = "error"
-            if attempt > max_retries:
+            failure_key = (classify_error(e), getattr(throttling_cause(e), "rejected", False))
+            failures_by_class[failure_key] = failures_by_class.get(failure_key, 0) + 1
+            decision = retry_policy.decide(e, failures_by_class[failure_key], max_attempts=max_retries + 1, job_id=job_id)
+            if not decision["retry"]:
+                if attempt <= max_retries:
+                    logger.warning(f"Not retrying step={step_name} error_class={decision['error_class']}")
                 raise
-            logger.warning(f"Retrying step={step_name} attempt={attempt}/{max_retries}")
+            logger.warning(
+                f"Retrying step={step_name} attempt={attempt}/{max_retries} "
+                f"error_class={decision['error_class']} delay_ms={decision['delay_ms']:.0f}"
+            )
 
         finally:
             duration_ms = round((time.perf_counter() - start) * 1000, 3)
@@ -187,10 +1556,153 @@ def execute_with_retries(step_name: str, fn, logger, test_case: str, max_retries
                     "attempt": attempt,
                     "duration_ms": duration_ms,
                     "status": status,
-                    "execution_model": "traditional_sequential_with_explicit_state",
+                    "error_class": decision["error_class"] if decision else None,
+                    "execution_model": execution_model,
                 },
             )
 
+        time.sleep(decision["delay_ms"] / 1000.0)
+
+
+# ============================================================
+# Backends de codificación
+# ============================================================
+#
+# "sleep": espera fija 100 ms + 50 ms por segundo de chunk (versión original).
+# "numpy": transcodificador sintético con coste de CPU real: DCT por bloques
+#          8x8, cuantización y estimación del tamaño entrópico sobre frames
+#          generados. El trabajo escala con la duración del chunk, la
+#          resolución y el bitrate, así que compite por la vCPU asignada.
+
+LAMBDA_FULL_VCPU_MEMORY_MB = 1769
+
+RESOLUTION_DIMENSIONS = {
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+    "1440p": (2560, 1440),
+    "4k": (3840, 2160),
+}
+
+_dct_basis_cache = {}
+
+
+def lambda_vcpu_share(memory_mb: int) -> float:
+    """
+    Fracción de vCPU que Lambda asigna a memory_mb (1 vCPU a 1769 MB,
+    proporcional por debajo). Un encoder monohilo no escala por encima de 1.
+    """
+    return min(1.0, memory_mb / LAMBDA_FULL_VCPU_MEMORY_MB)
+
+
+def extrapolate_encode_ms(measured_ms: float, from_memory_mb: int, to_memory_mb: int) -> float:
+    """
+    Extrapola un tiempo de encode CPU-bound medido con from_memory_mb a otra
+    configuración de memoria según el reparto de vCPU de Lambda.
+    """
+    return measured_ms * lambda_vcpu_share(from_memory_mb) / lambda_vcpu_share(to_memory_mb)
+
+
+def sleep_encoder(chunk: dict, *, resolution: str, bitrate_kbps: int) -> dict:
+    simulated_ms = 100 + (50 * int(chunk["duration_seconds"]))
+    time.sleep(simulated_ms / 1000.0)
+    return {"processing_ms": simulated_ms, "cpu_ms": 0.0, "estimated_bytes": None}
+
+
+def load_numpy():
+    """
+    Importa NumPy en el primer uso del backend numpy (~90 ms que no se pagan
+    en la fase INIT de contenedores que usan encoder_backend="sleep").
+    """
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError as e:
+            raise RuntimeError("encoder_backend='numpy' requires numpy in the deployment package or a layer") from e
+        np = numpy
+    return np
+
+
+def dct_basis(size: int = 8):
+    basis = _dct_basis_cache.get(size)
+    if basis is None:
+        k = np.arange(size)[:, None]
+        n = np.arange(size)[None, :]
+        basis = np.sqrt(2.0 / size) * np.cos(np.pi * (2 * n + 1) * k / (2 * size))
+        basis[0, :] /= np.sqrt(2.0)
+        _dct_basis_cache[size] = basis
+    return basis
+
+
+def numpy_synthetic_encoder(chunk: dict, *, resolution: str, bitrate_kbps: int) -> dict:
+    """
+    Transcodificación sintética de un chunk.
+
+    - Frames: ENCODER_SAMPLE_FPS frames por segundo de chunk, a la resolución
+      del job reducida por ENCODER_PIXEL_SCALE (fracción de lado) para que
+      quepa en 128 MB.
+    - Por frame: DCT 2D por bloques 8x8, y una pasada de cuantización +
+      estimación de bits (tamaño Exp-Golomb de los coeficientes no nulos) por
+      cada 1000 kbps de bitrate, como iteraciones de control de tasa.
+    """
+    load_numpy()
+
+    width, height = RESOLUTION_DIMENSIONS[resolution]
+    width = max(8, int(width * ENCODER_PIXEL_SCALE) // 8 * 8)
+    height = max(8, int(height * ENCODER_PIXEL_SCALE) // 8 * 8)
+    frame_count = max(1, int(round(float(chunk["duration_seconds"]) * ENCODER_SAMPLE_FPS)))
+    rate_passes = max(1, int(round(bitrate_kbps / 1000)))
+
+    start = time.perf_counter()
+    cpu_start = time.thread_time()
+
+    rng = np.random.default_rng(int(chunk["index"]))
+    basis = dct_basis(8)
+    yy, xx = np.mgrid[0:height, 0:width].astype(np.float32)
+    scene = 128 + 60 * np.sin(xx / 37.0) * np.cos(yy / 23.0)
+    # Paso de cuantización: más bitrate, cuantización más fina
+    q_step = 16.0 * 2000.0 / max(1, bitrate_kbps)
+
+    total_bits = 0
+    for frame_idx in range(frame_count):
+        frame = np.roll(scene, frame_idx * 3, axis=1) + rng.normal(0, 6, size=scene.shape)
+        blocks = (frame - 128).reshape(height // 8, 8, width // 8, 8).transpose(0, 2, 1, 3)
+        coeffs = basis @ blocks @ basis.T
+
+        for rate_pass in range(rate_passes):
+            quantized = np.rint(coeffs / (q_step * (1 + 0.25 * rate_pass)))
+            magnitudes = np.abs(quantized[quantized != 0])
+            total_bits += int(np.sum(2 * np.floor(np.log2(magnitudes)) + 2)) + 4 * blocks.shape[0] * blocks.shape[1]
+
+    processing_ms = (time.perf_counter() - start) * 1000
+    cpu_ms = (time.thread_time() - cpu_start) * 1000
+
+    if ENCODER_EMULATE_MEMORY_MB:
+        # Ejecución local: alarga el tiempo como si la vCPU fuera la fracción
+        # que Lambda asigna a ENCODER_EMULATE_MEMORY_MB.
+        emulated_ms = extrapolate_encode_ms(processing_ms, LAMBDA_FULL_VCPU_MEMORY_MB, ENCODER_EMULATE_MEMORY_MB)
+        time.sleep(max(0.0, emulated_ms - processing_ms) / 1000.0)
+        processing_ms = emulated_ms
+
+    return {
+        "processing_ms": round(processing_ms, 3),
+        "cpu_ms": round(cpu_ms, 3),
+        "estimated_bytes": total_bits // (8 * rate_passes),
+    }
+
+
+ENCODER_BACKENDS = {
+    "sleep": sleep_encoder,
+    "numpy": numpy_synthetic_encoder,
+}
+
+
+def run_encoder(backend: str, chunk: dict, *, resolution: str, bitrate_kbps: int) -> dict:
+    encoder = ENCODER_BACKENDS.get(backend)
+    if encoder is None:
+        raise ValueError(f"Unsupported encoder_backend: {backend}")
+    return encoder(chunk, resolution=resolution, bitrate_kbps=int(bitrate_kbps))
+
 
 # ============================================================
 # Etapas del pipeline tradicional
@@ -213,6 +1725,7 @@ def initialize_job(event: dict, logger) -> dict:
         "chunk_duration_seconds": int(
             encoding.get("chunk_duration_seconds", DEFAULT_CHUNK_DURATION_SECONDS)
         ),
+        "encoder_backend": encoding.get("encoder_backend", DEFAULT_ENCODER_BACKEND),
         "status": "initialized",
         "chunks": [],
         "encoded_chunks": [],
@@ -227,13 +1740,14 @@ def initialize_job(event: dict, logger) -> dict:
     return job_state
 
 
-def validate_video(state: dict, fail_mode: str, failure_key: str | None, logger) -> dict:
+def validate_video(state: dict, fail_mode: str, failure_key: str | None, logger, fault: dict | None = None) -> dict:
     maybe_fail(
         fail_mode=fail_mode,
         failure_key=failure_key,
         step_name="validate_video",
         logger=logger,
     )
+    fault_injector.inject(fault, scope=state["job_id"], step_name="validate_video", logger=logger)
 
     supported_formats = {"mp4", "mov", "mkv"}
     supported_resolutions = {"720p", "1080p", "1440p", "4k"}
@@ -269,13 +1783,14 @@ def validate_video(state: dict, fail_mode: str, failure_key: str | None, logger)
     return {"is_valid": True, "state": state}
 
 
-def split_video(state: dict, fail_mode: str, failure_key: str | None, logger) -> dict:
+def split_video(state: dict, fail_mode: str, failure_key: str | None, logger, fault: dict | None = None) -> dict:
     maybe_fail(
         fail_mode=fail_mode,
         failure_key=failure_key,
         step_name="split_video",
         logger=logger,
     )
+    fault_injector.inject(fault, scope=state["job_id"], step_name="split_video", logger=logger)
 
     duration = int(state["duration_seconds"])
     chunk_duration = int(state["chunk_duration_seconds"])
@@ -302,12 +1817,15 @@ def split_video(state: dict, fail_mode: str, failure_key: str | None, logger) ->
     state["status"] = "chunked"
     state["version"] += 1
 
+    if JOBS_TABLE_LAYOUT == "chunked":
+        put_chunk_items(state)
     save_job_state(state)
     logger.info(f"Generated {chunk_count} chunks for job={state['job_id']}")
     return state
 
 
-def encode_chunk(job_id: str, chunk: dict, fail_mode: str, failure_key: str | None, logger) -> dict:
+def encode_chunk(job_id: str, chunk: dict, fail_mode: str, failure_key: str | None, logger,
+                 test_case: str, fault: dict | None = None) -> dict:
     step_name = f"encode_chunk_{chunk['index']}"
 
     def _run():
@@ -319,9 +1837,15 @@ def encode_chunk(job_id: str, chunk: dict, fail_mode: str, failure_key: str | No
             step_name=step_name,
             logger=logger,
         )
-
-        simulated_ms = 100 + (50 * int(chunk["duration_seconds"]))
-        time.sleep(simulated_ms / 1000.0)
+        fault_injector.inject(fault, scope=job_id, step_name=step_name, logger=logger)
+
+        started_at_ms = int(time.time() * 1000)
+        encoder_result = run_encoder(
+            state.get("encoder_backend", "sleep"),
+            chunk,
+            resolution=state["resolution"],
+            bitrate_kbps=state["bitrate_kbps"],
+        )
 
         encoded = {
             "chunk_id": chunk["chunk_id"],
@@ -331,29 +1855,18 @@ def encode_chunk(job_id: str, chunk: dict, fail_mode: str, failure_key: str | No
             "bitrate_kbps": state["bitrate_kbps"],
             "output_uri": f"s3://{S3_BUCKET_NAME}/encoded/{state['job_id']}/{chunk['chunk_id']}.mp4",
             "status": "encoded",
-            "simulated_processing_ms": simulated_ms,
+            "simulated_processing_ms": encoder_result["processing_ms"],
+            "encoder_backend": state.get("encoder_backend", "sleep"),
+            "encoder_cpu_ms": encoder_result["cpu_ms"],
+            "estimated_bytes": encoder_result["estimated_bytes"],
+            "started_at_ms": started_at_ms,
+            "finished_at_ms": int(time.time() * 1000),
         }
 
-        updated_chunks = []
-        for existing in state["chunks"]:
-            if existing["chunk_id"] == chunk["chunk_id"]:
-                new_chunk = dict(existing)
-                new_chunk["status"] = "encoded"
-                new_chunk["output_uri"] = encoded["output_uri"]
-                updated_chunks.append(new_chunk)
-            else:
-                updated_chunks.append(existing)
-
-        encoded_chunks = list(state.get("encoded_chunks", []))
-        encoded_chunks = [c for c in encoded_chunks if c["chunk_id"] != encoded["chunk_id"]]
-        encoded_chunks.append(encoded)
-
-        state["chunks"] = updated_chunks
-        state["encoded_chunks"] = sorted(encoded_chunks, key=lambda c: c["index"])
-        state["status"] = "encoding"
-        state["version"] += 1
-
-        save_job_state(state)
+        if JOBS_TABLE_LAYOUT == "chunked":
+            save_encoded_chunk(apply_encoded_chunk(state, encoded), encoded)
+        else:
+            state = save_with_conflict_retries(state, lambda current: apply_encoded_chunk(current, encoded))
         logger.info(
             f"Encoded chunk index={chunk['index']} for job={state['job_id']} output={encoded['output_uri']}"
         )
@@ -363,13 +1876,153 @@ def encode_chunk(job_id: str, chunk: dict, fail_mode: str, failure_key: str | No
         step_name=step_name,
         fn=_run,
         logger=logger,
-        test_case=load_job_state(job_id).get("test_case", "unknown"),
+        test_case=test_case,
+        job_id=job_id,
     )
 
 
-def merge_video(job_id: str, fail_mode: str, failure_key: str | None, logger) -> dict:
+def compute_peak_concurrency(encoded_chunks: list) -> int:
+    """
+    Concurrencia real observada: máximo número de chunks cuyos intervalos
+    [started_at_ms, finished_at_ms) se solapan.
+    """
+    events = []
+    for c in encoded_chunks:
+        if "started_at_ms" not in c or "finished_at_ms" not in c:
+            continue
+        events.append((c["started_at_ms"], 1))
+        events.append((c["finished_at_ms"], -1))
+
+    # Los fines se ordenan antes que los inicios en el mismo instante
+    events.sort(key=lambda e: (e[0], e[1]))
+
+    peak = current = 0
+    for _, delta in events:
+        current += delta
+        peak = max(peak, current)
+    return peak
+
+
+class InvocationDeadline:
+    """
+    Tiempo restante de la invocación (context.get_remaining_time_in_millis)
+    menos un margen de seguridad. Sin deadline-aware, o fuera de Lambda sin
+    ese método, siempre permite continuar.
+    """
+
+    def __init__(self, context, enabled: bool, safety_ms: int = DEADLINE_SAFETY_MS):
+        self._remaining = getattr(context, "get_remaining_time_in_millis", None) if enabled else None
+        self.safety_ms = safety_ms
+
+    def remaining_ms(self):
+        return self._remaining() if self._remaining is not None else None
+
+    def allows(self, estimate_ms: float) -> bool:
+        remaining = self.remaining_ms()
+        return remaining is None or remaining - self.safety_ms >= estimate_ms
+
+
+class ChunkTimeEstimate:
+    """
+    Estimación del tiempo de un chunk para decidir si cabe antes del
+    deadline: el modelo del backend sleep (100 ms + 50 ms/s) hasta ver el
+    primer chunk, y después el peor tiempo observado por segundo de vídeo.
+    """
+
+    def __init__(self):
+        self._ms_per_second = None
+        self._lock = threading.Lock()
+
+    def observe(self, chunk: dict, elapsed_ms: float) -> None:
+        rate = elapsed_ms / max(1, int(chunk["duration_seconds"]))
+        with self._lock:
+            self._ms_per_second = max(self._ms_per_second or 0.0, rate)
+
+    def estimate_ms(self, chunk: dict) -> float:
+        duration = max(1, int(chunk["duration_seconds"]))
+        with self._lock:
+            if self._ms_per_second is None:
+                return 100 + 50 * duration
+            return self._ms_per_second * duration
+
+
+def encode_all_chunks(
+    job_id: str,
+    chunks: list,
+    failure: dict,
+    max_parallel_chunks: int,
+    logger,
+    test_case: str,
+    deadline: InvocationDeadline | None = None,
+    fault_plan: dict | None = None,
+) -> tuple:
+    """
+    Encode de los chunks: secuencial con max_parallel_chunks=1 y, si no, en
+    un pool acotado de threads. Cada chunk mantiene sus reintentos
+    (execute_with_retries) y la inyección de fallos (fail_mode y la spec del
+    fault_plan para su índice). Con deadline solo se lanza un chunk si su
+    tiempo estimado cabe antes del timeout.
+
+    Devuelve (encoded en el orden de los chunks, chunks sin lanzar). Un fallo
+    permanente cancela los pendientes.
+    """
+    estimate = ChunkTimeEstimate()
+    pending = list(chunks)
+    encoded = []
+
+    def run(chunk: dict) -> dict:
+        start = time.perf_counter()
+        result = encode_chunk(
+            job_id=job_id,
+            chunk=chunk,
+            fail_mode=failure.get("fail_mode", "none"),
+            failure_key=failure.get("failure_key"),
+            logger=logger,
+            test_case=test_case,
+            fault=resolve_fault_spec(fault_plan, "encode_chunk", chunk["index"]),
+        )
+        estimate.observe(chunk, (time.perf_counter() - start) * 1000)
+        return result
+
+    def fits(chunk: dict) -> bool:
+        return deadline is None or deadline.allows(estimate.estimate_ms(chunk))
+
+    if max_parallel_chunks <= 1 or len(chunks) <= 1:
+        while pending and fits(pending[0]):
+            encoded.append(run(pending.pop(0)))
+        return encoded, pending
+
+    workers = min(max_parallel_chunks, len(chunks))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="encode") as executor:
+        in_flight = set()
+        try:
+            while pending or in_flight:
+                while pending and len(in_flight) < workers and fits(pending[0]):
+                    in_flight.add(executor.submit(run, pending.pop(0)))
+                if not in_flight:
+                    break
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                encoded.extend(future.result() for future in done)
+        except BaseException:
+            for future in in_flight:
+                future.cancel()
+            raise
+
+    return sorted(encoded, key=lambda c: c["index"]), pending
+
+
+# Duración simulada del merge (también su estimación para el deadline)
+MERGE_ESTIMATE_MS = 200
+
+
+def merge_video(job_id: str, fail_mode: str, failure_key: str | None, logger, test_case: str,
+                fault: dict | None = None) -> dict:
     def _run():
         state = load_job_state(job_id)
+        # Reintento tras un merge concurrente (agregadores duplicados): el
+        # flag no se persiste, solo indica que este merge no escribió
+        if state["status"] == "merged":
+            return dict(state, already_merged=True)
 
         maybe_fail(
             fail_mode=fail_mode,
@@ -377,8 +2030,9 @@ def merge_video(job_id: str, fail_mode: str, failure_key: str | None, logger) ->
             step_name="merge_video",
             logger=logger,
         )
+        fault_injector.inject(fault, scope=job_id, step_name="merge_video", logger=logger)
 
-        time.sleep(0.2)
+        time.sleep(MERGE_ESTIMATE_MS / 1000.0)
 
         ordered_chunks = sorted(state.get("encoded_chunks", []), key=lambda c: c["index"])
         final_uri = f"s3://{S3_BUCKET_NAME}/final/{state['job_id']}/{state['video_id']}_encoded.mp4"
@@ -396,7 +2050,8 @@ def merge_video(job_id: str, fail_mode: str, failure_key: str | None, logger) ->
         step_name="merge_video",
         fn=_run,
         logger=logger,
-        test_case=load_job_state(job_id).get("test_case", "unknown"),
+        test_case=test_case,
+        job_id=job_id,
     )
 
 
@@ -410,7 +2065,7 @@ def build_response(state: dict, logger) -> dict:
         "encoded_chunk_count": len(state.get("encoded_chunks", [])),
         "output_uri": state["merged_output_uri"],
         "version": state["version"],
-        "execution_model": "traditional_sequential_with_explicit_state",
+        "execution_model": execution_model,
         "dynamodb_reads": IO_COUNTERS["jobs_table_reads"],
         "dynamodb_writes": IO_COUNTERS["jobs_table_writes"],
         "failure_marker_writes": IO_COUNTERS["failure_table_writes"],
@@ -420,10 +2075,341 @@ def build_response(state: dict, logger) -> dict:
     return result
 
 
+# ============================================================
+# Reanudación y continuación
+# ============================================================
+# Un evento con job_id de un job ya persistido retoma el trabajo desde su
+# status: no se reinicializa y no se re-codifican los chunks marcados como
+# encoded. En modo deadline-aware, si el siguiente paso no cabe antes del
+# timeout, la invocación se re-invoca de forma asíncrona con el mismo job_id
+# (todo el progreso ya está persistido) y devuelve 202.
+
+def resume_job(job_id: str, logger) -> dict | None:
+    """Estado persistido del job, o None si no existe (job nuevo)."""
+    try:
+        state = load_job_state(job_id)
+    except KeyError:
+        return None
+
+    encoded = sum(1 for c in state.get("chunks", []) if c.get("status") == "encoded")
+    logger.info(
+        f"Resuming job={job_id} status={state['status']} encoded_chunks={encoded}/{len(state.get('chunks', []))}"
+    )
+    return state
+
+
+def continue_job(event: dict, context, state: dict, deadline: InvocationDeadline, encoded_chunks: int,
+                 logger) -> dict:
+    """Re-invoca asíncronamente este Lambda para seguir con el job y devuelve la respuesta 202."""
+    continuation = int(event.get("continuation", 0)) + 1
+    if continuation > MAX_CONTINUATIONS:
+        raise RuntimeError(f"Job {state['job_id']} exceeded MAX_CONTINUATIONS={MAX_CONTINUATIONS}")
+
+    function_name = getattr(context, "invoked_function_arn", None) or os.environ.get("AWS_LAMBDA_FUNCTION_NAME")
+    if not function_name:
+        raise RuntimeError("Cannot continue job: unknown function name")
+
+    payload = dict(event, job_id=state["job_id"], continuation=continuation)
+    aws_client("lambda").invoke(
+        FunctionName=function_name,
+        InvocationType="Event",
+        Payload=json.dumps(payload, ensure_ascii=False).encode("utf-8"),
+    )
+
+    chunks = state.get("chunks", [])
+    pending_chunks = len(chunks) - sum(1 for c in chunks if c.get("status") == "encoded") - encoded_chunks
+    logger.info(f"Continuing job={state['job_id']} as continuation={continuation} pending_chunks={pending_chunks}")
+    emit_metric(
+        logger,
+        "job_continuation",
+        {
+            "test_case": event.get("test_case", "unknown"),
+            "status": state["status"],
+            "continuation": continuation,
+            "encoded_chunks": encoded_chunks,
+            "pending_chunks": pending_chunks,
+            "remaining_ms": deadline.remaining_ms(),
+            "execution_model": execution_model,
+        },
+    )
+
+    return {
+        "statusCode": 202,
+        "body": {
+            "message": "fase2-video-traditional continued in a new invocation",
+            "job_id": state["job_id"],
+            "video_id": state["video_id"],
+            "status": state["status"],
+            "continuation": continuation,
+            "pending_chunks": pending_chunks,
+            "execution_model": execution_model,
+        },
+    }
+
+
+# ============================================================
+# Fan-out por cola (coordinador, workers y agregador)
+# ============================================================
+# Despliegue alternativo del baseline con chunk_fanout="queue":
+# - lambda_handler actúa de coordinador: inicializa, valida, trocea y envía
+#   un mensaje por chunk a CHUNK_QUEUE_URL.
+# - chunk_worker_handler (trigger SQS con ReportBatchItemFailures) codifica
+#   cada chunk con encode_chunk y suma su finalización al contador
+#   completed_chunks del job.
+# - Al llegar a chunk_count, el worker invoca aggregator_handler
+#   (AGGREGATOR_FUNCTION_NAME), que hace el merge si todos los chunks están
+#   encoded. SQS entrega al menos una vez, así que el contador puede
+#   adelantarse: el agregador comprueba los chunks y el merge es idempotente.
+
+SQS_BATCH_MAX_MESSAGES = 10
+
+
+def enqueue_chunk_messages(event: dict, state: dict, chunks: list, submitted_at_ms: int, logger) -> int:
+    """Un mensaje por chunk en lotes de send_message_batch; reintenta los Failed."""
+    if not CHUNK_QUEUE_URL:
+        raise RuntimeError("CHUNK_QUEUE_URL is required for chunk_fanout='queue'")
+
+    failures = event.get("failures", {})
+    fault_plan = event.get("fault_plan")
+    bodies = [
+        json.dumps(
+            {
+                "job_id": state["job_id"],
+                "chunk": chunk,
+                "chunk_count": len(state["chunks"]),
+                "failures": {step: failures[step] for step in ("encode_chunk", "merge_video") if step in failures},
+                "fault_specs": {
+                    "encode_chunk": resolve_fault_spec(fault_plan, "encode_chunk", chunk["index"]),
+                    "merge_video": resolve_fault_spec(fault_plan, "merge_video"),
+                } if fault_plan else {},
+                "test_case": event.get("test_case", "unknown"),
+                "submitted_at_ms": submitted_at_ms,
+            },
+            ensure_ascii=False,
+        )
+        for chunk in chunks
+    ]
+
+    client = aws_client("sqs")
+    for offset in range(0, len(bodies), SQS_BATCH_MAX_MESSAGES):
+        entries = [
+            {"Id": str(position), "MessageBody": body}
+            for position, body in enumerate(bodies[offset:offset + SQS_BATCH_MAX_MESSAGES])
+        ]
+        attempt = 0
+        while entries:
+            response = client.send_message_batch(QueueUrl=CHUNK_QUEUE_URL, Entries=entries)
+            failed = {entry["Id"] for entry in response.get("Failed", [])}
+            entries = [entry for entry in entries if entry["Id"] in failed]
+            if entries:
+                attempt += 1
+                if attempt > MAX_RETRIES:
+                    raise RuntimeError(f"Failed to enqueue {len(entries)} chunk messages for job={state['job_id']}")
+                time.sleep(min(0.05 * 2 ** attempt, 1.0))
+
+    logger.info(f"Enqueued {len(bodies)} chunk messages for job={state['job_id']}")
+    return len(bodies)
+
+
+def trigger_aggregator(message: dict, logger) -> None:
+    if not AGGREGATOR_FUNCTION_NAME:
+        raise RuntimeError("AGGREGATOR_FUNCTION_NAME is required for chunk_fanout='queue'")
+
+    payload = {
+        "job_id": message["job_id"],
+        "test_case": message.get("test_case", "unknown"),
+        "submitted_at_ms": message.get("submitted_at_ms"),
+        "failures": message.get("failures", {}),
+        "fault_specs": {"merge_video": message.get("fault_specs", {}).get("merge_video")},
+    }
+    aws_client("lambda").invoke(
+        FunctionName=AGGREGATOR_FUNCTION_NAME,
+        InvocationType="Event",
+        Payload=json.dumps(payload, ensure_ascii=False).encode("utf-8"),
+    )
+    logger.info(f"Triggered aggregator for job={message['job_id']}")
+
+
+def process_chunk_message(message: dict, logger) -> None:
+    job_id, chunk = message["job_id"], message["chunk"]
+    state = load_job_state(job_id)
+    current = next((c for c in state["chunks"] if c["index"] == chunk["index"]), None)
+    if current is None:
+        raise KeyError(f"Chunk index={chunk['index']} not found for job_id={job_id}")
+
+    if current.get("status") == "encoded":
+        # Entrega duplicada: no se re-codifica, pero se cuenta por si la
+        # entrega anterior murió antes de sumar al contador
+        logger.info(f"Chunk index={chunk['index']} of job={job_id} already encoded")
+    else:
+        failure = message.get("failures", {}).get("encode_chunk", {})
+        encode_chunk(
+            job_id=job_id,
+            chunk=chunk,
+            fail_mode=failure.get("fail_mode", "none"),
+            failure_key=failure.get("failure_key"),
+            logger=logger,
+            test_case=message.get("test_case", "unknown"),
+            fault=message.get("fault_specs", {}).get("encode_chunk"),
+        )
+
+    if record_chunk_completion(job_id) >= message["chunk_count"]:
+        trigger_aggregator(message, logger)
+
+
+def chunk_worker_handler(event, context) -> dict:
+    """
+    Worker del fan-out por cola (evento SQS). Los mensajes que fallan se
+    devuelven en batchItemFailures: SQS los reentrega y, tras
+    maxReceiveCount, los mueve a la DLQ.
+    """
+    global execution_model
+
+    start = time.perf_counter()
+    execution_model = EXECUTION_MODEL_QUEUE
+    reset_io_counters()
+    job_state_cache.reset()
+    retry_policy.reset()
+    fault_injector.reset()
+    metrics.reset()
+    logger = handler_logger(context)
+
+    test_case = "unknown"
+    fault_plan_seen = False
+    batch_item_failures = []
+    records = event.get("Records", [])
+    for record in records:
+        message = json.loads(record["body"])
+        test_case = message.get("test_case", test_case)
+        fault_plan_seen = fault_plan_seen or bool(message.get("fault_specs"))
+        try:
+            process_chunk_message(message, logger)
+        except Exception:
+            logger.exception(f"Chunk message failed messageId={record['messageId']}")
+            batch_item_failures.append({"itemIdentifier": record["messageId"]})
+
+    status = "error" if batch_item_failures else "success"
+    emit_metric(
+        logger,
+        "chunk_worker_batch",
+        {
+            "test_case": test_case,
+            "records": len(records),
+            "failed_records": len(batch_item_failures),
+            "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+            "status": status,
+            "dynamodb_reads": IO_COUNTERS["jobs_table_reads"],
+            "dynamodb_writes": IO_COUNTERS["jobs_table_writes"],
+            "dynamodb_wcu": IO_COUNTERS["jobs_table_write_units"],
+            "dynamodb_rcu": IO_COUNTERS["jobs_table_read_units"],
+            "execution_model": execution_model,
+        },
+    )
+    if fault_plan_seen:
+        emit_fault_summary(logger, test_case, status)
+    metrics.flush({"test_case": test_case, "status": status})
+    return {"batchItemFailures": batch_item_failures}
+
+
+def aggregator_handler(event, context) -> dict:
+    """
+    Agregador del fan-out por cola (invocación asíncrona del worker): merge
+    del job si todos sus chunks están encoded; si no, o si ya está merged,
+    no hace nada. Los errores se propagan para que Lambda reintente la
+    invocación asíncrona.
+    """
+    global execution_model
+
+    start = time.perf_counter()
+    execution_model = EXECUTION_MODEL_QUEUE
+    status = "success"
+    test_case = event.get("test_case", "unknown")
+    reset_io_counters()
+    job_state_cache.reset()
+    retry_policy.reset()
+    fault_injector.reset()
+    metrics.reset()
+    logger = handler_logger(context)
+
+    try:
+        job_id = event["job_id"]
+        state = load_job_state(job_id)
+        pending = [c for c in state["chunks"] if c.get("status") != "encoded"]
+        if state["status"] == "merged" or pending:
+            status = "skipped"
+            logger.info(f"Aggregator skipped job={job_id} status={state['status']} pending_chunks={len(pending)}")
+            return {
+                "statusCode": 202 if pending else 200,
+                "body": {"job_id": job_id, "status": state["status"], "pending_chunks": len(pending)},
+            }
+
+        merge_failure = event.get("failures", {}).get("merge_video", {})
+        final_state = merge_video(
+            job_id=job_id,
+            fail_mode=merge_failure.get("fail_mode", "none"),
+            failure_key=merge_failure.get("failure_key"),
+            logger=logger,
+            test_case=test_case,
+            fault=event.get("fault_specs", {}).get("merge_video"),
+        )
+        result = build_response(final_state, logger)
+        if final_state.get("already_merged"):
+            # Otro agregador del mismo job hizo el merge
+            status = "skipped"
+            return {"statusCode": 200, "body": result}
+
+        submitted_at_ms = event.get("submitted_at_ms")
+        emit_metric(
+            logger,
+            "queue_job_summary",
+            {
+                "test_case": test_case,
+                "chunk_count": len(final_state.get("chunks", [])),
+                "completed_chunks": final_state.get("completed_chunks", 0),
+                "end_to_end_ms": int(time.time() * 1000) - submitted_at_ms if submitted_at_ms else None,
+                "execution_model": execution_model,
+            },
+        )
+        return {"statusCode": 200, "body": result}
+
+    except Exception:
+        status = "error"
+        logger.exception("Unhandled error in traditional aggregator")
+        raise
+
+    finally:
+        emit_metric(
+            logger,
+            "execution_duration",
+            {
+                "test_case": test_case,
+                "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+                "status": status,
+                "execution_model": execution_model,
+                "dynamodb_reads": IO_COUNTERS["jobs_table_reads"],
+                "dynamodb_writes": IO_COUNTERS["jobs_table_writes"],
+                "dynamodb_wcu": IO_COUNTERS["jobs_table_write_units"],
+                "dynamodb_rcu": IO_COUNTERS["jobs_table_read_units"],
+            },
+        )
+        if event.get("fault_specs"):
+            emit_fault_summary(logger, test_case, status)
+        metrics.flush({"test_case": test_case, "status": status})
+
+
 # ============================================================
 # Lambda handler principal
 # ============================================================
 
+def handler_logger(context):
+    logger = getattr(context, "logger", None)
+    if logger is None:
+        import logging
+        logger = logging.getLogger()
+        logger.setLevel(logging.INFO)
+    return logger
+
+
 def lambda_handler(event, context) -> dict:
     """
     Baseline tradicional:
@@ -431,122 +2417,203 @@ def lambda_handler(event, context) -> dict:
     - estado persistido manualmente en DynamoDB
     - retries implementados en código
     - mismas etapas funcionales que la versión durable
-    - ejecución secuencial: el paralelismo real requeriría
-      orquestación adicional manual (p. ej. Step Functions, SQS, fan-out explícito)
+    - encode secuencial por defecto; con "max_parallel_chunks" > 1 los chunks
+      se codifican en un pool de threads dentro del handler, con escrituras
+      condicionadas a version y reintentos por conflicto (sin orquestación
+      externa, limitado a la duración y la vCPU de una invocación)
+    - un evento con el job_id de un job persistido lo reanuda; con
+      "deadline_aware" la invocación se continúa en otra antes del timeout
+      (ver resume_job y continue_job)
     """
+    global execution_model
+
     start = time.perf_counter()
     status = "success"
     test_case = event.get("test_case", "unknown")
+    submitted_at_ms = int(event.get("submitted_at_ms") or time.time() * 1000)
+    max_parallel_chunks = max(1, int(event.get("max_parallel_chunks", DEFAULT_MAX_PARALLEL_CHUNKS)))
+    chunk_fanout = event.get("chunk_fanout", CHUNK_FANOUT)
+    if chunk_fanout == "queue":
+        execution_model = EXECUTION_MODEL_QUEUE
+    else:
+        execution_model = EXECUTION_MODEL_PARALLEL if max_parallel_chunks > 1 else EXECUTION_MODEL_SEQUENTIAL
     reset_io_counters()
+    job_state_cache.reset()
+    retry_policy.reset()
+    fault_injector.reset()
+    metrics.reset()
 
-    logger = getattr(context, "logger", None)
-    if logger is None:
-        import logging
-        logger = logging.getLogger()
-        logger.setLevel(logging.INFO)
+    logger = handler_logger(context)
 
     logger.info(f"Received event={event}")
 
     try:
         failures = event.get("failures", {})
-
-        # 1) Inicialización
-        state = execute_with_retries(
-            step_name="initialize_job",
-            fn=lambda: initialize_job(event, logger),
-            logger=logger,
-            test_case=test_case,
-        )
+        fault_plan = event.get("fault_plan")
+        deadline = InvocationDeadline(context, enabled=bool(event.get("deadline_aware", DEADLINE_AWARE)))
+        # Chunks codificados en esta invocación (para job_continuation)
+        encoded_this_invocation = 0
+
+        # 1) Inicialización, o reanudación del job persistido con ese job_id
+        state = resume_job(event["job_id"], logger) if event.get("job_id") else None
+        if state is not None:
+            emit_metric(
+                logger,
+                "job_resume",
+                {
+                    "test_case": test_case,
+                    "resumed_status": state["status"],
+                    "chunk_count": len(state.get("chunks", [])),
+                    "encoded_chunk_count": sum(1 for c in state.get("chunks", []) if c.get("status") == "encoded"),
+                    "continuation": int(event.get("continuation", 0)),
+                    "execution_model": execution_model,
+                },
+            )
+        else:
+            state = execute_with_retries(
+                step_name="initialize_job",
+                fn=lambda: initialize_job(event, logger),
+                logger=logger,
+                test_case=test_case,
+            )
 
         job_id = state["job_id"]
 
         # 2) Validación
-        validation_result = execute_with_retries(
-            step_name="validate_video",
-            fn=lambda: validate_video(
-                state=load_job_state(job_id),
-                fail_mode=failures.get("validate_video", {}).get("fail_mode", "none"),
-                failure_key=failures.get("validate_video", {}).get("failure_key"),
+        if state["status"] in ("initialized", "validation_failed"):
+            if not deadline.allows(0):
+                status = "continued"
+                return continue_job(event, context, state, deadline, encoded_this_invocation, logger)
+
+            validation_result = execute_with_retries(
+                step_name="validate_video",
+                fn=lambda: validate_video(
+                    state=load_job_state(job_id),
+                    fail_mode=failures.get("validate_video", {}).get("fail_mode", "none"),
+                    failure_key=failures.get("validate_video", {}).get("failure_key"),
+                    logger=logger,
+                    fault=resolve_fault_spec(fault_plan, "validate_video"),
+                ),
                 logger=logger,
-            ),
-            logger=logger,
-            test_case=test_case,
-        )
+                test_case=test_case,
+                job_id=job_id,
+            )
+
+            if not validation_result["is_valid"]:
+                emit_metric(
+                    logger,
+                    "validation_failure",
+                    {
+                        "test_case": test_case,
+                        "error_type": validation_result["error_type"],
+                        "error_message": validation_result["error_message"],
+                        "execution_model": execution_model,
+                    },
+                )
+
+                invalid_state = validation_result["state"]
+                invalid_state["status"] = "validation_failed"
+                invalid_state["version"] += 1
+                save_job_state(invalid_state)
+
+                return {
+                    "statusCode": 400,
+                    "body": {
+                        "message": "fase2-video-traditional validation failed",
+                        "job_id": invalid_state["job_id"],
+                        "video_id": invalid_state["video_id"],
+                        "status": "validation_failed",
+                        "error_type": validation_result["error_type"],
+                        "error_message": validation_result["error_message"],
+                        "execution_model": execution_model,
+                    },
+                }
+            state = validation_result["state"]
+
+        # 3) Chunking
+        if state["status"] == "validated":
+            if not deadline.allows(0):
+                status = "continued"
+                return continue_job(event, context, state, deadline, encoded_this_invocation, logger)
+
+            state = execute_with_retries(
+                step_name="split_video",
+                fn=lambda: split_video(
+                    state=load_job_state(job_id),
+                    fail_mode=failures.get("split_video", {}).get("fail_mode", "none"),
+                    failure_key=failures.get("split_video", {}).get("failure_key"),
+                    logger=logger,
+                    fault=resolve_fault_spec(fault_plan, "split_video"),
+                ),
+                logger=logger,
+                test_case=test_case,
+                job_id=job_id,
+            )
+
+        # 4) Encoding por chunk (persistencia explícita tras cada uno); al
+        #    reanudar solo los que no están encoded
+        if state["status"] in ("chunked", "encoding"):
+            pending = [c for c in state["chunks"] if c.get("status") != "encoded"]
+            if chunk_fanout == "queue" and pending:
+                enqueued = enqueue_chunk_messages(event, state, pending, submitted_at_ms, logger)
+                return {
+                    "statusCode": 202,
+                    "body": {
+                        "message": "fase2-video-traditional chunks enqueued",
+                        "job_id": job_id,
+                        "video_id": state["video_id"],
+                        "status": state["status"],
+                        "chunk_count": len(state["chunks"]),
+                        "enqueued_chunks": enqueued,
+                        "execution_model": execution_model,
+                    },
+                }
+
+            encoded_chunks, not_started = encode_all_chunks(
+                job_id,
+                pending,
+                failures.get("encode_chunk", {}),
+                max_parallel_chunks,
+                logger,
+                test_case,
+                deadline=deadline,
+                fault_plan=fault_plan,
+            )
+            encoded_this_invocation = len(encoded_chunks)
 
-        if not validation_result["is_valid"]:
             emit_metric(
                 logger,
-                "validation_failure",
+                "parallelism_summary",
                 {
                     "test_case": test_case,
-                    "error_type": validation_result["error_type"],
-                    "error_message": validation_result["error_message"],
-                    "execution_model": "traditional_sequential_with_explicit_state",
+                    "requested_parallel_chunks": len(state["chunks"]),
+                    "max_parallel_chunks": max_parallel_chunks,
+                    "executed_chunks": len(encoded_chunks),
+                    "skipped_chunks": len(state["chunks"]) - len(pending),
+                    "actual_parallel_chunks": compute_peak_concurrency(encoded_chunks),
+                    "state_conflicts": IO_COUNTERS["jobs_table_conflicts"],
+                    "execution_model": execution_model,
                 },
             )
 
-            invalid_state = validation_result["state"]
-            invalid_state["status"] = "validation_failed"
-            invalid_state["version"] += 1
-            save_job_state(invalid_state)
+            if not_started:
+                status = "continued"
+                return continue_job(event, context, state, deadline, encoded_this_invocation, logger)
 
-            return {
-                "statusCode": 400,
-                "body": {
-                    "message": "fase2-video-traditional validation failed",
-                    "job_id": invalid_state["job_id"],
-                    "video_id": invalid_state["video_id"],
-                    "status": "validation_failed",
-                    "error_type": validation_result["error_type"],
-                    "error_message": validation_result["error_message"],
-                    "execution_model": "traditional_sequential_with_explicit_state",
-                },
-            }
-
-        # 3) Chunking
-        state = execute_with_retries(
-            step_name="split_video",
-            fn=lambda: split_video(
-                state=load_job_state(job_id),
-                fail_mode=failures.get("split_video", {}).get("fail_mode", "none"),
-                failure_key=failures.get("split_video", {}).get("failure_key"),
-                logger=logger,
-            ),
-            logger=logger,
-            test_case=test_case,
-        )
+        # 5) Merge
+        if state["status"] != "merged":
+            if not deadline.allows(MERGE_ESTIMATE_MS):
+                status = "continued"
+                return continue_job(event, context, state, deadline, encoded_this_invocation, logger)
 
-        # 4) Encoding por chunk (persistencia explícita tras cada uno)
-        encoded_chunks = []
-        for chunk in state["chunks"]:
-            encoded = encode_chunk(
+            state = merge_video(
                 job_id=job_id,
-                chunk=chunk,
-                fail_mode=failures.get("encode_chunk", {}).get("fail_mode", "none"),
-                failure_key=failures.get("encode_chunk", {}).get("failure_key"),
+                fail_mode=failures.get("merge_video", {}).get("fail_mode", "none"),
+                failure_key=failures.get("merge_video", {}).get("failure_key"),
                 logger=logger,
+                test_case=test_case,
+                fault=resolve_fault_spec(fault_plan, "merge_video"),
             )
-            encoded_chunks.append(encoded)
-
-        emit_metric(
-            logger,
-            "parallelism_summary",
-            {
-                "test_case": test_case,
-                "requested_parallel_chunks": len(state["chunks"]),
-                "executed_chunks": len(encoded_chunks),
-                "actual_parallel_chunks": 1,
-                "execution_model": "traditional_sequential_with_explicit_state",
-            },
-        )
-
-        # 5) Merge
-        state = merge_video(
-            job_id=job_id,
-            fail_mode=failures.get("merge_video", {}).get("fail_mode", "none"),
-            failure_key=failures.get("merge_video", {}).get("failure_key"),
-            logger=logger,
-        )
 
         # 6) Respuesta
         final_state = load_job_state(job_id)
@@ -565,7 +2632,12 @@ def lambda_handler(event, context) -> dict:
                 "dynamodb_reads": IO_COUNTERS["jobs_table_reads"],
                 "dynamodb_writes": IO_COUNTERS["jobs_table_writes"],
                 "failure_marker_writes": IO_COUNTERS["failure_table_writes"],
-                "execution_model": "traditional_sequential_with_explicit_state",
+                "state_cache_hits": IO_COUNTERS["jobs_table_cache_hits"],
+                "state_conflicts": IO_COUNTERS["jobs_table_conflicts"],
+                "dynamodb_wcu": IO_COUNTERS["jobs_table_write_units"],
+                "dynamodb_rcu": IO_COUNTERS["jobs_table_read_units"],
+                "jobs_table_layout": JOBS_TABLE_LAYOUT,
+                "execution_model": execution_model,
             },
         )
 
@@ -581,7 +2653,7 @@ def lambda_handler(event, context) -> dict:
                 "test_case": test_case,
                 "error_type": type(e).__name__,
                 "error_message": str(e),
-                "execution_model": "traditional_sequential_with_explicit_state",
+                "execution_model": execution_model,
                 "dynamodb_reads": IO_COUNTERS["jobs_table_reads"],
                 "dynamodb_writes": IO_COUNTERS["jobs_table_writes"],
                 "failure_marker_writes": IO_COUNTERS["failure_table_writes"],
@@ -597,9 +2669,27 @@ def lambda_handler(event, context) -> dict:
                 "test_case": test_case,
                 "duration_ms": duration_ms,
                 "status": status,
-                "execution_model": "traditional_sequential_with_explicit_state",
+                "execution_model": execution_model,
+                "continuation": int(event.get("continuation", 0)),
                 "dynamodb_reads": IO_COUNTERS["jobs_table_reads"],
                 "dynamodb_writes": IO_COUNTERS["jobs_table_writes"],
                 "failure_marker_writes": IO_COUNTERS["failure_table_writes"],
+                "state_cache_hits": IO_COUNTERS["jobs_table_cache_hits"],
+                "state_conflicts": IO_COUNTERS["jobs_table_conflicts"],
+                "dynamodb_wcu": IO_COUNTERS["jobs_table_write_units"],
+                "dynamodb_rcu": IO_COUNTERS["jobs_table_read_units"],
+                "jobs_table_layout": JOBS_TABLE_LAYOUT,
             },
-        )
\ No newline at end of file
+        )
+        emit_metric(
+            logger,
+            "retry_summary",
+            {"test_case": test_case, "retry_policy": RETRY_POLICY, **retry_policy.summary(), "status": status},
+        )
+        if event.get("fault_plan"):
+            emit_fault_summary(logger, test_case, status)
+        emit_init_profile(logger, test_case)
+        metrics.flush({"test_case": test_case, "status": status})
+
+
+_init_marks.append(("module_body", time.perf_counter()))
@@ -0,0 +1,465 @@
+"""
+Parser en streaming de exports de CloudWatch Logs a columnas NumPy/Parquet.
+
+Entradas soportadas:
+
+- Export CSV de CloudWatch (`timestamp,message`), como los de
+  `phase1/cloudwatch/`: cada mensaje es un registro de plataforma en JSON
+  (`platform.report`, ...) o un log JSON cuyo `message` es una línea
+  `METRIC {...}`. Un registro CSV puede ocupar varias líneas físicas
+  (mensajes con saltos de línea entre comillas).
+- Logs en texto plano (los "Function Logs" de `phase*/results/*.txt`):
+  líneas `[INFO] <ts> <request_id> METRIC {...}` y `REPORT RequestId: ...`.
+
+El fichero se lee en bloques de READ_BLOCK_BYTES. Los registros CSV se
+separan con bytes.split y la paridad de comillas de cada línea (un message
+entre comillas con saltos de línea une varias líneas) y solo se decodifican
+los que contienen `METRIC {` o un informe de plataforma. De un log JSON de
+Lambda con una línea METRIC solo se decodifican `message` y `requestId`
+(scanstring), no el registro completo. La memoria no depende del tamaño del
+export sino del bloque y del número de métricas extraídas, que además se
+compactan a arrays NumPy cada `batch_rows` filas.
+
+Salida: una tabla por tipo (`platform_report` y cada `metric_type`), como
+dict columna -> np.ndarray. Numéricos -> int64/float64 (NaN si falta),
+booleanos -> bool, resto -> object (dicts/listas como JSON).
+
+Uso:
+    python tools/cloudwatch_parser.py phase1/cloudwatch/2026-04-22/*.csv --out metrics/ --format parquet
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from collections.abc import Iterator
+from itertools import chain, repeat
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # solo necesario con --format parquet
+    pa = None
+    pq = None
+
+
+PLATFORM_REPORT_TABLE = "platform_report"
+
+# Campos de platform.report (JSON) -> columna
+REPORT_METRIC_FIELDS = {
+    "durationMs": "duration_ms",
+    "billedDurationMs": "billed_duration_ms",
+    "memorySizeMB": "memory_size_mb",
+    "maxMemoryUsedMB": "max_memory_used_mb",
+    "initDurationMs": "init_duration_ms",
+}
+
+# Línea REPORT del formato de texto de Lambda
+TEXT_REPORT_FIELDS = {
+    "Duration": "duration_ms",
+    "Billed Duration": "billed_duration_ms",
+    "Memory Size": "memory_size_mb",
+    "Max Memory Used": "max_memory_used_mb",
+    "Init Duration": "init_duration_ms",
+}
+TEXT_REPORT_RE = re.compile(r"(Billed Duration|Init Duration|Max Memory Used|Memory Size|Duration): ([0-9.]+)")
+TEXT_REPORT_REQUEST_RE = re.compile(r"REPORT RequestId: (\S+)")
+# Resumen `platform.report: billedDurationMs=9316 memorySizeMB=128 ...` de results/*.txt
+SUMMARY_REPORT_RE = re.compile(r"(\w+)=([0-9.]+)")
+
+# Tamaño de bloque de lectura: acota la memoria del recorrido del fichero
+READ_BLOCK_BYTES = 8 * 1024 * 1024
+
+METRIC_MARKER = b"METRIC {"
+REPORT_MARKERS = (b"platform.report", b"REPORT RequestId")
+
+# Campos de un log JSON de Lambda (json.dumps con separadores por defecto)
+# que se decodifican sin parsear el registro entero; el message se busca aún
+# con las comillas del CSV duplicadas
+CSV_METRIC_MESSAGE = b'""message"": ""METRIC {'
+JSON_REQUEST_ID = '"requestId": "'
+scan_json_string = json.decoder.scanstring
+# raw_decode sin el envoltorio de json.loads (dos búsquedas de espacios por llamada)
+decode_json_prefix = json.JSONDecoder().raw_decode
+
+
+# ============================================================
+# Columnas
+# ============================================================
+
+def to_column_array(values: list) -> np.ndarray:
+    """
+    Convierte una lista de valores de una columna al dtype más estrecho.
+    Los tipos se clasifican en una pasada (valores de json.loads: tipos exactos).
+    """
+    kinds = set(map(type, values))
+    has_none = type(None) in kinds
+    kinds.discard(type(None))
+    if kinds == {bool}:
+        return np.array(values, dtype=object if has_none else bool)
+    if kinds and kinds <= {int, float}:
+        if kinds == {int} and not has_none:
+            return np.array(values, dtype=np.int64)
+        if has_none:
+            values = [np.nan if v is None else v for v in values]
+        return np.array(values, dtype=np.float64)
+
+    column = np.empty(len(values), dtype=object)
+    if kinds & {dict, list}:
+        for i, v in enumerate(values):
+            column[i] = json.dumps(v, ensure_ascii=False, sort_keys=True) if isinstance(v, (dict, list)) else v
+    else:
+        column[:] = values
+    return column
+
+
+def missing_column(length: int, like: np.ndarray) -> np.ndarray:
+    if like.dtype.kind in "if":
+        return np.full(length, np.nan)
+    return np.full(length, None, dtype=object)
+
+
+def concat_columns(parts: list) -> np.ndarray:
+    if len(parts) == 1:
+        return parts[0]
+    kinds = {p.dtype.kind for p in parts}
+    if kinds <= {"i"}:
+        return np.concatenate(parts)
+    if kinds <= {"i", "f"}:
+        return np.concatenate([p.astype(np.float64) for p in parts])
+    if kinds == {"b"}:
+        return np.concatenate(parts)
+    return np.concatenate([p.astype(object) for p in parts])
+
+
+class ColumnarTable:
+    """
+    Tabla que acumula filas (dicts) y las compacta a arrays cada batch_rows
+    filas; finish() concatena los lotes rellenando columnas ausentes.
+    """
+
+    def __init__(self, batch_rows: int = 8192):
+        self.batch_rows = batch_rows
+        self.rows = []
+        self.batches = []
+
+    def append(self, row: dict) -> None:
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_rows:
+            self._compact()
+
+    def __len__(self) -> int:
+        return sum(n for n, _ in self.batches) + len(self.rows)
+
+    def _compact(self) -> None:
+        if not self.rows:
+            return
+        # Columnas en orden de aparición; la extracción por columna va en C
+        names = dict.fromkeys(chain.from_iterable(self.rows))
+        batch = {name: to_column_array(list(map(dict.get, self.rows, repeat(name)))) for name in names}
+        self.batches.append((len(self.rows), batch))
+        self.rows = []
+
+    def finish(self) -> dict:
+        self._compact()
+        names = {}
+        for _, batch in self.batches:
+            for name, column in batch.items():
+                names.setdefault(name, column)
+
+        table = {}
+        for name, like in names.items():
+            parts = [
+                batch[name] if name in batch else missing_column(length, like)
+                for length, batch in self.batches
+            ]
+            table[name] = concat_columns(parts)
+        return table
+
+
+# ============================================================
+# Lectura en streaming
+# ============================================================
+
+def iter_blocks(f) -> Iterator[bytes]:
+    """Bloques de READ_BLOCK_BYTES del fichero."""
+    return iter(lambda: f.read(READ_BLOCK_BYTES), b"")
+
+
+def iter_lines(f) -> Iterator[bytes]:
+    """Líneas físicas (bytes, sin el salto de línea) leyendo por bloques."""
+    carry = b""
+    for block in iter_blocks(f):
+        lines = (carry + block).split(b"\n")
+        carry = lines.pop()
+        yield from lines
+    if carry:
+        yield carry
+
+
+def split_csv_records(buffer: bytes, final: bool) -> tuple:
+    """
+    (registros completos de buffer sin el salto de línea final, resto).
+
+    Las comillas escapadas van por pares, así que una línea con un número
+    impar de comillas abre (o cierra) un message entre comillas con saltos
+    de línea: el registro va de una línea impar a la siguiente. Si no es el
+    final del fichero, un registro sin cerrar queda en el resto para el
+    siguiente bloque, salvo que tenga un bloque entero por delante: entonces
+    está mal formado y se toma solo su primera línea.
+    """
+    end = buffer.rfind(b"\n") + 1
+    lines = buffer[:end].split(b"\n")
+    lines.pop()
+    rest = buffer[end:]
+    odd = [i for i, line in enumerate(lines) if line.count(b'"') & 1]
+    if len(odd) % 2:
+        last = odd.pop()
+        position = sum(map(len, lines[:last])) + last
+        if not final and len(buffer) - position < READ_BLOCK_BYTES:
+            rest = buffer[position:]
+            del lines[last:]
+
+    records = []
+    done = 0  # líneas ya consumidas
+    for first, closing in zip(odd[::2], odd[1::2]):
+        records += lines[done:first]
+        records.append(b"\n".join(lines[first:closing + 1]))
+        done = closing + 1
+    records += lines[done:]
+    return records, rest
+
+
+def iter_csv_blocks(f) -> Iterator[tuple[int, list[bytes]]]:
+    """
+    Por bloque: (registros leídos, [registro en bytes] de los relevantes).
+    El filtrado se hace aquí para que los registros descartados no salgan
+    del bloque.
+    """
+    report_marker, text_report_marker = REPORT_MARKERS
+
+    def split(buffer: bytes, final: bool) -> tuple:
+        records, carry = split_csv_records(buffer, final)
+        relevant = [
+            record
+            for record in records
+            if METRIC_MARKER in record or report_marker in record or text_report_marker in record
+        ]
+        return len(records), relevant, carry
+
+    carry = b""
+    for block in iter_blocks(f):
+        count, relevant, carry = split(carry + block, final=False)
+        yield count, relevant
+    if carry:
+        # Último registro sin salto de línea final
+        count, relevant, _ = split(carry if carry.endswith(b"\n") else carry + b"\n", final=True)
+        yield count, relevant
+
+
+def decode_csv_record(record: bytes) -> tuple:
+    """(timestamp_ms, message) de un registro CSV `timestamp,message`."""
+    first_line = record.find(b"\n")
+    comma = record.find(b",", 0, first_line if first_line >= 0 else len(record))
+    timestamp, message = (record[:comma], record[comma + 1:]) if comma >= 0 else (None, record)
+    if message[-1:] == b"\r":
+        message = message[:-1]
+    if len(message) >= 2 and message[:1] == b'"' and message[-1:] == b'"':
+        message = message[1:-1].replace(b'""', b'"')
+    try:
+        timestamp_ms = int(timestamp) if timestamp is not None else None
+    except ValueError:
+        timestamp_ms = None
+    return timestamp_ms, message.decode("utf-8", errors="replace")
+
+
+def parse_csv_metric(record: bytes) -> tuple | None:
+    """
+    Atajo de decode_csv_record + parse_message para un registro CSV cuyo
+    message es un log JSON de Lambda con una línea METRIC: solo se quitan las
+    comillas del CSV desde el campo message y se decodifican message y el
+    requestId que le sigue. None si el registro no tiene esa forma (se
+    parsea entero).
+    """
+    at = record.find(CSV_METRIC_MESSAGE)
+    if at < 0:
+        return None
+    comma = record.find(b",")
+    try:
+        timestamp_ms = int(record[:comma])
+        tail = record[at + len(b'""message"": '):].replace(b'""', b'"').decode("utf-8", errors="replace")
+        message, end = scan_json_string(tail, 1)
+        at = tail.find(JSON_REQUEST_ID, end)
+        if at < 0:
+            return None
+        request_id, _ = scan_json_string(tail, at + len(JSON_REQUEST_ID))
+        body = message[len("METRIC "):].rstrip()
+        payload, end = decode_json_prefix(body)
+    except ValueError:  # incluye json.JSONDecodeError
+        return None
+    if end != len(body) or not isinstance(payload, dict):
+        return None
+    metric_type = payload.pop("metric_type", "unknown")
+    return metric_type, {"timestamp_ms": timestamp_ms, "request_id": request_id or None, **payload}
+
+
+def parse_message(message: str, timestamp_ms) -> tuple | None:
+    """
+    Devuelve (tabla, fila) si el mensaje es una métrica o un informe de
+    plataforma; None en otro caso.
+    """
+    request_id = None
+    text = message.strip()
+
+    if text.startswith("{"):
+        try:
+            record = json.loads(text)
+        except json.JSONDecodeError:
+            record = None
+        if isinstance(record, dict):
+            if record.get("type") == "platform.report":
+                body = record.get("record", {})
+                row = {
+                    "timestamp_ms": timestamp_ms,
+                    "request_id": body.get("requestId"),
+                    "status": body.get("status"),
+                }
+                metrics = body.get("metrics", {})
+                for field, column in REPORT_METRIC_FIELDS.items():
+                    row[column] = metrics.get(field)
+                return PLATFORM_REPORT_TABLE, row
+            request_id = record.get("requestId") or None
+            text = str(record.get("message", ""))
+
+    if text.startswith("REPORT RequestId") or "\tREPORT RequestId" in text or text.startswith("REPORT "):
+        match = TEXT_REPORT_REQUEST_RE.search(text)
+        row = {"timestamp_ms": timestamp_ms, "request_id": match.group(1) if match else None, "status": None}
+        for column in TEXT_REPORT_FIELDS.values():
+            row[column] = None
+        for name, value in TEXT_REPORT_RE.findall(text):
+            row[TEXT_REPORT_FIELDS[name]] = float(value)
+        return PLATFORM_REPORT_TABLE, row
+
+    if text.startswith("platform.report:"):
+        values = dict(SUMMARY_REPORT_RE.findall(text))
+        row = {"timestamp_ms": timestamp_ms, "request_id": None, "status": None}
+        for field, column in REPORT_METRIC_FIELDS.items():
+            row[column] = float(values[field]) if field in values else None
+        return PLATFORM_REPORT_TABLE, row
+
+    marker = text.find("METRIC {")
+    if marker < 0:
+        return None
+    if request_id is None and marker:
+        # Formato texto: "[INFO]\t<ts>\t<request_id>\tMETRIC {...}"
+        fields = text[:marker].split()
+        if len(fields) >= 3:
+            request_id = fields[2]
+    try:
+        payload = json.loads(text[marker + len("METRIC "):])
+    except json.JSONDecodeError:
+        return None
+    metric_type = payload.pop("metric_type", "unknown")
+    return metric_type, {"timestamp_ms": timestamp_ms, "request_id": request_id, **payload}
+
+
+def is_relevant(raw: bytes) -> bool:
+    return METRIC_MARKER in raw or REPORT_MARKERS[0] in raw or REPORT_MARKERS[1] in raw
+
+
+def parse_file(path: Path, tables: dict, *, batch_rows: int = 8192, source: str | None = None) -> int:
+    """
+    Añade a `tables` (nombre -> ColumnarTable) lo extraído de `path`.
+    Devuelve el número de registros leídos.
+    """
+    source = source or path.name
+    records = 0
+
+    def add(parsed: tuple | None) -> None:
+        if parsed is None:
+            return
+        name, row = parsed
+        row["source"] = source
+        table = tables.get(name)
+        if table is None:
+            table = tables[name] = ColumnarTable(batch_rows)
+        table.append(row)
+
+    with open(path, "rb") as f:
+        is_csv = f.readline().startswith(b"timestamp,message")
+        if not is_csv:
+            f.seek(0)
+            for raw in iter_lines(f):
+                records += 1
+                if is_relevant(raw):
+                    add(parse_message(raw.decode("utf-8", errors="replace"), None))
+            return records
+
+        for count, relevant in iter_csv_blocks(f):
+            records += count
+            for record in relevant:
+                parsed = parse_csv_metric(record)
+                if parsed is None:
+                    timestamp_ms, text = decode_csv_record(record)
+                    parsed = parse_message(text, timestamp_ms)
+                add(parsed)
+    return records
+
+
+def parse_exports(paths: list, *, batch_rows: int = 8192) -> tuple:
+    """Parsea varios ficheros. Devuelve ({tabla: {columna: array}}, registros)."""
+    tables = {}
+    records = 0
+    for path in paths:
+        records += parse_file(Path(path), tables, batch_rows=batch_rows)
+    return {name: table.finish() for name, table in sorted(tables.items())}, records
+
+
+# ============================================================
+# Escritura
+# ============================================================
+
+def write_tables(tables: dict, out_dir: Path, fmt: str) -> list:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    written = []
+    for name, columns in tables.items():
+        if fmt == "parquet":
+            if pq is None:
+                raise RuntimeError("--format parquet requires pyarrow; use --format npz")
+            target = out_dir / f"{name}.parquet"
+            pq.write_table(pa.table({k: pa.array(list(v) if v.dtype == object else v) for k, v in columns.items()}), target)
+        else:
+            target = out_dir / f"{name}.npz"
+            np.savez(target, **columns)
+        written.append(target)
+    return written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", type=Path)
+    parser.add_argument("--out", type=Path, help="Directorio de salida (una tabla por fichero)")
+    parser.add_argument("--format", choices=["parquet", "npz"], default="parquet" if pq is not None else "npz")
+    parser.add_argument("--batch-rows", type=int, default=8192)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    tables, records = parse_exports(args.paths, batch_rows=args.batch_rows)
+    elapsed = time.perf_counter() - start
+
+    print(f"# {records} records in {elapsed:.2f} s ({records / max(elapsed, 1e-9):,.0f} records/s)", file=sys.stderr)
+    for name, columns in tables.items():
+        rows = len(next(iter(columns.values()))) if columns else 0
+        print(f"{name:>24} {rows:>8} rows  {', '.join(columns)}")
+
+    if args.out:
+        for target in write_tables(tables, args.out, args.format):
+            print(f"wrote {target}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
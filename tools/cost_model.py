@@ -0,0 +1,382 @@
+"""
+Modelo de coste durable vs. tradicional calculado a partir de los logs.
+
+1. Observado: lee los resultados de `phase2/results/{durable,traditional}/`
+   (REPORT / platform.report, métricas METRIC y el bloque "Key Metrics") y
+   calcula el coste por job de cada modelo:
+
+   - compute:  billed_ms * memory_mb / 1024 * lambda_gb_ms
+   - requests: invocaciones * lambda_request
+   - dynamodb: lecturas * ddb_read + escrituras * ddb_write (IO_COUNTERS)
+   - durable:  operaciones * durable_operation + checkpoint_kb * durable_gb_written
+               (solo modelo durable; operaciones = pasos fijos + chunks)
+
+   y lo compara con los overheads publicados en el README. Esos valores se
+   reconstruyen como `total` del TXT durable / coste DynamoDB tradicional
+   (columna legacy_ratio), no como cociente de costes totales.
+
+2. What-if: ajusta por mínimos cuadrados, para cada modelo, billed_ms,
+   lecturas, escrituras y checkpoint_kb frente a chunk_count, separa en la
+   pendiente el encode (100 ms + 50 ms/s de chunk, el sleep_encoder) del
+   overhead de orquestación por chunk, y evalúa de forma vectorizada la
+   rejilla duración de vídeo x duración de chunk x memoria x paralelismo x
+   tasa de fallo. Para cada combinación busca la duración de vídeo mínima a
+   partir de la cual durable no es más caro (break-even).
+
+   Supuestos del what-if:
+   - encode "sleep" no escala con memoria; "cpu" escala con el reparto de
+     vCPU de Lambda (1 vCPU a 1769 MB) y el paralelismo efectivo se limita a
+     las vCPU disponibles.
+   - Un fallo (tasa por job) a mitad de job: el tradicional relanza el job
+     completo (se pierde de media la mitad), el durable solo repite medio
+     chunk más el replay (`--replay-ms`, por defecto el coste fijo ajustado).
+
+Uso:
+    python tools/cost_model.py
+    python tools/cost_model.py --video-seconds 30 60 95 300 600 1800 --chunk-seconds 5 10 20 \\
+        --memory-mb 128 1024 1769 --parallelism 1 4 10 --failure-rates 0 0.05 0.2
+    python tools/cost_model.py --price durable_operation=0 --encode-kind cpu
+"""
+
+import argparse
+import json
+import re
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from cloudwatch_parser import PLATFORM_REPORT_TABLE, ColumnarTable, parse_file
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = REPO_ROOT / "phase2" / "results"
+TEST_EVENTS_DIR = REPO_ROOT / "phase2" / "test-events"
+
+MODELS = ("durable", "traditional")
+
+# Tarifas us-east-2 usadas en phase2/results (lambda_gb_ms = $1.67e-8 por GB·ms
+# facturado). Las de durable functions (operaciones y datos escritos) son la
+# tarifa publicada del servicio: revisar antes de decidir con ellas.
+PRICING = {
+    "lambda_gb_ms": 1.67e-8,
+    "lambda_request": 2e-7,
+    "ddb_read": 2.5e-7,
+    "ddb_write": 1.25e-6,
+    "durable_operation": 8e-6,
+    "durable_gb_written": 0.25,
+}
+
+# Overheads publicados en la tabla "Key Findings" del README, por test_case
+README_OVERHEADS = {
+    "cost_comparison_030s": 19.1,
+    "cost_comparison_060s": 19.3,
+    "cost_comparison_095s": 16.4,
+}
+
+# Pasos checkpointed fijos del pipeline durable (informe fase 2, §4.2)
+DURABLE_FIXED_OPERATIONS = 6
+
+# sleep_encoder: 100 ms + 50 ms por segundo de chunk
+ENCODE_BASE_MS = 100.0
+ENCODE_MS_PER_SECOND = 50.0
+OBSERVED_MEMORY_MB = 128
+LAMBDA_FULL_VCPU_MEMORY_MB = 1769
+
+KEY_METRIC_RE = re.compile(r"^\s+(\w+):\s+([0-9.]+)\s*$", re.MULTILINE)
+TEST_EVENT_RE = re.compile(r"Test Event Name: (\S+)")
+CHUNK_COUNT_RE = re.compile(r'"chunk_count": (\d+)')
+REPORTED_TOTAL_RE = re.compile(r"^\s+total:\s+\$([0-9.]+)", re.MULTILINE)
+
+
+# ============================================================
+# Observaciones
+# ============================================================
+
+def load_result(path: Path, model: str) -> dict:
+    """Una ejecución de phase2/results: billed, memoria, E/S y tamaño de estado."""
+    text = path.read_text(encoding="utf-8", errors="replace")
+    tables = {}
+    parse_file(path, tables)
+    rows = {name: table.finish() for name, table in tables.items()}
+
+    test_case = TEST_EVENT_RE.search(text).group(1)
+    key_metrics = {name: float(value) for name, value in KEY_METRIC_RE.findall(text)}
+    report = rows[PLATFORM_REPORT_TABLE]
+    # En los logs tradicionales la última REPORT es la de la ejecución
+    billed_ms = float(report["billed_duration_ms"][-1])
+    memory_mb = float(report["memory_size_mb"][-1])
+
+    execution = rows.get("execution_duration")
+    if execution is not None and "dynamodb_reads" in execution:
+        reads = float(execution["dynamodb_reads"][-1])
+        writes = float(execution["dynamodb_writes"][-1])
+    else:
+        reads = key_metrics.get("dynamodb_reads", 0.0)
+        writes = key_metrics.get("dynamodb_writes", 0.0)
+
+    state = rows.get("explicit_state_size")
+    checkpoint_kb = float(state["size_kb"][-1]) if state is not None else key_metrics.get("checkpoint_kb", 0.0)
+
+    event = json.loads((TEST_EVENTS_DIR / f"{test_case}.json").read_text())
+    chunk_count = int(CHUNK_COUNT_RE.search(text).group(1))
+    reported_total = REPORTED_TOTAL_RE.search(text)
+
+    return {
+        "test_case": test_case,
+        "model": model,
+        "video_seconds": float(event["video"]["duration_seconds"]),
+        "chunk_seconds": float(event["encoding"]["chunk_duration_seconds"]),
+        "chunk_count": chunk_count,
+        "billed_ms": billed_ms,
+        "memory_mb": memory_mb,
+        "invocations": float(len(report["billed_duration_ms"])),
+        "operations": float(DURABLE_FIXED_OPERATIONS + chunk_count) if model == "durable" else 0.0,
+        "checkpoint_kb": checkpoint_kb,
+        "dynamodb_reads": reads,
+        "dynamodb_writes": writes,
+        "reported_total": float(reported_total.group(1)) if reported_total else np.nan,
+    }
+
+
+def load_observations(pattern: str = "*cost_comparison_*.txt") -> dict:
+    """Columnas (dict de arrays) con una fila por modelo y test_case."""
+    table = ColumnarTable()
+    for model in MODELS:
+        for path in sorted((RESULTS_DIR / model).glob(pattern)):
+            table.append(load_result(path, model))
+    return table.finish()
+
+
+# ============================================================
+# Coste
+# ============================================================
+
+def job_cost(jobs: dict, pricing: dict) -> dict:
+    """Desglose de coste por job; todas las entradas pueden ser arrays."""
+    is_durable = np.asarray(jobs["model"]) == "durable"
+    compute = jobs["billed_ms"] * jobs["memory_mb"] / 1024.0 * pricing["lambda_gb_ms"]
+    requests = jobs["invocations"] * pricing["lambda_request"]
+    dynamodb = jobs["dynamodb_reads"] * pricing["ddb_read"] + jobs["dynamodb_writes"] * pricing["ddb_write"]
+    durable = np.where(
+        is_durable,
+        jobs["operations"] * pricing["durable_operation"]
+        + jobs["checkpoint_kb"] / (1024.0 * 1024.0) * pricing["durable_gb_written"],
+        0.0,
+    )
+    return {
+        "compute": compute,
+        "requests": requests,
+        "dynamodb": dynamodb,
+        "durable": durable,
+        "total": compute + requests + dynamodb + durable,
+    }
+
+
+def compare_observed(jobs: dict, pricing: dict) -> list:
+    """Una fila por test_case con el coste de ambos modelos y los cocientes."""
+    cost = job_cost(jobs, pricing)
+    by_key = {
+        (model, test_case): i
+        for i, (model, test_case) in enumerate(zip(jobs["model"], jobs["test_case"]))
+    }
+    rows = []
+    for test_case in sorted(set(jobs["test_case"])):
+        d = by_key.get(("durable", test_case))
+        t = by_key.get(("traditional", test_case))
+        if d is None or t is None:
+            continue
+        rows.append({
+            "test_case": test_case,
+            "chunks": int(jobs["chunk_count"][d]),
+            "durable_billed_ms": jobs["billed_ms"][d],
+            "traditional_billed_ms": jobs["billed_ms"][t],
+            "durable_total": cost["total"][d],
+            "traditional_total": cost["total"][t],
+            "ratio": cost["total"][d] / cost["total"][t],
+            "legacy_ratio": jobs["reported_total"][d] / cost["dynamodb"][t],
+            "readme_ratio": README_OVERHEADS.get(test_case, np.nan),
+        })
+    return rows
+
+
+# ============================================================
+# What-if
+# ============================================================
+
+def fit_linear(x: np.ndarray, y: np.ndarray) -> tuple:
+    """(intercept, pendiente) por mínimos cuadrados."""
+    design = np.stack([np.ones_like(x), x], axis=1)
+    (intercept, slope), *_ = np.linalg.lstsq(design, y, rcond=None)
+    return float(intercept), float(slope)
+
+
+def fit_models(jobs: dict) -> dict:
+    """Ajuste por modelo de billed_ms, E/S y checkpoint frente a chunk_count."""
+    fits = {}
+    for model in MODELS:
+        mask = np.asarray(jobs["model"]) == model
+        chunks = jobs["chunk_count"][mask].astype(np.float64)
+        fit = {name: fit_linear(chunks, jobs[name][mask]) for name in ("billed_ms", "dynamodb_reads", "dynamodb_writes", "checkpoint_kb")}
+        fixed_ms, per_chunk_ms = fit["billed_ms"]
+        observed_chunk_seconds = float(np.median(jobs["chunk_seconds"][mask]))
+        fit["fixed_ms"] = fixed_ms
+        fit["overhead_per_chunk_ms"] = max(0.0, per_chunk_ms - encode_ms(observed_chunk_seconds))
+        fits[model] = fit
+    return fits
+
+
+def encode_ms(chunk_seconds):
+    return ENCODE_BASE_MS + ENCODE_MS_PER_SECOND * chunk_seconds
+
+
+def vcpu_share(memory_mb):
+    return np.minimum(1.0, memory_mb / LAMBDA_FULL_VCPU_MEMORY_MB)
+
+
+def predict_jobs(model: str, fit: dict, video_seconds, chunk_seconds, memory_mb, parallelism, encode_kind: str) -> dict:
+    """Jobs predichos (arrays con broadcasting) para la rejilla dada."""
+    chunks = np.ceil(video_seconds / chunk_seconds)
+    per_chunk_encode = encode_ms(chunk_seconds)
+    if encode_kind == "cpu":
+        per_chunk_encode = per_chunk_encode * vcpu_share(OBSERVED_MEMORY_MB) / vcpu_share(memory_mb)
+        encode_parallel = np.minimum(np.minimum(parallelism, chunks), np.maximum(1.0, memory_mb / LAMBDA_FULL_VCPU_MEMORY_MB))
+    else:
+        encode_parallel = np.minimum(parallelism, chunks)
+    io_parallel = np.minimum(parallelism, chunks)
+
+    billed_ms = (
+        fit["fixed_ms"]
+        + chunks * per_chunk_encode / encode_parallel
+        + chunks * fit["overhead_per_chunk_ms"] / io_parallel
+    )
+    shape = np.broadcast(billed_ms, memory_mb).shape
+
+    def linear(name):
+        intercept, slope = fit[name]
+        return np.broadcast_to(np.maximum(0.0, intercept + slope * chunks), shape)
+
+    return {
+        "model": np.full(shape, model),
+        "billed_ms": np.broadcast_to(billed_ms, shape),
+        "memory_mb": np.broadcast_to(memory_mb, shape).astype(np.float64),
+        "invocations": np.ones(shape),
+        "operations": np.broadcast_to(DURABLE_FIXED_OPERATIONS + chunks, shape) if model == "durable" else np.zeros(shape),
+        "checkpoint_kb": linear("checkpoint_kb"),
+        "dynamodb_reads": linear("dynamodb_reads"),
+        "dynamodb_writes": linear("dynamodb_writes"),
+        "chunk_encode_ms": np.broadcast_to(per_chunk_encode, shape),
+    }
+
+
+def expected_cost(model: str, jobs: dict, pricing: dict, failure_rate, replay_ms: float) -> np.ndarray:
+    """Coste esperado por job con una tasa de fallo a mitad de job."""
+    total = job_cost(jobs, pricing)["total"]
+    retries = failure_rate / (1.0 - failure_rate)
+    if model == "traditional":
+        return total * (1.0 + 0.5 * retries)
+    gb_ms = jobs["memory_mb"] / 1024.0 * pricing["lambda_gb_ms"]
+    wasted = (0.5 * jobs["chunk_encode_ms"] + replay_ms) * gb_ms + pricing["lambda_request"]
+    return total + retries * wasted
+
+
+def sweep(fits: dict, pricing: dict, *, video_seconds, chunk_seconds, memory_mb, parallelism, failure_rates,
+          encode_kind: str, replay_ms: float | None) -> dict:
+    """
+    Evalúa la rejilla completa (ejes: vídeo, chunk, memoria, paralelismo,
+    fallo) y devuelve costes, cociente y break-even por combinación.
+    """
+    v = np.asarray(video_seconds, dtype=np.float64)[:, None, None, None, None]
+    c = np.asarray(chunk_seconds, dtype=np.float64)[None, :, None, None, None]
+    m = np.asarray(memory_mb, dtype=np.float64)[None, None, :, None, None]
+    p = np.asarray(parallelism, dtype=np.float64)[None, None, None, :, None]
+    f = np.asarray(failure_rates, dtype=np.float64)[None, None, None, None, :]
+    replay_ms = fits["durable"]["fixed_ms"] if replay_ms is None else replay_ms
+
+    costs = {}
+    for model in MODELS:
+        jobs = predict_jobs(model, fits[model], v, c, m, p, encode_kind)
+        costs[model] = np.broadcast_to(expected_cost(model, jobs, pricing, f, replay_ms), np.broadcast(v, c, m, p, f).shape)
+
+    ratio = costs["durable"] / costs["traditional"]
+    cheaper = ratio <= 1.0
+    first = np.argmax(cheaper, axis=0)
+    break_even = np.where(cheaper.any(axis=0), np.asarray(video_seconds, dtype=np.float64)[first], np.nan)
+    return {"durable": costs["durable"], "traditional": costs["traditional"], "ratio": ratio, "break_even_video_seconds": break_even}
+
+
+# ============================================================
+# CLI
+# ============================================================
+
+def parse_prices(items: list) -> dict:
+    pricing = dict(PRICING)
+    for item in items or []:
+        name, _, value = item.partition("=")
+        if name not in PRICING:
+            raise SystemExit(f"unknown price {name!r}; expected one of {sorted(PRICING)}")
+        pricing[name] = float(value)
+    return pricing
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--price", nargs="*", help="Sobrescribe tarifas: nombre=valor")
+    parser.add_argument("--video-seconds", type=float, nargs="+", default=[30, 60, 95, 300, 600, 1800, 3600])
+    parser.add_argument("--chunk-seconds", type=float, nargs="+", default=[5, 10, 20])
+    parser.add_argument("--memory-mb", type=float, nargs="+", default=[128, 1024, 1769])
+    parser.add_argument("--parallelism", type=float, nargs="+", default=[1, 4, 10])
+    parser.add_argument("--failure-rates", type=float, nargs="+", default=[0.0, 0.05, 0.2])
+    parser.add_argument("--encode-kind", choices=["sleep", "cpu"], default="sleep")
+    parser.add_argument("--replay-ms", type=float, help="Coste de replay por fallo (por defecto el fijo durable ajustado)")
+    args = parser.parse_args()
+
+    pricing = parse_prices(args.price)
+    jobs = load_observations()
+    if not len(jobs.get("model", [])):
+        raise SystemExit(f"no cost_comparison results under {RESULTS_DIR}")
+
+    print("# observed cost per job (phase2/results)")
+    print(f"{'test_case':>22} {'chunks':>6} {'d_billed':>8} {'t_billed':>8} {'durable_$':>11} {'trad_$':>11} {'ratio':>6} {'legacy':>7} {'readme':>7}")
+    for row in compare_observed(jobs, pricing):
+        print(
+            f"{row['test_case']:>22} {row['chunks']:>6} {row['durable_billed_ms']:>8.0f} {row['traditional_billed_ms']:>8.0f} "
+            f"{row['durable_total']:>11.8f} {row['traditional_total']:>11.8f} {row['ratio']:>5.2f}x "
+            f"{row['legacy_ratio']:>6.1f}x {row['readme_ratio']:>6.1f}x"
+        )
+
+    fits = fit_models(jobs)
+    print("\n# fitted per-job model (vs chunk_count)")
+    for model, fit in fits.items():
+        reads, writes = fit["dynamodb_reads"], fit["dynamodb_writes"]
+        print(
+            f"{model:>12}: fixed={fit['fixed_ms']:.0f} ms  overhead/chunk={fit['overhead_per_chunk_ms']:.0f} ms  "
+            f"reads={reads[0]:.1f}+{reads[1]:.2f}/chunk  writes={writes[0]:.1f}+{writes[1]:.2f}/chunk"
+        )
+
+    result = sweep(
+        fits,
+        pricing,
+        video_seconds=args.video_seconds,
+        chunk_seconds=args.chunk_seconds,
+        memory_mb=args.memory_mb,
+        parallelism=args.parallelism,
+        failure_rates=args.failure_rates,
+        encode_kind=args.encode_kind,
+        replay_ms=args.replay_ms,
+    )
+    cells = result["ratio"].size
+    print(f"\n# what-if sweep ({cells:,} cells, encode={args.encode_kind}); ratio = durable / traditional expected cost")
+    print(f"{'chunk_s':>7} {'mem_mb':>6} {'par':>4} {'fail':>5} {'ratio@min':>9} {'ratio@max':>9} {'break_even_s':>12}")
+    for ci, chunk_s in enumerate(args.chunk_seconds):
+        for mi, memory in enumerate(args.memory_mb):
+            for pi, par in enumerate(args.parallelism):
+                for fi, rate in enumerate(args.failure_rates):
+                    ratios = result["ratio"][:, ci, mi, pi, fi]
+                    be = result["break_even_video_seconds"][ci, mi, pi, fi]
+                    be_cell = "-" if np.isnan(be) else f"{be:.0f}"
+                    print(f"{chunk_s:>7g} {memory:>6g} {par:>4g} {rate:>5g} {ratios[0]:>8.2f}x {ratios[-1]:>8.2f}x {be_cell:>12}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,503 @@
+"""
+Almacén local columnar e indexado de métricas extraídas de CloudWatch.
+
+Guarda en un directorio las tablas `step_duration`, `chunk_duration`,
+`execution_duration`, `checkpoint_size` y `platform_report` que produce
+tools/cloudwatch_parser.py, como segmentos .npz que se añaden de forma
+incremental: cada `ingest` escribe un segmento nuevo por tabla y registra en
+`manifest.json` los ficheros ya ingeridos (ruta, tamaño, mtime), así que
+volver a ingerir un directorio solo procesa los exports nuevos.
+
+Al cargar, cada tabla se concatena en memoria y se indexa por `test_case`,
+`execution_model`, `step` y `request_id` (codificación por diccionario +
+listas de filas por valor). Las consultas son vectorizadas:
+
+- `percentiles(...)`: p50/p95/p99 (o cualquier q) por grupo, con filtros de
+  igualdad sobre columnas indexadas y ventana temporal [since_ms, until_ms).
+- `by`: columnas de agrupación; el pseudo-campo "window" agrupa por ventanas
+  de `window_ms` sobre `timestamp_ms`.
+- `rows_for_request(request_id)`: todas las filas de un request en cada tabla.
+
+`platform_report` no lleva test_case ni execution_model: se rellenan al
+ingerir cruzando su request_id con las métricas del mismo export.
+Las métricas de la fase 1 no llevan execution_model; se usa
+`--execution-model` (por defecto "durable", el único modelo de esa fase).
+
+Uso:
+    python tools/metrics_store.py ingest --store metrics_store/ phase1/cloudwatch/2026-04-22/*.csv --execution-model durable
+    python tools/metrics_store.py query --store metrics_store/ --table step_duration --by test_case step
+    python tools/metrics_store.py query --store metrics_store/ --table platform_report --value billed_duration_ms \\
+        --where test_case=counter_latency_baseline_001 --window-ms 60000 --by window
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from cloudwatch_parser import PLATFORM_REPORT_TABLE, concat_columns, missing_column, parse_exports
+
+
+STORE_TABLES = ("step_duration", "chunk_duration", "execution_duration", "checkpoint_size", PLATFORM_REPORT_TABLE)
+INDEX_COLUMNS = ("test_case", "execution_model", "step", "request_id")
+DEFAULT_VALUE_COLUMNS = {
+    "step_duration": "duration_ms",
+    "chunk_duration": "duration_ms",
+    "execution_duration": "duration_ms",
+    "checkpoint_size": "size_kb",
+    PLATFORM_REPORT_TABLE: "billed_duration_ms",
+}
+DEFAULT_PERCENTILES = (50, 95, 99)
+WINDOW_KEY = "window"
+# Por encima de 1/N de la tabla se usa el orden por valor precalculado
+SELECTIVITY_PRESORTED = 8
+MANIFEST_NAME = "manifest.json"
+
+
+# ============================================================
+# Índices
+# ============================================================
+
+def encode_column(column: np.ndarray) -> tuple:
+    """Codificación por diccionario: (codes int64, labels ordenadas). None -> ""."""
+    if column.dtype != object:
+        labels, codes = np.unique(column, return_inverse=True)
+        return codes.astype(np.int64).reshape(-1), labels
+
+    # Hash en una pasada en vez de ordenar n strings; luego se ordenan solo las etiquetas
+    lookup = {}
+    first_seen = np.fromiter(
+        (lookup.setdefault("" if v is None else str(v), len(lookup)) for v in column),
+        dtype=np.int64,
+        count=len(column),
+    )
+    unsorted = np.array(list(lookup), dtype=str if lookup else object)
+    order = np.argsort(unsorted, kind="stable")
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    return rank[first_seen], unsorted[order]
+
+
+def compact_codes(codes: np.ndarray, cardinality: int) -> tuple:
+    """Renumera 0..k-1 los códigos presentes. Devuelve (codes, presentes)."""
+    present = np.flatnonzero(np.bincount(codes, minlength=cardinality))
+    remap = np.full(cardinality, -1, dtype=np.int64)
+    remap[present] = np.arange(len(present))
+    return remap[codes], present
+
+
+class ColumnIndex:
+    """Listas de filas por valor de una columna (orden estable por fila)."""
+
+    def __init__(self, column: np.ndarray):
+        self.codes, self.labels = encode_column(column)
+        self.order = np.argsort(self.codes, kind="stable")
+        self.bounds = np.searchsorted(self.codes[self.order], np.arange(len(self.labels) + 1))
+        self.lookup = {label: code for code, label in enumerate(self.labels.tolist())}
+
+    def code(self, value) -> int | None:
+        return self.lookup.get("" if value is None else value)
+
+    def rows(self, value) -> np.ndarray:
+        code = self.code(value)
+        if code is None:
+            return np.empty(0, dtype=np.int64)
+        return self.order[self.bounds[code]:self.bounds[code + 1]]
+
+
+class IndexedTable:
+    """Columnas de una tabla más sus índices, construidos bajo demanda."""
+
+    def __init__(self, name: str, columns: dict):
+        self.name = name
+        self.columns = columns
+        self.length = len(next(iter(columns.values()))) if columns else 0
+        self._indexes = {}
+        self._value_orders = {}
+
+    def index(self, column: str) -> ColumnIndex:
+        index = self._indexes.get(column)
+        if index is None:
+            index = self._indexes[column] = ColumnIndex(self.column(column))
+        return index
+
+    def value_order(self, column: str) -> np.ndarray:
+        """Filas ordenadas por el valor numérico de `column` (NaN al final)."""
+        order = self._value_orders.get(column)
+        if order is None:
+            order = self._value_orders[column] = np.argsort(self.column(column).astype(np.float64), kind="stable")
+        return order
+
+    def column(self, name: str) -> np.ndarray:
+        column = self.columns.get(name)
+        if column is None:
+            return np.full(self.length, None, dtype=object)
+        return column
+
+    def select(self, where: dict | None = None, since_ms=None, until_ms=None) -> np.ndarray:
+        """Filas que cumplen los filtros de igualdad y la ventana temporal."""
+        where = where or {}
+        if where:
+            # Se parte de la lista de filas más corta y se filtra con los códigos del resto
+            postings = sorted(((self.index(c).rows(v), c, v) for c, v in where.items()), key=lambda p: len(p[0]))
+            rows = postings[0][0]
+            for _, column, value in postings[1:]:
+                index = self.index(column)
+                rows = rows[index.codes[rows] == index.code(value)]
+            rows = np.sort(rows)
+        else:
+            rows = np.arange(self.length)
+
+        if since_ms is not None or until_ms is not None:
+            timestamps = self.column("timestamp_ms")[rows].astype(np.float64)
+            keep = ~np.isnan(timestamps)
+            if since_ms is not None:
+                keep &= timestamps >= since_ms
+            if until_ms is not None:
+                keep &= timestamps < until_ms
+            rows = rows[keep]
+        return rows
+
+
+# ============================================================
+# Percentiles por grupo
+# ============================================================
+
+def grouped_percentiles(group_codes: np.ndarray, values: np.ndarray, group_count: int, qs, *, presorted: bool = False) -> tuple:
+    """
+    Percentiles (interpolación lineal, como np.percentile) de `values` por
+    grupo, sin bucle por grupo. Con presorted=True `values` ya viene
+    ordenado y basta una ordenación estable por grupo.
+    Devuelve (counts, {q: array por grupo}).
+    """
+    if presorted:
+        order = np.argsort(group_codes, kind="stable")
+    else:
+        order = np.lexsort((values, group_codes))
+    sorted_values = values[order]
+    counts = np.bincount(group_codes, minlength=group_count)
+    starts = np.cumsum(counts) - counts
+    nonempty = counts > 0
+
+    result = {}
+    for q in qs:
+        position = starts + (counts - 1).clip(min=0) * (q / 100.0)
+        low = np.floor(position).astype(np.int64)
+        high = np.ceil(position).astype(np.int64)
+        low[~nonempty] = 0
+        high[~nonempty] = 0
+        if len(sorted_values):
+            lower = sorted_values[low]
+            upper = sorted_values[high]
+            result[q] = np.where(nonempty, lower + (upper - lower) * (position - low), np.nan)
+        else:
+            result[q] = np.full(group_count, np.nan)
+    return counts, result
+
+
+class MetricsStore:
+    """Directorio de segmentos .npz por tabla, con manifest de ficheros ingeridos."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.manifest_path = self.root / MANIFEST_NAME
+        if self.manifest_path.exists():
+            self.manifest = json.loads(self.manifest_path.read_text())
+        else:
+            self.manifest = {"sources": {}, "segments": 0}
+        self._tables = None
+
+    # ----------------------------------------------------------
+    # Escritura incremental
+    # ----------------------------------------------------------
+
+    @staticmethod
+    def _fingerprint(path: Path) -> dict:
+        stat = path.stat()
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def ingest(self, paths: list, *, execution_model: str | None = None, batch_rows: int = 8192) -> dict:
+        """
+        Parsea e indexa los exports aún no ingeridos (o modificados desde
+        entonces). Devuelve {tabla: filas añadidas}.
+        """
+        pending = []
+        for path in map(Path, paths):
+            key = str(path.resolve())
+            if self.manifest["sources"].get(key) != self._fingerprint(path):
+                pending.append(path)
+        if not pending:
+            return {}
+
+        parsed, _ = parse_exports(pending, batch_rows=batch_rows)
+        tables = {name: parsed[name] for name in STORE_TABLES if name in parsed}
+        fill_request_attributes(tables, execution_model)
+
+        segment = self.manifest["segments"] + 1
+        added = {}
+        for name, columns in tables.items():
+            np.savez(self.root / f"{name}.{segment:05d}.npz", **columns)
+            added[name] = len(next(iter(columns.values())))
+
+        self.manifest["segments"] = segment
+        for path in pending:
+            self.manifest["sources"][str(path.resolve())] = self._fingerprint(path)
+        self.manifest_path.write_text(json.dumps(self.manifest, indent=2, sort_keys=True))
+        self._tables = None
+        return added
+
+    # ----------------------------------------------------------
+    # Lectura
+    # ----------------------------------------------------------
+
+    def tables(self) -> dict:
+        if self._tables is None:
+            self._tables = {}
+            for name in STORE_TABLES:
+                segments = sorted(self.root.glob(f"{name}.*.npz"))
+                if not segments:
+                    continue
+                loaded = []
+                for segment in segments:
+                    with np.load(segment, allow_pickle=True) as data:
+                        loaded.append({column: data[column] for column in data.files})
+                self._tables[name] = IndexedTable(name, merge_segments(loaded))
+        return self._tables
+
+    def table(self, name: str) -> IndexedTable:
+        table = self.tables().get(name)
+        if table is None:
+            raise KeyError(f"table {name!r} not in store {self.root}")
+        return table
+
+    def rows_for_request(self, request_id: str) -> dict:
+        """{tabla: {columna: valores}} con las filas de un request."""
+        found = {}
+        for name, table in self.tables().items():
+            rows = table.index("request_id").rows(request_id)
+            if len(rows):
+                found[name] = {column: values[rows] for column, values in table.columns.items()}
+        return found
+
+    def percentiles(
+        self,
+        table: str,
+        *,
+        value: str | None = None,
+        by=(),
+        where: dict | None = None,
+        since_ms=None,
+        until_ms=None,
+        window_ms: int | None = None,
+        qs=DEFAULT_PERCENTILES,
+    ) -> list:
+        """
+        Percentiles de `value` agrupados por `by`. Devuelve una lista de dicts
+        {<claves de grupo>, count, p<q>...} ordenada por grupo.
+        """
+        indexed = self.table(table)
+        value = value or DEFAULT_VALUE_COLUMNS[table]
+        rows = indexed.select(where, since_ms, until_ms)
+
+        # Selecciones grandes: se reutiliza el orden por valor de la tabla y
+        # solo queda una ordenación estable (entera) por grupo
+        presorted = len(rows) * SELECTIVITY_PRESORTED >= indexed.length
+        if presorted:
+            order = indexed.value_order(value)
+            selected = np.zeros(indexed.length, dtype=bool)
+            selected[rows] = True
+            rows = order[selected[order]]
+
+        values = indexed.column(value)[rows].astype(np.float64)
+        valid = ~np.isnan(values)
+        rows, values = rows[valid], values[valid]
+
+        key_codes = []
+        key_labels = []
+        for key in by:
+            if key == WINDOW_KEY:
+                if not window_ms:
+                    raise ValueError("grouping by 'window' requires window_ms")
+                windows = (indexed.column("timestamp_ms")[rows].astype(np.float64) // window_ms) * window_ms
+                codes, labels = encode_column(windows)
+                key_labels.append(labels.astype(np.int64))
+            else:
+                index = indexed.index(key)
+                codes, present = compact_codes(index.codes[rows], len(index.labels))
+                key_labels.append(index.labels[present])
+            key_codes.append(codes)
+
+        # Código de grupo = índice en el producto de las claves, compactado después
+        cardinalities = [len(labels) for labels in key_labels]
+        if int(np.prod(cardinalities, dtype=np.float64)) <= max(len(rows), 1) * 16:
+            flat = np.ravel_multi_index(key_codes, cardinalities) if key_codes else np.zeros(len(rows), dtype=np.int64)
+            group_codes, present = compact_codes(flat, int(np.prod(cardinalities)))
+            combined = np.stack(np.unravel_index(present, cardinalities), axis=1) if key_codes else np.zeros((len(present), 0), dtype=np.int64)
+        else:
+            combined, group_codes = np.unique(np.stack(key_codes, axis=1), axis=0, return_inverse=True)
+            group_codes = group_codes.reshape(-1)
+
+        counts, result = grouped_percentiles(group_codes, values, len(combined), qs, presorted=presorted)
+
+        groups = []
+        for g, key_row in enumerate(combined):
+            if not counts[g]:
+                continue
+            entry = {key: key_labels[i][code].item() for i, (key, code) in enumerate(zip(by, key_row))}
+            entry["count"] = int(counts[g])
+            for q in qs:
+                entry[f"p{q:g}"] = float(result[q][g])
+            groups.append(entry)
+        return groups
+
+
+def merge_segments(segments: list) -> dict:
+    """Concatena segmentos con columnas distintas rellenando las ausentes."""
+    names = {}
+    for segment in segments:
+        for name, column in segment.items():
+            names.setdefault(name, column)
+    merged = {}
+    for name, like in names.items():
+        parts = [
+            segment[name] if name in segment else missing_column(len(next(iter(segment.values()))), like)
+            for segment in segments
+        ]
+        merged[name] = concat_columns(parts)
+    return merged
+
+
+def fill_request_attributes(tables: dict, execution_model: str | None) -> None:
+    """
+    Completa execution_model (si falta) en las métricas y test_case /
+    execution_model en platform_report a partir de su request_id.
+    """
+    by_request = {}
+    for name, columns in tables.items():
+        if name == PLATFORM_REPORT_TABLE:
+            continue
+        length = len(next(iter(columns.values())))
+        if "execution_model" not in columns:
+            columns["execution_model"] = np.full(length, execution_model, dtype=object)
+        elif execution_model is not None:
+            models = columns["execution_model"]
+            models[np.equal(models, None)] = execution_model
+        for request_id, test_case, model in zip(
+            columns.get("request_id", [None] * length),
+            columns.get("test_case", [None] * length),
+            columns["execution_model"],
+        ):
+            if request_id is not None:
+                by_request.setdefault(request_id, (test_case, model))
+
+    report = tables.get(PLATFORM_REPORT_TABLE)
+    if report is not None:
+        attributes = [by_request.get(r, (None, None)) for r in report["request_id"]]
+        test_cases = np.empty(len(attributes), dtype=object)
+        models = np.empty(len(attributes), dtype=object)
+        for i, (test_case, model) in enumerate(attributes):
+            test_cases[i] = test_case
+            models[i] = model
+        report["test_case"] = test_cases
+        report["execution_model"] = models
+
+
+# ============================================================
+# CLI
+# ============================================================
+
+def parse_where(items: list) -> dict:
+    where = {}
+    for item in items or []:
+        column, _, value = item.partition("=")
+        if column not in INDEX_COLUMNS:
+            raise SystemExit(f"--where only supports indexed columns {INDEX_COLUMNS}, got {column!r}")
+        where[column] = value
+    return where
+
+
+def print_groups(groups: list) -> None:
+    if not groups:
+        print("(no rows)")
+        return
+    columns = list(groups[0])
+    widths = {c: max(len(c), *(len(format_cell(g[c])) for g in groups)) for c in columns}
+    print("  ".join(f"{c:>{widths[c]}}" for c in columns))
+    for group in groups:
+        print("  ".join(f"{format_cell(group[c]):>{widths[c]}}" for c in columns))
+
+
+def format_cell(value) -> str:
+    if isinstance(value, float):
+        return f"{value:.1f}"
+    return str(value)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest = commands.add_parser("ingest", help="Añade exports nuevos al almacén")
+    ingest.add_argument("paths", nargs="+", type=Path)
+    ingest.add_argument("--store", type=Path, required=True)
+    ingest.add_argument("--execution-model", default="durable",
+                        help="execution_model para métricas que no lo llevan (fase 1)")
+
+    query = commands.add_parser("query", help="Percentiles por grupo")
+    query.add_argument("--store", type=Path, required=True)
+    query.add_argument("--table", choices=STORE_TABLES, required=True)
+    query.add_argument("--value", help="Columna numérica (por defecto la de la tabla)")
+    query.add_argument("--by", nargs="*", default=[])
+    query.add_argument("--where", nargs="*", help="Filtros columna=valor sobre columnas indexadas")
+    query.add_argument("--since-ms", type=float)
+    query.add_argument("--until-ms", type=float)
+    query.add_argument("--window-ms", type=int)
+    query.add_argument("--q", type=float, nargs="+", default=list(DEFAULT_PERCENTILES))
+
+    request = commands.add_parser("request", help="Filas de un request_id en todas las tablas")
+    request.add_argument("--store", type=Path, required=True)
+    request.add_argument("request_id")
+
+    args = parser.parse_args()
+    store = MetricsStore(args.store)
+
+    if args.command == "ingest":
+        start = time.perf_counter()
+        added = store.ingest(args.paths, execution_model=args.execution_model)
+        elapsed = time.perf_counter() - start
+        if not added:
+            print("# nothing new to ingest", file=sys.stderr)
+        for name, rows in added.items():
+            print(f"{name:>20} +{rows} rows")
+        print(f"# ingested in {elapsed * 1000:.1f} ms", file=sys.stderr)
+
+    elif args.command == "query":
+        store.tables()
+        start = time.perf_counter()
+        groups = store.percentiles(
+            args.table,
+            value=args.value,
+            by=args.by,
+            where=parse_where(args.where),
+            since_ms=args.since_ms,
+            until_ms=args.until_ms,
+            window_ms=args.window_ms,
+            qs=args.q,
+        )
+        elapsed = time.perf_counter() - start
+        print_groups(groups)
+        print(f"# query in {elapsed * 1000:.2f} ms", file=sys.stderr)
+
+    else:
+        for name, columns in store.rows_for_request(args.request_id).items():
+            print(f"[{name}]")
+            for i in range(len(next(iter(columns.values())))):
+                print("  " + json.dumps({c: v[i].item() if hasattr(v[i], "item") else v[i] for c, v in columns.items()}, default=str))
+
+
+if __name__ == "__main__":
+    main()